@@ -0,0 +1,91 @@
+"""
+Measures how long the annotation list takes to show the first screen of
+a large project and to scroll through its first pages, with all rows
+exposed at once and with rows fetched in batches, and how long it
+takes to scroll to the last row.
+
+Runs under the offscreen Qt platform, so no display is needed.
+
+Run with `python benchmarks/bench_annotation_list.py`.
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QListView
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_list_model import AnnotationListModel
+from voice_annotation_tool.project import Project
+
+ROW_COUNT = 1_000_000
+SCROLL_STEPS = 200
+
+
+class AllRowsModel(AnnotationListModel):
+    """Exposes every row at once, like the model used to."""
+
+    FETCH_BATCH_SIZE = sys.maxsize
+
+
+def measure(application: QApplication, model: AnnotationListModel, project: Project):
+    view = QListView()
+    view.setUniformItemSizes(True)
+    view.resize(400, 800)
+    start = time.perf_counter()
+    model.set_project(project)
+    view.setModel(model)
+    view.show()
+    view.viewport().grab()
+    application.processEvents()
+    first_paint = time.perf_counter() - start
+
+    scroll_bar = view.verticalScrollBar()
+    start = time.perf_counter()
+    for step in range(SCROLL_STEPS):
+        scroll_bar.setValue(scroll_bar.value() + scroll_bar.pageStep())
+        view.viewport().grab()
+        application.processEvents()
+    scroll = (time.perf_counter() - start) / SCROLL_STEPS
+
+    start = time.perf_counter()
+    while True:
+        view.scrollToBottom()
+        view.viewport().grab()
+        application.processEvents()
+        if not model.canFetchMore():
+            break
+    to_bottom = time.perf_counter() - start
+    view.close()
+    model.set_project(None)
+    return first_paint, scroll, to_bottom
+
+
+def main():
+    application = QApplication([])
+    project = Project()
+    for row in range(ROW_COUNT):
+        project.add_annotation(Annotation({"path": f"sample_{row}.mp3"}))
+        if row % 3 == 0:
+            project.annotate(project.annotations[row], "text")
+    print(f"{ROW_COUNT} rows")
+    print(
+        f"{'model':<18} {'first paint ms':>16} {'ms per page':>12}"
+        f" {'to bottom ms':>14}"
+    )
+    for name, model in [
+        ("all rows", AllRowsModel()),
+        ("fetched in batches", AnnotationListModel()),
+    ]:
+        first_paint, scroll, to_bottom = measure(application, model, project)
+        print(
+            f"{name:<18} {first_paint * 1000:>16.1f} {scroll * 1000:>12.2f}"
+            f" {to_bottom * 1000:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
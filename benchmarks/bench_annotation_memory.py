@@ -0,0 +1,101 @@
+"""
+Measures the memory used by one million synthetic annotations, compared
+with the previous representation which stored a full path object and an
+attribute dictionary per annotation.
+
+Run with `python benchmarks/bench_annotation_memory.py`.
+"""
+
+import gc
+from pathlib import Path
+import random
+import tracemalloc
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.project import Project
+
+ANNOTATION_COUNT = 1_000_000
+AGES = ["", "teens", "twenties", "thirties", "fourties", "fifties"]
+GENDERS = ["", "male", "female", "other"]
+ACCENTS = ["", "us", "england", "scotland", "indian", "australia"]
+
+
+class DictAnnotation:
+    """The layout of an annotation before it used slots."""
+
+    def __init__(self, row: dict[str, str]):
+        self.client_id = row["client_id"]
+        self.path = Path(row["path"])
+        self.sentence = row["sentence"]
+        self.up_votes = int(row["up_votes"])
+        self.down_votes = int(row["down_votes"])
+        self.age = row["age"]
+        self.gender = row["gender"]
+        self.accent = row["accent"]
+        self.modified = False
+
+
+def synthetic_rows():
+    """Yields tsv rows like the ones of a CommonVoice dataset, with a
+    few thousand speakers.
+    """
+    generator = random.Random(0)
+    for row in range(ANNOTATION_COUNT):
+        yield {
+            "client_id": f"{generator.randrange(5000):064x}",
+            "path": f"common_voice_en_{row}.mp3",
+            "sentence": f"Sentence number {row}.",
+            "up_votes": "2",
+            "down_votes": "0",
+            "age": generator.choice(AGES),
+            "gender": generator.choice(GENDERS),
+            "accent": generator.choice(ACCENTS),
+        }
+
+
+def measure(create) -> int:
+    """Returns the memory in bytes kept alive by the object returned
+    by the given function.
+    """
+    gc.collect()
+    tracemalloc.start()
+    kept = create()
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return used
+
+
+def load_project() -> Project:
+    project = Project()
+    project.audio_folder = Path("/data/common_voice/clips")
+    for row in synthetic_rows():
+        project._insert(Annotation(row))
+    return project
+
+
+def load_dict_annotations() -> list[DictAnnotation]:
+    folder = Path("/data/common_voice/clips")
+    annotations = []
+    for row in synthetic_rows():
+        annotation = DictAnnotation(row)
+        annotation.path = folder / annotation.path
+        annotations.append(annotation)
+    return annotations
+
+
+def main():
+    for label, create in [
+        ("dict annotations", load_dict_annotations),
+        ("project", load_project),
+    ]:
+        used = measure(create)
+        print(
+            f"{label:<18} {used / 2**20:>8.1f} MiB"
+            f" {used / ANNOTATION_COUNT:>6.0f} bytes/annotation"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures how long it takes to read the durations of the wav files of a
+project one after another, in a pool of threads, and how long it takes
+to find the changed files when the project is opened again with the
+durations cached.
+
+Run with `python benchmarks/bench_audio_metadata.py`.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+from pathlib import Path
+import tempfile
+import time
+import wave
+
+from voice_annotation_tool.audio_folder_index import AudioFolderIndex
+from voice_annotation_tool.audio_metadata import AudioMetadataCache, probe_audio_file
+from voice_annotation_tool.audio_prober import PROBE_WORKERS
+
+FILE_COUNT = 5_000
+
+
+def write_files(folder: Path):
+    for number in range(FILE_COUNT):
+        with wave.open(str(folder / f"sample_{number}.wav"), "wb") as file:
+            file.setnchannels(1)
+            file.setsampwidth(2)
+            file.setframerate(16000)
+            file.writeframes(b"\0\0" * (number % 100 + 1) * 160)
+
+
+def probe(folder: Path, name: str):
+    stat = os.stat(folder / name)
+    return name, probe_audio_file(folder / name, stat.st_size, stat.st_mtime_ns)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        folder = Path(directory)
+        write_files(folder)
+        names = sorted(os.listdir(folder))
+        print(f"{FILE_COUNT} wav files")
+
+        start = time.perf_counter()
+        infos = [probe(folder, name) for name in names]
+        print(f"sequential: {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(PROBE_WORKERS) as executor:
+            infos = list(executor.map(lambda name: probe(folder, name), names))
+        print(f"{PROBE_WORKERS} threads: {time.perf_counter() - start:.2f} s")
+
+        cache = AudioMetadataCache(folder / "annotations.tsv.audio")
+        index = AudioFolderIndex()
+        index.scan(folder)
+        files = index.files
+        cache.outdated(folder, files)
+        cache.update(infos)
+        cache.save()
+
+        start = time.perf_counter()
+        cache = AudioMetadataCache(cache.path)
+        cache.load()
+        outdated = cache.outdated(folder, files)
+        total = cache.total_duration()
+        print(
+            f"cached: {(time.perf_counter() - start) * 1000:.1f} ms,"
+            f" {len(outdated)} outdated, {total:.0f} s total"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Measures how long applying 2000 generated texts to a project shown in
+the list takes, one `update_annotation` per sample like the window used
+to and in the batches reported by `AutoAnnotator`, and how long the
+event loop is blocked at most while doing so.
+
+The transcription itself isn't measured, it depends on the model.
+Runs under the offscreen Qt platform, so no display is needed.
+
+Run with `python benchmarks/bench_auto_annotate.py`.
+"""
+
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_diff import AnnotationDiff
+from voice_annotation_tool.auto_annotator import REPORT_BATCH_SIZE
+from voice_annotation_tool.opened_project_frame import OpenedProjectFrame
+from voice_annotation_tool.project import Project
+
+ROW_COUNT = 2_000
+
+
+def create_frame() -> OpenedProjectFrame:
+    project = Project()
+    for row in range(ROW_COUNT):
+        project.add_annotation(Annotation({"path": f"sample_{row}.mp3"}))
+    frame = OpenedProjectFrame()
+    frame.load_project(project)
+    frame.annotationList.model().fetch_row(ROW_COUNT - 1)
+    return frame
+
+
+def texts() -> list[tuple[str, str]]:
+    return [(f"sample_{row}.mp3", f"Text {row}.") for row in range(ROW_COUNT)]
+
+
+def apply_per_sample(application: QApplication, frame: OpenedProjectFrame) -> float:
+    longest = 0.0
+    for name, text in texts():
+        start = time.perf_counter()
+        frame.project.update_annotation(
+            frame.project.annotations.get(name), sentence=text
+        )
+        application.processEvents()
+        longest = max(longest, time.perf_counter() - start)
+    return longest
+
+
+def apply_batched(application: QApplication, frame: OpenedProjectFrame) -> float:
+    longest = 0.0
+    results = texts()
+    for first in range(0, len(results), REPORT_BATCH_SIZE):
+        start = time.perf_counter()
+        batch = [
+            (frame.project.annotations.get(name), text + " ")
+            for name, text in results[first : first + REPORT_BATCH_SIZE]
+        ]
+        frame.project.apply_diff(AnnotationDiff.texts(batch, mark_modified=False))
+        application.processEvents()
+        longest = max(longest, time.perf_counter() - start)
+    return longest
+
+
+def main():
+    application = QApplication([])
+    frame = create_frame()
+    frame.show()
+    print(f"{ROW_COUNT} generated texts")
+    for name, apply in [("per sample", apply_per_sample), ("batched", apply_batched)]:
+        start = time.perf_counter()
+        longest = apply(application, frame)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name}: {elapsed * 1000:.0f} ms,"
+            f" longest event loop block {longest * 1000:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
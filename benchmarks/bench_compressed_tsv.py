@@ -0,0 +1,94 @@
+"""
+Compares opening and saving a project with a plain, gzip and zstd
+compressed tsv file on simulated slow shared storage.
+
+Every read or write request to the storage takes `LATENCY` seconds
+plus the time to transfer the data at `BANDWIDTH` bytes per second.
+zstd is skipped if zstandard isn't installed.
+
+Run with `python benchmarks/bench_compressed_tsv.py`.
+"""
+
+import io
+from pathlib import Path
+import tempfile
+import time
+
+from voice_annotation_tool import atomic_file, tsv_file
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.project import Project
+
+ROW_COUNT = 300_000
+LATENCY = 0.001
+BANDWIDTH = 50 * 1024 * 1024
+
+
+class SlowFile(io.FileIO):
+    """A file that waits for the simulated storage on every request."""
+
+    def readinto(self, buffer):
+        count = super().readinto(buffer)
+        time.sleep(LATENCY + (count or 0) / BANDWIDTH)
+        return count
+
+    def write(self, data):
+        count = super().write(data)
+        time.sleep(LATENCY + count / BANDWIDTH)
+        return count
+
+
+def slow_open(path, mode="r", buffering=-1, encoding=None, newline=None):
+    raw = SlowFile(path, mode.replace("b", "").replace("t", ""))
+    size = buffering if buffering > 0 else io.DEFAULT_BUFFER_SIZE
+    if raw.readable():
+        buffered = io.BufferedReader(raw, size)
+    else:
+        buffered = io.BufferedWriter(raw, size)
+    if "b" in mode:
+        return buffered
+    return io.TextIOWrapper(buffered, encoding=encoding, newline=newline)
+
+
+def main():
+    tsv_file.open = slow_open
+    atomic_file.open = slow_open
+    project = Project()
+    for row in range(ROW_COUNT):
+        project.add_annotation(
+            Annotation(
+                {
+                    "client_id": f"speaker_{row % 1000}",
+                    "path": f"sample_{row}.mp3",
+                    "sentence": f"This is the sentence spoken in sample {row}.",
+                    "age": "twenties",
+                    "gender": "female",
+                }
+            )
+        )
+    # The first run uses the default buffer size, like plain open calls.
+    cases = [(".tsv", io.DEFAULT_BUFFER_SIZE)]
+    cases += [(".tsv", tsv_file.BUFFER_SIZE), (".tsv.gz", tsv_file.BUFFER_SIZE)]
+    if tsv_file.zstd_available():
+        cases.append((".tsv.zst", tsv_file.BUFFER_SIZE))
+    print(f"rows: {ROW_COUNT}, latency: {LATENCY * 1000:.0f}ms, ", end="")
+    print(f"bandwidth: {BANDWIDTH / 1024 / 1024:.0f} MiB/s")
+    print(f"{'file':>16} {'buffer':>10} {'save':>10} {'open':>10} {'MiB':>10}")
+    with tempfile.TemporaryDirectory() as folder:
+        for suffix, buffer_size in cases:
+            tsv_file.BUFFER_SIZE = buffer_size
+            path = Path(folder) / f"project{suffix}"
+            start = time.perf_counter()
+            project.save_tsv(path)
+            saved = time.perf_counter()
+            Project().load_tsv(path)
+            opened = time.perf_counter()
+            size = path.stat().st_size / 1024 / 1024
+            print(
+                f"{path.name:>16} {buffer_size // 1024:>7} KiB"
+                f" {saved - start:>9.2f}s {opened - saved:>9.2f}s"
+                f" {size:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
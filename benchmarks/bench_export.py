@@ -0,0 +1,89 @@
+"""
+Compares exporting all annotation fields as tsv, Json Lines, Arrow and
+Parquet, and loading the exported file again as a table of columns.
+
+Arrow and Parquet are skipped if pyarrow isn't installed.
+
+Run with `python benchmarks/bench_export.py`.
+"""
+
+import csv
+from pathlib import Path
+import tempfile
+import time
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_export import arrow_available
+from voice_annotation_tool.project import Project
+
+ROW_COUNT = 500_000
+
+
+def load_tsv(path: Path):
+    with open(path, newline="") as file:
+        return list(csv.DictReader(file, delimiter="\t"))
+
+
+def load_json_lines(path: Path):
+    import json
+
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+
+def main():
+    project = Project()
+    for row in range(ROW_COUNT):
+        project.add_annotation(
+            Annotation(
+                {
+                    "client_id": f"speaker_{row % 1000}",
+                    "path": f"sample_{row}.mp3",
+                    "sentence": f"Sentence {row}",
+                    "age": "twenties",
+                    "gender": "female",
+                }
+            )
+        )
+    with tempfile.TemporaryDirectory() as folder:
+        folder = Path(folder)
+
+        def tsv(path: Path):
+            with open(path, "w", newline="") as file:
+                project.save_annotations(file)
+
+        def json_lines(path: Path):
+            with open(path, "w") as file:
+                project.exportJsonLines(file)
+
+        formats = [("tsv", tsv, load_tsv), ("jsonl", json_lines, load_json_lines)]
+        if arrow_available():
+            import pyarrow.ipc
+            import pyarrow.parquet
+
+            formats += [
+                (
+                    "arrow",
+                    project.exportArrow,
+                    lambda path: pyarrow.ipc.open_file(str(path)).read_all(),
+                ),
+                ("parquet", project.exportParquet, pyarrow.parquet.read_table),
+            ]
+        print(f"rows: {ROW_COUNT}")
+        print(f"{'format':>10} {'export':>10} {'load':>10} {'MiB':>10}")
+        for name, export, load in formats:
+            path = folder / f"export.{name}"
+            start = time.perf_counter()
+            export(path)
+            exported = time.perf_counter()
+            load(path)
+            loaded = time.perf_counter()
+            size = path.stat().st_size / 1024 / 1024
+            print(
+                f"{name:>10} {exported - start:>9.3f}s {loaded - exported:>9.3f}s"
+                f" {size:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares opening a project with a million rows eagerly and lazily, and
+how long it takes until the first screen of rows can be shown.
+
+The lazy project is opened twice: the first time the tsv file is
+scanned for the row offsets, the second time they are read from the
+cache next to the file.
+
+Run with `python benchmarks/bench_lazy_tsv.py`.
+"""
+
+import csv
+from pathlib import Path
+import tempfile
+import time
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.project import Project
+
+ROW_COUNT = 1_000_000
+SCREEN_ROWS = 50
+
+
+def open_project(tsv_file: Path, lazy: bool) -> tuple[float, float]:
+    """Returns the time until the project is loaded and until the
+    first screen of rows is read.
+    """
+    project = Project()
+    project.lazy_tsv = lazy
+    start = time.perf_counter()
+    project.tsv_file = tsv_file
+    project.load_tsv()
+    loaded = time.perf_counter() - start
+    for row in range(SCREEN_ROWS):
+        project.annotations[row].sentence
+    shown = time.perf_counter() - start
+    project.close()
+    return loaded, shown
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        tsv_file = Path(folder) / "annotations.tsv"
+        with open(tsv_file, "w", newline="") as file:
+            writer = csv.writer(file, delimiter="\t")
+            writer.writerow(Annotation.TSV_HEADER_MEMBERS)
+            for row in range(ROW_COUNT):
+                writer.writerow(
+                    [
+                        f"speaker_{row % 1000}",
+                        f"sample_{row}.mp3",
+                        f"Sentence number {row}",
+                        0,
+                        0,
+                        "twenties",
+                        "female",
+                        "",
+                    ]
+                )
+        print(f"{'mode':<16} {'load s':>10} {'first screen s':>16}")
+        for mode, lazy in [
+            ("eager", False),
+            ("lazy, scan", True),
+            ("lazy, cached", True),
+        ]:
+            loaded, shown = open_project(tsv_file, lazy)
+            print(f"{mode:<16} {loaded:>10.3f} {shown:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
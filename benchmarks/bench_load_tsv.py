@@ -0,0 +1,47 @@
+"""
+Measures how long loading a tsv file into a project takes for a growing
+number of rows. Half of the rows overwrite a previous row with the same
+file name, which used to make loading quadratic.
+
+Run with `python benchmarks/bench_load_tsv.py`.
+"""
+
+from io import StringIO
+import csv
+import time
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.project import Project
+
+ROW_COUNTS = [25_000, 50_000, 100_000, 200_000, 400_000]
+
+
+def generate_tsv(rows: int) -> StringIO:
+    """Creates a tsv file where every second row repeats the
+    file name of an earlier row.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer, delimiter="\t")
+    writer.writerow(Annotation.TSV_HEADER_MEMBERS)
+    for row in range(rows):
+        name = (row // 4) * 2 if row % 2 else row
+        writer.writerow(
+            ["client", f"sample_{name}.mp3", f"Sentence {row}", 0, 0, "", "", ""]
+        )
+    buffer.seek(0)
+    return buffer
+
+
+def main():
+    print(f"{'rows':>10} {'seconds':>10} {'µs/row':>10}")
+    for rows in ROW_COUNTS:
+        tsv = generate_tsv(rows)
+        project = Project()
+        start = time.perf_counter()
+        project.load_tsv_file(tsv)
+        elapsed = time.perf_counter() - start
+        print(f"{rows:>10} {elapsed:>10.3f} {elapsed / rows * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures the throughput of loading a large tsv file into a project
+with 1, 2, 4 and 8 worker processes. One worker loads the file in a
+single process like small files.
+
+Run with `python benchmarks/bench_parallel_tsv.py`.
+"""
+
+import csv
+import os
+from pathlib import Path
+import tempfile
+import time
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.project import Project
+
+ROW_COUNT = 1_000_000
+WORKER_COUNTS = [1, 2, 4, 8]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        tsv_file = Path(folder) / "validated.tsv"
+        with open(tsv_file, "w", newline="") as file:
+            writer = csv.writer(file, delimiter="\t")
+            writer.writerow(Annotation.TSV_HEADER_MEMBERS)
+            for row in range(ROW_COUNT):
+                sentence = f"Sentence number {row}"
+                if row % 100 == 0:
+                    sentence = f'A "quoted"\nsentence {row}'
+                writer.writerow(
+                    [
+                        f"speaker_{row % 1000}",
+                        f"sample_{row}.mp3",
+                        sentence,
+                        row % 5,
+                        0,
+                        "twenties",
+                        "female",
+                        "",
+                    ]
+                )
+        size = os.path.getsize(tsv_file) / 1024 / 1024
+        print(f"{ROW_COUNT} rows, {size:.0f} MiB, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'seconds':>10} {'MiB/s':>10} {'rows/s':>12}")
+        for workers in WORKER_COUNTS:
+            project = Project()
+            start = time.perf_counter()
+            project.load_tsv(tsv_file, workers)
+            elapsed = time.perf_counter() - start
+            assert len(project.annotations) == ROW_COUNT
+            print(
+                f"{workers:>8} {elapsed:>10.3f} {size / elapsed:>10.1f}"
+                f" {ROW_COUNT / elapsed:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
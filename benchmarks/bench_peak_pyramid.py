@@ -0,0 +1,78 @@
+"""
+Measures how long it takes to compute the peak pyramid of a ten minute
+recording, to read it back from the cache, and to get the peaks of a
+1000 pixel wide waveform at different zoom levels, compared to
+reducing the samples themselves.
+
+Run with `python benchmarks/bench_peak_pyramid.py`.
+"""
+
+from pathlib import Path
+import tempfile
+import time
+import wave
+
+import numpy
+
+from voice_annotation_tool.peak_pyramid import PeakPyramid, cached_pyramid
+
+SAMPLE_RATE = 16000
+DURATION = 10 * 60
+COLUMNS = 1000
+
+
+def write_recording(path: Path):
+    seconds = numpy.arange(SAMPLE_RATE * DURATION) / SAMPLE_RATE
+    samples = numpy.sin(2 * numpy.pi * 220 * seconds) * 10000 * (seconds % 7 < 4)
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(SAMPLE_RATE)
+        file.writeframes(samples.astype("<i2").tobytes())
+
+
+def sample_peaks(path: Path, start: float, end: float):
+    # What drawing without a pyramid costs: decode and reduce every sample.
+    with wave.open(str(path), "rb") as file:
+        samples = numpy.frombuffer(file.readframes(file.getnframes()), "<i2")
+    visible = samples[int(start * SAMPLE_RATE) : int(end * SAMPLE_RATE)]
+    columns = numpy.array_split(visible, COLUMNS)
+    return [column.min() for column in columns], [column.max() for column in columns]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        folder = Path(directory)
+        audio = folder / "recording.wav"
+        write_recording(audio)
+        print(f"{DURATION // 60} minute recording, {audio.stat().st_size >> 20} MiB")
+
+        start = time.perf_counter()
+        pyramid = cached_pyramid(audio, folder / "peaks")
+        print(f"compute and cache: {(time.perf_counter() - start) * 1000:.0f} ms")
+        cache_size = sum(path.stat().st_size for path in (folder / "peaks").iterdir())
+        print(f"cache size: {cache_size >> 10} KiB, {len(pyramid.levels)} levels")
+
+        start = time.perf_counter()
+        pyramid = cached_pyramid(audio, folder / "peaks")
+        print(f"read cache: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        for span in [DURATION, 60, 1]:
+            view = (DURATION / 2, DURATION / 2 + span)
+            if span == DURATION:
+                view = (0, DURATION)
+            start = time.perf_counter()
+            for _ in range(100):
+                pyramid.peaks(*view, COLUMNS)
+            pyramid_time = (time.perf_counter() - start) * 10
+            start = time.perf_counter()
+            sample_peaks(audio, *view)
+            sample_time = (time.perf_counter() - start) * 1000
+            print(
+                f"{span:4} s visible: pyramid {pyramid_time:.2f} ms,"
+                f" samples {sample_time:.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
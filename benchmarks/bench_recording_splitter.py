@@ -0,0 +1,61 @@
+"""
+Measures how fast a two hour recording is split into segments at its
+pauses, and the peak memory needed compared to the size of the
+recording.
+
+Run with `python benchmarks/bench_recording_splitter.py`.
+"""
+
+from pathlib import Path
+import tempfile
+import time
+import tracemalloc
+import wave
+
+import numpy
+
+from voice_annotation_tool.recording_splitter import split_recording
+
+SAMPLE_RATE = 16000
+DURATION = 2 * 60 * 60
+WRITE_SECONDS = 60
+
+
+def write_recording(path: Path):
+    # Sentences of four seconds with pauses of one, written a minute at
+    # a time so the benchmark itself stays small.
+    seconds = numpy.arange(SAMPLE_RATE * WRITE_SECONDS) / SAMPLE_RATE
+    minute = numpy.sin(2 * numpy.pi * 220 * seconds) * 10000 * (seconds % 5 < 4)
+    minute = minute.astype("<i2").tobytes()
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(SAMPLE_RATE)
+        for _ in range(DURATION // WRITE_SECONDS):
+            file.writeframes(minute)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        folder = Path(directory)
+        recording = folder / "recording.wav"
+        write_recording(recording)
+        size = recording.stat().st_size
+        print(f"{DURATION // 3600} hour recording, {size >> 20} MiB")
+        segments_folder = folder / "segments"
+        segments_folder.mkdir()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        segments = split_recording(recording, segments_folder)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        lengths = [segment.end - segment.start for segment in segments]
+        print(f"{len(segments)} segments of {min(lengths):.1f} to {max(lengths):.1f} s")
+        print(f"split: {elapsed:.2f} s, {DURATION / elapsed:.0f}x real time")
+        print(f"peak memory: {peak >> 20} MiB, recording: {size >> 20} MiB")
+
+
+if __name__ == "__main__":
+    main()
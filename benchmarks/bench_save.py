@@ -0,0 +1,38 @@
+"""
+Compares the time a save blocks the GUI thread, which is the time it
+takes to capture a snapshot of the project, with the time the
+background thread needs to write the tsv file.
+
+Run with `python benchmarks/bench_save.py`.
+"""
+
+from pathlib import Path
+import tempfile
+import time
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.project import Project
+
+ROW_COUNT = 500_000
+
+
+def main():
+    project = Project()
+    for row in range(ROW_COUNT):
+        project.add_annotation(
+            Annotation({"path": f"sample_{row}.mp3", "sentence": f"Sentence {row}"})
+        )
+    with tempfile.TemporaryDirectory() as folder:
+        project.tsv_file = Path(folder) / "project.tsv"
+        start = time.perf_counter()
+        snapshot = project.snapshot(Path(folder))
+        captured = time.perf_counter()
+        snapshot.write(Path(folder) / "project.json")
+        written = time.perf_counter()
+    print(f"rows:                     {ROW_COUNT}")
+    print(f"snapshot (GUI thread):    {captured - start:.3f}s")
+    print(f"write (background):       {written - captured:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Measures how long loading the audio folder of a project takes when the
+folder listing isn't cached (cold), when it is cached and the folder
+didn't change (warm), and when a few files were added since (changed).
+
+The folder is on the local disk, the difference grows on network
+filesystems where every directory entry and stat call is slow.
+
+Run with `python benchmarks/bench_scan_audio_folder.py`.
+"""
+
+import os
+from pathlib import Path
+import tempfile
+import time
+
+from voice_annotation_tool.project import Project
+
+FILE_COUNT = 100_000
+OLD_MTIME_NS = 1_000_000_000_000_000_000
+
+
+def open_project(tmp: Path) -> float:
+    project = Project()
+    project.tsv_file = tmp / "project.tsv"
+    start = time.perf_counter()
+    project.load_audio_files(tmp / "audio")
+    return time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_name:
+        tmp = Path(tmp_name)
+        audio = tmp / "audio"
+        audio.mkdir()
+        for num in range(FILE_COUNT):
+            audio.joinpath(f"sample_{num}.mp3").touch()
+        os.utime(audio, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+        print(f"{FILE_COUNT} files")
+        print(f"{'cold':>10} {open_project(tmp):>10.3f}s")
+        print(f"{'warm':>10} {open_project(tmp):>10.3f}s")
+        for num in range(100):
+            audio.joinpath(f"new_{num}.mp3").touch()
+        os.utime(audio, ns=(OLD_MTIME_NS + 1, OLD_MTIME_NS + 1))
+        print(f"{'changed':>10} {open_project(tmp):>10.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Measures how long it takes to build the search index of a project with
+a million annotations and to answer queries while typing, and compares
+the queries with scanning every annotation.
+
+Run with `python benchmarks/bench_search.py`.
+"""
+
+import random
+import time
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.project import Project
+from voice_annotation_tool.search_index import SearchQuery, words_of
+
+ROW_COUNT = 1_000_000
+VOCABULARY_SIZE = 20_000
+CHANGED_ROWS = 10_000
+QUERIES = [
+    "h",
+    "ho",
+    "hou",
+    "house",
+    "house ",
+    "the house ",
+    "gender:female",
+    "gender:female modified:no",
+    'accent:"new zealand" house',
+    "nothing",
+]
+
+
+def scan(project: Project, query: SearchQuery) -> int:
+    "Counts the matching annotations by looking at every annotation."
+    count = 0
+    for annotation in project.annotations:
+        if query.facets.get("gender", [annotation.gender])[0] != annotation.gender:
+            continue
+        words = words_of(annotation.sentence)
+        if all(word in words for word in query.words) and (
+            not query.prefix or any(word.startswith(query.prefix) for word in words)
+        ):
+            count += 1
+    return count
+
+
+def main():
+    random.seed(0)
+    vocabulary = ["the", "a", "house", "home"] + [
+        f"word{number}" for number in range(VOCABULARY_SIZE)
+    ]
+    # Word frequencies roughly follow Zipf's law like in real texts.
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    project = Project()
+    for row in range(ROW_COUNT):
+        annotation = Annotation()
+        annotation.path = f"sample_{row}.mp3"
+        annotation.sentence = " ".join(random.choices(vocabulary, weights, k=10))
+        annotation.gender = random.choice(["", "male", "female"])
+        annotation.accent = random.choice(["", "new zealand", "england"])
+        project.add_annotation(annotation)
+    start = time.perf_counter()
+    project.search_index()
+    print(f"{ROW_COUNT} rows, index built in {time.perf_counter() - start:.1f} s")
+    print(f"{'query':<28} {'matches':>8} {'index ms':>10}")
+    for query in QUERIES:
+        start = time.perf_counter()
+        matches = len(project.search_index().search(query))
+        elapsed = time.perf_counter() - start
+        print(f"{query!r:<28} {matches:>8} {elapsed * 1000:>10.2f}")
+    start = time.perf_counter()
+    for row in range(CHANGED_ROWS):
+        project.annotate(project.annotations[row], "a new house")
+    changed = time.perf_counter() - start
+    start = time.perf_counter()
+    matches = len(project.search_index().search("new house "))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{CHANGED_ROWS} changes indexed in {changed * 1000:.0f} ms,"
+        f" {matches} matches found in {elapsed * 1000:.2f} ms"
+    )
+    start = time.perf_counter()
+    matches = scan(project, SearchQuery("the house "))
+    elapsed = time.perf_counter() - start
+    print(
+        f"scanning every annotation found {matches} matches in {elapsed * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Measures how long typing an accent takes with 50000 selected rows,
+setting the field of every selected index for each keystroke like the
+frame used to and with the edits batched by `SelectionEditor`, and how
+long it takes to select all rows and then a single row.
+
+Runs under the offscreen Qt platform, so no display is needed.
+
+Run with `python benchmarks/bench_selection_edit.py`.
+"""
+
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_list_model import AnnotationListModel
+from voice_annotation_tool.opened_project_frame import OpenedProjectFrame
+from voice_annotation_tool.project import Project
+
+ROW_COUNT = 50_000
+TYPED = "new zealand"
+
+
+def create_frame() -> OpenedProjectFrame:
+    project = Project()
+    for row in range(ROW_COUNT):
+        project.add_annotation(Annotation({"path": f"sample_{row}.mp3"}))
+    frame = OpenedProjectFrame()
+    frame.load_project(project)
+    frame.annotationList.model().fetch_row(ROW_COUNT - 1)
+    return frame
+
+
+def type_per_index(frame: OpenedProjectFrame):
+    """Sets the accent of every selected index for each keystroke and
+    compares the metadata of the selection, as the frame used to.
+    """
+    for length in range(1, len(TYPED) + 1):
+        indexes = frame.annotationList.selectionModel().selectedIndexes()
+        annotations = [
+            index.data(AnnotationListModel.ANNOTATION_ROLE) for index in indexes
+        ]
+        for annotation in annotations:
+            frame.project.update_annotation(annotation, accent=TYPED[:length])
+        accents = {annotation.accent for annotation in annotations}
+        assert len(accents) == 1
+
+
+def type_batched(frame: OpenedProjectFrame):
+    for length in range(1, len(TYPED) + 1):
+        frame.accentEdit.setText(TYPED[:length])
+    frame.flush_edits()
+
+
+def main():
+    application = QApplication([])
+    frame = create_frame()
+    print(f"{ROW_COUNT} selected rows, typing {len(TYPED)} characters")
+    start = time.perf_counter()
+    frame.annotationList.selectAll()
+    application.processEvents()
+    print(f"select all: {(time.perf_counter() - start) * 1000:.1f} ms")
+    for name, type in [("per index", type_per_index), ("batched", type_batched)]:
+        start = time.perf_counter()
+        type(frame)
+        application.processEvents()
+        print(f"{name}: {(time.perf_counter() - start) * 1000:.1f} ms")
+    start = time.perf_counter()
+    frame.next_pressed()
+    application.processEvents()
+    print(f"select one row: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
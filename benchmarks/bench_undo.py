@@ -0,0 +1,65 @@
+"""
+Measures the memory kept to undo a bulk edit of 100000 annotations,
+as a diff and as copies of the annotations, and how long applying and
+undoing the edit takes.
+
+Run with `python benchmarks/bench_undo.py`.
+"""
+
+import copy
+import time
+import tracemalloc
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_diff import AnnotationDiff
+from voice_annotation_tool.project import Project
+
+ROW_COUNT = 100_000
+
+
+def measure_memory(function):
+    tracemalloc.start()
+    result = function()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    project = Project()
+    for row in range(ROW_COUNT):
+        project.add_annotation(
+            Annotation(
+                {
+                    "path": f"sample_{row}.mp3",
+                    "accent": ["us", "england", "india"][row % 3],
+                    "sentence": f"sentence {row}",
+                }
+            )
+        )
+    annotations = list(project.annotations)
+    print(f"{ROW_COUNT} annotations")
+
+    _, size = measure_memory(lambda: [copy.copy(row) for row in annotations])
+    print(f"copies of the annotations: {size / 1024 / 1024:.1f} MiB")
+    diff, size = measure_memory(
+        lambda: AnnotationDiff.assign(annotations, {"accent": "new zealand"})
+    )
+    print(f"diff of setting the accent: {size / 1024 / 1024:.1f} MiB")
+    texts, size = measure_memory(
+        lambda: AnnotationDiff.texts((row, row.sentence.upper()) for row in annotations)
+    )
+    print(f"diff of changing every text: {size / 1024 / 1024:.1f} MiB")
+
+    for name, diff in [("accent", diff), ("texts", texts)]:
+        start = time.perf_counter()
+        project.apply_diff(diff)
+        applied = time.perf_counter() - start
+        start = time.perf_counter()
+        project.apply_diff(diff, reverse=True)
+        undone = time.perf_counter() - start
+        print(f"{name}: apply {applied * 1000:.0f} ms, undo {undone * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Measures how fast the speech in a two hour recording is detected by
+streaming it through `SpeechDetector` in blocks, and the peak memory
+it needs compared to the size of the decoded samples.
+
+Run with `python benchmarks/bench_voice_activity.py`.
+"""
+
+from pathlib import Path
+import tempfile
+import time
+import tracemalloc
+import wave
+
+import numpy
+
+from voice_annotation_tool.voice_activity import detect_speech
+
+SAMPLE_RATE = 16000
+DURATION = 2 * 60 * 60
+WRITE_SECONDS = 60
+
+
+def write_recording(path: Path):
+    # Written a minute at a time, so the benchmark itself stays small.
+    seconds = numpy.arange(SAMPLE_RATE * WRITE_SECONDS) / SAMPLE_RATE
+    minute = numpy.sin(2 * numpy.pi * 220 * seconds) * 10000 * (seconds % 7 < 4)
+    minute = minute.astype("<i2").tobytes()
+    silence = bytes(len(minute))
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(SAMPLE_RATE)
+        file.writeframes(silence)
+        for _ in range(DURATION // WRITE_SECONDS - 2):
+            file.writeframes(minute)
+        file.writeframes(silence)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        audio = Path(directory) / "recording.wav"
+        write_recording(audio)
+        size = audio.stat().st_size
+        print(f"{DURATION // 3600} hour recording, {size >> 20} MiB")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        speech = detect_speech(audio)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"speech from {speech[0]:.2f} s to {speech[1]:.2f} s")
+        print(f"detect: {elapsed:.2f} s, {DURATION / elapsed:.0f}x real time")
+        print(f"peak memory: {peak >> 20} MiB, samples: {size >> 20} MiB")
+
+
+if __name__ == "__main__":
+    main()
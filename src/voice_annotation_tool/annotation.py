@@ -1,12 +1,60 @@
+import os
 from pathlib import Path
+import re
+import sys
+from typing import Any, Sequence
+
+SEPARATORS = frozenset(filter(None, ["/", os.sep, os.altsep]))
+"Characters separating the parts of a path."
+
+_find_separator = re.compile("[%s]" % re.escape("".join(SEPARATORS))).search
+
+_folders: dict[Path, Path] = {}
+"Cache of folder paths, so annotations in the same folder share one path."
+
+
+def shared_folder(folder: Path) -> Path:
+    """Returns a path equal to the given folder that is shared by all
+    annotations in that folder.
+    """
+    return _folders.setdefault(folder, folder)
+
+
+def intern_member(member: str, value: Any) -> Any:
+    """Interns the value if the member only takes a handful of
+    distinct values across a dataset, so equal values share one string.
+    """
+    if member in Annotation.INTERNED_MEMBERS and type(value) is str:
+        return sys.intern(value)
+    return value
 
 
 class Annotation:
     """Stores the metadata of one sample.
 
     The fields are taken from the CommonVoice dataset.
+
+    Annotations are kept compact since projects can hold millions of
+    them: only the file name of the sample is stored together with a
+    folder path shared by all annotations of the audio folder, and the
+    categorical fields are interned when they are loaded.
     """
 
+    __slots__ = (
+        "client_id",
+        "name",
+        "folder",
+        "sentence",
+        "up_votes",
+        "down_votes",
+        "age",
+        "gender",
+        "accent",
+        "modified",
+        "revision",
+        "__weakref__",
+    )
+
     TSV_HEADER_MEMBERS = [
         "client_id",
         "path",
@@ -21,12 +69,15 @@ class Annotation:
     and written to and from a tsv file.
     """
 
+    INTERNED_MEMBERS = frozenset(["client_id", "age", "gender", "accent"])
+    "Members that only take a handful of distinct values across a dataset."
+
     def __init__(self, dict=None):
         self.client_id: str = "0"
-        self.path: Path
-        """The path to the audio file of this annotation.
-
-        Only the file name is saved in the tsv file."""
+        self.name: str = ""
+        "The file name of the sample, which is saved in the tsv file."
+        self.folder: Path | None = None
+        "The folder of the sample, None if the path is just the file name."
         self.sentence: str = ""
         self.up_votes: int = 0
         self.down_votes: int = 0
@@ -37,17 +88,41 @@ class Annotation:
         """True if the text of this annotation was changed since the
         project was created.
         """
+        self.revision: int = 0
+        "The revision of the project in which this annotation last changed."
 
         if dict:
             self.from_dict(dict)
 
+    @property
+    def path(self) -> Path:
+        """The path to the audio file of this annotation.
+
+        Only the file name is saved in the tsv file."""
+        if self.folder is None:
+            return Path(self.name)
+        return self.folder / self.name
+
+    @path.setter
+    def path(self, path: Path | str):
+        if type(path) is str and not _find_separator(path) and path != ".":
+            # Avoid creating a path object for plain file names read
+            # from tsv files.
+            self.name = path
+            self.folder = None
+            return
+        path = Path(path)
+        self.name = path.name
+        folder = path.parent
+        self.folder = None if folder == Path() else shared_folder(folder)
+
     def to_dict(self):
         """Returns a dictionary ready to be written to a csv file by
         a DictWriter.
         """
         properties = {
             "client_id": self.client_id,
-            "path": str(self.path.name),
+            "path": self.name,
             "sentence": self.sentence,
             "age": self.age,
             "gender": self.gender,
@@ -57,19 +132,59 @@ class Annotation:
         }
         return properties
 
+    def to_row(self) -> tuple:
+        """Returns the values of the members listed in
+        `TSV_HEADER_MEMBERS`, in the same order.
+        """
+        return (
+            self.client_id,
+            self.name,
+            self.sentence,
+            self.up_votes,
+            self.down_votes,
+            self.age,
+            self.gender,
+            self.accent,
+        )
+
     def from_dict(self, dict):
         """Loads an annotation from deserialized csv row.
 
         It is not required that all fields are set.
         """
-        self.client_id = dict.get("client_id", "")
-        self.path = Path(dict.get("path", ""))
+        self.client_id = sys.intern(dict.get("client_id", ""))
+        self.path = dict.get("path", "")
         self.sentence = dict.get("sentence", "")
-        self.age = dict.get("age", "")
-        self.gender = dict.get("gender", "")
-        self.accent = dict.get("accent", "")
+        self.age = sys.intern(dict.get("age", ""))
+        self.gender = sys.intern(dict.get("gender", ""))
+        self.accent = sys.intern(dict.get("accent", ""))
         self.down_votes = int(dict.get("down_votes", 0))
         self.up_votes = int(dict.get("up_votes", 0))
 
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> "Annotation":
+        """Creates an annotation from values in the order of
+        `TSV_HEADER_MEMBERS`, as returned by `to_row`.
+
+        Faster than `from_dict` when many annotations are created. The
+        values are used as they are, so the votes must be integers and
+        the members in `INTERNED_MEMBERS` should already be interned.
+        """
+        annotation = cls.__new__(cls)
+        (
+            annotation.client_id,
+            path,
+            annotation.sentence,
+            annotation.up_votes,
+            annotation.down_votes,
+            annotation.age,
+            annotation.gender,
+            annotation.accent,
+        ) = row
+        annotation.path = path
+        annotation.modified = False
+        annotation.revision = 0
+        return annotation
+
     def __hash__(self):
         return hash(frozenset(self.to_dict().items()))
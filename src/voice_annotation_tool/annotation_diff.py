@@ -0,0 +1,163 @@
+from array import array
+from itertools import repeat
+from typing import Any, Iterable, Iterator, Sequence
+
+from voice_annotation_tool.annotation import Annotation
+
+
+class ValueColumn:
+    """The values of one field for the rows of a diff.
+
+    A value shared by all rows is stored once. Otherwise every distinct
+    value is stored once and the rows refer to it with a code in an
+    array, taking one to four bytes per row.
+    """
+
+    __slots__ = ("_values", "_codes", "_length")
+
+    def __init__(self, values: Sequence[Any]):
+        codes: dict[Any, int] = {}
+        row_codes = [codes.setdefault(value, len(codes)) for value in values]
+        self._values = list(codes)
+        "The distinct values, in the order they first appear."
+        self._length = len(row_codes)
+        self._codes: array | None = None
+        "The index of the value of every row, None if there is one value."
+        if len(self._values) > 1:
+            typecode = (
+                "B" if len(codes) <= 0xFF else "H" if len(codes) <= 0xFFFF else "I"
+            )
+            self._codes = array(typecode, row_codes)
+
+    @classmethod
+    def constant(cls, value: Any, length: int) -> "ValueColumn":
+        """Returns a column where every row has the same value."""
+        column = cls.__new__(cls)
+        column._values = [value]
+        column._codes = None
+        column._length = length
+        return column
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._codes is None:
+            return repeat(self._values[0], self._length)
+        return map(self._values.__getitem__, self._codes)
+
+    def nbytes(self) -> int:
+        "Returns the size of the codes, not counting the shared values."
+        return 0 if self._codes is None else len(self._codes) * self._codes.itemsize
+
+
+class AnnotationDiff:
+    """The values of some fields of annotations before and after an
+    edit, used to undo and redo it.
+
+    Only the file names of the changed annotations and the columns of
+    the changed fields are stored, see `ValueColumn`, so a bulk edit
+    takes little memory if it sets the same values.
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        old: dict[str, ValueColumn],
+        new: dict[str, ValueColumn],
+    ):
+        self.names = names
+        "The file names of the changed annotations."
+        self.old = old
+        "Maps the changed fields to their values before the edit."
+        self.new = new
+        "Maps the changed fields to their values after the edit."
+
+    @classmethod
+    def assign(
+        cls, annotations: Iterable[Annotation], fields: dict[str, Any]
+    ) -> "AnnotationDiff":
+        """Returns the diff that sets the given fields of the
+        annotations. Annotations that already have the values are left
+        out.
+        """
+        names = []
+        old: dict[str, list] = {field: [] for field in fields}
+        for annotation in annotations:
+            values = [getattr(annotation, field) for field in fields]
+            if all(value == fields[field] for field, value in zip(fields, values)):
+                continue
+            names.append(annotation.name)
+            for column, value in zip(old.values(), values):
+                column.append(value)
+        return cls(
+            names,
+            {field: ValueColumn(values) for field, values in old.items()},
+            {
+                field: ValueColumn.constant(value, len(names))
+                for field, value in fields.items()
+            },
+        )
+
+    @classmethod
+    def texts(
+        cls, texts: Iterable[tuple[Annotation, str]], mark_modified=True
+    ) -> "AnnotationDiff":
+        """Returns the diff that changes the texts of the annotations
+        and marks them as modified, like `Project.annotate`. Generated
+        texts that still need to be checked are not marked as modified
+        if mark_modified is false.
+        """
+        names = []
+        sentences = []
+        modified = []
+        new_sentences = []
+        for annotation, text in texts:
+            if annotation.sentence == text and (
+                annotation.modified or not mark_modified
+            ):
+                continue
+            names.append(annotation.name)
+            sentences.append(annotation.sentence)
+            modified.append(annotation.modified)
+            new_sentences.append(text)
+        old = {"sentence": ValueColumn(sentences)}
+        new = {"sentence": ValueColumn(new_sentences)}
+        if mark_modified:
+            old["modified"] = ValueColumn(modified)
+            new["modified"] = ValueColumn.constant(True, len(names))
+        return cls(names, old, new)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def changes(self, reverse=False) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Yields the file name of every changed annotation with the
+        values of its fields after the edit, or before it if reverse is
+        true.
+        """
+        columns = self.old if reverse else self.new
+        fields = list(columns)
+        for name, values in zip(self.names, zip(*columns.values())):
+            yield name, dict(zip(fields, values))
+
+    def then(self, other: "AnnotationDiff") -> "AnnotationDiff":
+        """Returns the diff of this edit followed by another edit of the
+        same annotations and fields, for example when typing.
+        """
+        return AnnotationDiff(self.names, self.old, other.new)
+
+    def is_noop(self) -> bool:
+        """Returns true if the values after the edit are the values
+        before it, for example when typed text was deleted again.
+        """
+        return self.old.keys() == self.new.keys() and all(
+            list(column) == list(self.new[field]) for field, column in self.old.items()
+        )
+
+    def nbytes(self) -> int:
+        """Returns the approximate memory used by the diff, not counting
+        the names and values shared with the annotations.
+        """
+        columns = [*self.old.values(), *self.new.values()]
+        return len(self.names) * 8 + sum(column.nbytes() for column in columns)
@@ -0,0 +1,111 @@
+import csv
+from json.encoder import encode_basestring_ascii
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+
+from voice_annotation_tool.annotation import Annotation
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+EXPORT_BATCH_SIZE = 16 * 1024
+"The number of annotations converted and written at once."
+
+INTEGER_MEMBERS = frozenset(["up_votes", "down_votes"])
+"Members of `Annotation.TSV_HEADER_MEMBERS` that hold integers."
+
+
+def arrow_available() -> bool:
+    """Returns true if pyarrow is installed, which is required to export
+    Arrow and Parquet files.
+    """
+    return pyarrow is not None
+
+
+def batched(rows: Iterable[tuple], size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """Splits the rows into lists of at most the given size."""
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def write_tsv_rows(file: TextIO, rows: Iterable[tuple]):
+    """Writes annotations converted using `Annotation.to_row` to a tsv
+    file, including the header.
+    """
+    writer = csv.writer(file, delimiter="\t")
+    writer.writerow(Annotation.TSV_HEADER_MEMBERS)
+    writer.writerows(rows)
+
+
+def write_json_lines(file: TextIO, rows: Iterable[tuple]):
+    """Writes rows in the order of `Annotation.TSV_HEADER_MEMBERS` as
+    one Json object per line.
+    """
+    # Formatting the encoded values into a template is about twice as
+    # fast as calling json.dumps with a dictionary for every row.
+    members = Annotation.TSV_HEADER_MEMBERS
+    template = "{{" + ", ".join(f'"{member}": {{}}' for member in members) + "}}\n"
+    encoders = [
+        str if member in INTEGER_MEMBERS else encode_basestring_ascii
+        for member in members
+    ]
+    for batch in batched(rows):
+        file.write(
+            "".join(
+                template.format(
+                    *[encode(value) for encode, value in zip(encoders, row)]
+                )
+                for row in batch
+            )
+        )
+
+
+def arrow_schema() -> "pyarrow.Schema":
+    """Returns the schema of the exported Arrow and Parquet files."""
+    return pyarrow.schema(
+        [
+            (member, pyarrow.int64() if member in INTEGER_MEMBERS else pyarrow.string())
+            for member in Annotation.TSV_HEADER_MEMBERS
+        ]
+    )
+
+
+def arrow_batches(rows: Iterable[tuple]) -> Iterator["pyarrow.RecordBatch"]:
+    """Converts rows in the order of `Annotation.TSV_HEADER_MEMBERS` to
+    Arrow record batches.
+    """
+    schema = arrow_schema()
+    for batch in batched(rows):
+        columns = zip(*batch)
+        yield pyarrow.RecordBatch.from_arrays(
+            [
+                pyarrow.array(column, field.type)
+                for column, field in zip(columns, schema)
+            ],
+            schema=schema,
+        )
+
+
+def write_arrow(path: Path, rows: Iterable[tuple]):
+    """Writes the rows to an Arrow IPC file."""
+    if not arrow_available():
+        raise RuntimeError("Exporting Arrow files requires pyarrow.")
+    with pyarrow.OSFile(str(path), "wb") as sink:
+        with pyarrow.ipc.new_file(sink, arrow_schema()) as writer:
+            for batch in arrow_batches(rows):
+                writer.write_batch(batch)
+
+
+def write_parquet(path: Path, rows: Iterable[tuple]):
+    """Writes the rows to a Parquet file, one row group per batch."""
+    if not arrow_available():
+        raise RuntimeError("Exporting Parquet files requires pyarrow.")
+    with pyarrow.parquet.ParquetWriter(str(path), arrow_schema()) as writer:
+        for batch in arrow_batches(rows):
+            writer.write_table(pyarrow.Table.from_batches([batch]))
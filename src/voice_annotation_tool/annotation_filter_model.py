@@ -0,0 +1,188 @@
+from typing import Any
+
+import numpy
+from PySide6.QtCore import QAbstractProxyModel, QModelIndex, Qt
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_list_model import AnnotationListModel
+from voice_annotation_tool.search_index import SearchQuery
+
+
+class AnnotationFilterModel(QAbstractProxyModel):
+    """Shows the annotations of an `AnnotationListModel` that match a
+    search query, see `SearchQuery`, optionally ordered by the duration
+    of their audio file.
+
+    The matching annotations are looked up in the search index of the
+    project, so filtering doesn't look at every annotation. Rows keep
+    showing when a change makes them stop matching, until the query
+    changes or annotations are added or removed. Like the source model,
+    rows are exposed to views in batches.
+    """
+
+    def __init__(self, source: AnnotationListModel, parent=None):
+        super().__init__(parent)
+        self._query = SearchQuery("")
+        self._duration_order: Qt.SortOrder | None = None
+        self._ids = numpy.zeros(0, numpy.int64)
+        "The search index ids of the matching annotations, in row order."
+        self._sorted_ids = self._ids
+        "The ids in ascending order, to look up the row of an id."
+        self._rows: numpy.ndarray | None = None
+        "The rows of the sorted ids, None if the rows are in id order."
+        self._loaded = 0
+        "The number of rows that were fetched by views."
+        self.setSourceModel(source)
+        source.modelReset.connect(self.refilter)
+        source.rowsInserted.connect(self.refilter)
+        source.rowsRemoved.connect(self.refilter)
+        source.dataChanged.connect(self.source_data_changed)
+
+    def set_query(self, query: str, duration_order: Qt.SortOrder | None = None):
+        """Shows the annotations matching the query, ordered by the
+        duration of their audio file or in the order of the project if
+        the order is None.
+        """
+        self._query = SearchQuery(query)
+        self._duration_order = duration_order
+        self.refilter(reset=True)
+
+    def is_filtering(self) -> bool:
+        "Returns true if the query doesn't match every annotation."
+        return not self._query.is_empty()
+
+    def is_active(self) -> bool:
+        """Returns true if the annotations are filtered or ordered, so
+        the model shows something else than the source model.
+        """
+        return self.is_filtering() or self._duration_order is not None
+
+    def match_count(self) -> int:
+        "Returns the number of matching annotations, including unfetched rows."
+        return len(self._ids)
+
+    def refilter(self, *args, reset=False):
+        """Searches the annotations matching the query again, resetting
+        views if the result changed or if reset is true.
+        """
+        project = self.sourceModel().project()
+        ids = self._ids[:0]
+        sorted_ids = ids
+        rows = None
+        if project and self.is_active():
+            index = project.search_index()
+            ids = sorted_ids = index.search(self._query)
+            if self._duration_order is not None:
+                ids = index.order_by_duration(
+                    ids, self._duration_order == Qt.DescendingOrder
+                )
+                rows = numpy.argsort(ids)
+                sorted_ids = ids[rows]
+        if not reset and numpy.array_equal(ids, self._ids):
+            return
+        self.beginResetModel()
+        self._ids = ids
+        self._sorted_ids = sorted_ids
+        self._rows = rows
+        self._loaded = min(len(ids), AnnotationListModel.FETCH_BATCH_SIZE)
+        self.endResetModel()
+
+    def source_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex):
+        """Notifies views that any shown row might have changed. Views
+        only repaint the visible rows.
+        """
+        if self._loaded:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._loaded - 1, 0))
+
+    def row_of(self, name: str) -> int | None:
+        """Returns the row of the annotation with the given file name,
+        None if it doesn't match the query.
+        """
+        project = self.sourceModel().project()
+        index = project.search_index()
+        if name not in index:
+            return None
+        id = index.id_of(name)
+        position = int(numpy.searchsorted(self._sorted_ids, id))
+        if position == len(self._sorted_ids) or self._sorted_ids[position] != id:
+            return None
+        return position if self._rows is None else int(self._rows[position])
+
+    def fetch_row(self, row: int):
+        """Fetches rows until the given row is part of the model, for
+        example before it is selected.
+        """
+        while row >= self._loaded and self.canFetchMore():
+            self.fetchMore()
+
+    def annotations_in_rows(self, first: int, last: int) -> list[Annotation]:
+        """Returns the annotations of the rows from first to last,
+        without going through model indexes.
+        """
+        project = self.sourceModel().project()
+        name_of = project.search_index().name_of
+        names = filter(None, (name_of(int(id)) for id in self._ids[first : last + 1]))
+        return [
+            annotation
+            for annotation in map(project.annotations.get, names)
+            if annotation is not None
+        ]
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else 1
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._loaded < len(self._ids)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        count = min(
+            len(self._ids) - self._loaded,
+            max(AnnotationListModel.FETCH_BATCH_SIZE, self._loaded),
+        )
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def index(self, row: int, column: int = 0, parent=QModelIndex()) -> QModelIndex:
+        if parent.isValid() or not 0 <= row < self._loaded or column != 0:
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index: QModelIndex) -> QModelIndex:
+        if not proxy_index.isValid() or proxy_index.row() >= len(self._ids):
+            return QModelIndex()
+        project = self.sourceModel().project()
+        name = project.search_index().name_of(int(self._ids[proxy_index.row()]))
+        if name is None:
+            return QModelIndex()
+        try:
+            row = project.annotations.row_of(name)
+        except KeyError:
+            return QModelIndex()
+        return self.sourceModel().index(row, 0)
+
+    def mapFromSource(self, source_index: QModelIndex) -> QModelIndex:
+        if not source_index.isValid():
+            return QModelIndex()
+        annotation = source_index.data(AnnotationListModel.ANNOTATION_ROLE)
+        row = self.row_of(annotation.name) if annotation else None
+        if row is None or row >= self._loaded:
+            return QModelIndex()
+        return self.index(row, 0)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        return self.mapToSource(index).data(role)
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.EditRole) -> bool:
+        return self.sourceModel().setData(self.mapToSource(index), value, role)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        return self.sourceModel().flags(self.mapToSource(index))
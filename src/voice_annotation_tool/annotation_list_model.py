@@ -1,47 +1,336 @@
-from typing import Any, Union
-from PySide6.QtCore import QAbstractListModel, QModelIndex, QPersistentModelIndex
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, Union
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QPersistentModelIndex,
+    QTimer,
+)
 from PySide6.QtGui import QBrush, Qt
 
 from voice_annotation_tool.project import Project, Annotation
 
 
 class AnnotationListModel(QAbstractListModel):
-    """Model that shows the annotations of a project."""
+    """Model that shows the annotations of a project.
+
+    Rows are exposed to views in batches using `canFetchMore` and
+    `fetchMore`, so opening a large project only reads the rows that
+    are shown. Changes made through the project are collected and
+    reported as `dataChanged` for the affected rows once control
+    returns to the event loop.
+    """
 
     ANNOTATION_ROLE = Qt.UserRole + 1
 
-    def __init__(self, project: Project, parent=None):
+    FETCH_BATCH_SIZE = 2000
+    """The minimum number of rows added to the model every time more
+    are fetched. Later fetches add as many rows as were fetched so far,
+    since views lay out all of their rows whenever rows are added."""
+
+    MODIFIED_BRUSH = QBrush(Qt.GlobalColor.green)
+    "The background of modified annotations, shared by all rows."
+    MISSING_BRUSH = QBrush(Qt.GlobalColor.gray)
+    "The text color of annotations whose audio file is missing."
+
+    def __init__(self, project: Project | None = None, parent=None):
         super().__init__(parent)
-        self._data: Project = project
+        self._data: Project | None = None
+        self._loaded = 0
+        "The number of rows that were fetched by views."
+        self._changed_names: set[str] = set()
+        "Names of changed annotations that views weren't notified of yet."
+        self._removed_rows: list[int] = []
+        self._removed: list[Annotation] = []
+        """The rows and annotations that were removed from the project
+        but not yet from the views, sorted by row."""
+        self._hidden_rows: list[int] = []
+        """The rows in which annotations that were added to the project
+        but not yet to the views would be shown, sorted."""
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(0)
+        self._flush_timer.timeout.connect(self.flush_changes)
+        if project:
+            self.set_project(project)
+
+    def set_project(self, project: Project | None):
+        """Shows the annotations of another project, resetting views
+        without replacing the model.
+        """
+        self.beginResetModel()
+        if self._data:
+            self._data.change_listeners.remove(self.annotations_changed)
+        self._data = project
+        self._changed_names.clear()
+        self._loaded = 0
+        if project:
+            project.change_listeners.append(self.annotations_changed)
+            self._loaded = min(len(project.annotations), self.FETCH_BATCH_SIZE)
+        self.endResetModel()
+
+    def project(self) -> Project | None:
+        "Returns the project whose annotations are shown."
+        return self._data
 
     def rowCount(self, parent=QModelIndex()) -> int:
-        if self._data is None:
+        if self._data is None or parent.isValid():
             return 0
-        return len(self._data.annotations)
+        return self._loaded
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if self._data is None or parent.isValid():
+            return False
+        return self._loaded < len(self._data.annotations)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        count = min(
+            len(self._data.annotations) - self._loaded,
+            max(self.FETCH_BATCH_SIZE, self._loaded),
+        )
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def fetch_row(self, row: int):
+        """Fetches rows until the given row is part of the model, for
+        example before it is selected.
+        """
+        while row >= self._loaded and self.canFetchMore():
+            self.fetchMore()
+
+    def annotations_in_rows(self, first: int, last: int) -> list[Annotation]:
+        """Returns the annotations of the rows from first to last,
+        without going through model indexes.
+        """
+        last = min(last, self._row_count() - 1)
+        return [self._annotation(row) for row in range(first, last + 1)]
 
     def data(self, index: QModelIndex, role: int):
         if not index.isValid():
             return None
-        if index.row() >= len(self._data.annotations):
+        if self._data is None or index.row() >= self._row_count():
+            # Rows that weren't fetched are still shown by proxy models.
             return None
-        annotation = self._data.annotations[index.row()]
+        annotation = self._annotation(index.row())
         match role:
             case Qt.DisplayRole:
-                return annotation.path.name
+                return annotation.name
             case Qt.BackgroundRole:
-                return QBrush(Qt.GlobalColor.green) if annotation.modified else QBrush()
+                return self.MODIFIED_BRUSH if annotation.modified else None
+            case Qt.ForegroundRole:
+                if annotation.name in self._data.missing_files:
+                    return self.MISSING_BRUSH
+                return None
+            case Qt.ToolTipRole:
+                info = self._data.audio_metadata.entries.get(annotation.name)
+                if not info or info.duration is None:
+                    return None
+                return self.tr(
+                    "{duration:.1f} s, {rate} Hz, {channels} channels"
+                ).format(
+                    duration=info.duration,
+                    rate=info.sample_rate,
+                    channels=info.channels,
+                )
             case self.ANNOTATION_ROLE:
                 return annotation
             case Qt.EditRole:
-                return annotation.path.name
+                return annotation.name
         return None
 
-    def removeRow(self, row: int, parent=QModelIndex()) -> bool:
-        if not self._data or row < 0 or row >= self.rowCount():
+    def removeRows(self, row: int, count: int, parent=QModelIndex()) -> bool:
+        if not self._data or row < 0 or count < 1 or row + count > self.rowCount():
             return False
-        self._data.annotations.remove(row)
+        annotations = [self._annotation(row + offset) for offset in range(count)]
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        self._data.remove_annotations(annotations)
+        self._loaded -= count
+        self.endRemoveRows()
         return True
 
+    def delete_annotations(
+        self, annotations: list[Annotation], trash=False
+    ) -> list[Annotation]:
+        """Deletes the audio files of the annotations and removes them
+        from the project. If trash is true, the files are moved to the
+        trash folder of the project instead, see
+        `Project.trash_audio_files`.
+
+        The annotations are removed from the project at once. Views are
+        then notified of every contiguous range of removed rows,
+        starting at the bottom so the rows of the remaining ranges stay
+        valid. Until they are notified, the removed rows are still
+        shown. Rows that weren't fetched yet are removed silently.
+
+        Returns the removed annotations.
+        """
+        if trash:
+            deleted = self._data.trash_audio_files(annotations)
+        else:
+            deleted = self._data.delete_audio_files(annotations)
+        by_row = sorted(
+            (
+                (self._data.annotations.row_of(annotation.name), annotation)
+                for annotation in deleted
+            ),
+            key=lambda item: item[0],
+        )
+        end = len(by_row)
+        while end and by_row[end - 1][0] >= self._loaded:
+            end -= 1
+        self._removed_rows = [row for row, _ in by_row[:end]]
+        self._removed = [annotation for _, annotation in by_row[:end]]
+        self._data.remove_annotations(annotation for _, annotation in by_row)
+        while end:
+            start = end - 1
+            while start and by_row[start - 1][0] == by_row[start][0] - 1:
+                start -= 1
+            self.beginRemoveRows(QModelIndex(), by_row[start][0], by_row[end - 1][0])
+            del self._removed_rows[start:]
+            del self._removed[start:]
+            self._loaded -= end - start
+            self.endRemoveRows()
+            end = start
+        return deleted
+
+    def restore_annotations(
+        self, annotations: list[Annotation], rows: list[int] | None = None
+    ):
+        """Adds deleted annotations back into the given rows of the
+        project, or to its end, see `Project.restore_annotations`.
+
+        The annotations are added to the project at once. Views are
+        then notified of every contiguous range of added rows, starting
+        at the bottom, and don't see the other added rows until then.
+        Rows after the fetched rows are added silently.
+        """
+        store = self._data.annotations
+        if rows is None:
+            rows = list(range(len(store), len(store) + len(annotations)))
+        kept = [
+            (row, annotation)
+            for row, annotation in zip(rows, annotations)
+            if annotation.name not in store
+        ]
+        if not kept:
+            return
+        fetched_all = not self.canFetchMore()
+        self._data.restore_annotations(
+            [annotation for _, annotation in kept], [row for row, _ in kept]
+        )
+        added = sorted(store.row_of(annotation.name) for _, annotation in kept)
+        # The rows the annotations would be shown in if none were added.
+        hidden = [row - count for count, row in enumerate(added)]
+        end = len(hidden)
+        while end and (
+            hidden[end - 1] > self._loaded
+            or hidden[end - 1] == self._loaded
+            and not fetched_all
+        ):
+            end -= 1
+        self._hidden_rows = hidden[:end]
+        while end:
+            start = bisect_left(self._hidden_rows, self._hidden_rows[end - 1])
+            first = self._hidden_rows[start]
+            self.beginInsertRows(QModelIndex(), first, first + end - start - 1)
+            del self._hidden_rows[start:]
+            self._loaded += end - start
+            self.endInsertRows()
+            end = start
+
+    def append_audio_files(self, names: list[str]):
+        """Adds annotations for new audio files to the end of the
+        project, notifying views with a single row insertion if all
+        other rows were fetched already.
+        """
+        if not names:
+            return
+        if self.canFetchMore():
+            self._data.add_audio_files(names)
+            return
+        first = len(self._data.annotations)
+        self.beginInsertRows(QModelIndex(), first, first + len(names) - 1)
+        self._data.add_audio_files(names)
+        self._loaded += len(names)
+        self.endInsertRows()
+
+    def _row_count(self) -> int:
+        """Returns the number of rows including those that weren't
+        fetched, and removed or added rows views weren't notified of
+        yet.
+        """
+        return (
+            len(self._data.annotations)
+            + len(self._removed_rows)
+            - len(self._hidden_rows)
+        )
+
+    def _annotation(self, row: int) -> Annotation:
+        """Returns the annotation shown in the given row, see
+        `delete_annotations`.
+        """
+        if self._removed_rows:
+            removed = bisect_left(self._removed_rows, row)
+            if removed < len(self._removed_rows) and self._removed_rows[removed] == row:
+                return self._removed[removed]
+            row -= removed
+        elif self._hidden_rows:
+            row += bisect_right(self._hidden_rows, row)
+        return self._data.annotations[row]
+
+    def annotations_changed(self, names: Iterable[str]):
+        """Remembers that the annotations with the given file names
+        changed. Views are notified once the event loop runs again, so
+        many changes are reported together.
+        """
+        self._changed_names.update(names)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def refresh_annotations(self, names: Iterable[str]):
+        """Notifies views that the annotations with the given file
+        names changed, once for every contiguous range of fetched rows.
+        """
+        rows = []
+        for name in names:
+            try:
+                row = self._data.annotations.row_of(name)
+            except KeyError:
+                # The annotation was deleted or renamed since.
+                continue
+            if row < self._loaded:
+                rows.append(row)
+        rows.sort()
+        end = len(rows)
+        while end:
+            start = end - 1
+            while start and rows[start - 1] >= rows[start] - 1:
+                start -= 1
+            self.dataChanged.emit(self.index(rows[start]), self.index(rows[end - 1]))
+            end = start
+
+    def flush_changes(self):
+        """Notifies views of the changes collected by
+        `annotations_changed`.
+        """
+        self._flush_timer.stop()
+        names = self._changed_names
+        self._changed_names = set()
+        if self._data is None or not names:
+            return
+        if len(names) >= self._loaded:
+            self.refresh_all()
+        else:
+            self.refresh_annotations(names)
+
+    def refresh_all(self):
+        """Notifies views that any annotation might have changed."""
+        if self.rowCount():
+            self.dataChanged.emit(self.index(0), self.index(self.rowCount() - 1))
+
     def flags(self, index) -> Qt.ItemFlags:
         return super().flags(index) | Qt.ItemIsEditable
 
@@ -69,6 +358,10 @@ class AnnotationListModel(QAbstractListModel):
     ) -> bool:
         if role == Qt.EditRole:
             annotation: Annotation = self.data(index, self.ANNOTATION_ROLE)
-            annotation.path = annotation.path.rename(annotation.path.with_name(value))
+            try:
+                self._data.rename_annotation(annotation, value)
+            except (KeyError, OSError):
+                return False
+            self.dataChanged.emit(index, index)
             return True
         return super().setData(index, value, role)
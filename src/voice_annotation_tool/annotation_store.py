@@ -0,0 +1,249 @@
+from contextlib import AbstractContextManager, nullcontext
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from voice_annotation_tool.annotation import Annotation, shared_folder
+
+
+class SlotHoles:
+    """Counts the deleted slots of a store in a Fenwick tree, so rows
+    and slots can be converted in logarithmic time while the deleted
+    slots weren't compacted yet.
+    """
+
+    def __init__(self, size: int):
+        self.count = 0
+        "The number of deleted slots."
+        self._tree = [0] * (size + 1)
+        "The number of deleted slots in the range ending at every slot."
+
+    def append(self):
+        """Adds a slot that isn't deleted at the end."""
+        index = len(self._tree)
+        self._tree.append(self.before(index - 1) - self.before(index & (index - 1)))
+
+    def pop(self):
+        """Removes the last slot, which mustn't be deleted."""
+        self._tree.pop()
+
+    def delete(self, slot: int):
+        """Marks the slot as deleted."""
+        self.count += 1
+        index = slot + 1
+        while index < len(self._tree):
+            self._tree[index] += 1
+            index += index & -index
+
+    def before(self, slot: int) -> int:
+        """Returns the number of deleted slots before the slot."""
+        count = 0
+        while slot:
+            count += self._tree[slot]
+            slot &= slot - 1
+        return count
+
+    def slot_of(self, row: int) -> int:
+        """Returns the slot of the row, counting only slots that aren't
+        deleted.
+        """
+        slot = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            index = slot + step
+            if index < len(self._tree) and step - self._tree[index] <= row:
+                slot = index
+                row -= step - self._tree[index]
+            step >>= 1
+        return slot
+
+
+class AnnotationStore:
+    """Ordered collection of annotations indexed by sample file name.
+
+    Inserting, replacing, looking up and deleting an annotation by its
+    file name are constant time operations. The order in which the
+    annotations were added is kept, which is also the order they are
+    shown in and written to the tsv file.
+
+    Deleted annotations leave an empty slot behind. Rows are mapped to
+    slots by counting the empty slots before them, see `SlotHoles`, and
+    the slots are compacted once half of them are empty.
+    """
+
+    def __init__(self, annotations: Iterable[Annotation] = ()):
+        self.folder: Path | None = None
+        "The folder annotations without a folder are placed in when added."
+        self._slots: list[Annotation | None] = []
+        "The annotations in insertion order, None for deleted entries."
+        self._index: dict[str, int] = {}
+        "Maps the file name of an annotation to its slot."
+        self._holes: SlotHoles | None = None
+        "The deleted slots that weren't compacted yet, None if there are none."
+        for annotation in annotations:
+            self.add(annotation)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[Annotation]:
+        if self._holes is None:
+            return iter(self._slots)
+        return (annotation for annotation in self._slots if annotation is not None)
+
+    def __getitem__(self, row: int) -> Annotation:
+        if self._holes is None:
+            return self._slots[row]
+        if row < 0:
+            row += len(self._index)
+        if not 0 <= row < len(self._index):
+            raise IndexError(row)
+        return self._slots[self._holes.slot_of(row)]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index
+
+    def get(self, name: str) -> Annotation | None:
+        """Returns the annotation of the sample with the given file
+        name, or None if there is none.
+        """
+        slot = self._index.get(name)
+        if slot is None:
+            return None
+        return self._slots[slot]
+
+    def names(self) -> Iterable[str]:
+        """Returns the file names of all stored annotations."""
+        return self._index.keys()
+
+    def row_of(self, name: str) -> int:
+        """Returns the row of the annotation with the given file name.
+
+        Raises a KeyError if there is no such annotation.
+        """
+        slot = self._index[name]
+        if self._holes is None:
+            return slot
+        return slot - self._holes.before(slot)
+
+    def add(self, annotation: Annotation, overwrite=False) -> bool:
+        """Appends the annotation to the end of the store. If an
+        annotation with the same file name exists it is replaced in
+        place if overwrite is true, otherwise nothing is changed.
+
+        Returns true if the annotation was added.
+        """
+        if annotation.folder is None and self.folder:
+            annotation.folder = shared_folder(self.folder)
+        name = annotation.name
+        slot = self._index.get(name)
+        if slot is None:
+            self._index[name] = len(self._slots)
+            self._slots.append(annotation)
+            if self._holes is not None:
+                self._holes.append()
+            return True
+        if not overwrite:
+            return False
+        self._slots[slot] = annotation
+        return True
+
+    def insert_many(self, items: Iterable[tuple[int, Annotation]]):
+        """Inserts annotations at the given rows, which are the rows
+        they have afterwards and have to be ascending. Rows past the
+        end append the annotation. The file names must not be stored
+        yet.
+        """
+        rest = (annotation for annotation in self._slots if annotation is not None)
+        slots: list[Annotation | None] = []
+        for row, annotation in items:
+            if annotation.folder is None and self.folder:
+                annotation.folder = shared_folder(self.folder)
+            slots.extend(islice(rest, max(row - len(slots), 0)))
+            slots.append(annotation)
+        slots.extend(rest)
+        self._slots = slots
+        self._index = {annotation.name: slot for slot, annotation in enumerate(slots)}
+        self._holes = None
+
+    def remove(self, name: str) -> Annotation | None:
+        """Removes the annotation with the given file name and
+        returns it, or None if there is no such annotation.
+        """
+        slot = self._index.pop(name, None)
+        if slot is None:
+            return None
+        annotation = self._slots[slot]
+        if slot == len(self._slots) - 1:
+            self._slots.pop()
+            if self._holes is not None:
+                self._holes.pop()
+            return annotation
+        self._slots[slot] = None
+        if self._holes is None:
+            self._holes = SlotHoles(len(self._slots))
+        self._holes.delete(slot)
+        if self._holes.count * 2 > len(self._slots):
+            self._compact()
+        return annotation
+
+    def remove_many(self, names: Iterable[str]):
+        """Removes the annotations with the given file names, ignoring
+        names without an annotation.
+        """
+        for name in names:
+            self.remove(name)
+
+    def rename(self, old_name: str, new_name: str):
+        """Moves the annotation stored under the old file name to the
+        new name, keeping its row.
+        """
+        if new_name == old_name:
+            return
+        if new_name in self._index:
+            raise KeyError(new_name)
+        self._index[new_name] = self._index.pop(old_name)
+
+    def update(self, annotation: Annotation):
+        """Stores changes made to the members of an annotation.
+
+        Annotations are kept in memory, so there is nothing to do.
+        """
+
+    def batch(self) -> AbstractContextManager:
+        """Returns a context in which many annotations can be added
+        or changed efficiently.
+        """
+        return nullcontext()
+
+    def rows(self) -> Iterator[tuple]:
+        """Yields the annotations converted using `Annotation.to_row`."""
+        return (annotation.to_row() for annotation in self)
+
+    def snapshot_rows(self) -> Iterable[tuple]:
+        """Returns the rows of the annotations as they are now, which
+        can be read from another thread while the store is changed.
+        """
+        return list(self.rows())
+
+    def clear(self):
+        """Removes all annotations."""
+        self._slots.clear()
+        self._index.clear()
+        self._holes = None
+
+    def close(self):
+        """Releases the resources of the store.
+
+        Annotations are kept in memory, so there is nothing to do.
+        """
+
+    def _compact(self):
+        """Removes the slots of deleted annotations so rows map
+        directly to slots.
+        """
+        self._slots = [slot for slot in self._slots if slot is not None]
+        self._index = {
+            annotation.name: row for row, annotation in enumerate(self._slots)
+        }
+        self._holes = None
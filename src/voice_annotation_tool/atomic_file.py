@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+import os
+from pathlib import Path
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_write(
+    path: Path,
+    newline: str | None = None,
+    binary=False,
+    buffering: int = -1,
+    encoding: str | None = None,
+) -> Iterator[IO]:
+    """Opens a temporary file next to the given path for writing and
+    moves it in place of the path once the context is left.
+
+    The file is flushed to disk before it is renamed, so the path
+    either has its old or its complete new content, even if the
+    program crashes while writing. If an exception is raised, the
+    temporary file is removed and the path isn't touched.
+
+    The file is opened in binary mode if binary is true, buffering and
+    encoding are passed to `open`.
+    """
+    temp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        mode = "wb" if binary else "w"
+        with open(
+            temp_path, mode, buffering, encoding=encoding, newline=newline
+        ) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,112 @@
+import json
+import os
+from pathlib import Path
+import time
+
+from voice_annotation_tool.atomic_file import atomic_write
+
+AUDIO_SUFFIXES = frozenset([".mp3", ".ogg", ".mp4", ".webm", ".avi", ".mkv", ".wav"])
+"File extensions of the samples that are loaded from the audio folder."
+
+MTIME_GRANULARITY_NS = 2_000_000_000
+"""Folders modified more recently than this when they are scanned are
+scanned again next time, since a file added within the same timestamp
+tick wouldn't change the modification time."""
+
+
+class AudioFolderIndex:
+    """Cached listing of the audio files in the audio folder of a
+    project, with the size and modification time of every file.
+
+    Listing a folder with hundreds of thousands of files is slow on
+    network filesystems. The listing is therefore stored in a file
+    next to the tsv file and only refreshed if the modification time
+    of the folder changed. When it is refreshed, every audio file is
+    examined again, so files that were replaced are noticed.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        "The file the listing is stored in, None to keep it in memory."
+        self.folder: str = ""
+        "The folder that was listed."
+        self.folder_mtime_ns: int = 0
+        "The modification time of the folder when it was listed."
+        self.files: dict[str, tuple[int, int]] = {}
+        "Maps the names of the audio files to their size and mtime in ns."
+
+    @staticmethod
+    def for_tsv_file(tsv_file: Path) -> "AudioFolderIndex":
+        """Returns the index that is stored next to a tsv file."""
+        return AudioFolderIndex(tsv_file.with_name(tsv_file.name + ".files"))
+
+    def load(self):
+        """Reads the stored listing. A missing or unreadable index is
+        ignored, the folder is then listed again on the next scan.
+        """
+        if not self.path or not self.path.is_file():
+            return
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+            files = {name: (size, mtime) for name, size, mtime in data["files"]}
+        except (ValueError, KeyError, TypeError):
+            return
+        self.folder = data.get("folder", "")
+        self.folder_mtime_ns = data.get("mtime_ns", 0)
+        self.files = files
+
+    def save(self):
+        """Writes the listing to the index file."""
+        if not self.path:
+            return
+        content = json.dumps(
+            {
+                "folder": self.folder,
+                "mtime_ns": self.folder_mtime_ns,
+                "files": [[name, *stat] for name, stat in self.files.items()],
+            },
+            separators=(",", ":"),
+        )
+        with atomic_write(self.path) as file:
+            file.write(content)
+
+    def scan(self, folder: Path) -> tuple[list[str], list[str]]:
+        """Updates the listing of the folder and returns the names of
+        the audio files that were added and those that vanished since
+        the last scan.
+
+        Nothing is read from the folder if its modification time
+        didn't change.
+        """
+        folder_mtime_ns = os.stat(folder).st_mtime_ns
+        if str(folder) != self.folder:
+            self.folder = str(folder)
+            self.folder_mtime_ns = 0
+            self.files = {}
+        elif folder_mtime_ns == self.folder_mtime_ns:
+            return [], []
+        known = self.files
+        files: dict[str, tuple[int, int]] = {}
+        added = []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                name = entry.name
+                if name not in known:
+                    if os.path.splitext(name)[1] not in AUDIO_SUFFIXES:
+                        continue
+                    if not entry.is_file():
+                        continue
+                try:
+                    result = entry.stat()
+                except OSError:
+                    continue
+                if name not in known:
+                    added.append(name)
+                files[name] = (result.st_size, result.st_mtime_ns)
+        vanished = [name for name in known if name not in files]
+        self.files = files
+        if time.time_ns() - folder_mtime_ns < MTIME_GRANULARITY_NS:
+            folder_mtime_ns = 0
+        self.folder_mtime_ns = folder_mtime_ns
+        return added, vanished
@@ -0,0 +1,61 @@
+from pathlib import Path
+from PySide6.QtCore import (
+    QElapsedTimer,
+    QFileSystemWatcher,
+    QObject,
+    QTimer,
+    Signal,
+    Slot,
+)
+
+
+class AudioFolderWatcher(QObject):
+    """Watches the audio folder of a project for added and removed
+    files.
+
+    A recording pipeline writing many files in a row causes a burst of
+    change notifications, so `folder_changed` is only emitted once the
+    folder didn't change for `DELAY` milliseconds, or at the latest
+    `MAX_DELAY` milliseconds after the first change.
+    """
+
+    DELAY = 500
+    "Milliseconds to wait for further changes before emitting."
+    MAX_DELAY = 3000
+    "Milliseconds after which the signal is emitted even if changes continue."
+
+    folder_changed = Signal()
+    "Emitted after files were added to or removed from the folder."
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._directory_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DELAY)
+        self._timer.timeout.connect(self.folder_changed)
+        self._pending_since = QElapsedTimer()
+
+    def watch(self, folder: Path | None):
+        """Starts watching the folder instead of the previously watched
+        one. Stops watching if the folder is None or doesn't exist.
+        """
+        self._timer.stop()
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        if folder and folder.is_dir():
+            self._watcher.addPath(str(folder))
+
+    def watched_folder(self) -> Path | None:
+        """Returns the folder that is watched, if any."""
+        directories = self._watcher.directories()
+        return Path(directories[0]) if directories else None
+
+    @Slot()
+    def _directory_changed(self, path: str):
+        if not self._timer.isActive():
+            self._pending_since.start()
+        elif self._pending_since.elapsed() >= self.MAX_DELAY:
+            return
+        self._timer.start()
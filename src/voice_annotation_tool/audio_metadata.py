@@ -0,0 +1,252 @@
+import json
+import math
+from pathlib import Path
+import struct
+from typing import BinaryIO, Iterable
+
+import ffmpeg
+
+from voice_annotation_tool.atomic_file import atomic_write
+
+WAV_SUFFIXES = frozenset([".wav", ".wave"])
+"File extensions whose header is read directly instead of using ffprobe."
+
+UNKNOWN_SIZE = 0xFFFFFFFF
+"Chunk size written by programs that stream wav files of unknown length."
+
+
+class AudioInfo:
+    """The properties of an audio file, and the size and modification
+    time of the file they were read from.
+    """
+
+    __slots__ = ("duration", "sample_rate", "channels", "size", "mtime_ns")
+
+    def __init__(
+        self,
+        duration: float | None,
+        sample_rate: int,
+        channels: int,
+        size: int,
+        mtime_ns: int,
+    ):
+        self.duration = duration
+        "The length of the audio in seconds, None if it couldn't be read."
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.size = size
+        "The size of the file in bytes."
+        self.mtime_ns = mtime_ns
+        "The modification time of the file in nanoseconds."
+
+    def to_list(self) -> list:
+        "Returns the values in the order they are stored in the cache file."
+        return [
+            self.size,
+            self.mtime_ns,
+            self.duration,
+            self.sample_rate,
+            self.channels,
+        ]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, AudioInfo) and self.to_list() == other.to_list()
+
+    def __repr__(self) -> str:
+        return f"AudioInfo({self.duration}, {self.sample_rate}, {self.channels})"
+
+
+def read_wav_header(file: BinaryIO, size: int) -> tuple[float, int, int] | None:
+    """Reads the duration, sample rate and channel count from the
+    header of a wav file of the given size in bytes, without reading
+    the samples. Returns None if the file isn't a valid wav file.
+    """
+    header = file.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:] != b"WAVE":
+        return None
+    byte_rate = 0
+    sample_rate = 0
+    channels = 0
+    while True:
+        chunk = file.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id = chunk[:4]
+        chunk_size = int.from_bytes(chunk[4:], "little")
+        if chunk_id == b"fmt ":
+            format = file.read(chunk_size)
+            if len(format) < 16:
+                return None
+            _, channels, sample_rate, byte_rate = struct.unpack("<HHII", format[:12])
+            file.seek(chunk_size & 1, 1)
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # The size is missing or wrong if writing the file was
+            # interrupted or its length wasn't known in advance.
+            available = size - file.tell()
+            if chunk_size == UNKNOWN_SIZE or chunk_size > available:
+                chunk_size = available
+            return chunk_size / byte_rate, sample_rate, channels
+        else:
+            file.seek(chunk_size + (chunk_size & 1), 1)
+
+
+def probe_with_ffmpeg(path: Path) -> tuple[float | None, int, int] | None:
+    """Reads the duration, sample rate and channel count of the first
+    audio stream of a file using ffprobe. Returns None if the file has
+    no audio stream or ffprobe failed.
+    """
+    try:
+        result = ffmpeg.probe(str(path))
+    except (ffmpeg.Error, OSError):
+        return None
+    for stream in result.get("streams", []):
+        if stream.get("codec_type") != "audio":
+            continue
+        duration = stream.get("duration") or result.get("format", {}).get("duration")
+        return (
+            float(duration) if duration else None,
+            int(stream.get("sample_rate", 0)),
+            int(stream.get("channels", 0)),
+        )
+    return None
+
+
+def probe_audio_file(path: Path, size: int, mtime_ns: int) -> AudioInfo:
+    """Reads the properties of the audio file, which has the given size
+    and modification time. The header of wav files is read directly,
+    other files are probed with ffprobe.
+
+    The duration is None if the file couldn't be read, so it isn't
+    probed again until it changes.
+    """
+    properties = None
+    if path.suffix.lower() in WAV_SUFFIXES:
+        try:
+            with open(path, "rb") as file:
+                properties = read_wav_header(file, size)
+        except OSError:
+            pass
+    if properties is None:
+        properties = probe_with_ffmpeg(path)
+    if properties is None:
+        return AudioInfo(None, 0, 0, size, mtime_ns)
+    return AudioInfo(*properties, size, mtime_ns)
+
+
+class AudioMetadataCache:
+    """The properties of the audio files of a project, stored in a file
+    next to the tsv file.
+
+    An entry is only valid as long as the size and modification time
+    of the file didn't change, so only new and changed files have to
+    be probed when the project is opened again.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        "The file the cache is stored in, None to keep it in memory."
+        self.folder: str = ""
+        "The folder containing the audio files."
+        self.entries: dict[str, AudioInfo] = {}
+        "Maps the names of the audio files to their properties."
+        self._total: float | None = None
+        "The sum of all durations, None if it has to be summed again."
+
+    @staticmethod
+    def for_tsv_file(tsv_file: Path) -> "AudioMetadataCache":
+        """Returns the cache that is stored next to a tsv file."""
+        return AudioMetadataCache(tsv_file.with_name(tsv_file.name + ".audio"))
+
+    def load(self):
+        """Reads the stored cache. A missing or unreadable cache is
+        ignored, the files are then probed again.
+        """
+        if not self.path or not self.path.is_file():
+            return
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+            entries = {
+                name: AudioInfo(duration, rate, channels, size, mtime)
+                for name, size, mtime, duration, rate, channels in data["files"]
+            }
+        except (ValueError, KeyError, TypeError):
+            return
+        self.folder = data.get("folder", "")
+        self.entries = entries
+        self._total = None
+
+    def save(self):
+        """Writes the cache to its file."""
+        if not self.path:
+            return
+        content = json.dumps(
+            {
+                "folder": self.folder,
+                "files": [
+                    [name, *info.to_list()] for name, info in self.entries.items()
+                ],
+            },
+            separators=(",", ":"),
+        )
+        with atomic_write(self.path) as file:
+            file.write(content)
+
+    def copy(self) -> "AudioMetadataCache":
+        """Returns a copy of the cache that can be saved in another
+        thread while this one is changed.
+        """
+        copy = AudioMetadataCache(self.path)
+        copy.folder = self.folder
+        copy.entries = dict(self.entries)
+        return copy
+
+    def outdated(self, folder: Path, files: dict[str, tuple[int, int]]) -> list[str]:
+        """Returns the names of the files that have no valid entry,
+        given the size and modification time of the files in the
+        folder, as listed by `AudioFolderIndex`. Entries of other
+        files are removed.
+        """
+        if str(folder) != self.folder:
+            self.folder = str(folder)
+            self.entries = {}
+            self._total = None
+        entries = self.entries
+        for name in [name for name in entries if name not in files]:
+            del entries[name]
+            self._total = None
+        outdated = []
+        for name, (size, mtime_ns) in files.items():
+            info = entries.get(name)
+            if info is None or info.size != size or info.mtime_ns != mtime_ns:
+                outdated.append(name)
+        return outdated
+
+    def update(self, infos: Iterable[tuple[str, AudioInfo]]):
+        """Stores the properties of probed files."""
+        self.entries.update(infos)
+        self._total = None
+
+    def duration(self, name: str) -> float | None:
+        """Returns the duration of the file in seconds, None if it
+        wasn't probed or couldn't be read.
+        """
+        info = self.entries.get(name)
+        return info.duration if info else None
+
+    def total_duration(self, names: Iterable[str] | None = None) -> float:
+        """Returns the sum of the durations of the files with the given
+        names, or of all files, in seconds. Unknown durations count as
+        zero.
+        """
+        entries = self.entries
+        if names is not None:
+            infos = filter(None, map(entries.get, names))
+            return math.fsum(info.duration for info in infos if info.duration)
+        if self._total is None:
+            self._total = math.fsum(
+                info.duration for info in entries.values() if info.duration
+            )
+        return self._total
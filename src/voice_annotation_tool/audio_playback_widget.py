@@ -1,9 +1,54 @@
+import logging
 from pathlib import Path
-from PySide6.QtCore import QSize, QTime, QUrl, Slot, Signal
+import statistics
+import time
+from PySide6.QtCore import QBuffer, QByteArray, QSize, QTime, QUrl, Slot, Signal
 from PySide6.QtGui import QIcon
 from PySide6.QtMultimedia import QAudioOutput, QMediaPlayer
 from PySide6.QtWidgets import QMessageBox, QPushButton, QWidget
 from voice_annotation_tool.audio_playback_widget_ui import Ui_AudioPlaybackWidget
+from voice_annotation_tool.waveform_widget import WaveformWidget
+
+LATENCY_REPORT_INTERVAL = 50
+"The number of loaded files after which the load latency is logged."
+
+logger = logging.getLogger(__name__)
+
+
+class LoadLatency:
+    """Collects the time from selecting a sample until its audio is
+    ready to play, separately for files played from memory and from
+    disk.
+    """
+
+    def __init__(self):
+        self.samples: dict[bool, list[float]] = {True: [], False: []}
+        "Maps whether the file was in memory to the latencies in seconds."
+
+    def add(self, seconds: float, from_memory: bool):
+        self.samples[from_memory].append(seconds)
+
+    def count(self) -> int:
+        return sum(map(len, self.samples.values()))
+
+    def report(self) -> str:
+        """Returns the median and 95th percentile of the latencies."""
+        parts = []
+        for from_memory, name in [(True, "memory"), (False, "disk")]:
+            samples = self.samples[from_memory]
+            if not samples:
+                continue
+            median = statistics.median(samples) * 1000
+            slowest = sorted(samples)[int(len(samples) * 0.95)] * 1000
+            parts.append(
+                f"{name}: {len(samples)} files, median {median:.1f} ms,"
+                f" 95% {slowest:.1f} ms"
+            )
+        return "audio load latency " + "; ".join(parts)
+
+    def clear(self):
+        for samples in self.samples.values():
+            samples.clear()
 
 
 class AudioPlaybackWidget(QWidget, Ui_AudioPlaybackWidget):
@@ -17,6 +62,8 @@ class AudioPlaybackWidget(QWidget, Ui_AudioPlaybackWidget):
     def __init__(self, parent=None):
         super().__init__()
         self.setupUi(self)
+        self.waveform = WaveformWidget(self)
+        self.verticalLayout.insertWidget(0, self.waveform)
         self.output = QAudioOutput()
         self.player = QMediaPlayer()
         self.player.setAudioOutput(self.output)
@@ -29,11 +76,24 @@ class AudioPlaybackWidget(QWidget, Ui_AudioPlaybackWidget):
         ]
         self.stopButton.pressed.connect(self.player.stop)
         self.timeSlider.valueChanged.connect(self.player.setPosition)
+        self.waveform.seek.connect(self.player.setPosition)
         self.volumeSlider.valueChanged.connect(self.volume_changed)
         self.player.durationChanged.connect(self.update_duration)
         self.player.positionChanged.connect(self.update_position)
         self.player.errorOccurred.connect(self.playerError)
         self.player.playbackStateChanged.connect(self.playback_state_changed)
+        self.player.mediaStatusChanged.connect(self.media_status_changed)
+        self.buffer: QBuffer | None = None
+        "The memory buffer the player reads the current file from."
+        self.latency = LoadLatency()
+        self.skip_silence = True
+        """True if playback starts at the speech and stops after it, see
+        `set_speech_range`."""
+        self.speech_range: tuple[int, int] | None = None
+        "The start and end of the speech in milliseconds, None if unknown."
+        self._load_started: float | None = None
+        "When the current file was loaded, None once it was ready."
+        self._loaded_from_memory = False
         self.reload_button_tooltips()
 
     def get_button_tooltip(self, button: QPushButton) -> str:
@@ -69,11 +129,39 @@ class AudioPlaybackWidget(QWidget, Ui_AudioPlaybackWidget):
                 self.get_button_tooltip(button) + " " + button.shortcut().toString()
             )
 
-    def load_file(self, file: Path) -> None:
+    def load_file(self, file: Path, data: bytes | None = None) -> None:
         """Loads the given audio file which can then be played by
         pressing the pause/play button.
+
+        If the content of the file is passed, it is played from memory
+        instead of opening the file again.
+        """
+        self._load_started = time.perf_counter()
+        self._loaded_from_memory = data is not None
+        self.set_speech_range(None)
+        old_buffer = self.buffer
+        self.buffer = None
+        if data is None:
+            self.player.setSource(QUrl.fromLocalFile(file))
+        else:
+            self.buffer = QBuffer(self)
+            self.buffer.setData(QByteArray(data))
+            self.buffer.open(QBuffer.ReadOnly)
+            # The URL tells the player the format of the data.
+            self.player.setSourceDevice(self.buffer, QUrl.fromLocalFile(file))
+        if old_buffer:
+            old_buffer.deleteLater()
+
+    def set_speech_range(self, speech_range: tuple[float, float] | None):
+        """Sets the start and end of the speech in the loaded file in
+        seconds, so the silence before and after it can be skipped.
         """
-        self.player.setSource(QUrl.fromLocalFile(file))
+        self.speech_range = (
+            (int(speech_range[0] * 1000), int(speech_range[1] * 1000))
+            if speech_range
+            else None
+        )
+        self.waveform.set_speech_range(speech_range)
 
     @Slot()
     def playerError(self, error, string):
@@ -81,6 +169,24 @@ class AudioPlaybackWidget(QWidget, Ui_AudioPlaybackWidget):
         message.setText(self.tr("Error playing audio: {error}").format(error=string))
         message.exec()
 
+    @Slot()
+    def media_status_changed(self, status):
+        """Records how long it took until a loaded file was ready to
+        play, and logs the collected latencies for debugging now and then.
+        """
+        if self._load_started is None or status not in (
+            QMediaPlayer.LoadedMedia,
+            QMediaPlayer.BufferedMedia,
+        ):
+            return
+        self.latency.add(
+            time.perf_counter() - self._load_started, self._loaded_from_memory
+        )
+        self._load_started = None
+        if self.latency.count() >= LATENCY_REPORT_INTERVAL:
+            logger.debug(self.latency.report())
+            self.latency.clear()
+
     @Slot()
     def playback_state_changed(self, state):
         playing = state == QMediaPlayer.PlayingState
@@ -93,8 +199,13 @@ class AudioPlaybackWidget(QWidget, Ui_AudioPlaybackWidget):
     def play_pause_button_pressed(self):
         if self.player.playbackState() == QMediaPlayer.PlayingState:
             self.player.pause()
-        else:
-            self.player.play()
+            return
+        if self.skip_silence and self.speech_range:
+            start, end = self.speech_range
+            position = self.player.position()
+            if position < start or position >= end:
+                self.player.setPosition(start)
+        self.player.play()
 
     @Slot()
     def previous_button_pressed(self):
@@ -119,3 +230,12 @@ class AudioPlaybackWidget(QWidget, Ui_AudioPlaybackWidget):
         self.timeSlider.blockSignals(True)
         self.timeSlider.setValue(position)
         self.timeSlider.blockSignals(False)
+        self.waveform.set_position(position)
+        if (
+            self.skip_silence
+            and self.speech_range
+            and position >= self.speech_range[1]
+            and self.player.playbackState() == QMediaPlayer.PlayingState
+        ):
+            # The rest is silence.
+            self.player.stop()
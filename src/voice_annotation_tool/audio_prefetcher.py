@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from pathlib import Path
+
+from voice_annotation_tool.background_worker import BackgroundLoader
+
+PREFETCH_DISTANCE = 4
+"The number of samples before and after the selected one that are read."
+
+PREFETCH_WORKERS = 2
+"The number of files read at the same time."
+
+CACHE_BYTES = 64 * 1024 * 1024
+"The maximum size of the cached files."
+
+MAX_FILE_BYTES = CACHE_BYTES // 8
+"Files larger than this are played from disk instead of being cached."
+
+
+def read_audio_file(path: Path) -> bytes | None:
+    """Reads the content of an audio file, None if it couldn't be read
+    or is too large to be cached.
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read(MAX_FILE_BYTES + 1)
+    except OSError:
+        return None
+    if len(data) > MAX_FILE_BYTES:
+        return None
+    return data
+
+
+class AudioCache:
+    """Keeps the content of recently used audio files in memory, up to
+    a total size. The least recently used files are dropped first.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        "The total size of the cached files in bytes."
+        self._files: OrderedDict[str, bytes] = OrderedDict()
+        "Maps the paths of the files to their content, least recent first."
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._files
+
+    def get(self, path: str) -> bytes | None:
+        """Returns the content of a cached file and marks it as recently
+        used, None if it isn't cached.
+        """
+        data = self._files.get(path)
+        if data is not None:
+            self._files.move_to_end(path)
+        return data
+
+    def put(self, path: str, data: bytes):
+        """Caches the content of a file, dropping the least recently
+        used files if the cache grows too large.
+        """
+        self.discard(path)
+        if len(data) > self.max_bytes:
+            return
+        self._files[path] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, dropped = self._files.popitem(last=False)
+            self.size -= len(dropped)
+
+    def discard(self, path: str):
+        """Removes a file from the cache, for example if it changed."""
+        data = self._files.pop(path, None)
+        if data is not None:
+            self.size -= len(data)
+
+    def clear(self):
+        self._files.clear()
+        self.size = 0
+
+
+class AudioPrefetcher(BackgroundLoader):
+    """Reads the audio files of the samples next to the selected one in
+    background threads, so they can be played from memory when they
+    are selected, see `AudioCache`.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent, PREFETCH_WORKERS)
+        self.cache = AudioCache()
+        self.hits = 0
+        "The number of files that were played from memory."
+        self.misses = 0
+        "The number of files that had to be read by the player."
+
+    def data(self, path: Path) -> bytes | None:
+        """Returns the content of the file if it was read already, None
+        if it has to be read from disk.
+        """
+        data = self.cache.get(str(path))
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def prefetch(self, paths: list[Path]):
+        """Reads the given files in the background, in order. Reads of
+        other files that didn't start yet are canceled, since they are
+        no longer next to the selected sample.
+        """
+        wanted = [str(path) for path in paths]
+        self.keep_only(wanted)
+        for path in wanted:
+            if path in self.cache:
+                # Keep the neighbours of the selection in the cache.
+                self.cache.get(path)
+            else:
+                self.load(path)
+
+    def discard(self, paths: list[Path]):
+        """Drops cached files that changed on disk."""
+        for path in paths:
+            self.cache.discard(str(path))
+
+    def clear(self):
+        """Drops all cached files and pending reads, for example when
+        another project is opened.
+        """
+        self.cancel()
+        self.cache.clear()
+
+    def _load(self, path: str) -> bytes | None:
+        return read_audio_file(Path(path))
+
+    def _loaded(self, path: str, data: bytes | None):
+        if data is not None:
+            self.cache.put(path, data)
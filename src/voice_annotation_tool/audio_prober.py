@@ -0,0 +1,67 @@
+from concurrent.futures import Future
+from pathlib import Path
+from PySide6.QtCore import Signal
+
+from voice_annotation_tool.audio_metadata import (
+    AudioInfo,
+    AudioMetadataCache,
+    probe_audio_file,
+)
+from voice_annotation_tool.background_worker import BackgroundWorker
+
+PROBE_WORKERS = 8
+"The number of threads probing audio files at the same time."
+
+PROBE_BATCH_SIZE = 256
+"The number of files probed by a thread before the results are reported."
+
+
+class AudioProber(BackgroundWorker):
+    """Reads the duration and format of audio files in a pool of
+    background threads, see `probe_audio_file`.
+
+    Most of the time is spent waiting for the disk or for ffprobe, so
+    several files are probed at once. The results are reported in
+    batches in the thread of the prober.
+    """
+
+    probed = Signal(list)
+    "Emitted with a list of file names and their `AudioInfo`."
+    finished = Signal()
+    "Emitted after all files passed to `probe` were probed."
+
+    def __init__(self, parent=None):
+        super().__init__(parent, PROBE_WORKERS)
+
+    def probe(self, files: list[tuple[Path, int, int]]):
+        """Starts probing the files, given as their path, size and
+        modification time, and cancels probing the previous files.
+        """
+        self.cancel()
+        for start in range(0, len(files), PROBE_BATCH_SIZE):
+            batch = files[start : start + PROBE_BATCH_SIZE]
+            self.submit(self._report, self._probe_batch, self._generation, batch)
+        if not self.is_busy():
+            self.finished.emit()
+
+    def is_probing(self) -> bool:
+        """Returns true if some files weren't probed yet."""
+        return self.is_busy()
+
+    def save_cache(self, cache: AudioMetadataCache) -> Future:
+        """Writes a copy of the cache in a background thread."""
+        return self._executor.submit(cache.copy().save)
+
+    def _probe_batch(self, generation: int, files: list[tuple[Path, int, int]]):
+        results: list[tuple[str, AudioInfo]] = []
+        for path, size, mtime_ns in files:
+            if generation != self._generation:
+                # Canceled, the results are dropped anyway.
+                break
+            results.append((path.name, probe_audio_file(path, size, mtime_ns)))
+        return results
+
+    def _report(self, future: Future):
+        self.probed.emit(future.result())
+        if not self.is_busy():
+            self.finished.emit()
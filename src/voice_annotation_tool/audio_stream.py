@@ -0,0 +1,92 @@
+from pathlib import Path
+from typing import Iterator
+import wave
+
+import ffmpeg
+import numpy
+
+DECODE_SAMPLE_RATE = 16000
+"The sample rate files are decoded at if they aren't 16 bit wav files."
+
+CHUNK_SAMPLES = 256 * 1024
+"The number of samples decoded at once, which bounds the memory used."
+
+
+def wav_chunks(path: Path) -> tuple[int, Iterator[numpy.ndarray]] | None:
+    """Returns the sample rate of a 16 bit wav file and an iterator over
+    chunks of its samples, mixed down to mono. Returns None if the file
+    isn't a 16 bit wav file.
+    """
+    try:
+        file = wave.open(str(path), "rb")
+    except (wave.Error, EOFError, OSError):
+        return None
+    if file.getsampwidth() != 2:
+        file.close()
+        return None
+    channels = file.getnchannels()
+
+    def chunks():
+        with file:
+            while True:
+                data = file.readframes(CHUNK_SAMPLES)
+                if not data:
+                    return
+                samples = numpy.frombuffer(data, "<i2")
+                if channels > 1:
+                    samples = samples[: len(samples) - len(samples) % channels]
+                    samples = samples.reshape(-1, channels).mean(axis=1)
+                yield samples.astype(numpy.int16, copy=False)
+
+    return file.getframerate(), chunks()
+
+
+def ffmpeg_chunks(
+    path: Path, sample_rate: int = DECODE_SAMPLE_RATE
+) -> Iterator[numpy.ndarray]:
+    """Decodes any audio file with ffmpeg, yielding chunks of mono 16 bit
+    samples at the sample rate.
+    """
+    process = (
+        ffmpeg.input(str(path))
+        .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=sample_rate)
+        # Only errors are written, so the pipe can't fill up.
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+    try:
+        while True:
+            data = process.stdout.read(CHUNK_SAMPLES * 2)
+            if not data:
+                break
+            yield numpy.frombuffer(data[: len(data) - len(data) % 2], "<i2")
+        error = process.stderr.read()
+    finally:
+        process.stdout.close()
+        process.stderr.close()
+        process.wait()
+    if process.returncode:
+        raise ffmpeg.Error("ffmpeg", None, error)
+
+
+def decode_chunks(path: Path) -> tuple[int, Iterator[numpy.ndarray]]:
+    """Returns the sample rate of an audio file and an iterator over
+    chunks of its mono samples. 16 bit wav files are read directly,
+    other files are decoded with ffmpeg at `DECODE_SAMPLE_RATE`.
+    """
+    return wav_chunks(path) or (DECODE_SAMPLE_RATE, ffmpeg_chunks(path))
+
+
+def read_samples(path: Path, sample_rate: int) -> numpy.ndarray:
+    """Returns all mono 16 bit samples of an audio file at the sample
+    rate. 16 bit wav files that already have the sample rate are read
+    directly, other files are decoded with ffmpeg.
+    """
+    wav = wav_chunks(path)
+    if wav and wav[0] == sample_rate:
+        chunks = wav[1]
+    else:
+        if wav:
+            wav[1].close()
+        chunks = ffmpeg_chunks(path, sample_rate)
+    return numpy.concatenate([numpy.zeros(0, numpy.int16), *chunks])
@@ -0,0 +1,119 @@
+from concurrent.futures import Future
+from pathlib import Path
+import threading
+import time
+
+from PySide6.QtCore import Signal
+from stt import Model
+
+from voice_annotation_tool.audio_stream import read_samples
+from voice_annotation_tool.background_worker import BackgroundWorker
+
+REPORT_BATCH_SIZE = 100
+"The number of transcribed samples after which they are reported."
+
+REPORT_INTERVAL = 1.0
+"The seconds after which transcribed samples are reported at the latest."
+
+
+def transcribe(model: Model, path: Path) -> str:
+    """Returns the text spoken in an audio file, written as a sentence."""
+    samples = read_samples(path, model.sampleRate())
+    return model.stt(samples).capitalize() + "."
+
+
+class AutoAnnotator(BackgroundWorker):
+    """Transcribes audio files with a speech to text model in a
+    background thread, so the window stays responsive during runs that
+    take hours.
+
+    The model is loaded once per run. The texts are reported in
+    batches, so they can be applied to the project together. Files that
+    fail are reported and skipped.
+    """
+
+    transcribed = Signal(list)
+    "Emitted with a batch of file names and their text."
+    file_failed = Signal(str, str)
+    "Emitted with the name of a file that couldn't be transcribed and the error."
+    progress = Signal(int, int, float)
+    """Emitted with the number of examined files, the number of files
+    and the estimated seconds until all are transcribed."""
+    finished = Signal()
+    "Emitted after all files passed to `start` were examined."
+    failed = Signal(str)
+    "Emitted with the error if the model couldn't be loaded."
+
+    def __init__(self, parent=None):
+        super().__init__(parent, 1)
+        self._stop = threading.Event()
+        "Set to stop the current run."
+        self._total = 0
+        self._started = 0.0
+
+    def start(self, model_path: Path, files: list[tuple[str, Path]]):
+        """Starts transcribing the files, given as their name and path,
+        and cancels the previous run.
+        """
+        self.cancel()
+        self._stop = threading.Event()
+        self._total = len(files)
+        self._started = time.monotonic()
+        self.submit(
+            self._finish, self._run, self._generation, self._stop, model_path, files
+        )
+
+    def is_running(self) -> bool:
+        """Returns true if some files weren't transcribed yet."""
+        return self.is_busy()
+
+    def cancel(self):
+        """Stops transcribing after the current file. The texts that
+        were already reported are kept.
+        """
+        self._stop.set()
+        super().cancel()
+
+    def _run(
+        self,
+        generation: int,
+        stop: threading.Event,
+        model_path: Path,
+        files: list[tuple[str, Path]],
+    ):
+        model = Model(str(model_path))
+        texts: list[tuple[str, str]] = []
+        errors: list[tuple[str, str]] = []
+        reported = time.monotonic()
+        for done, (name, path) in enumerate(files, 1):
+            if stop.is_set():
+                return
+            try:
+                texts.append((name, transcribe(model, path)))
+            except Exception as error:
+                # A broken file shouldn't stop a run of thousands.
+                errors.append((name, str(error) or type(error).__name__))
+            now = time.monotonic()
+            if (
+                len(texts) + len(errors) >= REPORT_BATCH_SIZE
+                or now - reported >= REPORT_INTERVAL
+                or done == len(files)
+            ):
+                self.post(generation, self._report, texts, errors, done)
+                texts, errors = [], []
+                reported = now
+
+    def _report(self, texts: list, errors: list, done: int):
+        for name, error in errors:
+            self.file_failed.emit(name, error)
+        if texts:
+            self.transcribed.emit(texts)
+        elapsed = time.monotonic() - self._started
+        self.progress.emit(done, self._total, elapsed / done * (self._total - done))
+
+    def _finish(self, future: Future):
+        error = future.exception()
+        if error:
+            self.failed.emit(str(error) or type(error).__name__)
+        else:
+            self.finished.emit()
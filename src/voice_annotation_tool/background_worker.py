@@ -0,0 +1,148 @@
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Any, Callable
+
+from PySide6.QtCore import QObject, Qt, Signal, Slot
+
+
+class BackgroundWorker(QObject):
+    """Runs functions in a pool of background threads or processes and
+    handles their results in the thread of the worker.
+
+    Results and progress reports are passed through a queued signal,
+    so they arrive in the thread of the worker. Reports of work that
+    was submitted before the last `cancel` are dropped. `shutdown`
+    waits for the pool, so nothing arrives once it returned; it has to
+    be called before the worker is deleted.
+    """
+
+    _posted = Signal(int, object, tuple)
+    """Emitted from the pool with the generation of the work, the
+    function to call in the thread of the worker and its arguments."""
+
+    def __init__(
+        self,
+        parent=None,
+        workers: int | None = None,
+        executor: Executor | None = None,
+    ):
+        super().__init__(parent)
+        self._executor = executor or ThreadPoolExecutor(max_workers=workers)
+        self._generation = 0
+        "Increased by `cancel`, so reports of older work are dropped."
+        self._futures: dict[Future, Callable[[Future], Any]] = {}
+        """The submitted work whose result wasn't handled yet and the
+        functions handling it, in the order it was submitted."""
+        self._closed = False
+        # Queued even if the work finished before its callback was
+        # added, which then runs the callback in this thread.
+        self._posted.connect(self._call, Qt.QueuedConnection)
+
+    def submit(
+        self, handler: Callable[[Future], Any], function: Callable, *args
+    ) -> Future:
+        """Runs the function with the arguments in the pool. The handler
+        is called with the finished future in the thread of the worker,
+        unless the work is canceled first.
+        """
+        future = self._executor.submit(function, *args)
+        self._futures[future] = handler
+        future.add_done_callback(partial(self._future_done, self._generation))
+        return future
+
+    def post(self, generation: int, function: Callable, *args):
+        """Calls the function with the arguments in the thread of the
+        worker, unless the work of the generation was canceled since.
+        Used by the work to report progress.
+        """
+        if not self._closed:
+            self._posted.emit(generation, function, args)
+
+    def wait(self):
+        """Blocks until the submitted work finished and handles the
+        results right away, in the order the work was submitted.
+        """
+        futures = list(self._futures)
+        wait(futures)
+        for future in futures:
+            self._deliver(future)
+
+    def is_busy(self) -> bool:
+        """Returns true if the result of some work wasn't handled yet."""
+        return bool(self._futures)
+
+    def cancel(self):
+        """Drops the results of the submitted work. Work that didn't
+        start yet isn't run.
+        """
+        self._generation += 1
+        for future in self._futures:
+            future.cancel()
+        self._futures.clear()
+
+    def shutdown(self):
+        """Cancels the submitted work and waits for the running work to
+        finish, after which nothing is reported anymore.
+        """
+        if self._closed:
+            return
+        self.cancel()
+        self._closed = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _future_done(self, generation: int, future: Future):
+        # Runs in the pool, or in the thread that canceled the future.
+        self.post(generation, self._deliver, future)
+
+    def _deliver(self, future: Future):
+        handler = self._futures.pop(future, None)
+        if handler and not future.cancelled():
+            handler(future)
+
+    @Slot()
+    def _call(self, generation: int, function: Callable, args: tuple):
+        if generation == self._generation and not self._closed:
+            function(*args)
+
+
+class BackgroundLoader(BackgroundWorker):
+    """Loads values by key in the background, each key once at a time.
+
+    Subclasses implement `_load`, which runs in the pool, and `_loaded`,
+    which is called with the value in the thread of the loader.
+    """
+
+    def __init__(self, parent=None, workers: int | None = None):
+        super().__init__(parent, workers)
+        self._pending: dict[str, Future] = {}
+        "The keys whose value wasn't loaded yet."
+
+    def load(self, key: str, *args):
+        """Starts loading the value of the key, passing the arguments to
+        `_load`, unless it is already being loaded.
+        """
+        if key not in self._pending:
+            self._pending[key] = self.submit(
+                partial(self._finish, key), self._load, key, *args
+            )
+
+    def keep_only(self, keys: list[str]):
+        """Cancels the loads of other keys that didn't start yet."""
+        wanted = set(keys)
+        for key in [key for key in self._pending if key not in wanted]:
+            if self._pending[key].cancel():
+                del self._pending[key]
+
+    def cancel(self):
+        super().cancel()
+        self._pending.clear()
+
+    def _load(self, key: str, *args) -> Any:
+        raise NotImplementedError
+
+    def _loaded(self, key: str, value: Any):
+        raise NotImplementedError
+
+    def _finish(self, key: str, future: Future):
+        self._pending.pop(key, None)
+        self._loaded(key, future.result())
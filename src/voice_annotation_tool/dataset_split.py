@@ -0,0 +1,158 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+import csv
+from hashlib import blake2b
+import multiprocessing
+import os
+from pathlib import Path
+from typing import Iterable
+
+from voice_annotation_tool.annotation_export import write_tsv_rows
+from voice_annotation_tool.tsv_file import ENCODING
+
+DEFAULT_RATIOS = {"train": 0.8, "dev": 0.1, "test": 0.1}
+"The share of speakers assigned to each split, like in CommonVoice."
+
+SHARD_BATCH_SIZE = 8192
+"The number of rows collected for a shard before they are written."
+
+CLIENT_ID_COLUMN = 0
+"The column of the client id in rows created by `Annotation.to_row`."
+PATH_COLUMN = 1
+"The column of the file name in rows created by `Annotation.to_row`."
+
+HASH_RANGE = 2**64
+
+
+def stable_hash(value: str, seed: int) -> int:
+    """Returns a 64 bit hash of the value that is the same in every
+    process and every run, unlike the built-in `hash`.
+    """
+    digest = blake2b(f"{seed}:{value}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class SplitAssigner:
+    """Assigns rows to splits by hashing the client id, so all samples
+    of a speaker end up in the same split and the assignment doesn't
+    depend on the order or number of rows.
+
+    Samples without a client id are assigned by their file name, since
+    their speaker is unknown.
+    """
+
+    def __init__(self, ratios: dict[str, float] = DEFAULT_RATIOS, seed: int = 0):
+        if not ratios or any(ratio < 0 for ratio in ratios.values()):
+            raise ValueError("The split ratios must not be negative.")
+        total = sum(ratios.values())
+        if total <= 0:
+            raise ValueError("At least one split ratio must be positive.")
+        self.seed = seed
+        "Changes the assignment of all speakers when changed."
+        self.names = list(ratios)
+        "The names of the splits."
+        self._bounds: list[int] = []
+        cumulative = 0.0
+        for ratio in ratios.values():
+            cumulative += ratio / total
+            self._bounds.append(int(cumulative * HASH_RANGE))
+        self._bounds[-1] = HASH_RANGE
+        self._cache: dict[str, str] = {}
+
+    def split_of(self, row: tuple) -> str:
+        """Returns the name of the split the row belongs to."""
+        client_id = row[CLIENT_ID_COLUMN]
+        if not client_id:
+            return self._split_of_hash(stable_hash(row[PATH_COLUMN], self.seed))
+        split = self._cache.get(client_id)
+        if split is None:
+            split = self._split_of_hash(stable_hash(client_id, self.seed))
+            self._cache[client_id] = split
+        return split
+
+    def _split_of_hash(self, value: int) -> str:
+        for name, bound in zip(self.names, self._bounds):
+            if value < bound:
+                return name
+        return self.names[-1]
+
+
+def shard_file_name(split: str, shard: int, shards: int) -> str:
+    """Returns the name of the tsv file of a shard of a split."""
+    if shards == 1:
+        return f"{split}.tsv"
+    return f"{split}-{shard:05d}-of-{shards:05d}.tsv"
+
+
+def write_shard_rows(path: Path, rows: list[tuple], first: bool):
+    """Writes rows to a shard file, creating it with a header if these
+    are its first rows. Runs in a worker process.
+    """
+    if first:
+        with open(path, "w", encoding=ENCODING, newline="") as file:
+            write_tsv_rows(file, rows)
+    else:
+        with open(path, "a", encoding=ENCODING, newline="") as file:
+            csv.writer(file, delimiter="\t").writerows(rows)
+
+
+def export_splits(
+    rows: Iterable[tuple],
+    folder: Path,
+    ratios: dict[str, float] = DEFAULT_RATIOS,
+    seed: int = 0,
+    shards: int = 1,
+    workers: int | None = None,
+) -> dict[str, int]:
+    """Writes the rows to one tsv file per split and shard in the
+    folder, for example `train.tsv`, `dev.tsv` and `test.tsv`.
+
+    The rows are streamed: they are assigned to a split using a
+    `SplitAssigner` and to the shards of the split in turn, collected
+    in batches and written by a pool of worker processes. The batches
+    of one shard are written one after another, so each shard keeps
+    the order of the rows.
+
+    Returns the number of rows written to each split.
+    """
+    if shards < 1:
+        raise ValueError("There must be at least one shard.")
+    assigner = SplitAssigner(ratios, seed)
+    folder.mkdir(parents=True, exist_ok=True)
+    counts = {name: 0 for name in assigner.names}
+    buffers: dict[tuple[str, int], list[tuple]] = {}
+    pending: dict[tuple[str, int], Future] = {}
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(counts) * shards)
+    # Forking would copy the threads of the GUI into the workers.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as executor:
+
+        def flush(key: tuple[str, int]):
+            previous = pending.get(key)
+            if previous:
+                previous.result()
+            split, shard = key
+            path = folder / shard_file_name(split, shard, shards)
+            pending[key] = executor.submit(
+                write_shard_rows, path, buffers.pop(key), previous is None
+            )
+
+        for row in rows:
+            split = assigner.split_of(row)
+            shard = counts[split] % shards
+            counts[split] += 1
+            buffer = buffers.setdefault((split, shard), [])
+            buffer.append(row)
+            if len(buffer) >= SHARD_BATCH_SIZE:
+                flush((split, shard))
+        for key in list(buffers):
+            flush(key)
+        for future in pending.values():
+            future.result()
+    for split in assigner.names:
+        for shard in range(shards):
+            if (split, shard) not in pending:
+                write_shard_rows(
+                    folder / shard_file_name(split, shard, shards), [], True
+                )
+    return counts
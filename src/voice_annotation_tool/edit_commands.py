@@ -0,0 +1,77 @@
+from PySide6.QtGui import QUndoCommand
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_diff import AnnotationDiff
+from voice_annotation_tool.annotation_list_model import AnnotationListModel
+from voice_annotation_tool.project import Project
+
+TEXT_COMMAND_ID = 1
+"Identifies `TextCommand`s so consecutive ones can be merged."
+
+
+class EditCommand(QUndoCommand):
+    """Changes fields of annotations through the project, so the
+    changes are saved like any other edit.
+
+    Only the diff of the changed values is kept, see `AnnotationDiff`.
+    A command that doesn't change anything is dropped by the stack.
+    """
+
+    def __init__(self, project: Project, diff: AnnotationDiff, text: str):
+        super().__init__(text)
+        self.project = project
+        self.diff = diff
+        self.setObsolete(not diff)
+
+    def redo(self):
+        self.project.apply_diff(self.diff)
+
+    def undo(self):
+        self.project.apply_diff(self.diff, reverse=True)
+
+
+class TextCommand(EditCommand):
+    """Changes the text of an annotation. Consecutive changes of the
+    same annotation are merged, so typing is undone at once.
+    """
+
+    def id(self) -> int:
+        return TEXT_COMMAND_ID
+
+    def mergeWith(self, other: QUndoCommand) -> bool:
+        if not isinstance(other, TextCommand) or other.diff.names != self.diff.names:
+            return False
+        self.diff = self.diff.then(other.diff)
+        self.setObsolete(self.diff.is_noop())
+        return True
+
+
+class DeleteCommand(QUndoCommand):
+    """Removes annotations from the project. Their audio files are moved
+    to the trash folder of the project, so undoing the command can put
+    both back into the rows they were removed from.
+    """
+
+    def __init__(
+        self, model: AnnotationListModel, annotations: list[Annotation], text: str
+    ):
+        super().__init__(text)
+        self.model = model
+        self.annotations = annotations
+        "The annotations to delete, or that were deleted."
+        self.rows: list[int] = []
+        "The rows the deleted annotations had."
+
+    def redo(self):
+        store = self.model.project().annotations
+        rows = {
+            annotation.name: store.row_of(annotation.name)
+            for annotation in self.annotations
+            if annotation.name in store
+        }
+        self.annotations = self.model.delete_annotations(self.annotations, trash=True)
+        self.rows = [rows[annotation.name] for annotation in self.annotations]
+        self.setObsolete(not self.annotations)
+
+    def undo(self):
+        self.model.restore_annotations(self.annotations, self.rows)
@@ -0,0 +1,125 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator, TextIO
+
+
+class AnnotationJournal:
+    """Append-only log of the changes made to the annotations of a
+    project.
+
+    Every change is written as one json object per line, containing
+    the file name of the sample in the `path` key and the new values
+    of the changed fields. A `deleted` key marks a removed annotation
+    and a `renamed` key holds the new file name of a renamed sample.
+    Because every record holds absolute values, replaying a record
+    more than once has no effect.
+
+    Saving a project only has to flush the journal to disk instead of
+    rewriting the tsv file. Once the journal grows too large it is
+    compacted: the journal is moved aside, the tsv file is rewritten
+    and the moved journal is removed. If the program crashes during a
+    compaction, the moved journal is replayed before the current one
+    the next time the project is opened.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        "The file the changes are appended to."
+        self.compaction_path = path.with_name(path.name + ".compacting")
+        "The file the journal is moved to while the tsv file is rewritten."
+        self._file: TextIO | None = None
+        self.committed_size = self.size()
+        """The size of the journal when the project was last saved.
+        Changes after this are discarded by `rollback`."""
+
+    @staticmethod
+    def for_tsv_file(tsv_file: Path) -> "AnnotationJournal":
+        """Returns the journal that is stored next to a tsv file."""
+        return AnnotationJournal(tsv_file.with_name(tsv_file.name + ".journal"))
+
+    def read(self) -> Iterator[dict[str, Any]]:
+        """Yields the records of an interrupted compaction followed by
+        the records of the journal.
+
+        A partially written last line, left behind by a crash, is
+        ignored.
+        """
+        for path in [self.compaction_path, self.path]:
+            if not path.is_file():
+                continue
+            with open(path) as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+
+    def append(self, records: Iterable[dict[str, Any]]):
+        """Writes records to the end of the journal.
+
+        The records are handed to the operating system right away, so
+        they survive a crash of the program but not of the system.
+        """
+        if not self._file:
+            self._file = open(self.path, "a")
+        self._file.write("".join(json.dumps(record) + "\n" for record in records))
+        self._file.flush()
+
+    def size(self) -> int:
+        """Returns the size of the journal in bytes."""
+        if self._file:
+            return self._file.tell()
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def sync(self, size: int | None = None):
+        """Forces the journal to disk and marks its content up to the
+        given size as saved, or all of it if no size is given.
+
+        Can be called from another thread than the one appending to
+        the journal, as long as the journal isn't closed meanwhile.
+        """
+        if size is None:
+            size = self.size()
+        if self._file:
+            os.fsync(self._file.fileno())
+        self.committed_size = size
+
+    def rollback(self):
+        """Removes the changes appended since the journal was last
+        synced.
+        """
+        self.close()
+        if self.size() > self.committed_size:
+            os.truncate(self.path, self.committed_size)
+
+    def begin_compaction(self):
+        """Moves the journal aside so new changes start a new journal
+        while the tsv file is rewritten.
+        """
+        self.close()
+        if not self.path.is_file():
+            return
+        if self.compaction_path.is_file():
+            # A previous compaction failed, keep its records in order.
+            with open(self.compaction_path, "a") as compacting:
+                compacting.write(self.path.read_text())
+            self.path.unlink()
+        else:
+            os.replace(self.path, self.compaction_path)
+        self.committed_size = 0
+
+    def end_compaction(self):
+        """Removes the moved journal once the tsv file contains its
+        changes.
+        """
+        self.compaction_path.unlink(missing_ok=True)
+
+    def close(self):
+        """Closes the journal file. It is reopened by the next append."""
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,70 @@
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+CHUNK_SIZE = 64 * 1024
+"The number of characters read from a file at once."
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(file: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yields the elements of the Json array stored in the file one by
+    one, without reading the whole file into memory.
+
+    Raises a ValueError if the file doesn't contain a Json array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    end_of_file = False
+    expected = "["
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        need_more = position == len(buffer)
+        if not need_more:
+            char = buffer[position]
+            if expected == "[":
+                if char != "[":
+                    raise ValueError("The file doesn't contain a Json array.")
+                position += 1
+                expected = "first"
+                continue
+            if expected == "," or (expected == "first" and char == "]"):
+                position += 1
+                if char == "]":
+                    return
+                if char != ",":
+                    raise ValueError(f"Expected ',' at character {position}.")
+                expected = "value"
+                continue
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if end_of_file:
+                    raise
+                need_more = True
+            else:
+                # A number at the end of the buffer might continue in
+                # the next chunk.
+                if end < len(buffer) or end_of_file:
+                    position = end
+                    expected = ","
+                    yield value
+                    continue
+                need_more = True
+        if end_of_file:
+            raise ValueError("The Json array isn't closed.")
+        chunk = file.read(chunk_size)
+        end_of_file = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_json_lines(file: TextIO) -> Iterator[Any]:
+    """Yields the values of a Json Lines file, which contains one Json
+    value per line. Empty lines are skipped.
+    """
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
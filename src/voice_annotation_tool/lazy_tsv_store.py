@@ -0,0 +1,500 @@
+from array import array
+from collections import OrderedDict
+from itertools import accumulate
+from contextlib import AbstractContextManager, nullcontext
+import csv
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+from weakref import WeakValueDictionary
+
+from voice_annotation_tool.annotation import SEPARATORS, Annotation, shared_folder
+from voice_annotation_tool.annotation_store import SlotHoles
+from voice_annotation_tool.atomic_file import atomic_write
+from voice_annotation_tool.tsv_file import ENCODING
+
+SCAN_CHUNK_SIZE = 8 * 1024 * 1024
+"The number of bytes of the tsv file that are indexed at once."
+
+NOT_IN_FILE = -1
+"The offset of annotations that were added after the tsv file was read."
+
+
+def row_offsets_path(tsv_file: Path) -> Path:
+    """Returns the file the row offsets of a tsv file are cached in."""
+    return tsv_file.with_name(tsv_file.name + ".offsets")
+
+
+def rewritten_tsv_path(tsv_file: Path) -> Path:
+    """Returns the file a lazily read tsv file is rewritten to before
+    it is swapped in, see `LazyTsvStore.replace_file`.
+    """
+    return tsv_file.with_name(f".{tsv_file.name}.new")
+
+
+class LazyTsvStore:
+    """Stores the annotations of a project that are read from a tsv
+    file on demand.
+
+    The tsv file is memory-mapped and scanned once for the offset and
+    file name of every row, which is cached next to the tsv file, so
+    reopening an unchanged file only reads the cache. A row is only
+    parsed into an annotation when it is accessed. Annotations that
+    were added or changed are kept in an overlay, all others are
+    parsed again once they are no longer referenced. Deleted rows leave
+    an empty slot behind until half of the slots are empty, see
+    `SlotHoles`.
+
+    Can be used instead of an `AnnotationStore` for uncompressed tsv
+    files.
+    """
+
+    CACHE_SIZE = 4096
+    "The number of recently accessed annotations kept in memory."
+
+    def __init__(self, tsv_file: Path, modified: set[str] | None = None):
+        self.tsv_file = tsv_file
+        "The file the annotations are read from."
+        self.folder: Path | None = None
+        "The folder annotations without a folder are placed in when added."
+        self.modified = set() if modified is None else modified
+        "The names of the annotations that are marked as modified."
+        self._offsets = array("q")
+        "The offset of the row of every slot in the tsv file."
+        self._index: dict[str, int] = {}
+        "Maps the file name of an annotation to its slot."
+        self._deleted: set[int] = set()
+        "Slots of deleted annotations that weren't compacted yet."
+        self._holes: SlotHoles | None = None
+        "Counts the slots in `_deleted` to map rows to slots."
+        self._overlay: dict[int, Annotation] = {}
+        "Annotations that were added or changed, by slot."
+        self._live: WeakValueDictionary[int, Annotation] = WeakValueDictionary()
+        "Annotations that are referenced somewhere, by slot."
+        self._recent: OrderedDict[int, Annotation] = OrderedDict()
+        "Recently accessed annotations, by slot."
+        self._header: list[str] = []
+        self._map: mmap.mmap | None = None
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[Annotation]:
+        for slot in range(len(self._offsets)):
+            if slot not in self._deleted:
+                yield self._annotation(slot)
+
+    def __getitem__(self, row: int) -> Annotation:
+        if row < 0:
+            row += len(self._index)
+        if not 0 <= row < len(self._index):
+            raise IndexError(row)
+        if self._holes is None:
+            return self._annotation(row)
+        return self._annotation(self._holes.slot_of(row))
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index
+
+    def get(self, name: str) -> Annotation | None:
+        """Returns the annotation of the sample with the given file
+        name, or None if there is none.
+        """
+        slot = self._index.get(name)
+        if slot is None:
+            return None
+        return self._annotation(slot)
+
+    def names(self) -> Iterable[str]:
+        """Returns the file names of all stored annotations."""
+        return self._index.keys()
+
+    def row_of(self, name: str) -> int:
+        """Returns the row of the annotation with the given file name.
+
+        Raises a KeyError if there is no such annotation.
+        """
+        slot = self._index[name]
+        if self._holes is None:
+            return slot
+        return slot - self._holes.before(slot)
+
+    def add(self, annotation: Annotation, overwrite=False) -> bool:
+        """Appends the annotation to the end of the store. If an
+        annotation with the same file name exists it is replaced in
+        place if overwrite is true, otherwise nothing is changed.
+
+        Returns true if the annotation was added.
+        """
+        if annotation.folder is None and self.folder:
+            annotation.folder = shared_folder(self.folder)
+        slot = self._index.get(annotation.name)
+        if slot is None:
+            slot = len(self._offsets)
+            self._index[annotation.name] = slot
+            self._offsets.append(NOT_IN_FILE)
+            if self._holes is not None:
+                self._holes.append()
+        elif not overwrite:
+            return False
+        self._live.pop(slot, None)
+        self._recent.pop(slot, None)
+        self._overlay[slot] = annotation
+        return True
+
+    def insert_many(self, items: Iterable[tuple[int, Annotation]]):
+        """Inserts annotations at the given rows, which are the rows
+        they have afterwards and have to be ascending. Rows past the
+        end append the annotation. The file names must not be stored
+        yet.
+        """
+        new_slots = array("q", [-1]) * len(self._offsets)
+        offsets = array("q")
+        inserted = []
+        slot = 0
+        for row, annotation in items:
+            while len(offsets) < row and slot < len(self._offsets):
+                if slot not in self._deleted:
+                    new_slots[slot] = len(offsets)
+                    offsets.append(self._offsets[slot])
+                slot += 1
+            inserted.append((len(offsets), annotation))
+            offsets.append(NOT_IN_FILE)
+        for slot in range(slot, len(self._offsets)):
+            if slot not in self._deleted:
+                new_slots[slot] = len(offsets)
+                offsets.append(self._offsets[slot])
+        self._move_slots(new_slots, offsets)
+        for slot, annotation in inserted:
+            if annotation.folder is None and self.folder:
+                annotation.folder = shared_folder(self.folder)
+            self._index[annotation.name] = slot
+            self._overlay[slot] = annotation
+
+    def update(self, annotation: Annotation):
+        """Keeps the changed annotation in memory, since it differs
+        from the row in the tsv file now.
+        """
+        self._overlay[self._index[annotation.name]] = annotation
+
+    def remove(self, name: str) -> Annotation | None:
+        """Removes the annotation with the given file name and
+        returns it, or None if there is no such annotation.
+        """
+        slot = self._index.get(name)
+        if slot is None:
+            return None
+        annotation = self._annotation(slot)
+        del self._index[name]
+        self._overlay.pop(slot, None)
+        self._live.pop(slot, None)
+        self._recent.pop(slot, None)
+        if slot == len(self._offsets) - 1:
+            self._offsets.pop()
+            if self._holes is not None:
+                self._holes.pop()
+            return annotation
+        self._deleted.add(slot)
+        if self._holes is None:
+            self._holes = SlotHoles(len(self._offsets))
+        self._holes.delete(slot)
+        if len(self._deleted) * 2 > len(self._offsets):
+            self._compact()
+        return annotation
+
+    def remove_many(self, names: Iterable[str]):
+        """Removes the annotations with the given file names, ignoring
+        names without an annotation.
+        """
+        for name in names:
+            self.remove(name)
+
+    def rename(self, old_name: str, new_name: str):
+        """Moves the annotation stored under the old file name to the
+        new name, keeping its row.
+        """
+        if new_name == old_name:
+            return
+        if new_name in self._index:
+            raise KeyError(new_name)
+        slot = self._index[old_name]
+        self._overlay[slot] = self._annotation(slot)
+        self._index[new_name] = self._index.pop(old_name)
+
+    def batch(self) -> AbstractContextManager:
+        """Returns a context in which many annotations can be added
+        or changed efficiently.
+        """
+        return nullcontext()
+
+    def rows(self) -> Iterator[tuple]:
+        """Yields the annotations converted using `Annotation.to_row`.
+
+        Rows that weren't changed are parsed without keeping an
+        annotation in memory.
+        """
+        for slot in range(len(self._offsets)):
+            if slot in self._deleted:
+                continue
+            annotation = self._overlay.get(slot)
+            if annotation is None:
+                annotation = self._live.get(slot)
+            if annotation is None:
+                annotation = self._read(self._offsets[slot])
+            yield annotation.to_row()
+
+    def snapshot_rows(self) -> Iterable[tuple]:
+        """Returns the rows of the annotations as they are now, which
+        can be read from another thread while the store is changed.
+
+        Only the rows of changed annotations are converted right away,
+        the other rows are parsed from the tsv file when iterated.
+        """
+        items: list[tuple | int] = []
+        for slot in range(len(self._offsets)):
+            if slot in self._deleted:
+                continue
+            annotation = self._overlay.get(slot)
+            items.append(annotation.to_row() if annotation else self._offsets[slot])
+        return (
+            self._read(item).to_row() if isinstance(item, int) else item
+            for item in items
+        )
+
+    def clear(self):
+        """Removes all annotations."""
+        self._offsets = array("q")
+        self._index.clear()
+        self._deleted.clear()
+        self._holes = None
+        self._overlay.clear()
+        self._live.clear()
+        self._recent.clear()
+
+    def replace_file(self, path: Path):
+        """Moves the file at the path in place of the tsv file and reads
+        the rows from it from now on. The file has to contain the rows
+        returned by an earlier `snapshot_rows`.
+
+        The tsv file is unmapped while it is replaced, since mapped
+        files can't be replaced on every platform. The rows keep their
+        order, the rows of annotations that weren't changed since the
+        snapshot are looked up in the new file by their name.
+        """
+        self.close()
+        os.replace(path, self.tsv_file)
+        index, offsets = self._index, self._offsets
+        self._index, self._offsets = {}, array("q")
+        self._open()
+        new_index, new_offsets = self._index, self._offsets
+        self._index = index
+        self._offsets = array("q", [NOT_IN_FILE]) * len(offsets)
+        for name, slot in index.items():
+            new_slot = new_index.get(name)
+            if new_slot is not None:
+                self._offsets[slot] = new_offsets[new_slot]
+
+    def close(self):
+        """Unmaps the tsv file. Annotations that weren't read can't be
+        accessed afterwards.
+        """
+        if self._map:
+            self._map.close()
+            self._map = None
+
+    def _open(self):
+        """Maps the tsv file and reads the header and row offsets."""
+        with open(self.tsv_file, "rb") as file:
+            if os.fstat(file.fileno()).st_size:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map:
+            self._load_offsets()
+
+    def _annotation(self, slot: int) -> Annotation:
+        """Returns the annotation in the slot, parsing its row if it
+        isn't in memory.
+        """
+        annotation = self._overlay.get(slot)
+        if annotation is not None:
+            return annotation
+        annotation = self._live.get(slot)
+        if annotation is None:
+            annotation = self._read(self._offsets[slot])
+            self._live[slot] = annotation
+        self._recent[slot] = annotation
+        self._recent.move_to_end(slot)
+        if len(self._recent) > self.CACHE_SIZE:
+            self._recent.popitem(last=False)
+        return annotation
+
+    def _read(self, offset: int) -> Annotation:
+        """Parses the row starting at the given offset."""
+        fields = next(csv.reader(self._lines(offset), delimiter="\t"))
+        annotation = Annotation(dict(zip(self._header, fields)))
+        annotation.modified = annotation.name in self.modified
+        if annotation.folder is None and self.folder:
+            annotation.folder = shared_folder(self.folder)
+        return annotation
+
+    def _lines(self, offset: int) -> Iterator[str]:
+        """Yields the lines of the tsv file starting at the offset."""
+        data = self._map
+        while offset < len(data):
+            end = data.find(b"\n", offset)
+            end = len(data) if end == -1 else end + 1
+            yield data[offset:end].decode(ENCODING)
+            offset = end
+
+    def _load_offsets(self):
+        """Reads the header and the row offsets, from the cache if it
+        belongs to the current tsv file.
+        """
+        self._header = next(csv.reader(self._lines(0), delimiter="\t"))
+        stat = os.stat(self.tsv_file)
+        key = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        cache = row_offsets_path(self.tsv_file)
+        try:
+            with open(cache, "rb") as file:
+                if json.loads(file.readline()) == key:
+                    self._offsets.frombytes(file.read(int(file.readline())))
+                    names = file.read().decode().split("\n")
+                    self._index = {name: slot for slot, name in enumerate(names)}
+                    if len(self._index) == len(self._offsets):
+                        return
+        except (OSError, ValueError):
+            pass
+        self._offsets = array("q")
+        self._index = {}
+        self._scan()
+        try:
+            with atomic_write(cache, binary=True) as file:
+                file.write(json.dumps(key).encode() + b"\n")
+                file.write(b"%d\n" % (len(self._offsets) * self._offsets.itemsize))
+                file.write(self._offsets.tobytes())
+                file.write("\n".join(self._index).encode())
+        except OSError as error:
+            print("Failed to cache the row offsets:", error)
+
+    def _scan(self):
+        """Finds the offset and file name of every row of the tsv file.
+
+        If a file name occurs more than once, the last row replaces
+        the earlier ones at the position of the first, like when the
+        file is loaded into an `AnnotationStore`.
+        """
+        data = self._map
+        size = len(data)
+        column = self._header.index("path")
+        offset = data.find(b"\n") + 1 or size
+        while offset < size:
+            quote = data.find(b'"', offset)
+            if quote == -1:
+                self._scan_plain(offset, size, column)
+                return
+            row = data.rfind(b"\n", offset, quote) + 1 or offset
+            if row > offset:
+                self._scan_plain(offset, row, column)
+            offset = self._scan_quoted(row, column)
+
+    def _scan_plain(self, start: int, end: int, column: int):
+        """Indexes the rows between the offsets, which don't contain
+        quotes, in chunks of whole lines.
+        """
+        data = self._map
+        while start < end:
+            stop = data.rfind(b"\n", start, min(end, start + SCAN_CHUNK_SIZE)) + 1
+            if stop <= start:
+                stop = end
+            lines = data[start:stop].split(b"\n")
+            if not lines[-1]:
+                lines.pop()
+            offsets = list(accumulate(map((1).__add__, map(len, lines)), initial=start))
+            offsets.pop()
+            try:
+                fields = [line.split(b"\t", column + 1)[column] for line in lines]
+            except IndexError:
+                fields = None
+            if fields is None or b"" in fields:
+                # Some rows have no file name, like blank lines.
+                rows = [
+                    (parts[column], offset)
+                    for line, offset in zip(lines, offsets)
+                    if len(parts := line.split(b"\t", column + 1)) > column
+                    and parts[column].rstrip(b"\r")
+                ]
+                fields = [field for field, _ in rows]
+                offsets = [offset for _, offset in rows]
+            if not fields:
+                start = stop
+                continue
+            names = b"\n".join(fields).decode(ENCODING).replace("\r", "")
+            if any(separator in names for separator in SEPARATORS):
+                names = "\n".join(Path(name).name for name in names.split("\n"))
+            self._add_rows(names.split("\n"), offsets)
+            start = stop
+
+    def _scan_quoted(self, offset: int, column: int) -> int:
+        """Indexes the row at the offset, which contains quotes, and
+        returns the offset of the next row.
+        """
+        lines: list[str] = []
+        # The reader only pulls the lines of one row, so the consumed
+        # lines are the row, quoted the way csv reads it.
+        source = (lines.append(line) or line for line in self._lines(offset))
+        fields = next(csv.reader(source, delimiter="\t"), [])
+        text = "".join(lines)
+        if len(fields) > column and fields[column]:
+            name = fields[column]
+            if not SEPARATORS.isdisjoint(name) or name == ".":
+                name = Path(name).name
+            self._add_rows([name], [offset])
+        return offset + len(text.encode(ENCODING))
+
+    def _add_rows(self, names: list[str], offsets: Iterable[int]):
+        """Adds the rows with the given names at the given offsets."""
+        first = len(self._offsets)
+        added = dict(zip(names, range(first, first + len(names))))
+        if len(added) == len(names) and self._index.keys().isdisjoint(added):
+            self._index.update(added)
+            self._offsets.extend(offsets)
+            return
+        for name, offset in zip(names, offsets):
+            slot = self._index.get(name)
+            if slot is None:
+                self._index[name] = len(self._offsets)
+                self._offsets.append(offset)
+            else:
+                self._offsets[slot] = offset
+
+    def _compact(self):
+        """Removes the slots of deleted annotations so rows map
+        directly to slots.
+        """
+        new_slots = array("q", [-1]) * len(self._offsets)
+        offsets = array("q")
+        for slot, offset in enumerate(self._offsets):
+            if slot not in self._deleted:
+                new_slots[slot] = len(offsets)
+                offsets.append(offset)
+        self._move_slots(new_slots, offsets)
+
+    def _move_slots(self, new_slots: array, offsets: array):
+        """Moves the annotations to the slots given for their current
+        slots, dropping the deleted slots, and uses the given offsets.
+        """
+        self._offsets = offsets
+        self._index = {name: new_slots[slot] for name, slot in self._index.items()}
+        self._overlay = {
+            new_slots[slot]: annotation for slot, annotation in self._overlay.items()
+        }
+        self._live = WeakValueDictionary(
+            {new_slots[slot]: annotation for slot, annotation in self._live.items()}
+        )
+        self._recent = OrderedDict(
+            (new_slots[slot], annotation) for slot, annotation in self._recent.items()
+        )
+        self._deleted.clear()
+        self._holes = None
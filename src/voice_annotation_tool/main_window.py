@@ -1,19 +1,30 @@
 from json.decoder import JSONDecodeError
 import json
-import wave
-import numpy
+import math
+import shutil
 import ffmpeg
-from stt import Model
 from pathlib import Path
 from typing import Any, TextIO
-from PySide6.QtGui import QDesktopServices
-from PySide6.QtWidgets import QMainWindow, QFileDialog, QMessageBox
-from PySide6.QtCore import QStandardPaths, Signal, Slot
+from PySide6.QtGui import QCloseEvent, QDesktopServices, QKeySequence
+from PySide6.QtWidgets import (
+    QMainWindow,
+    QFileDialog,
+    QMessageBox,
+    QInputDialog,
+    QProgressDialog,
+)
+from PySide6.QtCore import QTimer, Qt, Signal, Slot
 
 from voice_annotation_tool.project_settings_dialog import ProjectSettingsDialog
-from voice_annotation_tool.project import Project
+from voice_annotation_tool.annotation_diff import AnnotationDiff
+from voice_annotation_tool.annotation_export import arrow_available
+from voice_annotation_tool.auto_annotator import AutoAnnotator
+from voice_annotation_tool.project import ImportResult, Project
+from voice_annotation_tool.project_saver import ProjectSaver
 from voice_annotation_tool.opened_project_frame import OpenedProjectFrame
+from voice_annotation_tool.recording_importer import RecordingImporter
 from voice_annotation_tool.shortcut_settings_dialog import ShortcutSettingsDialog
+from voice_annotation_tool.speech_scanner import SpeechScanner
 from voice_annotation_tool.choose_project_frame import ChooseProjectFrame
 from voice_annotation_tool.about_dialog import AboutDialog
 from voice_annotation_tool.main_ui import Ui_MainWindow
@@ -52,11 +63,6 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         None if the project was never saved.
         """
-        self.last_saved_hash: int = 0
-        """The hash of the project when it was last saved.
-
-        Zero if no project is loaded.
-        """
         self.recent_projects: list[Path] = []
         """List of recently opened projects.
 
@@ -65,11 +71,61 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         self.language_model: Path | None = None
 
+        self.saver = ProjectSaver(self)
+        "Writes the project to disk in the background."
+        self.saver.saved.connect(self.project_saved)
+        self.saver.failed.connect(self.save_failed)
+        self.save_requested = False
+        """True if the project should be saved again once the
+        running save is finished."""
+        self.autosave_interval: int = 0
+        "Minutes between automatic saves, zero if autosave is disabled."
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.timeout.connect(self.autosave)
+        self.speech_scanner = SpeechScanner(self)
+        "Detects the speech in the audio files in worker processes."
+        self.speech_scanner.detected.connect(self.speech_detected)
+        self.speech_scanner.progress.connect(self.speech_detection_progressed)
+        self.speech_scanner.finished.connect(self.speech_detection_finished)
+        self.speech_progress: QProgressDialog | None = None
+        "Shows the progress of the speech detection while it runs."
+        self.recording_importer = RecordingImporter(self)
+        "Splits long recordings into segments in the background."
+        self.recording_importer.progress.connect(self.recording_import_progressed)
+        self.recording_importer.finished.connect(self.recording_imported)
+        self.recording_importer.failed.connect(self.recording_import_failed)
+        self.recording_progress: QProgressDialog | None = None
+        "Shows the progress of splitting a recording while it runs."
+        self.auto_annotator = AutoAnnotator(self)
+        "Transcribes samples with the language model in the background."
+        self.auto_annotator.transcribed.connect(self.auto_annotations_transcribed)
+        self.auto_annotator.file_failed.connect(self.auto_annotation_file_failed)
+        self.auto_annotator.progress.connect(self.auto_annotation_progressed)
+        self.auto_annotator.finished.connect(self.auto_annotation_finished)
+        self.auto_annotator.failed.connect(self.auto_annotation_failed)
+        self.auto_annotation_progress: QProgressDialog | None = None
+        "Shows the progress of the transcription while it runs."
+        self.auto_annotation_errors: list[tuple[str, str]] = []
+        "The names of the samples that couldn't be transcribed and the errors."
+        self.auto_annotation_count = 0
+        "The number of samples that were annotated by the current run."
+
         # Layout
         self.verticalLayout.addWidget(self.opened_project_frame)
         self.verticalLayout.addWidget(self.choose_project_frame)
         self.opened_project_frame.hide()
 
+        undo_stack = self.opened_project_frame.undo_stack
+        self.actionUndo = undo_stack.createUndoAction(self, self.tr("&Undo"))
+        self.actionUndo.setShortcut(QKeySequence.Undo)
+        self.actionRedo = undo_stack.createRedoAction(self, self.tr("&Redo"))
+        self.actionRedo.setShortcut(QKeySequence.Redo)
+        first_edit_action = self.menuEdit.actions()[0]
+        self.menuEdit.insertActions(
+            first_edit_action, [self.actionUndo, self.actionRedo]
+        )
+        self.menuEdit.insertSeparator(first_edit_action)
+
         self.choose_project_frame.project_opened.connect(self.recent_project_chosen)
         self.choose_project_frame.create_project_pressed.connect(self.new_project)
         self.actionNewProject.triggered.connect(self.new_project)
@@ -82,20 +138,32 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.actionAbout.triggered.connect(self.about)
         self.actionProjectSettings.triggered.connect(self.show_project_settings)
         self.actionImportJson.triggered.connect(self.importJson)
+        self.actionImportRecording.triggered.connect(self.import_recording)
         self.actionExportJson.triggered.connect(self.exportJson)
         self.actionImportCSV.triggered.connect(self.importCSV)
         self.actionExportCSV.triggered.connect(self.exportCSV)
+        self.actionExportDataset.triggered.connect(self.exportDataset)
+        self.actionExportSplits.triggered.connect(self.exportSplits)
+        self.actionExportTrimmedAudio.triggered.connect(self.exportTrimmedAudio)
         self.actionDeleteSelected.triggered.connect(self.deleteSelected)
         self.actionConfigureShortcuts.triggered.connect(self.configure_shortcuts)
         self.actionDocumentation.triggered.connect(self.open_documentation)
         self.actionSelectLanguageModel.triggered.connect(self.select_language_model)
         self.actionAutoGenerate.triggered.connect(self.auto_generate_annotations)
+        self.actionConfigureAutosave.triggered.connect(self.configure_autosave)
+        self.actionDetectSpeech.triggered.connect(self.detect_speech)
+        self.actionSkipSilence.toggled.connect(self.skip_silence_toggled)
+        self.actionSkipSilence.triggered.connect(self.skip_silence_triggered)
 
         self.project_actions = [
             self.actionImportCSV,
             self.actionImportJson,
+            self.actionImportRecording,
             self.actionExportCSV,
             self.actionExportJson,
+            self.actionExportDataset,
+            self.actionExportSplits,
+            self.actionExportTrimmedAudio,
             self.actionSaveProject,
             self.actionSaveProjectAs,
             self.actionDeleteProject,
@@ -103,6 +171,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.actionCloseProject,
             self.actionProjectSettings,
             self.actionAutoGenerate,
+            self.actionDetectSpeech,
         ]
         "Actions that can only be used with a project open."
 
@@ -131,22 +200,36 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         if "language_model" in data:
             self.language_model = Path(data["language_model"])
         self.opened_project_frame.apply_shortcuts(data.get("shortcuts", []))
+        self.set_autosave_interval(data.get("autosave_interval", 0))
+        self.actionSkipSilence.setChecked(data.get("skip_silence", True))
 
     def save_settings(self, to: TextIO):
         """Saves the `recent_projects` list and keyboard
         shortcuts to a json file.
         """
-        data: dict[str, str | list[str]] = {
+        data: dict[str, str | int | bool | list[str]] = {
             "recent_projects": list(map(str, self.recent_projects)),
             "shortcuts": self.opened_project_frame.get_shortcuts(),
             "language_model": str(self.language_model),
+            "autosave_interval": self.autosave_interval,
+            "skip_silence": self.actionSkipSilence.isChecked(),
         }
         json.dump(data, to)
 
+    def set_autosave_interval(self, minutes: int):
+        """Sets the minutes between automatic saves. Zero disables
+        autosave.
+        """
+        self.autosave_interval = minutes
+        if minutes > 0:
+            self.autosave_timer.start(minutes * 60 * 1000)
+        else:
+            self.autosave_timer.stop()
+
     def set_current_project(self, project: Project):
         """Sets the current project and loads it into the GUI."""
         self.project = project
-        self.last_saved_hash = hash(project)
+        self.project.mark_saved()
         if self.project_file:
             self.setWindowTitle(self.project_file.name)
         else:
@@ -191,6 +274,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         If there are any issues with the project, report
         them to the user.
         """
+        self.close_current_project()
         self.project_file = path
         self.project = Project()
         with open(path) as file:
@@ -202,9 +286,12 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 message.setWindowTitle(self.tr("Error"))
                 message.setText(self.tr("Invalid project."))
                 return message.exec()
-            if self.project.tsv_file and self.project.tsv_file.is_file():
-                with open(self.project.tsv_file, newline="") as file:
-                    self.project.load_tsv_file(file)
+            if self.project.database and self.project.database.is_file():
+                self.project.use_database(self.project.database)
+            elif self.project.tsv_file and self.project.tsv_file.is_file():
+                if self.project.database:
+                    self.project.use_database(self.project.database)
+                self.project.load_tsv()
             else:
                 message = QMessageBox()
                 message.setText(
@@ -215,6 +302,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 message.setWindowTitle(self.tr("Warning"))
                 message.setIcon(QMessageBox.Warning)
                 message.exec()
+            self.project.open_journal()
             if self.project.audio_folder:
                 self.project.load_audio_files(self.project.audio_folder)
             else:
@@ -233,16 +321,21 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     def save_current_project(self):
         """Save the annotations and project file of the
         current project.
+
+        The files are written in the background from a snapshot of
+        the project. If a save is still running, the project is saved
+        again once it is finished.
         """
+        self.opened_project_frame.flush_edits()
         if not self.project_file:
             return self.save_project_as()
-        self.last_saved_hash = hash(self.project)
-        with open(self.project_file, "w") as file:
-            self.project.save(file, self.project_file.parent)
-        if self.project.tsv_file and self.project.tsv_file.parent.is_dir():
-            with open(self.project.tsv_file, "w", newline="") as file:
-                self.project.save_annotations(file)
-        else:
+        if self.saver.is_saving():
+            self.save_requested = True
+            return
+        snapshot = self.project.snapshot(self.project_file.parent)
+        self.project.mark_saved()
+        self.saver.save(snapshot, self.project_file)
+        if not snapshot.tsv_file:
             message = QMessageBox()
             message.setText(
                 self.tr(
@@ -261,7 +354,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         Returns true if the user is ok with the status of
         the project, false if they canceled the operation.
         """
-        if hash(self.project) == self.last_saved_hash:
+        self.opened_project_frame.flush_edits()
+        if not self.project.is_modified():
             return True
 
         message = QMessageBox(self)
@@ -277,17 +371,54 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 if not self.project_file:
                     return True
             case QMessageBox.Discard:
+                self.saver.wait()
+                self.project.discard_unsaved_changes()
                 return True
             case QMessageBox.Cancel:
                 return False
         # Unreachable.
         return True
 
+    def close_current_project(self):
+        """Waits for running saves of the current project and stops
+        recording its changes.
+        """
+        self.save_requested = False
+        self.saver.wait()
+        self.opened_project_frame.audio_folder_watcher.watch(None)
+        if self.speech_scanner.is_scanning():
+            self.speech_scanner.cancel()
+            self.speech_detection_finished()
+        if self.recording_importer.is_running():
+            self.recording_import_canceled()
+        if self.auto_annotator.is_running():
+            self.auto_annotator.cancel()
+            self.close_auto_annotation_progress()
+        # The trash of the project is emptied, so deletions can't be
+        # undone anymore.
+        self.opened_project_frame.undo_stack.clear()
+        self.project.close()
+
+    def shutdown(self):
+        """Stops the background threads and processes, before the window
+        is deleted.
+        """
+        self.saver.shutdown()
+        self.opened_project_frame.shutdown()
+        self.speech_scanner.shutdown()
+        self.recording_importer.shutdown()
+        self.auto_annotator.shutdown()
+
+    def closeEvent(self, event: QCloseEvent):
+        self.shutdown()
+        super().closeEvent(event)
+
     def return_to_start_screen(self):
         """Close the current project and set up the UI as
         it was before opening a project.
         """
-        self.last_saved_hash = 0
+        self.close_current_project()
+        self.project = Project()
         self.project_file = None
         self.setWindowTitle(self.original_title)
         self.opened_project_frame.hide()
@@ -298,6 +429,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     @Slot()
     def new_project(self):
         if self.confirm_discard_unsaved_changes():
+            self.close_current_project()
             self.project_file = None
             self.set_current_project(Project())
 
@@ -339,6 +471,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         )
         if result != QMessageBox.Ok:
             return
+        self.saver.wait()
         self.project.delete_tsv()
         if self.project_file:
             self.project_file.unlink()
@@ -352,8 +485,45 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     @Slot()
     def quit(self):
         if self.confirm_discard_unsaved_changes():
+            self.close_current_project()
+            self.shutdown()
             exit()
 
+    @Slot()
+    def autosave(self):
+        if self.project_file and self.project.is_modified():
+            self.save_current_project()
+
+    @Slot(Path)
+    def project_saved(self, project_file: Path):
+        if self.save_requested and project_file == self.project_file:
+            self.save_requested = False
+            self.save_current_project()
+
+    @Slot(Path, str)
+    def save_failed(self, project_file: Path, error: str):
+        if project_file == self.project_file:
+            self.project.mark_unsaved()
+        QMessageBox.warning(
+            self,
+            self.tr("Error"),
+            self.tr("Failed to save the project: {error}").format(error=error),
+        )
+
+    @Slot()
+    def configure_autosave(self):
+        minutes, accepted = QInputDialog.getInt(
+            self,
+            self.tr("Autosave"),
+            self.tr("Minutes between automatic saves (0 to disable):"),
+            self.autosave_interval,
+            0,
+            24 * 60,
+        )
+        if accepted:
+            self.set_autosave_interval(minutes)
+            self.settings_changed.emit()
+
     @Slot()
     def about(self):
         AboutDialog().exec()
@@ -366,7 +536,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         if not path:
             return
         with open(path, newline="") as file:
-            self.project.importCSV(file)
+            result = self.project.importCSV(file)
+        self.imported(result)
 
     @Slot()
     def exportCSV(self):
@@ -381,12 +552,40 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     @Slot()
     def importJson(self):
         path, _ = QFileDialog.getOpenFileName(
-            self, self.tr("Import Json"), "", self.tr("Json Files (*.json)")
+            self,
+            self.tr("Import Json"),
+            "",
+            self.tr("Json Files (*.json);;Json Lines Files (*.jsonl)"),
         )
         if not path:
             return
         with open(path) as file:
-            self.project.importJson(file)
+            if path.endswith(".jsonl"):
+                result = self.project.importJsonLines(file)
+            else:
+                result = self.project.importJson(file)
+        self.imported(result)
+
+    def imported(self, result: ImportResult):
+        """Shows the changed annotations and how many rows of an
+        imported file were used.
+        """
+        self.opened_project_frame.refresh_selection()
+        self.opened_project_frame.update_selected_annotation()
+        message = QMessageBox(self)
+        message.setWindowTitle(self.tr("Import"))
+        message.setIcon(QMessageBox.Information)
+        message.setText(
+            self.tr(
+                "Changed {changed} of {matched} matching annotations. "
+                "{unmatched} rows didn't match any sample."
+            ).format(
+                changed=result.changed,
+                matched=result.matched,
+                unmatched=result.unmatched,
+            )
+        )
+        message.exec()
 
     @Slot()
     def exportJson(self):
@@ -398,6 +597,90 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         with open(path, "w") as file:
             self.project.exportJson(file)
 
+    @Slot()
+    def exportDataset(self):
+        filters = [self.tr("Json Lines Files (*.jsonl)")]
+        if arrow_available():
+            filters += [
+                self.tr("Parquet Files (*.parquet)"),
+                self.tr("Arrow Files (*.arrow)"),
+            ]
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, self.tr("Export Dataset"), "", ";;".join(filters)
+        )
+        if not path:
+            return
+        suffix = Path(path).suffix
+        if suffix not in [".jsonl", ".parquet", ".arrow"]:
+            suffix = selected_filter[selected_filter.index("*") + 1 : -1]
+            path += suffix
+        match suffix:
+            case ".parquet":
+                self.project.exportParquet(Path(path))
+            case ".arrow":
+                self.project.exportArrow(Path(path))
+            case _:
+                with open(path, "w") as file:
+                    self.project.exportJsonLines(file)
+
+    @Slot()
+    def exportSplits(self):
+        folder = QFileDialog.getExistingDirectory(self, self.tr("Export Splits"))
+        if not folder:
+            return
+        shards, ok = QInputDialog.getInt(
+            self,
+            self.tr("Export Splits"),
+            self.tr("Number of files per split:"),
+            1,
+            1,
+            1024,
+        )
+        if not ok:
+            return
+        counts = self.project.exportSplits(Path(folder), shards=shards)
+        message = QMessageBox(self)
+        message.setWindowTitle(self.tr("Export Splits"))
+        message.setIcon(QMessageBox.Information)
+        message.setText(
+            "\n".join(f"{split}: {count}" for split, count in counts.items())
+        )
+        message.exec()
+
+    @Slot()
+    def exportTrimmedAudio(self):
+        folder = QFileDialog.getExistingDirectory(self, self.tr("Export Trimmed Audio"))
+        if not folder:
+            return
+        audio_folder = self.project.audio_folder
+        if audio_folder and Path(folder).resolve() == audio_folder.resolve():
+            return QMessageBox.warning(
+                self,
+                self.tr("Export Trimmed Audio"),
+                self.tr(
+                    "The audio files can't be exported to the audio folder, since they would be overwritten."
+                ),
+            )
+        try:
+            trimmed, copied = self.project.exportTrimmedAudio(Path(folder))
+        except (OSError, ffmpeg.Error) as error:
+            return QMessageBox.warning(
+                self,
+                self.tr("Export Trimmed Audio"),
+                self.tr("Failed to export the audio files: {error}").format(
+                    error=error
+                ),
+            )
+        message = QMessageBox(self)
+        message.setWindowTitle(self.tr("Export Trimmed Audio"))
+        message.setIcon(QMessageBox.Information)
+        message.setText(
+            self.tr(
+                "{trimmed} files were trimmed, {copied} files without detected speech were copied unchanged."
+            ).format(trimmed=trimmed, copied=copied)
+        )
+        message.exec()
+
     @Slot()
     def deleteSelected(self):
         result: int = QMessageBox.warning(
@@ -416,12 +699,22 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.project_settings_dialog.exec()
 
     @Slot(dict)
-    def settings_confirmed(self, settings: dict[str, Path]):
+    def settings_confirmed(self, settings: dict[str, Any]):
+        self.saver.wait()
         self.project.tsv_file = settings["tsv"]
         self.project.audio_folder = settings["audio"]
-        if self.project.tsv_file.is_file():
-            with open(self.project.tsv_file, newline="") as file:
-                self.project.load_tsv_file(file)
+        # The tsv file is loaded on demand the next time it is opened.
+        self.project.lazy_tsv = settings["lazy"]
+        if settings["database"] and not self.project.database:
+            self.project.use_database(self.project.tsv_file.with_suffix(".sqlite"))
+        elif not settings["database"] and self.project.database:
+            self.project.use_database(None)
+        # The database already holds the content of the tsv file.
+        if self.project.tsv_file.is_file() and (
+            not self.project.database or not len(self.project.annotations)
+        ):
+            self.project.load_tsv()
+        self.project.open_journal()
         self.project.load_audio_files(self.project.audio_folder)
         self.opened_project_frame.load_project(self.project)
 
@@ -460,8 +753,152 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.language_model = Path(path)
         self.settings_changed.emit()
 
+    @Slot()
+    def import_recording(self):
+        """Splits a long recording into segments in the audio folder,
+        which are added to the project as new samples.
+        """
+        if self.recording_importer.is_running():
+            return
+        audio_folder = self.project.audio_folder
+        if not audio_folder or not audio_folder.is_dir():
+            return QMessageBox.warning(
+                self,
+                self.tr("Import Recording"),
+                self.tr("The project has no audio folder to add the segments to."),
+            )
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            self.tr("Import Recording"),
+            "",
+            self.tr(
+                "Audio Files (*.wav *.mp3 *.ogg *.flac *.m4a *.opus);;All Files (*)"
+            ),
+        )
+        if not path:
+            return
+        progress = QProgressDialog(
+            self.tr("Splitting the recording..."), self.tr("Cancel"), 0, 0, self
+        )
+        progress.setWindowTitle(self.tr("Import Recording"))
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.canceled.connect(self.recording_import_canceled)
+        self.recording_progress = progress
+        self.recording_importer.start(Path(path), audio_folder)
+
+    @Slot()
+    def recording_import_progressed(self, seconds: float):
+        if self.recording_progress:
+            self.recording_progress.setLabelText(
+                self.tr("Split {minutes} minutes of the recording...").format(
+                    minutes=int(seconds // 60)
+                )
+            )
+
+    @Slot()
+    def recording_imported(self, segments: list):
+        self.close_recording_progress()
+        # Adds the samples like any other files added to the folder.
+        self.opened_project_frame.audio_folder_changed()
+        QMessageBox.information(
+            self,
+            self.tr("Import Recording"),
+            self.tr("{count} segments were added.").format(count=len(segments)),
+        )
+
+    @Slot()
+    def recording_import_failed(self, error: str):
+        self.close_recording_progress()
+        QMessageBox.warning(
+            self,
+            self.tr("Import Recording"),
+            self.tr("Failed to split the recording: {error}").format(error=error),
+        )
+
+    @Slot()
+    def recording_import_canceled(self):
+        """Stops splitting. The segments written so far are removed."""
+        self.recording_importer.cancel()
+        self.close_recording_progress()
+
+    def close_recording_progress(self):
+        if self.recording_progress:
+            self.recording_progress.canceled.disconnect(self.recording_import_canceled)
+            self.recording_progress.close()
+            self.recording_progress.deleteLater()
+            self.recording_progress = None
+
+    @Slot()
+    def detect_speech(self):
+        """Detects where speech starts and ends in the audio files that
+        weren't examined yet, so the player can skip the silence.
+        """
+        if self.speech_scanner.is_scanning():
+            return
+        files = self.project.audio_files_without_speech_range()
+        if not files:
+            return QMessageBox.information(
+                self,
+                self.tr("Detect Speech"),
+                self.tr("The speech in all audio files was already detected."),
+            )
+        progress = QProgressDialog(
+            self.tr("Detecting speech..."), self.tr("Cancel"), 0, len(files), self
+        )
+        progress.setWindowTitle(self.tr("Detect Speech"))
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.canceled.connect(self.speech_detection_canceled)
+        self.speech_progress = progress
+        self.speech_scanner.scan(files)
+
+    @Slot()
+    def speech_detected(self, ranges: list):
+        self.project.set_speech_ranges(ranges)
+        self.opened_project_frame.update_speech_range()
+
+    @Slot()
+    def speech_detection_progressed(self, done: int, total: int):
+        if self.speech_progress:
+            self.speech_progress.setValue(done)
+
+    @Slot()
+    def speech_detection_canceled(self):
+        """Stops detecting speech. The files examined so far keep their
+        speech range.
+        """
+        self.speech_scanner.cancel()
+        self.speech_detection_finished()
+
+    @Slot()
+    def speech_detection_finished(self):
+        if self.speech_progress:
+            self.speech_progress.canceled.disconnect(self.speech_detection_canceled)
+            self.speech_progress.close()
+            self.speech_progress.deleteLater()
+            self.speech_progress = None
+        try:
+            self.project.speech_ranges.save()
+        except OSError as error:
+            print("Failed to save the speech ranges:", error)
+
+    @Slot()
+    def skip_silence_toggled(self, skip: bool):
+        self.opened_project_frame.audioPlaybackWidget.skip_silence = skip
+
+    @Slot()
+    def skip_silence_triggered(self):
+        # Only changes by the user are saved, not those of load_settings.
+        self.settings_changed.emit()
+
     @Slot()
     def auto_generate_annotations(self):
+        """Transcribes the samples without a sentence with the language
+        model in the background. The texts are added as they arrive.
+        """
+        if self.auto_annotator.is_running():
+            return
         if not self.language_model or not self.language_model.is_file():
             return QMessageBox.warning(
                 self,
@@ -470,35 +907,117 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                     "No language model specified. Choose a model under Edit>Select Language Model... Pretrained models can be downloaded from <a href='https://coqui.ai/models'>https://coqui.ai/models</a>."
                 ),
             )
-        model = Model(str(self.language_model))
-        tmp_dir = Path(QStandardPaths.writableLocation(QStandardPaths.TempLocation))
-        for annotation in self.project.annotations:
-            if annotation.sentence or not annotation.path.is_file():
-                continue
-            temp_file = tmp_dir / "converted_sample.wav"
-            stream = ffmpeg.input(str(annotation.path))
-            output = ffmpeg.output(
-                stream, str(temp_file), **{"ar": str(model.sampleRate())}
+        if shutil.which("ffmpeg") is None:
+            return QMessageBox.warning(
+                self,
+                self.tr("No FFmpeg installation found"),
+                self.tr(
+                    "No FFmpeg installation found. FFmpeg is required to process the audio files so they can be used by the speech to text module."
+                ),
             )
-            try:
-                ffmpeg.run(output)
-            except FileNotFoundError:
-                return QMessageBox.warning(
-                    self,
-                    self.tr("No FFmpeg installation found"),
-                    self.tr(
-                        "No FFmpeg installation found. FFmpeg is required to process the audio files so they can be used by the speech to text module."
-                    ),
-                )
-            audio = wave.open(temp_file.open("rb"), "rb")
-            audio = numpy.frombuffer(audio.readframes(audio.getnframes()), numpy.int16)
-            annotation.sentence = model.stt(audio).capitalize() + "."
-            temp_file.unlink()
-        self.opened_project_frame.update_selected_annotation()
-        return QMessageBox.information(
+        files = [
+            (annotation.name, annotation.path)
+            for annotation in self.project.annotations
+            if not annotation.sentence and self.project.has_audio_file(annotation)
+        ]
+        if not files:
+            return QMessageBox.information(
+                self,
+                self.tr("Done"),
+                self.tr("All samples already have an annotated sentence."),
+            )
+        progress = QProgressDialog(
+            self.tr("Loading the language model..."),
+            self.tr("Cancel"),
+            0,
+            len(files),
             self,
-            self.tr("Done"),
+        )
+        progress.setWindowTitle(self.tr("Auto-Generate Annotation Text"))
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.canceled.connect(self.auto_annotation_canceled)
+        self.auto_annotation_progress = progress
+        self.auto_annotation_errors = []
+        self.auto_annotation_count = 0
+        self.auto_annotator.start(self.language_model, files)
+
+    @Slot()
+    def auto_annotations_transcribed(self, results: list):
+        annotations = self.project.annotations
+        texts = []
+        for name, text in results:
+            annotation = annotations.get(name)
+            # Samples that were annotated by hand meanwhile are kept.
+            if annotation is not None and not annotation.sentence:
+                texts.append((annotation, text))
+        # Generated texts still need to be checked, so they aren't
+        # marked as modified.
+        self.project.apply_diff(AnnotationDiff.texts(texts, mark_modified=False))
+        self.auto_annotation_count += len(texts)
+        self.opened_project_frame.refresh_annotation_text(
+            {annotation.name for annotation, text in texts}
+        )
+
+    @Slot()
+    def auto_annotation_file_failed(self, name: str, error: str):
+        print("Failed to transcribe", name, error)
+        self.auto_annotation_errors.append((name, error))
+
+    @Slot()
+    def auto_annotation_progressed(self, done: int, total: int, remaining: float):
+        if not self.auto_annotation_progress:
+            return
+        self.auto_annotation_progress.setLabelText(
             self.tr(
-                "Samples without an annotated sentence have been automatically annotated."
-            ),
+                "Transcribed {done} of {total} samples, about {minutes} min left."
+            ).format(done=done, total=total, minutes=math.ceil(remaining / 60))
+        )
+        self.auto_annotation_progress.setValue(done)
+
+    @Slot()
+    def auto_annotation_canceled(self):
+        """Stops transcribing. The texts added so far are kept."""
+        self.auto_annotator.cancel()
+        self.auto_annotation_finished()
+
+    @Slot()
+    def auto_annotation_finished(self):
+        self.close_auto_annotation_progress()
+        message = QMessageBox(self)
+        message.setWindowTitle(self.tr("Done"))
+        text = self.tr("{count} samples have been automatically annotated.").format(
+            count=self.auto_annotation_count
+        )
+        if self.auto_annotation_errors:
+            message.setIcon(QMessageBox.Warning)
+            text += " " + self.tr("{count} samples couldn't be transcribed.").format(
+                count=len(self.auto_annotation_errors)
+            )
+            message.setDetailedText(
+                "\n".join(
+                    f"{name}: {error}" for name, error in self.auto_annotation_errors
+                )
+            )
+        else:
+            message.setIcon(QMessageBox.Information)
+        message.setText(text)
+        message.exec()
+
+    @Slot()
+    def auto_annotation_failed(self, error: str):
+        self.close_auto_annotation_progress()
+        QMessageBox.warning(
+            self,
+            self.tr("Auto-Generate Annotation Text"),
+            self.tr("Failed to load the language model: {error}").format(error=error),
         )
+
+    def close_auto_annotation_progress(self):
+        if self.auto_annotation_progress:
+            self.auto_annotation_progress.canceled.disconnect(
+                self.auto_annotation_canceled
+            )
+            self.auto_annotation_progress.close()
+            self.auto_annotation_progress.deleteLater()
+            self.auto_annotation_progress = None
@@ -1,8 +1,23 @@
-from PySide6.QtCore import QModelIndex, Slot
-from PySide6.QtWidgets import QFrame, QFileDialog, QPushButton, QWidget
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, QTimer, Qt, Slot
+from PySide6.QtGui import QUndoStack
+from PySide6.QtWidgets import (
+    QApplication,
+    QFrame,
+    QFileDialog,
+    QPushButton,
+    QWidget,
+)
+from voice_annotation_tool.annotation_diff import AnnotationDiff
+from voice_annotation_tool.annotation_filter_model import AnnotationFilterModel
 from voice_annotation_tool.annotation_list_model import AnnotationListModel
+from voice_annotation_tool.audio_folder_watcher import AudioFolderWatcher
+from voice_annotation_tool.audio_prefetcher import PREFETCH_DISTANCE, AudioPrefetcher
+from voice_annotation_tool.audio_prober import AudioProber
+from voice_annotation_tool.edit_commands import DeleteCommand, EditCommand, TextCommand
 from voice_annotation_tool.opened_project_frame_ui import Ui_OpenedProjectFrame
+from voice_annotation_tool.peak_loader import PeakLoader
 from voice_annotation_tool.project import Annotation, Project
+from voice_annotation_tool.selection_editor import SelectionEditor
 
 AGES = [
     "",
@@ -35,6 +50,15 @@ AGE_STRINGS = [
 GENDERS = ["", "male", "female", "other"]
 "List of possible genders."
 
+SEARCH_DELAY = 150
+"Milliseconds without typing after which the search query is applied."
+
+TOTALS_DELAY = 1000
+"Milliseconds after a change after which the duration totals are updated."
+
+DURATION_ORDERS = [None, Qt.AscendingOrder, Qt.DescendingOrder]
+"The orders of the sort combo box, None for the order of the project."
+
 
 class OpenedProjectFrame(QFrame, Ui_OpenedProjectFrame):
     """The main interface used to edit a project.
@@ -48,11 +72,44 @@ class OpenedProjectFrame(QFrame, Ui_OpenedProjectFrame):
         self.setupUi(self)
         self.audioPlaybackWidget.next_pressed.connect(self.next_pressed)
         self.audioPlaybackWidget.previous_pressed.connect(self.previous_pressed)
-        self.project: Project
+        self.project = Project()
         self.annotationList.installEventFilter(self)
         for age in AGE_STRINGS:
             self.ageInput.addItem(age)
         self.ageInput.addItem(self.tr("[Multiple]"))
+        self.audio_folder_watcher = AudioFolderWatcher(self)
+        self.audio_folder_watcher.folder_changed.connect(self.audio_folder_changed)
+        self.annotation_model = AnnotationListModel(parent=self)
+        self.filter_model = AnnotationFilterModel(self.annotation_model, self)
+        self.undo_stack = QUndoStack(self)
+        "The edits of the project that can be undone."
+        self.undo_stack.indexChanged.connect(self.history_changed)
+        self._pushing = False
+        "True while a new edit is pushed to the undo stack."
+        self.selection_editor = SelectionEditor(
+            self.annotationList, self.push_edit, self
+        )
+        self.annotation_model.modelReset.connect(self.selection_editor.refresh)
+        self.annotation_model.rowsRemoved.connect(self.selection_editor.refresh)
+        self.filter_model.modelReset.connect(self.selection_editor.refresh)
+        self.show_model(self.annotation_model)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY)
+        self.search_timer.timeout.connect(self.search_changed)
+        self.searchEdit.textChanged.connect(self.search_timer.start)
+        self.sortInput.currentIndexChanged.connect(self.search_changed)
+        self.audio_prefetcher = AudioPrefetcher(self)
+        self.peak_loader = PeakLoader(self)
+        self.peak_loader.loaded.connect(self.peaks_loaded)
+        self.audio_prober = AudioProber(self)
+        self.audio_prober.probed.connect(self.audio_probed)
+        self.audio_prober.finished.connect(self.probing_finished)
+        self.totals_timer = QTimer(self)
+        self.totals_timer.setSingleShot(True)
+        self.totals_timer.setInterval(TOTALS_DELAY)
+        self.totals_timer.timeout.connect(self.update_duration_totals)
+        self.project.change_listeners.append(self.annotations_changed)
 
     def get_playback_buttons(self) -> list[QPushButton]:
         """Returns a list of buttons used to control the audio playback."""
@@ -71,33 +128,14 @@ class OpenedProjectFrame(QFrame, Ui_OpenedProjectFrame):
 
     def update_metadata_header(self):
         """Loads the metadata of the selected annotations into the GUI."""
-        first = True
-        age = None
-        gender = None
-        accent = None
-        client_id = None
-        for annotation in self.get_selected_annotations():
-            if first:
-                age = annotation.age
-                gender = annotation.gender
-                accent = annotation.accent
-                client_id = annotation.client_id
-                first = False
-            if annotation.age != age:
-                age = None
-            if annotation.gender != gender:
-                gender = None
-            if annotation.accent != accent:
-                accent = None
-            if annotation.client_id != client_id:
-                client_id = None
-
-            if all([age == None, gender == None, accent == None, client_id == None]):
-                break
-
-        if first:
+        summary = self.selection_editor.summary
+        if not summary.count:
             # No annotation in the list.
             return
+        age = summary.common("age")
+        gender = summary.common("gender")
+        accent = summary.common("accent")
+        client_id = summary.common("client_id")
 
         inputs = [self.ageInput, self.accentEdit, self.genderInput, self.clientIdEdit]
         for input in inputs:
@@ -113,29 +151,160 @@ class OpenedProjectFrame(QFrame, Ui_OpenedProjectFrame):
         self.ageInput.setCurrentIndex(age_index)
         self.ageInput.view().setRowHidden(len(AGES), age != None)
 
-        self.clientIdEdit.clear()
-        if client_id:
-            self.clientIdEdit.insert(client_id)
+        # Keep the cursor where it is while typing.
+        if self.clientIdEdit.text() != (client_id or ""):
+            self.clientIdEdit.clear()
+            if client_id:
+                self.clientIdEdit.insert(client_id)
 
-        self.accentEdit.clear()
-        if accent:
-            self.accentEdit.insert(accent)
+        if self.accentEdit.text() != (accent or ""):
+            self.accentEdit.clear()
+            if accent:
+                self.accentEdit.insert(accent)
 
         for input in inputs:
             input.blockSignals(False)
 
+    def shutdown(self):
+        """Stops the background threads. Has to be called before the
+        frame is deleted, since they report to it.
+        """
+        self.audio_prober.shutdown()
+        self.audio_prefetcher.shutdown()
+        self.peak_loader.shutdown()
+
     def load_project(self, project: Project):
         """Loads the project's annotations into the GUI."""
+        self.audio_prober.cancel()
+        self.audio_prefetcher.clear()
+        self.peak_loader.clear()
+        self.peak_loader.cache_folder = project.peak_folder()
+        self.audioPlaybackWidget.waveform.set_pyramid(None)
+        self.selection_editor.set_project(project)
+        self.undo_stack.clear()
+        self.project.change_listeners.remove(self.annotations_changed)
         self.project = project
-        model = AnnotationListModel(self.project)
+        project.change_listeners.append(self.annotations_changed)
+        for input in [self.searchEdit, self.sortInput]:
+            input.blockSignals(True)
+        self.searchEdit.clear()
+        self.sortInput.setCurrentIndex(0)
+        for input in [self.searchEdit, self.sortInput]:
+            input.blockSignals(False)
+        self.search_timer.stop()
+        self.filter_model.set_query("")
+        self.show_model(self.annotation_model)
+        self.annotation_model.set_project(project)
+        self.annotationEdit.clear()
+        self.update_metadata_widgets()
+        self.audio_folder_watcher.watch(project.audio_folder)
+        self.audio_prober.probe(project.audio_files_to_probe())
+        self.update_duration_totals()
+        if len(project.annotations):
+            self.annotationList.setCurrentIndex(self.annotationList.model().index(0, 0))
+
+    def show_model(self, model: QAbstractItemModel):
+        """Shows the annotations of the model in the list, either all
+        annotations or those matching the search query.
+        """
+        if self.annotationList.model() is model:
+            return
+        old_selection = self.annotationList.selectionModel()
         self.annotationList.setModel(model)
+        if old_selection:
+            old_selection.deleteLater()
         self.annotationList.selectionModel().selectionChanged.connect(
             self.selection_changed
         )
-        self.annotationEdit.clear()
-        self.update_metadata_widgets()
-        if len(project.annotations):
+        self.selection_editor.refresh()
+
+    def row_count(self) -> int:
+        """Returns the number of rows of the list, including the rows
+        that weren't fetched yet.
+        """
+        if self.annotationList.model() is self.filter_model:
+            return self.filter_model.match_count()
+        return len(self.project.annotations)
+
+    def select_annotation(self, name: str) -> bool:
+        """Makes the annotation with the given file name the current
+        row of the list. Returns false if it isn't shown.
+        """
+        model = self.annotationList.model()
+        if model is self.filter_model:
+            row = self.filter_model.row_of(name)
+        else:
+            row = (
+                self.project.annotations.row_of(name)
+                if name in self.project.annotations
+                else None
+            )
+        if row is None:
+            return False
+        model.fetch_row(row)
+        self.annotationList.setCurrentIndex(model.index(row, 0))
+        return True
+
+    @Slot()
+    def search_changed(self):
+        """Filters the list by the search query and orders it as
+        selected, keeping the current annotation selected if it matches.
+        """
+        self.search_timer.stop()
+        current: Annotation = self.annotationList.currentIndex().data(
+            AnnotationListModel.ANNOTATION_ROLE
+        )
+        # The search index is built by the first search.
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            self.filter_model.set_query(
+                self.searchEdit.text(), DURATION_ORDERS[self.sortInput.currentIndex()]
+            )
+        finally:
+            QApplication.restoreOverrideCursor()
+        if self.filter_model.is_active():
+            self.show_model(self.filter_model)
+        else:
+            self.show_model(self.annotation_model)
+        if not current or not self.select_annotation(current.name):
             self.annotationList.setCurrentIndex(self.annotationList.model().index(0, 0))
+        self.update_selected_annotation()
+
+    @Slot()
+    def audio_probed(self, infos: list):
+        """Stores the properties of probed audio files in the project."""
+        self.project.set_audio_info(infos)
+        if not self.totals_timer.isActive():
+            self.totals_timer.start()
+
+    @Slot()
+    def probing_finished(self):
+        """Saves the probed properties and orders the list again if it is
+        ordered by duration.
+        """
+        self.audio_prober.save_cache(self.project.audio_metadata)
+        self.update_duration_totals()
+        if DURATION_ORDERS[self.sortInput.currentIndex()] is not None:
+            self.filter_model.refilter()
+
+    def annotations_changed(self, names: list[str]):
+        """Updates the duration totals a while after annotations were
+        changed, so they aren't summed again for every change.
+        """
+        if not self.totals_timer.isActive():
+            self.totals_timer.start()
+
+    @Slot()
+    def update_duration_totals(self):
+        """Shows the total duration of the modified and of the other
+        samples, using the cached durations of the audio files.
+        """
+        self.totals_timer.stop()
+        annotated, remaining = self.project.duration_totals()
+        text = self.tr("{annotated:.1f} h annotated, {remaining:.1f} h remaining")
+        self.durationLabel.setText(
+            text.format(annotated=annotated / 3600, remaining=remaining / 3600)
+        )
 
     def update_metadata_widgets(self):
         """Disables or enables the widgets used to edit the annotation
@@ -161,20 +330,61 @@ class OpenedProjectFrame(QFrame, Ui_OpenedProjectFrame):
         ]
 
     def delete_selected(self):
-        """Delete the selected annotations and audio files."""
-        for selected in self.get_selected_annotations():
-            self.project.delete_annotation(selected)
-        self.annotationList.model().layoutChanged.emit()
+        """Delete the selected annotations and audio files. The audio
+        files are kept in the trash until the project is closed, so the
+        deletion can be undone.
+        """
+        self.selection_editor.flush()
+        self.push_edit(
+            DeleteCommand(
+                self.annotation_model,
+                self.get_selected_annotations(),
+                self.tr("Delete Samples"),
+            )
+        )
+        # Rows that weren't fetched by the list are removed silently.
+        self.filter_model.refilter()
+        self.update_metadata_widgets()
+
+    def push_edit(self, command: EditCommand | DeleteCommand):
+        """Applies an edit by pushing it to the undo stack."""
+        self._pushing = True
+        try:
+            self.undo_stack.push(command)
+        finally:
+            self._pushing = False
+
+    @Slot()
+    def history_changed(self):
+        """Shows the state of the annotations after an edit was undone
+        or redone.
+        """
+        if self._pushing:
+            return
+        self.filter_model.refilter()
         self.update_metadata_widgets()
+        self.refresh_selection()
+        self.update_selected_annotation()
 
     def get_selected_annotations(self) -> list[Annotation]:
         """Returns all the selected annotations in the
         annotation panel.
         """
-        annotations: list[Annotation] = []
-        for selected_index in self.annotationList.selectionModel().selectedIndexes():
-            annotations.append(selected_index.data(AnnotationListModel.ANNOTATION_ROLE))
-        return annotations
+        return self.selection_editor.selected_annotations()
+
+    def flush_edits(self):
+        """Applies metadata edits that are still waiting for typing to
+        stop, for example before the project is saved.
+        """
+        self.selection_editor.flush()
+
+    def refresh_selection(self):
+        """Reads the metadata of the selected annotations again after
+        they were changed outside of this frame, for example by an
+        import.
+        """
+        self.selection_editor.refresh()
+        self.update_metadata_header()
 
     def update_selected_annotation(self):
         """Update the GUI with the data of the selected sample."""
@@ -182,7 +392,7 @@ class OpenedProjectFrame(QFrame, Ui_OpenedProjectFrame):
         index: QModelIndex = self.annotationList.currentIndex()
         self.audioPlaybackWidget.previousButton.setEnabled(index.row() > 0)
         self.audioPlaybackWidget.nextButton.setEnabled(
-            index.row() < len(self.project.annotations) - 1
+            index.row() < self.row_count() - 1
         )
         annotation: Annotation = index.data(AnnotationListModel.ANNOTATION_ROLE)
         if not annotation:
@@ -190,10 +400,111 @@ class OpenedProjectFrame(QFrame, Ui_OpenedProjectFrame):
         self.annotationEdit.blockSignals(True)
         self.annotationEdit.setText(annotation.sentence)
         self.annotationEdit.blockSignals(False)
-        if annotation.path.is_file():
-            self.audioPlaybackWidget.load_file(annotation.path)
+        has_audio_file = self.project.has_audio_file(annotation)
+        if has_audio_file:
+            self.audioPlaybackWidget.load_file(
+                annotation.path, self.audio_prefetcher.data(annotation.path)
+            )
+        self.audioPlaybackWidget.waveform.set_pyramid(
+            self.peak_loader.request(annotation.path) if has_audio_file else None
+        )
+        self.update_speech_range()
         for buttons in self.get_playback_buttons():
-            buttons.setEnabled(annotation.path.is_file())
+            buttons.setEnabled(has_audio_file)
+        self.prefetch_neighbours(index.row())
+
+    def update_speech_range(self):
+        """Lets the player skip the silence of the selected sample, for
+        example after speech was detected.
+        """
+        annotation: Annotation = self.annotationList.currentIndex().data(
+            AnnotationListModel.ANNOTATION_ROLE
+        )
+        if annotation:
+            self.audioPlaybackWidget.set_speech_range(
+                self.project.speech_range(annotation)
+            )
+
+    def refresh_annotation_text(self, names: set[str]):
+        """Shows the text of the selected sample again if it is one of
+        the given annotations, which were changed outside the editor,
+        for example by the speech to text model.
+        """
+        annotation: Annotation = self.annotationList.currentIndex().data(
+            AnnotationListModel.ANNOTATION_ROLE
+        )
+        if annotation and annotation.name in names:
+            self.annotationEdit.blockSignals(True)
+            self.annotationEdit.setText(annotation.sentence)
+            self.annotationEdit.blockSignals(False)
+
+    def prefetch_neighbours(self, row: int):
+        """Reads the audio files and waveforms of the samples around the
+        given row in the background, nearest first, so moving to the next
+        or previous sample doesn't wait for the disk.
+        """
+        model = self.annotationList.model()
+        first = max(row - PREFETCH_DISTANCE, 0)
+        annotations = model.annotations_in_rows(first, row + PREFETCH_DISTANCE)
+        # Nearest first, the next sample before the previous one.
+        neighbours = sorted(
+            (
+                (first + offset - row, annotation)
+                for offset, annotation in enumerate(annotations)
+                if first + offset != row
+            ),
+            key=lambda item: (abs(item[0]), item[0] < 0),
+        )
+        paths = [
+            annotation.path
+            for _, annotation in neighbours
+            if self.project.has_audio_file(annotation)
+        ]
+        self.audio_prefetcher.prefetch(paths)
+        current = annotations[row - first] if row - first < len(annotations) else None
+        if current and self.project.has_audio_file(current):
+            # Don't cancel loading the waveform that is waiting to be shown.
+            paths.insert(0, current.path)
+        self.peak_loader.prefetch(paths)
+
+    @Slot()
+    def peaks_loaded(self, path: str, pyramid):
+        """Shows the waveform of the selected sample once it is loaded."""
+        annotation: Annotation = self.annotationList.currentIndex().data(
+            AnnotationListModel.ANNOTATION_ROLE
+        )
+        if annotation and str(annotation.path) == path:
+            self.audioPlaybackWidget.waveform.set_pyramid(pyramid)
+
+    @Slot()
+    def audio_folder_changed(self):
+        """Adds annotations for new audio files and flags annotations
+        whose file was removed.
+        """
+        new_files, changed = self.project.scan_audio_folder()
+        changed_paths = [self.project.audio_folder / name for name in changed]
+        self.audio_prefetcher.discard(changed_paths)
+        self.peak_loader.discard(changed_paths)
+        self.annotation_model.append_audio_files(new_files)
+        self.annotation_model.refresh_annotations(changed)
+        self.filter_model.refilter()
+        if new_files or changed:
+            self.audio_prober.probe(self.project.audio_files_to_probe())
+        if new_files:
+            self.update_metadata_widgets()
+        current = self.annotationList.currentIndex()
+        annotation: Annotation = current.data(AnnotationListModel.ANNOTATION_ROLE)
+        if not annotation:
+            if new_files:
+                self.annotationList.setCurrentIndex(
+                    self.annotationList.model().index(0, 0)
+                )
+        elif annotation.name in changed:
+            self.update_selected_annotation()
+        elif new_files:
+            self.audioPlaybackWidget.nextButton.setEnabled(
+                current.row() < self.row_count() - 1
+            )
 
     @Slot()
     def previous_pressed(self):
@@ -205,6 +516,7 @@ class OpenedProjectFrame(QFrame, Ui_OpenedProjectFrame):
     @Slot()
     def next_pressed(self):
         current = self.annotationList.currentIndex().row()
+        self.annotationList.model().fetch_row(current + 1)
         next = self.annotationList.model().index(current + 1, 0)
         self.annotationList.clearSelection()
         self.annotationList.setCurrentIndex(next)
@@ -213,29 +525,23 @@ class OpenedProjectFrame(QFrame, Ui_OpenedProjectFrame):
     def gender_selected(self, gender: int):
         if gender == len(GENDERS):
             return
-        for annotation in self.get_selected_annotations():
-            annotation.gender = GENDERS[gender]
+        self.selection_editor.assign(gender=GENDERS[gender])
         self.update_metadata_header()
 
     @Slot()
     def age_selected(self, age: int):
         if age == len(AGES):
             return
-        for annotation in self.get_selected_annotations():
-            annotation.age = AGES[age]
+        self.selection_editor.assign(age=AGES[age])
         self.update_metadata_header()
 
     @Slot()
     def accent_changed(self, accent: str):
-        for annotation in self.get_selected_annotations():
-            annotation.accent = accent
-        self.update_metadata_header()
+        self.selection_editor.edit("accent", accent)
 
     @Slot()
     def client_id_changed(self, client_id: str):
-        for annotation in self.get_selected_annotations():
-            annotation.client_id = client_id
-        self.update_metadata_header()
+        self.selection_editor.edit("client_id", client_id)
 
     @Slot()
     def text_changed(self):
@@ -244,10 +550,17 @@ class OpenedProjectFrame(QFrame, Ui_OpenedProjectFrame):
             AnnotationListModel.ANNOTATION_ROLE
         )
         if selected_annotation:
-            self.project.annotate(selected_annotation, text)
+            self.push_edit(
+                TextCommand(
+                    self.project,
+                    AnnotationDiff.texts([(selected_annotation, text)]),
+                    self.tr("Edit Text"),
+                )
+            )
 
     @Slot()
     def selection_changed(self, selected, deselected):
+        self.selection_editor.selection_changed(selected, deselected)
         self.update_selected_annotation()
 
     @Slot()
@@ -262,16 +575,23 @@ class OpenedProjectFrame(QFrame, Ui_OpenedProjectFrame):
             for line in file:
                 parts = line.split(": ")
                 properties[parts[0]] = parts[1].rstrip()
-        for annotation in self.get_selected_annotations():
-            if "age" in properties:
-                annotation.age = properties["age"]
-            if "gender" in properties:
-                annotation.gender = properties["gender"]
-            if "accent" in properties:
-                annotation.accent = properties["accent"]
+        fields = {
+            field: properties[field]
+            for field in ["age", "gender", "accent"]
+            if field in properties
+        }
+        self.selection_editor.assign(**fields)
         self.update_metadata_header()
 
     @Slot()
     def mark_unchanged_pressed(self):
-        for annotation in self.get_selected_annotations():
-            self.project.mark_unchanged(annotation)
+        self.selection_editor.flush()
+        self.push_edit(
+            EditCommand(
+                self.project,
+                AnnotationDiff.assign(
+                    self.get_selected_annotations(), {"modified": False}
+                ),
+                self.tr("Mark Unchanged"),
+            )
+        )
@@ -0,0 +1,173 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import csv
+from io import StringIO
+import mmap
+import multiprocessing
+import os
+from pathlib import Path
+import sys
+from typing import Iterator
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_export import INTEGER_MEMBERS
+from voice_annotation_tool.tsv_file import ENCODING, compression_of
+
+PARALLEL_MIN_SIZE = 32 * 1024 * 1024
+"Files smaller than this many bytes are parsed in a single process."
+
+CHUNKS_PER_WORKER = 4
+"More chunks than workers balance the load if some chunks parse slower."
+
+COUNT_BLOCK_SIZE = 16 * 1024 * 1024
+"The number of bytes searched for quotes at once."
+
+SEPARATOR = "\0"
+"Joins the values of a column, so a column is sent as a single string."
+
+DEFAULT_VALUES = {"up_votes": "0", "down_votes": "0"}
+"Values of members whose column is missing from the tsv file, instead of ''."
+
+
+def worker_count(path: Path, workers: int | None = None) -> int:
+    """Returns the number of processes the tsv file should be parsed
+    with, by default one per CPU. Compressed files and files smaller
+    than `PARALLEL_MIN_SIZE` are parsed in a single process.
+    """
+    if compression_of(path) or os.path.getsize(path) < PARALLEL_MIN_SIZE:
+        return 1
+    return workers or os.cpu_count() or 1
+
+
+def count_quotes(data: mmap.mmap, start: int, end: int) -> int:
+    """Counts the quote characters between the offsets."""
+    count = 0
+    for block in range(start, end, COUNT_BLOCK_SIZE):
+        count += data[block : min(block + COUNT_BLOCK_SIZE, end)].count(b'"')
+    return count
+
+
+def row_boundaries(path: Path, chunks: int) -> tuple[list[str], list[int]]:
+    """Reads the header of the tsv file and splits the rows into about
+    the given number of chunks of similar size.
+
+    Returns the header and the offsets the chunks start at, followed
+    by the size of the file. Chunks only start after line breaks that
+    are outside of quoted fields, so no row is split.
+    """
+    if not os.path.getsize(path):
+        return [], [0, 0]
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    with data:
+        size = len(data)
+        position = 0
+        quotes = 0
+        boundaries: list[int] = []
+        for chunk in range(chunks):
+            target = size * chunk // chunks
+            if boundaries and target <= boundaries[-1]:
+                continue
+            quotes += count_quotes(data, position, target)
+            position = max(position, target)
+            while True:
+                newline = data.find(b"\n", position)
+                if newline == -1:
+                    position = size
+                    break
+                quotes += count_quotes(data, position, newline + 1)
+                position = newline + 1
+                if quotes % 2 == 0:
+                    boundaries.append(position)
+                    break
+            if position == size:
+                break
+        header_end = boundaries.pop(0) if boundaries else size
+        header = next(
+            csv.reader([data[:header_end].decode(ENCODING)], delimiter="\t"), []
+        )
+    return header, [header_end, *boundaries, size]
+
+
+def parse_chunk(path: Path, start: int, end: int, header: list[str]) -> list:
+    """Parses the rows between the offsets into columns in the order of
+    `Annotation.TSV_HEADER_MEMBERS`. Runs in a worker process.
+
+    The columns are encoded so they are quick to send to the main
+    process and to turn into annotations there: strings are joined
+    with `SEPARATOR`, votes are converted to integer arrays and the
+    members in `Annotation.INTERNED_MEMBERS` are sent as their distinct
+    values and the index of the value of every row. Blank lines are
+    skipped.
+    """
+    with open(path, "rb") as file:
+        file.seek(start)
+        text = file.read(end - start).decode(ENCODING)
+    reader = csv.reader(StringIO(text, newline=""), delimiter="\t")
+    rows = [row for row in reader if row]
+    width = len(header)
+    for row in rows:
+        if len(row) < width:
+            row.extend([""] * (width - len(row)))
+    joinable = SEPARATOR not in text
+    columns = []
+    for member in Annotation.TSV_HEADER_MEMBERS:
+        if member in header:
+            column = header.index(member)
+            values = [row[column] for row in rows]
+        else:
+            values = [DEFAULT_VALUES.get(member, "")] * len(rows)
+        if member in INTEGER_MEMBERS:
+            columns.append(array("q", map(int, values)))
+        elif member in Annotation.INTERNED_MEMBERS:
+            distinct = list(dict.fromkeys(values))
+            positions = {value: position for position, value in enumerate(distinct)}
+            columns.append((distinct, array("L", map(positions.__getitem__, values))))
+        else:
+            columns.append(SEPARATOR.join(values) if joinable else values)
+    return [len(rows), columns]
+
+
+def decode_columns(count: int, columns: list) -> list[list]:
+    """Turns the columns returned by `parse_chunk` back into lists of
+    values, interning the values of `Annotation.INTERNED_MEMBERS`.
+    """
+    if not count:
+        return [[] for column in columns]
+    decoded = []
+    for column in columns:
+        if isinstance(column, str):
+            decoded.append(column.split(SEPARATOR))
+        elif isinstance(column, tuple):
+            distinct = [sys.intern(value) for value in column[0]]
+            decoded.append(list(map(distinct.__getitem__, column[1])))
+        else:
+            decoded.append(column)
+    return decoded
+
+
+def parse_tsv_parallel(
+    path: Path, workers: int | None = None
+) -> Iterator[Iterator[tuple]]:
+    """Parses an uncompressed tsv file in a pool of worker processes.
+
+    The file is split into chunks at row boundaries, which are parsed
+    in parallel. Yields the rows of every chunk in file order, as
+    tuples that can be passed to `Annotation.from_row`.
+
+    Chunks are split at line breaks with an even number of quotes
+    before them, so quoted fields may contain line breaks.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    header, boundaries = row_boundaries(path, workers * CHUNKS_PER_WORKER)
+    chunks = list(zip(boundaries, boundaries[1:]))
+    # Forking would copy the threads of the GUI into the workers.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as executor:
+        results = executor.map(
+            parse_chunk,
+            *zip(*[(path, start, end, header) for start, end in chunks]),
+        )
+        for count, columns in results:
+            yield zip(*decode_columns(count, columns))
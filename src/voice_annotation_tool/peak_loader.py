@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from pathlib import Path
+
+from PySide6.QtCore import Signal
+
+from voice_annotation_tool.background_worker import BackgroundLoader
+from voice_annotation_tool.peak_pyramid import PeakPyramid, cached_pyramid
+
+PEAK_WORKERS = 2
+"The number of files whose peaks are computed at the same time."
+
+PYRAMIDS_IN_MEMORY = 32
+"The number of recently shown pyramids that are kept in memory."
+
+
+class PeakLoader(BackgroundLoader):
+    """Computes the `PeakPyramid`s of audio files in background threads,
+    or reads them from the cache folder, so the waveform of a sample is
+    never decoded in the GUI thread.
+
+    Decoding is done by ffmpeg or by numpy reductions, which both run
+    outside the interpreter lock, so threads are enough.
+    """
+
+    loaded = Signal(str, object)
+    "Emitted with the path of a file and its pyramid, None if it failed."
+
+    def __init__(self, parent=None):
+        super().__init__(parent, PEAK_WORKERS)
+        self.cache_folder: Path | None = None
+        "The folder the pyramids are stored in, None to keep them in memory."
+        self._pyramids: OrderedDict[str, PeakPyramid | None] = OrderedDict()
+        "The recently loaded pyramids by path, least recent first."
+
+    def request(self, path: Path) -> PeakPyramid | None:
+        """Returns the pyramid of a file if it is in memory. Otherwise
+        it is loaded in the background and `loaded` is emitted later.
+        """
+        key = str(path)
+        if key in self._pyramids:
+            self._pyramids.move_to_end(key)
+            return self._pyramids[key]
+        self.load(key, self.cache_folder)
+        return None
+
+    def prefetch(self, paths: list[Path]):
+        """Loads the pyramids of the given files in the background, in
+        order. Loads of other files that didn't start yet are canceled.
+        """
+        wanted = [str(path) for path in paths]
+        self.keep_only(wanted)
+        for path in wanted:
+            if path in self._pyramids:
+                self._pyramids.move_to_end(path)
+            else:
+                self.load(path, self.cache_folder)
+
+    def discard(self, paths: list[Path]):
+        """Forgets the pyramids of files that changed on disk."""
+        for path in paths:
+            self._pyramids.pop(str(path), None)
+
+    def clear(self):
+        """Forgets all pyramids and cancels pending loads, for example
+        when another project is opened.
+        """
+        self.cancel()
+        self._pyramids.clear()
+
+    def _load(self, path: str, cache_folder: Path | None) -> PeakPyramid | None:
+        return cached_pyramid(Path(path), cache_folder)
+
+    def _loaded(self, path: str, pyramid: PeakPyramid | None):
+        self._pyramids[path] = pyramid
+        while len(self._pyramids) > PYRAMIDS_IN_MEMORY:
+            self._pyramids.popitem(last=False)
+        self.loaded.emit(path, pyramid)
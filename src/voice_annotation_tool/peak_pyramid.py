@@ -0,0 +1,196 @@
+import os
+from pathlib import Path
+from typing import Iterable
+
+import ffmpeg
+import numpy
+
+from voice_annotation_tool.atomic_file import atomic_write
+from voice_annotation_tool.audio_stream import decode_chunks
+
+BASE_BLOCK = 64
+"The number of samples summarized by a peak of the finest level."
+
+LEVEL_FACTOR = 4
+"The number of peaks of a level summarized by a peak of the next level."
+
+MIN_LEVEL_PEAKS = 512
+"No coarser level is added once a level has fewer peaks than this."
+
+
+def block_peaks(
+    chunks: Iterable[numpy.ndarray], block: int
+) -> tuple[numpy.ndarray, numpy.ndarray, int]:
+    """Returns the minimum and maximum of every block of samples and the
+    number of samples. A shorter last block is summarized as well.
+    """
+    minimums = []
+    maximums = []
+    count = 0
+    rest = numpy.zeros(0, numpy.int16)
+    for chunk in chunks:
+        count += len(chunk)
+        if len(rest):
+            chunk = numpy.concatenate([rest, chunk])
+        usable = len(chunk) - len(chunk) % block
+        blocks = chunk[:usable].reshape(-1, block)
+        minimums.append(blocks.min(axis=1))
+        maximums.append(blocks.max(axis=1))
+        rest = chunk[usable:]
+    if len(rest):
+        minimums.append(rest.min(keepdims=True))
+        maximums.append(rest.max(keepdims=True))
+    if not minimums:
+        empty = numpy.zeros(0, numpy.int16)
+        return empty, empty, 0
+    return numpy.concatenate(minimums), numpy.concatenate(maximums), count
+
+
+def reduce_peaks(peaks: numpy.ndarray, factor: int, function) -> numpy.ndarray:
+    """Combines every factor peaks into one using a numpy reduction."""
+    return function.reduceat(peaks, numpy.arange(0, len(peaks), factor))
+
+
+class PeakPyramid:
+    """The minimum and maximum sample of every block of an audio file,
+    at several block sizes, so the waveform can be drawn at any zoom
+    level by reading about as many peaks as there are pixels.
+
+    Level 0 summarizes `BASE_BLOCK` samples per peak, every further
+    level `LEVEL_FACTOR` times as many.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        sample_count: int,
+        levels: list[tuple[numpy.ndarray, numpy.ndarray]],
+    ):
+        self.sample_rate = sample_rate
+        self.sample_count = sample_count
+        self.levels = levels
+        "The minimums and maximums of each level, finest first."
+
+    @classmethod
+    def from_chunks(
+        cls, sample_rate: int, chunks: Iterable[numpy.ndarray]
+    ) -> "PeakPyramid":
+        """Computes the pyramid from chunks of mono samples."""
+        minimums, maximums, count = block_peaks(chunks, BASE_BLOCK)
+        levels = [(minimums, maximums)]
+        while len(minimums) >= MIN_LEVEL_PEAKS:
+            minimums = reduce_peaks(minimums, LEVEL_FACTOR, numpy.minimum)
+            maximums = reduce_peaks(maximums, LEVEL_FACTOR, numpy.maximum)
+            levels.append((minimums, maximums))
+        return cls(sample_rate, count, levels)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "PeakPyramid":
+        """Decodes an audio file and computes its pyramid. 16 bit wav
+        files are read directly, other files are decoded with ffmpeg.
+        """
+        return cls.from_chunks(*decode_chunks(path))
+
+    @property
+    def duration(self) -> float:
+        "The length of the audio in seconds."
+        return self.sample_count / self.sample_rate if self.sample_rate else 0
+
+    def samples_per_peak(self, level: int) -> int:
+        return BASE_BLOCK * LEVEL_FACTOR**level
+
+    def peaks(
+        self, start: float, end: float, columns: int
+    ) -> tuple[numpy.ndarray, numpy.ndarray]:
+        """Returns the minimum and maximum sample in each of the given
+        number of columns between the start and end in seconds. The
+        coarsest level with at least one peak per column is used.
+        """
+        empty = numpy.zeros(0, numpy.int16)
+        if columns < 1 or end <= start or not self.sample_count:
+            return empty, empty
+        samples_per_column = (end - start) * self.sample_rate / columns
+        level = 0
+        while (
+            level + 1 < len(self.levels)
+            and self.samples_per_peak(level + 1) <= samples_per_column
+        ):
+            level += 1
+        minimums, maximums = self.levels[level]
+        per_peak = self.samples_per_peak(level)
+        first = start * self.sample_rate / per_peak
+        last = end * self.sample_rate / per_peak
+        bounds = numpy.linspace(first, last, columns + 1).astype(numpy.int64)
+        bounds = bounds.clip(0, len(minimums))
+        # Columns after the end of the audio are left out.
+        starts = bounds[:-1][bounds[:-1] < len(minimums)]
+        if not len(starts):
+            return empty, empty
+        stop = max(int(bounds[-1]), int(starts[-1]) + 1)
+        # Columns narrower than a peak get the single peak they start
+        # in, since reduceat doesn't combine equal starts.
+        return (
+            numpy.minimum.reduceat(minimums[:stop], starts),
+            numpy.maximum.reduceat(maximums[:stop], starts),
+        )
+
+    def save(self, path: Path, size: int, mtime_ns: int):
+        """Writes the pyramid to a file, together with the size and
+        modification time of the audio file it was computed from.
+        """
+        arrays = {
+            "header": numpy.array(
+                [self.sample_rate, self.sample_count, size, mtime_ns], numpy.int64
+            )
+        }
+        for level, (minimums, maximums) in enumerate(self.levels):
+            arrays[f"min{level}"] = minimums
+            arrays[f"max{level}"] = maximums
+        with atomic_write(path, binary=True) as file:
+            numpy.savez(file, **arrays)
+
+    @classmethod
+    def load(cls, path: Path, size: int, mtime_ns: int) -> "PeakPyramid | None":
+        """Reads a pyramid written by `save`, None if the file is missing
+        or unreadable or the audio file changed since.
+        """
+        try:
+            with numpy.load(path) as arrays:
+                sample_rate, sample_count, saved_size, saved_mtime = arrays["header"]
+                if saved_size != size or saved_mtime != mtime_ns:
+                    return None
+                levels = []
+                while f"min{len(levels)}" in arrays:
+                    level = len(levels)
+                    levels.append((arrays[f"min{level}"], arrays[f"max{level}"]))
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(int(sample_rate), int(sample_count), levels)
+
+
+def cached_pyramid(audio_path: Path, cache_folder: Path | None) -> PeakPyramid | None:
+    """Returns the pyramid of an audio file, read from the cache folder
+    if it is up to date and otherwise computed and stored there. Returns
+    None if the audio file can't be decoded.
+    """
+    try:
+        stat = os.stat(audio_path)
+    except OSError:
+        return None
+    cache_path = cache_folder / (audio_path.name + ".npz") if cache_folder else None
+    if cache_path:
+        pyramid = PeakPyramid.load(cache_path, stat.st_size, stat.st_mtime_ns)
+        if pyramid:
+            return pyramid
+    try:
+        pyramid = PeakPyramid.from_file(audio_path)
+    except (ffmpeg.Error, OSError) as error:
+        print("Failed to decode", audio_path, error)
+        return None
+    if cache_path:
+        try:
+            cache_folder.mkdir(exist_ok=True)
+            pyramid.save(cache_path, stat.st_size, stat.st_mtime_ns)
+        except OSError as error:
+            print("Failed to cache the waveform of", audio_path, error)
+    return pyramid
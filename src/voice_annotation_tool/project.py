@@ -1,10 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
+from operator import itemgetter
 import os, csv
 from pathlib import Path
 import json
-from typing import TextIO
+import shutil
+import tempfile
+from typing import Any, Callable, Iterable, TextIO
 
-from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation import Annotation, intern_member
+from voice_annotation_tool.annotation_diff import AnnotationDiff
+from voice_annotation_tool.annotation_export import (
+    batched,
+    write_arrow,
+    write_json_lines,
+    write_parquet,
+    write_tsv_rows,
+)
+from voice_annotation_tool.annotation_store import AnnotationStore
+from voice_annotation_tool.atomic_file import atomic_write
+from voice_annotation_tool.audio_folder_index import AudioFolderIndex
+from voice_annotation_tool.audio_metadata import AudioInfo, AudioMetadataCache
+from voice_annotation_tool.dataset_split import DEFAULT_RATIOS, export_splits
+from voice_annotation_tool.journal import AnnotationJournal
+from voice_annotation_tool.json_stream import iter_json_array, iter_json_lines
+from voice_annotation_tool.lazy_tsv_store import (
+    LazyTsvStore,
+    rewritten_tsv_path,
+    row_offsets_path,
+)
+from voice_annotation_tool.parallel_tsv import parse_tsv_parallel, worker_count
+from voice_annotation_tool.recording_splitter import (
+    TARGET_SEGMENT_SECONDS,
+    Segment,
+    split_recording,
+)
+from voice_annotation_tool.search_index import SearchIndex
+from voice_annotation_tool.sqlite_store import SqliteAnnotationStore
+from voice_annotation_tool.tsv_file import compression_of, open_tsv, write_tsv
+from voice_annotation_tool.voice_activity import (
+    SpeechCache,
+    SpeechRange,
+    trim_audio_file,
+)
+
+JOURNAL_COMPACTION_SIZE = 4 * 1024 * 1024
+"Size in bytes after which the journal is merged into the tsv file on save."
+
+DELETE_WORKERS = 8
+"The number of threads deleting audio files at the same time."
+
+TRIM_WORKERS = 4
+"The number of threads writing trimmed audio files at the same time."
+
+TRASH_SUFFIX = ".trash"
+"""Appended to the name of the tsv file to get the folder deleted audio
+files are kept in until the project is closed."""
+
+PEAKS_SUFFIX = ".peaks"
+"""Appended to the name of the tsv file to get the folder the waveform
+peaks of the audio files are cached in."""
+
+IMPORT_BATCH_SIZE = 10_000
+"The number of imported texts that are applied to the project at once."
 
 
 def relative_or_absolute(path: Path, relative_to: Path) -> Path:
@@ -17,6 +75,115 @@ def relative_or_absolute(path: Path, relative_to: Path) -> Path:
         return path
 
 
+class ImportResult:
+    """Counts the rows of an imported file."""
+
+    def __init__(self):
+        self.matched = 0
+        "Rows whose file name belongs to an annotation of the project."
+        self.unmatched = 0
+        "Rows with an unknown file name, or without a file name or text."
+        self.changed = 0
+        "Matched rows whose text differs from the text of the annotation."
+
+
+def move_file(source: Path, destination: Path) -> bool:
+    """Moves a file, which is a rename if both paths are on the same
+    disk. Returns false if the file exists but couldn't be moved.
+    """
+    try:
+        shutil.move(source, destination)
+    except FileNotFoundError:
+        pass
+    except OSError as error:
+        print("Failed to move", source, error)
+        return False
+    return True
+
+
+def unlink_audio_file(annotation: Annotation) -> bool:
+    """Deletes the audio file of an annotation. Returns false if the
+    file exists but couldn't be deleted.
+    """
+    try:
+        annotation.path.unlink(missing_ok=True)
+    except OSError as error:
+        print("Failed to delete", annotation.path, error)
+        return False
+    return True
+
+
+class ProjectSnapshot:
+    """The content of a project at the time it was saved, which can be
+    written to disk from another thread while the project is edited.
+
+    Created by `Project.snapshot`.
+    """
+
+    def __init__(
+        self,
+        project_data: str,
+        tsv_file: Path | None,
+        rows: list[tuple] | None,
+        journal: AnnotationJournal | None,
+        journal_size: int,
+        store: LazyTsvStore | None = None,
+    ):
+        self.project_data = project_data
+        "The content of the project file."
+        self.tsv_file = tsv_file
+        "The tsv file to write, None if it can't be written."
+        self.rows = rows
+        """The annotations to write to the tsv file, None if only the
+        journal has to be synced."""
+        self.journal = journal
+        self.journal_size = journal_size
+        "The size of the journal when the snapshot was taken."
+        self.store = store
+        """The store reading the tsv file lazily, which has to swap in
+        the rewritten file itself, see `finish`."""
+        self.written_tsv: Path | None = None
+        "The rewritten tsv file that wasn't swapped in yet."
+
+    def write(self, project_file: Path):
+        """Atomically writes the project file and the tsv file, or
+        forces the journal to disk if the tsv file is up to date.
+
+        If the annotations are read from the tsv file lazily, the tsv
+        file is written next to it and swapped in by `finish`.
+        """
+        with atomic_write(project_file) as file:
+            file.write(self.project_data)
+        if not self.tsv_file:
+            return
+        if self.rows is None:
+            if self.journal:
+                self.journal.sync(self.journal_size)
+            return
+        if self.store:
+            written_tsv = rewritten_tsv_path(self.tsv_file)
+            with write_tsv(written_tsv) as file:
+                write_tsv_rows(file, self.rows)
+            self.written_tsv = written_tsv
+            return
+        with write_tsv(self.tsv_file) as file:
+            write_tsv_rows(file, self.rows)
+        if self.journal:
+            self.journal.end_compaction()
+
+    def finish(self):
+        """Swaps in the rewritten tsv file of a lazily read project,
+        see `LazyTsvStore.replace_file`. Has to be called in the thread
+        of the project after `write`. Does nothing for other projects.
+        """
+        if not self.written_tsv:
+            return
+        self.store.replace_file(self.written_tsv)
+        self.written_tsv = None
+        if self.journal:
+            self.journal.end_compaction()
+
+
 class Project:
     """Representation of a project file.
 
@@ -26,21 +193,77 @@ class Project:
     Provides methods for importing and exporting json, text and csv
     files.
     The tsv file and audio folder of a project can be None.
+
+    Once the journal is opened, every change made through the methods
+    of the project is appended to it, so saving doesn't need to
+    rewrite the tsv file.
+
+    Projects that are too large to be kept in memory can store their
+    annotations in a SQLite database instead. The tsv file is then
+    only written when the project is saved, streamed from the database.
+    Alternatively, the rows of the tsv file can be read on demand,
+    see `lazy_tsv`.
     """
 
     def __init__(self):
         self.tsv_file: Path | None = None
         "The file where the metadata of the samples is stored."
-        self.audio_folder: Path | None = None
+        self.database: Path | None = None
+        """The SQLite database the annotations are stored in, None if
+        they are kept in memory."""
+        self.lazy_tsv = False
+        """True if the rows of an uncompressed tsv file are only read
+        when they are accessed, see `LazyTsvStore`."""
+        self.annotations: AnnotationStore | SqliteAnnotationStore | LazyTsvStore = (
+            AnnotationStore()
+        )
+        """The annotations of the project, in the order they are shown
+        and saved. They can also be looked up by the name of the sample
+        file."""
+        self._audio_folder: Path | None = None
+        self.missing_files: set[str] = set()
+        """The sample file names of annotations whose audio file wasn't
+        found in the audio folder."""
+        self._audio_index: AudioFolderIndex | None = None
+        self.audio_metadata = AudioMetadataCache()
+        """The duration and format of the audio files, filled by probing
+        the files returned by `audio_files_to_probe`."""
+        self.speech_ranges = SpeechCache()
+        """Where speech starts and ends in the audio files, filled by
+        examining the files returned by `audio_files_without_speech_range`."""
+        self.modified_annotations: set[str] = set()
+        """The sample file names whose text was modified since the
+        project was created."""
+        self.journal: AnnotationJournal | None = None
+        "The journal the changes to the annotations are recorded in."
+        self.revision: int = 0
+        "Increased every time an annotation is changed, added or deleted."
+        self.saved_revision: int = 0
+        "The revision of the project when it was last saved."
+        self.dirty_annotations: dict[str, int] = {}
+        """Maps the file names of the annotations changed, added or
+        deleted since the last save to the revision of the change."""
+        self.tsv_outdated = False
+        """True if the tsv file has to be rewritten on the next save
+        because the journal doesn't contain all changes."""
+        self.change_listeners: list[Callable[[Iterable[str]], Any]] = []
+        """Functions called with the file names of the annotations
+        whose members were changed through the project."""
+        self._search_index: SearchIndex | None = None
+        self.trashed_files: dict[str, Path] = {}
+        """Maps the file names of deleted annotations to the location
+        their audio file was moved to, see `trash_audio_files`."""
+        self._trash_folder: Path | None = None
+
+    @property
+    def audio_folder(self) -> Path | None:
         "The folder containing the speech samples."
-        self.annotations_by_path: dict[str, Annotation] = {}
-        """A dictionary that maps the name of the sample file to the
-        annotations"""
-        self.annotations: list[Annotation] = []
-        "The annotations of the project."
-        self.modified_annotations: list[str] = []
-        """A list of sample file names whose text was modified since
-        the project was created."""
+        return self._audio_folder
+
+    @audio_folder.setter
+    def audio_folder(self, folder: Path | None):
+        self._audio_folder = folder
+        self.annotations.folder = folder
 
     def load_json(self, file: TextIO, location: Path = Path()) -> bool:
         """Loads a project from a json file.
@@ -54,48 +277,315 @@ class Project:
             ["modified_annotations" in data, "audio_folder" in data, "tsv_file" in data]
         ):
             raise ValueError
-        self.modified_annotations = data["modified_annotations"]
+        self.modified_annotations = set(data["modified_annotations"])
         self.audio_folder = location.joinpath(data.get("audio_folder"))
         self.tsv_file = location.joinpath(data.get("tsv_file"))
+        if data.get("database"):
+            self.database = location.joinpath(data["database"])
+        self.lazy_tsv = bool(data.get("lazy_tsv"))
         return True
 
     def load_audio_files(self, folder: Path):
         """Creates empty annotations for the audio files in the given
         folder which are not already loaded from a tsv file.
+
+        The listing of the folder is cached next to the tsv file, so
+        the folder is only listed again if it changed. Annotations
+        whose audio file doesn't exist are added to `missing_files`.
         """
         self.audio_folder = folder
         if not self.audio_folder.is_dir():
             return
-        for audio_file in os.listdir(self.audio_folder):
-            path = Path(audio_file)
-            if not path.suffix in [
-                ".mp3",
-                ".ogg",
-                ".mp4",
-                ".webm",
-                ".avi",
-                ".mkv",
-                ".wav",
-            ]:
-                continue
-            annotation = Annotation()
-            annotation.path = path
-            self.add_annotation(annotation)
+        index = self.audio_folder_index()
+        index.load()
+        files = index.files
+        index.scan(self.audio_folder)
+        # The listing is replaced whenever the folder was listed again.
+        if index.files is not files:
+            try:
+                index.save()
+            except OSError as error:
+                print("Failed to save the audio folder index:", error)
+        self._audio_index = index
+        self.audio_metadata = (
+            AudioMetadataCache.for_tsv_file(self.tsv_file)
+            if self.tsv_file
+            else AudioMetadataCache()
+        )
+        self.audio_metadata.load()
+        self.speech_ranges = (
+            SpeechCache.for_tsv_file(self.tsv_file) if self.tsv_file else SpeechCache()
+        )
+        self.speech_ranges.load()
+        known = self.annotations.names()
+        self.add_audio_files([name for name in index.files if name not in known])
+        self.missing_files = {
+            name for name in self.annotations.names() if name not in index.files
+        }
+
+    def scan_audio_folder(self) -> tuple[list[str], list[str]]:
+        """Looks for files that were added to or removed from the audio
+        folder since it was loaded.
+
+        Returns the names of new audio files that don't have an
+        annotation yet, which can be added using `add_audio_files`,
+        and the names of the annotations whose file vanished or
+        reappeared. `missing_files` is updated accordingly.
+        """
+        index = self._audio_index
+        if not index or not self.audio_folder or not self.audio_folder.is_dir():
+            return [], []
+        added, vanished = index.scan(self.audio_folder)
+        new_files = []
+        changed = []
+        for name in added:
+            if name not in self.annotations:
+                new_files.append(name)
+            elif name in self.missing_files:
+                self.missing_files.remove(name)
+                changed.append(name)
+        for name in vanished:
+            if name in self.annotations:
+                self.missing_files.add(name)
+                changed.append(name)
+        return new_files, changed
+
+    def add_audio_files(self, names: list[str]):
+        """Appends empty annotations for the audio files with the given
+        names, which must not have an annotation yet.
+        """
+        with self.annotations.batch():
+            for name in names:
+                annotation = Annotation()
+                annotation.path = name
+                self._insert(annotation)
+
+    def import_recording(
+        self, path: Path, target_seconds: float = TARGET_SEGMENT_SECONDS
+    ) -> list[Segment]:
+        """Splits a long recording at pauses into segments of about the
+        target length, which are written to the audio folder as wav
+        files, and adds an empty annotation for each of them.
+
+        Returns the segments, see `split_recording`.
+        """
+        if not self.audio_folder or not self.audio_folder.is_dir():
+            raise FileNotFoundError("The project has no audio folder.")
+        segments = split_recording(path, self.audio_folder, target_seconds)
+        # Keeps the listing of the audio folder up to date.
+        self.scan_audio_folder()
+        self.add_audio_files(
+            [
+                segment.name
+                for segment in segments
+                if segment.name not in self.annotations
+            ]
+        )
+        return segments
+
+    def has_audio_file(self, annotation: Annotation) -> bool:
+        """Returns true if the audio file of the annotation exists.
+
+        Once the audio folder is loaded this is answered from its
+        listing, see `missing_files`, without accessing the disk.
+        """
+        if self._audio_index is None:
+            return annotation.path.is_file()
+        return annotation.name not in self.missing_files
+
+    def audio_files_to_probe(self) -> list[tuple[Path, int, int]]:
+        """Returns the path, size and modification time of the audio
+        files in the audio folder whose properties aren't cached, see
+        `audio_metadata`. The listing of the audio folder is used, so
+        the files aren't accessed.
+        """
+        index = self._audio_index
+        if not index or not self.audio_folder:
+            return []
+        outdated = self.audio_metadata.outdated(self.audio_folder, index.files)
+        return [(self.audio_folder / name, *index.files[name]) for name in outdated]
+
+    def set_audio_info(self, infos: list[tuple[str, AudioInfo]]):
+        """Stores the properties of probed audio files, given as pairs of
+        the file name and the properties.
+        """
+        self.audio_metadata.update(infos)
+        if self._search_index is not None:
+            self._search_index.set_durations(
+                (name, info.duration) for name, info in infos
+            )
+
+    def audio_files_without_speech_range(self) -> list[tuple[Path, int, int]]:
+        """Returns the path, size and modification time of the audio
+        files in the audio folder that weren't examined for speech yet,
+        see `speech_ranges`.
+        """
+        index = self._audio_index
+        if not index or not self.audio_folder:
+            return []
+        outdated = self.speech_ranges.outdated(self.audio_folder, index.files)
+        return [(self.audio_folder / name, *index.files[name]) for name in outdated]
+
+    def set_speech_ranges(self, ranges: list[tuple[str, SpeechRange]]):
+        """Stores where speech starts and ends in examined audio files,
+        given as pairs of the file name and the range.
+        """
+        self.speech_ranges.update(ranges)
+
+    def speech_range(self, annotation: Annotation) -> tuple[float, float] | None:
+        """Returns the start and end of the speech in the audio file of
+        the annotation in seconds, None if it is unknown.
+        """
+        return self.speech_ranges.get(annotation.name)
+
+    def duration_totals(self) -> tuple[float, float]:
+        """Returns the total duration in seconds of the audio files of
+        the modified annotations and of the other annotations. Files
+        whose duration isn't known don't count.
+        """
+        annotated = self.audio_metadata.total_duration(self.modified_annotations)
+        total = self.audio_metadata.total_duration()
+        return annotated, max(total - annotated, 0.0)
+
+    def audio_folder_index(self) -> AudioFolderIndex:
+        """Returns the index of the audio folder, which is stored next
+        to the tsv file if the project has one.
+        """
+        if self.tsv_file:
+            return AudioFolderIndex.for_tsv_file(self.tsv_file)
+        return AudioFolderIndex()
+
+    def search_index(self) -> SearchIndex:
+        """Returns the index used to search the annotations. It is built
+        when it is first needed and then kept up to date by the methods
+        of the project.
+        """
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.annotations)
+            self._search_index.set_durations(
+                (name, info.duration)
+                for name, info in self.audio_metadata.entries.items()
+            )
+        return self._search_index
 
     def annotate(self, annotation: Annotation, text: str) -> None:
         """Changes the text of the given annotation and marks it as
         modified.
         """
         if not annotation.modified:
-            self.modified_annotations.append(annotation.path.name)
+            self.modified_annotations.add(annotation.name)
         annotation.modified = True
         annotation.sentence = text
+        self.annotations.update(annotation)
+        self._changed(annotation, sentence=text, modified=True)
+
+    def annotate_many(self, texts: Iterable[tuple[Annotation, str]]) -> None:
+        """Changes the texts of many annotations at once and marks them
+        as modified. The changes are recorded as a single revision.
+        """
+        records = []
+        revision = self.revision + 1
+        with self.annotations.batch():
+            for annotation, text in texts:
+                if not annotation.modified:
+                    self.modified_annotations.add(annotation.name)
+                annotation.modified = True
+                annotation.sentence = text
+                annotation.revision = revision
+                self.annotations.update(annotation)
+                if self._search_index is not None:
+                    self._search_index.update(annotation)
+                self.dirty_annotations[annotation.name] = revision
+                records.append(
+                    {"path": annotation.name, "sentence": text, "modified": True}
+                )
+        if not records:
+            return
+        self.revision = revision
+        if self.journal:
+            self.journal.append(records)
+        self._notify(record["path"] for record in records)
+
+    def update_annotation(self, annotation: Annotation, **fields: Any) -> None:
+        """Sets the given metadata fields of the annotation, for example
+        `update_annotation(annotation, age="twenties")`.
+        """
+        for field, value in fields.items():
+            setattr(annotation, field, intern_member(field, value))
+        self.annotations.update(annotation)
+        self._changed(annotation, **fields)
+
+    def update_annotations(
+        self, annotations: Iterable[Annotation], **fields: Any
+    ) -> None:
+        """Sets the given metadata fields of many annotations at once.
+        The changes are recorded as a single revision and listeners are
+        notified once. Annotations that already have the values are
+        left out.
+        """
+        fields = {field: intern_member(field, value) for field, value in fields.items()}
+        records = []
+        revision = self.revision + 1
+        with self.annotations.batch():
+            for annotation in annotations:
+                if all(
+                    getattr(annotation, field) == value
+                    for field, value in fields.items()
+                ):
+                    continue
+                for field, value in fields.items():
+                    setattr(annotation, field, value)
+                annotation.revision = revision
+                self.annotations.update(annotation)
+                if self._search_index is not None:
+                    self._search_index.update(annotation)
+                self.dirty_annotations[annotation.name] = revision
+                records.append({"path": annotation.name, **fields})
+        if not records:
+            return
+        self.revision = revision
+        if self.journal and fields:
+            self.journal.append(records)
+        self._notify(record["path"] for record in records)
+
+    def apply_diff(self, diff: AnnotationDiff, reverse=False) -> None:
+        """Sets the fields of the annotations to their values after the
+        edit recorded in the diff, or before it if reverse is true. The
+        changes are recorded as a single revision. Annotations that were
+        removed since are skipped.
+        """
+        records = []
+        revision = self.revision + 1
+        with self.annotations.batch():
+            for name, fields in diff.changes(reverse):
+                annotation = self.annotations.get(name)
+                if annotation is None:
+                    continue
+                for field, value in fields.items():
+                    setattr(annotation, field, value)
+                if fields.get("modified"):
+                    self.modified_annotations.add(name)
+                elif "modified" in fields:
+                    self.modified_annotations.discard(name)
+                annotation.revision = revision
+                self.annotations.update(annotation)
+                if self._search_index is not None:
+                    self._search_index.update(annotation)
+                self.dirty_annotations[name] = revision
+                records.append({"path": name, **fields})
+        if not records:
+            return
+        self.revision = revision
+        if self.journal:
+            self.journal.append(records)
+        self._notify(record["path"] for record in records)
 
     def mark_unchanged(self, annotation: Annotation) -> None:
         """Remove the modified mark of the given annotation."""
         annotation.modified = False
-        if annotation.path in self.modified_annotations:
-            self.modified_annotations.remove(annotation.path)
+        self.modified_annotations.discard(annotation.name)
+        self.annotations.update(annotation)
+        self._changed(annotation, modified=False)
 
     def save(self, file: TextIO, location: Path = Path()):
         """Saves this project to the given buffer. Paths to the audio
@@ -104,7 +594,7 @@ class Project:
         data = {
             "tsv_file": "",
             "audio_folder": "",
-            "modified_annotations": self.modified_annotations,
+            "modified_annotations": sorted(self.modified_annotations),
         }
         if self.tsv_file:
             data["tsv_file"] = str(relative_or_absolute(self.tsv_file, location))
@@ -112,39 +602,310 @@ class Project:
             data["audio_folder"] = str(
                 relative_or_absolute(self.audio_folder, location)
             )
+        if self.database:
+            data["database"] = str(relative_or_absolute(self.database, location))
+        if self.lazy_tsv:
+            data["lazy_tsv"] = True
         json.dump(data, file)
 
     def save_annotations(self, file: TextIO):
         """Exports the project's annotations to a tab separated
         value (tsv) file.
         """
-        writer = csv.DictWriter(file, Annotation.TSV_HEADER_MEMBERS, delimiter="\t")
-        writer.writeheader()
-        for annotation in self.annotations:
-            writer.writerow(annotation.to_dict())
+        write_tsv_rows(file, self.annotations.rows())
+
+    def snapshot(self, location: Path = Path(), compact=False) -> ProjectSnapshot:
+        """Captures the project for saving it in a background thread.
+
+        Paths in the project file are saved relative to the location.
+        If the journal is up to date, only the journal is synced when
+        the snapshot is written. Otherwise, or if compact is true, the
+        tsv file is rewritten and the journal is compacted.
+        """
+        project_data = StringIO()
+        self.save(project_data, location)
+        tsv_file = self.tsv_file
+        if not tsv_file or not tsv_file.parent.is_dir():
+            tsv_file = None
+        rows = None
+        store = None
+        journal_size = self.journal.size() if self.journal else 0
+        if tsv_file and (
+            compact
+            or self.tsv_outdated
+            or not self.journal
+            or not tsv_file.is_file()
+            or self.needs_compaction()
+        ):
+            rows = self.annotations.snapshot_rows()
+            if (
+                isinstance(self.annotations, LazyTsvStore)
+                and self.annotations.tsv_file == tsv_file
+            ):
+                store = self.annotations
+            self.tsv_outdated = False
+            if self.journal:
+                self.journal.begin_compaction()
+                journal_size = 0
+        return ProjectSnapshot(
+            project_data.getvalue(), tsv_file, rows, self.journal, journal_size, store
+        )
+
+    def load_tsv(self, path: Path | None = None, workers: int | None = None):
+        """Loads the annotations from the tsv file at the given path,
+        or from the `tsv_file` of the project. Files ending with `.gz`
+        or `.zst` are decompressed while they are read. Large
+        uncompressed files are parsed by the given number of processes,
+        by default one per CPU, see `worker_count`.
+
+        If `lazy_tsv` is set and no annotations are loaded yet, an
+        uncompressed file is only indexed and its rows are read when
+        they are accessed.
+        """
+        path = path or self.tsv_file
+        if (
+            self.lazy_tsv
+            and not self.database
+            and not compression_of(path)
+            and not len(self.annotations)
+        ):
+            store = LazyTsvStore(path, self.modified_annotations)
+            store.folder = self.audio_folder
+            self.close_database()
+            self.annotations = store
+            self._search_index = None
+            return
+        workers = worker_count(path, workers)
+        if workers > 1:
+            self.load_tsv_parallel(path, workers)
+            return
+        with open_tsv(path) as file:
+            self.load_tsv_file(file)
+
+    def save_tsv(self, path: Path | None = None):
+        """Writes the annotations to the tsv file at the given path, or
+        to the `tsv_file` of the project, compressing them if the path
+        ends with `.gz` or `.zst`.
+        """
+        path = path or self.tsv_file
+        store = self.annotations
+        if isinstance(store, LazyTsvStore) and store.tsv_file == path:
+            # The mapped file can't be replaced on every platform.
+            written_tsv = rewritten_tsv_path(path)
+            with write_tsv(written_tsv) as file:
+                self.save_annotations(file)
+            store.replace_file(written_tsv)
+            return
+        with write_tsv(path) as file:
+            self.save_annotations(file)
 
     def load_tsv_file(self, file: TextIO):
         """Loads the annotations from the `tsv_file` into the
         annotations array.
         """
         reader = csv.DictReader(file, delimiter="\t")
-        for row in reader:
-            annotation = Annotation(row)
-            if annotation.path.name in self.modified_annotations:
-                annotation.modified = True
-            self.add_annotation(annotation, overwrite=True)
-        print("loaded csv")
+        with self.annotations.batch():
+            for row in reader:
+                annotation = Annotation(row)
+                if annotation.name in self.modified_annotations:
+                    annotation.modified = True
+                self._insert(annotation, overwrite=True)
+
+    def load_tsv_parallel(self, path: Path, workers: int | None = None):
+        """Loads the annotations from an uncompressed tsv file that is
+        parsed in chunks by a pool of worker processes.
+        """
+        with self.annotations.batch():
+            for rows in parse_tsv_parallel(path, workers):
+                for row in rows:
+                    annotation = Annotation.from_row(row)
+                    if annotation.name in self.modified_annotations:
+                        annotation.modified = True
+                    self._insert(annotation, overwrite=True)
 
     def delete_tsv(self):
-        """Deletes the TSV file."""
+        """Deletes the TSV file and its journal."""
+        self.empty_trash()
+        journal = self.journal
+        self.close_journal()
+        if journal:
+            journal.path.unlink(missing_ok=True)
+            journal.compaction_path.unlink(missing_ok=True)
+        if self.tsv_file:
+            self.audio_folder_index().path.unlink(missing_ok=True)
+            AudioMetadataCache.for_tsv_file(self.tsv_file).path.unlink(missing_ok=True)
+            SpeechCache.for_tsv_file(self.tsv_file).path.unlink(missing_ok=True)
+            row_offsets_path(self.tsv_file).unlink(missing_ok=True)
+            rewritten_tsv_path(self.tsv_file).unlink(missing_ok=True)
+            shutil.rmtree(self.peak_folder(), ignore_errors=True)
         if self.tsv_file and self.tsv_file.is_file():
             self.tsv_file.unlink()
 
     def delete_annotation(self, annotation: Annotation):
         """Deletes a stored annotation and the audio file on disk."""
-        annotation.path.unlink(missing_ok=True)
-        self.annotations_by_path.pop(annotation.path.name)
-        self.annotations.remove(annotation)
+        self.delete_annotations([annotation])
+
+    def delete_annotations(self, annotations: Iterable[Annotation]) -> list[Annotation]:
+        """Deletes the audio files of the annotations and removes the
+        annotations whose file could be deleted.
+
+        Returns the removed annotations.
+        """
+        deleted = self.delete_audio_files(annotations)
+        self.remove_annotations(deleted)
+        return deleted
+
+    def delete_audio_files(self, annotations: Iterable[Annotation]) -> list[Annotation]:
+        """Deletes the audio files of the annotations, using several
+        threads since every deletion waits for the disk. Blocks until
+        all files are deleted.
+
+        Returns the annotations whose file was deleted or didn't exist.
+        """
+        annotations = list(annotations)
+        if len(annotations) < 2:
+            results = map(unlink_audio_file, annotations)
+        else:
+            with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as executor:
+                results = list(executor.map(unlink_audio_file, annotations))
+        return [
+            annotation for annotation, deleted in zip(annotations, results) if deleted
+        ]
+
+    def peak_folder(self) -> Path | None:
+        """Returns the folder the waveform peaks of the audio files are
+        cached in, next to the tsv file. None if there is no tsv file.
+        """
+        if not self.tsv_file:
+            return None
+        return self.tsv_file.with_name(self.tsv_file.name + PEAKS_SUFFIX)
+
+    def trash_folder(self) -> Path:
+        """Returns the folder deleted audio files are moved to, next to
+        the tsv file or in the temporary folder if there is none.
+        """
+        if self._trash_folder is None:
+            if self.tsv_file:
+                self._trash_folder = self.tsv_file.with_name(
+                    self.tsv_file.name + TRASH_SUFFIX
+                )
+                self._trash_folder.mkdir(exist_ok=True)
+            else:
+                self._trash_folder = Path(tempfile.mkdtemp(suffix=TRASH_SUFFIX))
+        return self._trash_folder
+
+    def trash_audio_files(self, annotations: Iterable[Annotation]) -> list[Annotation]:
+        """Moves the audio files of the annotations to the trash folder
+        instead of deleting them, so they can be restored using
+        `restore_annotations`.
+
+        Returns the annotations whose file was moved or didn't exist.
+        """
+        annotations = list(annotations)
+        if not annotations:
+            return []
+        folder = self.trash_folder()
+        destinations = [folder / annotation.name for annotation in annotations]
+        with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as executor:
+            results = list(
+                executor.map(
+                    move_file,
+                    (annotation.path for annotation in annotations),
+                    destinations,
+                )
+            )
+        trashed = []
+        for annotation, destination, moved in zip(annotations, destinations, results):
+            if moved:
+                self.trashed_files[annotation.name] = destination
+                trashed.append(annotation)
+        return trashed
+
+    def restore_annotations(
+        self, annotations: list[Annotation], rows: list[int] | None = None
+    ):
+        """Adds annotations that were removed by `trash_audio_files` and
+        `remove_annotations` back to the project and moves their audio
+        files back.
+
+        The annotations are put back into the given rows, usually the
+        rows they had before they were removed, or at the end of the
+        project if no rows are given. Annotations whose file name is
+        in use again are skipped.
+        """
+        if not annotations:
+            return
+        if rows is None:
+            first = len(self.annotations)
+            rows = list(range(first, first + len(annotations)))
+        revision = self.revision + 1
+        records = []
+        items = []
+        with self.annotations.batch():
+            for row, annotation in sorted(zip(rows, annotations), key=itemgetter(0)):
+                name = annotation.name
+                if name in self.annotations:
+                    continue
+                trashed = self.trashed_files.pop(name, None)
+                restored = trashed is not None and trashed.is_file()
+                if restored:
+                    move_file(trashed, annotation.path)
+                items.append((row, annotation))
+                if annotation.modified:
+                    self.modified_annotations.add(name)
+                if self._audio_index is not None and not restored:
+                    self.missing_files.add(name)
+                else:
+                    self.missing_files.discard(name)
+                annotation.revision = revision
+                self.dirty_annotations[name] = revision
+                records.append(
+                    {
+                        **annotation.to_dict(),
+                        "modified": annotation.modified,
+                        "row": row,
+                    }
+                )
+            if items:
+                self._insert_rows(items)
+        if not records:
+            return
+        self.revision = revision
+        if self.journal:
+            self.journal.append(records)
+        self._notify(record["path"] for record in records)
+
+    def empty_trash(self):
+        """Deletes the audio files in the trash folder. Deleted
+        annotations can't be restored afterwards.
+        """
+        self.trashed_files.clear()
+        if self._trash_folder is not None:
+            shutil.rmtree(self._trash_folder, ignore_errors=True)
+            self._trash_folder = None
+
+    def remove_annotations(self, annotations: Iterable[Annotation]):
+        """Removes the annotations from the project without deleting
+        their audio files. The removal is recorded as one change.
+        """
+        annotations = list(annotations)
+        if not annotations:
+            return
+        self.revision += 1
+        with self.annotations.batch():
+            self.annotations.remove_many(annotation.name for annotation in annotations)
+            for annotation in annotations:
+                name = annotation.name
+                self.modified_annotations.discard(name)
+                self.missing_files.discard(name)
+                if self._search_index is not None:
+                    self._search_index.remove(name)
+                annotation.revision = self.revision
+                self.dirty_annotations[name] = self.revision
+        if self.journal:
+            self.journal.append(
+                {"path": annotation.name, "deleted": True} for annotation in annotations
+            )
 
     def add_annotation(self, annotation: Annotation, overwrite=False):
         """Adds the annotation to the project. If an annotation with
@@ -152,27 +913,268 @@ class Project:
 
         If the audio folder is specified, it is added to the annotation path.
         """
-        if self.audio_folder and self.audio_folder not in annotation.path.parents:
-            annotation.path = self.audio_folder.joinpath(annotation.path)
-        if annotation.path.name in self.annotations_by_path:
-            if overwrite:
-                existing = self.annotations.index(
-                    self.annotations_by_path[annotation.path.name]
-                )
-                self.annotations[existing] = annotation
+        if self._insert(annotation, overwrite):
+            self._changed(annotation)
+
+    def rename_annotation(self, annotation: Annotation, name: str):
+        """Renames the audio file of an annotation, keeping its row.
+
+        The file is renamed first, so the annotation stays unchanged if
+        that fails. Renaming it to its current name does nothing.
+        """
+        old_name = annotation.name
+        if name == old_name:
+            return
+        if name in self.annotations:
+            raise KeyError(name)
+        path = annotation.path.rename(annotation.path.with_name(name))
+        self.annotations.rename(old_name, name)
+        self._changed(annotation, renamed=name)
+        annotation.path = path
+        self.dirty_annotations[name] = self.revision
+        if old_name in self.modified_annotations:
+            self.modified_annotations.remove(old_name)
+            self.modified_annotations.add(name)
+        if self._search_index is not None:
+            self._search_index.rename(old_name, name)
+
+    def open_journal(self):
+        """Replays the journal stored next to the tsv file over the
+        loaded annotations and records further changes in it.
+
+        Should be called after the tsv file was loaded and before the
+        audio files are loaded.
+        """
+        self.close_journal()
+        if not self.tsv_file or self.database:
+            return
+        journal = AnnotationJournal.for_tsv_file(self.tsv_file)
+        restored: list[dict[str, Any]] = []
+        for record in journal.read():
+            # Restored annotations with ascending rows are inserted at once.
+            if "row" not in record or (
+                restored and record["row"] <= restored[-1]["row"]
+            ):
+                self._replay_restored(restored)
+                restored = []
+            if "row" in record:
+                restored.append(record)
             else:
-                return
+                self._replay(record)
+        self._replay_restored(restored)
+        self.journal = journal
+        self._search_index = None
+
+    def close_journal(self):
+        """Stops recording changes.
+
+        Saves that are still being written must be finished first.
+        """
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+
+    def use_database(self, database: Path | None):
+        """Moves the annotations into the SQLite database at the given
+        path, or back into memory if the path is None.
+
+        Annotations that are already loaded replace those in the
+        database. An existing database is otherwise kept, so this is
+        also used to open the database of a project.
+        """
+        if database:
+            self.close_journal()
+            store = SqliteAnnotationStore(database)
         else:
-            self.annotations.append(annotation)
-        self.annotations_by_path[annotation.path.name] = annotation
+            store = AnnotationStore()
+            # The journal doesn't contain the changes made in the database.
+            self.tsv_outdated = True
+        store.folder = self.audio_folder
+        with store.batch():
+            for annotation in self.annotations:
+                store.add(annotation, overwrite=True)
+        self.close_database()
+        self.annotations = store
+        self.database = database
+        self._search_index = None
+
+    def close_database(self):
+        """Closes the database or the memory-mapped tsv file the
+        annotations are read from, if any. The annotations can't be
+        accessed afterwards.
+        """
+        self.annotations.close()
+
+    def close(self):
+        """Stops recording changes in the journal and closes the
+        database.
+        """
+        self.close_journal()
+        self.close_database()
+        self.empty_trash()
+
+    def discard_unsaved_changes(self):
+        """Removes the changes made since the last save from the
+        journal. The loaded annotations are not reverted.
+        """
+        if self.journal:
+            self.journal.rollback()
+
+    def needs_compaction(self) -> bool:
+        """Returns true if the journal grew large enough to be merged
+        into the tsv file.
+        """
+        return bool(self.journal) and self.journal.size() >= JOURNAL_COMPACTION_SIZE
+
+    def is_modified(self) -> bool:
+        """Returns true if the project was changed since it was last
+        saved.
+        """
+        return self.revision != self.saved_revision
+
+    def mark_saved(self):
+        """Marks the current revision of the project as saved."""
+        self.saved_revision = self.revision
+        self.dirty_annotations.clear()
+
+    def mark_unsaved(self):
+        """Marks the project as modified, for example if saving it
+        failed.
+        """
+        self.saved_revision = -1
+
+    def _insert(self, annotation: Annotation, overwrite=False) -> bool:
+        """Adds the annotation to the store without marking the
+        project as changed. Used when loading annotations.
+        """
+        self._place_in_audio_folder(annotation)
+        if not self.annotations.add(annotation, overwrite):
+            return False
+        if self._search_index is not None:
+            self._search_index.update(annotation)
+        return True
+
+    def _insert_rows(self, items: list[tuple[int, Annotation]]):
+        """Inserts new annotations at the given ascending rows without
+        marking the project as changed, see `AnnotationStore.insert_many`.
+        """
+        for _, annotation in items:
+            self._place_in_audio_folder(annotation)
+        self.annotations.insert_many(items)
+        if self._search_index is not None:
+            for _, annotation in items:
+                self._search_index.update(annotation)
+
+    def _place_in_audio_folder(self, annotation: Annotation):
+        """Moves the path of an annotation from another folder into
+        the audio folder.
+        """
+        if (
+            self.audio_folder
+            and annotation.folder is not None
+            and annotation.folder != self.audio_folder
+            and self.audio_folder not in annotation.folder.parents
+        ):
+            annotation.path = self.audio_folder.joinpath(annotation.path)
+
+    def _changed(self, annotation: Annotation, **fields: Any):
+        """Increases the revision, marks the annotation as dirty and
+        appends the changed fields to the journal.
+        """
+        self.revision += 1
+        annotation.revision = self.revision
+        self.dirty_annotations[annotation.name] = self.revision
+        if self.journal and fields:
+            self.journal.append([{"path": annotation.name, **fields}])
+        if self._search_index is not None:
+            self._search_index.update(annotation)
+        self._notify([annotation.name])
+
+    def _notify(self, names: Iterable[str]):
+        """Passes the names of changed annotations to the listeners."""
+        if not self.change_listeners:
+            return
+        names = list(names)
+        for listener in self.change_listeners:
+            listener(names)
+
+    def _replay(self, record: dict[str, Any]):
+        """Applies a change read from the journal."""
+        name = record.pop("path")
+        annotation = self.annotations.get(name)
+        if record.pop("deleted", False):
+            self.annotations.remove(name)
+            self.modified_annotations.discard(name)
+            return
+        if "renamed" in record:
+            if annotation:
+                self.annotations.rename(name, record["renamed"])
+                annotation.path = annotation.path.with_name(record["renamed"])
+                if name in self.modified_annotations:
+                    self.modified_annotations.remove(name)
+                    self.modified_annotations.add(record["renamed"])
+            return
+        if not annotation:
+            annotation = Annotation()
+            annotation.path = Path(name)
+            self._insert(annotation)
+        for field, value in record.items():
+            setattr(annotation, field, intern_member(field, value))
+        self.annotations.update(annotation)
+        if record.get("modified"):
+            self.modified_annotations.add(name)
+        elif "modified" in record:
+            self.modified_annotations.discard(name)
+
+    def _replay_restored(self, records: list[dict[str, Any]]):
+        """Applies restored annotations read from the journal, whose
+        rows are ascending.
+        """
+        items = []
+        for record in records:
+            name = record.pop("path")
+            row = record.pop("row")
+            if name in self.annotations:
+                continue
+            annotation = Annotation()
+            annotation.path = Path(name)
+            for field, value in record.items():
+                setattr(annotation, field, intern_member(field, value))
+            if annotation.modified:
+                self.modified_annotations.add(name)
+            items.append((row, annotation))
+        if items:
+            self._insert_rows(items)
 
-    def importCSV(self, infile: StringIO):
+    def import_texts(self, rows: Iterable[dict[str, Any]]) -> ImportResult:
+        """Sets the texts of the annotations from rows containing the
+        sample file name in the `file` key and the text in the `text`
+        key. The rows are consumed and applied in batches, so they can
+        be streamed from a file of any size.
+        """
+        result = ImportResult()
+        batch: list[tuple[Annotation, str]] = []
+        for row in rows:
+            name = row.get("file") if isinstance(row, dict) else None
+            text = row.get("text") if name is not None else None
+            annotation = self.annotations.get(name) if text is not None else None
+            if not annotation:
+                result.unmatched += 1
+                continue
+            result.matched += 1
+            if annotation.sentence == text:
+                continue
+            result.changed += 1
+            batch.append((annotation, text))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                self.annotate_many(batch)
+                batch = []
+        self.annotate_many(batch)
+        return result
+
+    def importCSV(self, infile: StringIO) -> ImportResult:
         """Imports a CSV file created using the export function."""
-        reader = csv.DictReader(infile, delimiter=";")
-        for row in reader:
-            if not row["file"] in self.annotations_by_path:
-                return
-            self.annotate(self.annotations_by_path[row["file"]], row["text"])
+        return self.import_texts(csv.DictReader(infile, delimiter=";"))
 
     def exportCSV(self, outfile: StringIO):
         """Exports a CSV file with the path and text of the annotations
@@ -181,25 +1183,100 @@ class Project:
         writer = csv.writer(outfile, delimiter=";")
         writer.writerow(["file", "text"])
         for annotation in self.annotations:
-            writer.writerow([annotation.path.name, annotation.sentence])
-
-    def importJson(self, infile: StringIO):
-        """Imports a Json file created using the exportJson function."""
-        data = json.load(infile)
-        for row in data:
-            if "file" in row and "text" in row:
-                if not row["file"] in self.annotations_by_path:
-                    continue
-                self.annotate(self.annotations_by_path[row["file"]], row["text"])
+            writer.writerow([annotation.name, annotation.sentence])
+
+    def importJson(self, infile: StringIO) -> ImportResult:
+        """Imports a Json file created using the exportJson function.
+
+        The file is parsed incrementally."""
+        return self.import_texts(iter_json_array(infile))
+
+    def importJsonLines(self, infile: StringIO) -> ImportResult:
+        """Imports a Json Lines file with one object containing the
+        `file` and `text` keys per line.
+        """
+        return self.import_texts(iter_json_lines(infile))
 
     def exportJson(self, outfile: StringIO):
         """Exports a Json file with a list of dictionaries containing
         the annotation path as key and the text as value.
+
+        The list is written in batches instead of being built in memory.
+        """
+        separator = ""
+        outfile.write("[")
+        for batch in batched(self.annotations):
+            outfile.write(
+                separator
+                + ", ".join(
+                    json.dumps({"file": annotation.name, "text": annotation.sentence})
+                    for annotation in batch
+                )
+            )
+            separator = ", "
+        outfile.write("]")
+
+    def exportJsonLines(self, outfile: StringIO):
+        """Exports a Json Lines file with one object per annotation,
+        containing all members that are saved in the tsv file.
+        """
+        write_json_lines(outfile, self.annotations.rows())
+
+    def exportArrow(self, path: Path):
+        """Exports an Arrow IPC file with all members that are saved in
+        the tsv file as columns. Requires pyarrow.
         """
-        data: list[dict[str, str]] = []
+        write_arrow(path, self.annotations.rows())
+
+    def exportParquet(self, path: Path):
+        """Exports a Parquet file with all members that are saved in
+        the tsv file as columns. Requires pyarrow.
+        """
+        write_parquet(path, self.annotations.rows())
+
+    def exportSplits(
+        self,
+        folder: Path,
+        ratios: dict[str, float] = DEFAULT_RATIOS,
+        seed: int = 0,
+        shards: int = 1,
+    ) -> dict[str, int]:
+        """Exports the annotations as speaker-disjoint train, dev and
+        test tsv files, optionally split into shards. See
+        `export_splits`.
+
+        Returns the number of annotations in each split.
+        """
+        return export_splits(self.annotations.rows(), folder, ratios, seed, shards)
+
+    def exportTrimmedAudio(self, folder: Path) -> tuple[int, int]:
+        """Writes the audio files of the annotations to the folder with
+        the silence before and after the speech removed, see
+        `speech_ranges`. Files without a known speech range are copied
+        unchanged.
+
+        Returns the number of trimmed and of copied files.
+        """
+        folder.mkdir(parents=True, exist_ok=True)
+        files = []
         for annotation in self.annotations:
-            data.append({"file": annotation.path.name, "text": annotation.sentence})
-        json.dump(data, outfile)
+            if self.has_audio_file(annotation):
+                files.append(
+                    (
+                        annotation.path,
+                        folder / annotation.name,
+                        self.speech_range(annotation),
+                    )
+                )
+
+        def write(file: tuple[Path, Path, tuple[float, float] | None]) -> bool:
+            source, destination, speech = file
+            if speech is None:
+                shutil.copy2(source, destination)
+                return False
+            trim_audio_file(source, destination, *speech)
+            return True
 
-    def __hash__(self):
-        return hash(frozenset(map(hash, self.annotations)))
+        with ThreadPoolExecutor(max_workers=TRIM_WORKERS) as executor:
+            trimmed = sum(executor.map(write, files))
+        return trimmed, len(files) - trimmed
@@ -0,0 +1,54 @@
+from concurrent.futures import Future
+from functools import partial
+from pathlib import Path
+from PySide6.QtCore import Signal
+
+from voice_annotation_tool.background_worker import BackgroundWorker
+from voice_annotation_tool.project import ProjectSnapshot
+
+
+class ProjectSaver(BackgroundWorker):
+    """Writes project snapshots to disk in a background thread so the
+    GUI stays responsive while large tsv files are written.
+
+    Snapshots are written one after another in the order they were
+    passed to `save`, and finished in the thread of the saver, see
+    `ProjectSnapshot.finish`.
+    """
+
+    saved = Signal(Path)
+    "Emitted with the project file after a snapshot was written."
+    failed = Signal(Path, str)
+    "Emitted with the project file and the error if writing failed."
+
+    def __init__(self, parent=None):
+        super().__init__(parent, 1)
+
+    def save(self, snapshot: ProjectSnapshot, project_file: Path) -> Future:
+        """Starts writing the snapshot and returns immediately."""
+        return self.submit(
+            partial(self._finished, snapshot, project_file),
+            snapshot.write,
+            project_file,
+        )
+
+    def is_saving(self) -> bool:
+        """Returns true if a snapshot is still being written."""
+        return self.is_busy()
+
+    def shutdown(self):
+        """Finishes writing the snapshots and stops the thread."""
+        self.wait()
+        super().shutdown()
+
+    def _finished(self, snapshot: ProjectSnapshot, project_file: Path, future: Future):
+        error = future.exception()
+        if error is None:
+            try:
+                snapshot.finish()
+            except OSError as finish_error:
+                error = finish_error
+        if error:
+            self.failed.emit(project_file, str(error))
+        else:
+            self.saved.emit(project_file)
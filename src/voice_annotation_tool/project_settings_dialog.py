@@ -3,6 +3,7 @@ from PySide6.QtCore import Signal, Slot
 from PySide6.QtWidgets import QDialog, QFileDialog
 
 from voice_annotation_tool.project import Project
+from voice_annotation_tool.tsv_file import zstd_available
 from voice_annotation_tool.project_settings_dialog_ui import Ui_ProjectSettingsDialog
 
 
@@ -18,6 +19,8 @@ class ProjectSettingsDialog(QDialog, Ui_ProjectSettingsDialog):
             self.audioPathEdit.setText(str(project.audio_folder))
         if project.tsv_file:
             self.tsvPathEdit.setText(str(project.tsv_file))
+        self.databaseCheckBox.setChecked(project.database is not None)
+        self.lazyCheckBox.setChecked(project.lazy_tsv)
 
     def accept(self):
         audio: Path = Path(self.audioPathEdit.text())
@@ -29,6 +32,8 @@ class ProjectSettingsDialog(QDialog, Ui_ProjectSettingsDialog):
             {
                 "audio": audio,
                 "tsv": tsv,
+                "database": self.databaseCheckBox.isChecked(),
+                "lazy": self.lazyCheckBox.isChecked(),
             }
         )
         super().accept()
@@ -43,13 +48,20 @@ class ProjectSettingsDialog(QDialog, Ui_ProjectSettingsDialog):
 
     @Slot()
     def select_tsv_file_pressed(self):
-        file, _ = QFileDialog.getSaveFileName(
+        filters = ["TSV/CSV Files (*.tsv)", "Gzip Compressed TSV Files (*.tsv.gz)"]
+        if zstd_available():
+            filters.append("Zstandard Compressed TSV Files (*.tsv.zst)")
+        filters.append("CSV Files (*.csv)")
+        file, selected_filter = QFileDialog.getSaveFileName(
             self,
             "Select TSV File Location",
             "",
-            "TSV/CSV Files (*.tsv);;CSV Files (*.csv)",
+            ";;".join(filters),
             options=QFileDialog.DontConfirmOverwrite,
         )
         if not file:
             return
+        suffix = selected_filter[selected_filter.index("*") + 1 : -1]
+        if suffix.endswith((".gz", ".zst")) and not file.endswith(suffix):
+            file += suffix
         self.tsvPathEdit.setText(file)
@@ -0,0 +1,76 @@
+from concurrent.futures import Future
+from functools import partial
+from pathlib import Path
+import threading
+
+import ffmpeg
+from PySide6.QtCore import Signal
+
+from voice_annotation_tool.background_worker import BackgroundWorker
+from voice_annotation_tool.recording_splitter import (
+    TARGET_SEGMENT_SECONDS,
+    split_recording,
+)
+
+
+class RecordingImporter(BackgroundWorker):
+    """Splits a long recording into segments in a background thread, see
+    `split_recording`, so the window stays responsive while hours of
+    audio are decoded.
+
+    Decoding is done by ffmpeg or by numpy reductions, which both run
+    outside the interpreter lock, so a thread is enough.
+    """
+
+    progress = Signal(float)
+    "Emitted with the number of seconds of the recording split so far."
+    finished = Signal(list)
+    "Emitted with the `Segment`s once the recording was split."
+    failed = Signal(str)
+    "Emitted with the error if the recording couldn't be split."
+
+    def __init__(self, parent=None):
+        super().__init__(parent, 1)
+        self._stop = threading.Event()
+        "Set to stop the current split."
+
+    def start(
+        self,
+        path: Path,
+        folder: Path,
+        target_seconds: float = TARGET_SEGMENT_SECONDS,
+    ):
+        """Starts splitting the recording into segments written to the
+        folder, and cancels the previous split.
+        """
+        self.cancel()
+        self._stop = threading.Event()
+        progress = partial(self.post, self._generation, self.progress.emit)
+        self.submit(
+            self._report,
+            split_recording,
+            path,
+            folder,
+            target_seconds,
+            progress,
+            self._stop,
+        )
+
+    def is_running(self) -> bool:
+        """Returns true if a recording is being split."""
+        return self.is_busy()
+
+    def cancel(self):
+        """Stops splitting. The segments written so far are removed."""
+        self._stop.set()
+        super().cancel()
+
+    def _report(self, future: Future):
+        error = future.exception()
+        if error is None:
+            self.finished.emit(future.result())
+        elif isinstance(error, ffmpeg.Error):
+            message = error.stderr.decode(errors="replace") if error.stderr else ""
+            self.failed.emit(message.strip() or str(error))
+        else:
+            self.failed.emit(str(error))
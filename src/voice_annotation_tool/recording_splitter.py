@@ -0,0 +1,240 @@
+from pathlib import Path
+import threading
+from typing import Callable
+import wave
+
+import numpy
+
+from voice_annotation_tool.audio_stream import decode_chunks
+from voice_annotation_tool.voice_activity import (
+    FRAME_SECONDS,
+    MIN_SPEECH_SECONDS,
+    frame_features,
+    speech_frames,
+)
+
+TARGET_SEGMENT_SECONDS = 10.0
+"Segments are cut at the first pause after they reached this length."
+
+MIN_PAUSE_SECONDS = 0.3
+"The shortest silence a recording is cut in, in the middle of it."
+
+
+class Segment:
+    """A part of a recording that was written to its own file."""
+
+    __slots__ = ("name", "start", "end")
+
+    def __init__(self, name: str, start: float, end: float):
+        self.name = name
+        "The name of the file in the folder the segments were written to."
+        self.start = start
+        "The start of the segment in the recording in seconds."
+        self.end = end
+        "The end of the segment in the recording in seconds."
+
+    def __repr__(self) -> str:
+        return f"Segment({self.name!r}, {self.start}, {self.end})"
+
+
+class RecordingSplitter:
+    """Splits a stream of mono 16 bit samples into segments of about
+    the target length, which are written as wav files named after the
+    recording, like ``session_0001.wav``.
+
+    A segment ends in the middle of the first pause of at least
+    `MIN_PAUSE_SECONDS` after it reached the target length, or after
+    twice the target length if nobody paused. Silence is cut off in
+    pieces of the pause length, so long silences are left out instead
+    of starting the next segment. Samples are written as soon as no cut
+    can fall before them, so only one block is kept in memory.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        stem: str,
+        sample_rate: int,
+        target_seconds: float = TARGET_SEGMENT_SECONDS,
+    ):
+        self.folder = folder
+        self.stem = stem
+        self.sample_rate = sample_rate
+        self.frame_size = max(int(sample_rate * FRAME_SECONDS), 2)
+        "The number of samples per frame."
+        self.target_frames = max(round(target_seconds / FRAME_SECONDS), 1)
+        self.max_frames = 2 * self.target_frames
+        "Segments without a pause are cut after this many frames."
+        self.pause_frames = max(round(MIN_PAUSE_SECONDS / FRAME_SECONDS), 1)
+        self.min_speech_frames = max(round(MIN_SPEECH_SECONDS / FRAME_SECONDS), 1)
+        "Segments with fewer speech frames are left out."
+        self.sample_count = 0
+        "The number of samples fed so far."
+        self.segments: list[Segment] = []
+        "The segments that were written."
+        self._frame_count = 0
+        "The number of frames examined so far."
+        self._segment_start = 0
+        "The first frame of the current segment."
+        self._counted = 0
+        "The frame up to which speech frames were counted."
+        self._speech = 0
+        "The number of speech frames in the current segment."
+        self._silence = 0
+        "The number of silent frames at the end of the previous block."
+        self._written = 0
+        "The number of samples written to segment files."
+        self._pending = numpy.zeros(0, numpy.int16)
+        "The examined samples that weren't written yet."
+        self._rest = numpy.zeros(0, numpy.int16)
+        "The samples of the previous block that didn't fill a frame."
+        self._file: wave.Wave_write | None = None
+        self._path: Path | None = None
+
+    def feed(self, samples: numpy.ndarray):
+        """Examines the next block of samples and writes the segments
+        that ended in it.
+        """
+        self.sample_count += len(samples)
+        if len(self._rest):
+            samples = numpy.concatenate([self._rest, samples])
+        usable = len(samples) - len(samples) % self.frame_size
+        self._rest = samples[usable:].copy()
+        if not usable:
+            return
+        speech = speech_frames(
+            *frame_features(samples[:usable].reshape(-1, self.frame_size))
+        )
+        self._pending = numpy.concatenate([self._pending, samples[:usable]])
+        first = self._frame_count
+        # The length of the run of silent frames ending at every frame,
+        # continuing the run at the end of the previous block.
+        positions = numpy.arange(len(speech))
+        last_speech = numpy.maximum.accumulate(numpy.where(speech, positions, -1))
+        silence = positions - last_speech
+        silence[last_speech < 0] += self._silence
+        # Cutting in the middle of the pause keeps some silence on both
+        # sides. Cuts never fall more than `hold` frames before the end.
+        hold = self.pause_frames - self.pause_frames // 2
+        pauses = (silence >= self.pause_frames) & (silence % self.pause_frames == 0)
+        for pause_end in (first + numpy.flatnonzero(pauses)).tolist():
+            self._force_cuts(pause_end, speech, first)
+            cut = pause_end + 1 - hold
+            self._count_speech(cut, speech, first)
+            if not self._speech or cut - self._segment_start >= self.target_frames:
+                self._cut(cut, speech, first)
+        self._frame_count += len(speech)
+        self._force_cuts(self._frame_count, speech, first)
+        self._count_speech(self._frame_count, speech, first)
+        self._silence = int(silence[-1])
+        if self._speech or self._file:
+            # Silence is kept until it is known whether speech follows.
+            self._write_until((self._frame_count - hold) * self.frame_size)
+
+    def finish(self) -> list[Segment]:
+        """Writes the last segment and returns all segments."""
+        if self._speech or self._file:
+            self._pending = numpy.concatenate([self._pending, self._rest])
+            self._write_until(self.sample_count)
+        self._finish_segment(self.sample_count)
+        return self.segments
+
+    def abort(self):
+        """Removes the segments that were written."""
+        if self._file:
+            self._file.close()
+            self._file = None
+            self._path.unlink(missing_ok=True)
+        for segment in self.segments:
+            self.folder.joinpath(segment.name).unlink(missing_ok=True)
+        self.segments = []
+
+    def _force_cuts(self, frame: int, speech: numpy.ndarray, first: int):
+        while frame - self._segment_start > self.max_frames:
+            self._cut(self._segment_start + self.max_frames, speech, first)
+
+    def _count_speech(self, frame: int, speech: numpy.ndarray, first: int):
+        # The frames before the block were counted at its start.
+        if frame > self._counted:
+            start = self._counted - first
+            self._speech += int(numpy.count_nonzero(speech[start : frame - first]))
+            self._counted = frame
+
+    def _cut(self, frame: int, speech: numpy.ndarray, first: int):
+        self._count_speech(frame, speech, first)
+        end = frame * self.frame_size
+        if self._speech or self._file:
+            self._write_until(end)
+        else:
+            # Nothing but silence, which is dropped without a file.
+            self._pending = self._pending[end - self._written :]
+            self._written = end
+        self._finish_segment(end)
+        self._segment_start = frame
+
+    def _write_until(self, sample: int):
+        count = sample - self._written
+        if count <= 0:
+            return
+        if self._file is None:
+            self._path = self.folder / f"{self.stem}_{len(self.segments) + 1:04d}.wav"
+            if self._path.exists():
+                raise FileExistsError(f"{self._path} already exists")
+            self._file = wave.open(str(self._path), "wb")
+            self._file.setnchannels(1)
+            self._file.setsampwidth(2)
+            self._file.setframerate(self.sample_rate)
+        self._file.writeframes(self._pending[:count].astype("<i2").tobytes())
+        self._pending = self._pending[count:]
+        self._written = sample
+
+    def _finish_segment(self, end: int):
+        if self._file:
+            self._file.close()
+            self._file = None
+            if self._speech >= self.min_speech_frames:
+                start = self._segment_start * self.frame_size
+                self.segments.append(
+                    Segment(
+                        self._path.name,
+                        start / self.sample_rate,
+                        end / self.sample_rate,
+                    )
+                )
+            else:
+                self._path.unlink()
+        self._speech = 0
+
+
+def split_recording(
+    path: Path,
+    folder: Path,
+    target_seconds: float = TARGET_SEGMENT_SECONDS,
+    progress: Callable[[float], None] | None = None,
+    stop: threading.Event | None = None,
+) -> list[Segment]:
+    """Splits a long recording into segments written to the folder, see
+    `RecordingSplitter`. The recording is decoded in chunks, by ffmpeg
+    if it isn't a 16 bit wav file.
+
+    The progress is called with the number of seconds split so far.
+    Setting the stop event removes the segments written so far and
+    returns no segments.
+    """
+    sample_rate, chunks = decode_chunks(path)
+    splitter = RecordingSplitter(folder, path.stem, sample_rate, target_seconds)
+    try:
+        for chunk in chunks:
+            splitter.feed(chunk)
+            if stop and stop.is_set():
+                splitter.abort()
+                return []
+            if progress:
+                progress(splitter.sample_count / sample_rate)
+        return splitter.finish()
+    except BaseException:
+        splitter.abort()
+        raise
+    finally:
+        # Stops ffmpeg if the recording wasn't decoded completely.
+        chunks.close()
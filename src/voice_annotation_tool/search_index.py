@@ -0,0 +1,420 @@
+from bisect import bisect_left
+import math
+import re
+import shlex
+from typing import Any, Iterable
+
+import numpy
+
+from voice_annotation_tool.annotation import Annotation
+
+FACETS = ("age", "gender", "accent", "client_id", "modified")
+"The members of an annotation that can be filtered with `member:value`."
+
+RANGE_OPERATORS = {
+    "<=": lambda value: (-math.inf, value),
+    ">=": lambda value: (value, math.inf),
+    "<": lambda value: (-math.inf, math.nextafter(value, -math.inf)),
+    ">": lambda value: (math.nextafter(value, math.inf), math.inf),
+}
+"Turn the value of `duration:<value` terms into a closed interval."
+
+TRUE_VALUES = frozenset(["1", "true", "yes"])
+"Values of the modified facet that match modified annotations."
+
+REBUILD_RATIO = 0.125
+"""The fraction of annotations that can be changed after the postings
+were built before they are built again."""
+
+REBUILD_MIN_CHANGES = 4096
+"The number of changes that never cause the postings to be rebuilt."
+
+PREFIX_SCAN_LIMIT = 1024
+"""The number of results up to which the sentences themselves are
+searched for a prefix instead of the index."""
+
+_find_words = re.compile(r"\w+").findall
+
+_EMPTY = numpy.zeros(0, numpy.int64)
+
+
+def words_of(text: str) -> set[str]:
+    "Returns the case-folded words of a text."
+    return set(_find_words(text.casefold()))
+
+
+def parse_range(value: str) -> tuple[float, float] | None:
+    """Parses `<5`, `>=2.5` or `2-5` into the closed interval of the
+    matching numbers. Returns None if the value can't be parsed.
+    """
+    try:
+        for operator, interval in RANGE_OPERATORS.items():
+            if value.startswith(operator):
+                return interval(float(value[len(operator) :]))
+        low, separator, high = value.partition("-")
+        if separator:
+            return float(low or 0), float(high) if high else math.inf
+    except ValueError:
+        pass
+    return None
+
+
+def grown(array: numpy.ndarray, capacity: int, fill=0) -> numpy.ndarray:
+    """Returns a copy of the array enlarged to the capacity, filled with
+    the given value.
+    """
+    result = numpy.full(capacity, fill, array.dtype)
+    result[: len(array)] = array
+    return result
+
+
+class SearchQuery:
+    """A parsed search query.
+
+    Words are matched against the sentences, terms of the form
+    `member:value` against the members listed in `FACETS`. Values
+    containing spaces can be quoted, like `accent:"new zealand"`, and
+    an empty value matches annotations where the member isn't set.
+    The duration of the audio file in seconds is matched by terms like
+    `duration:<5`, `duration:>=2.5` or `duration:2-5`.
+    All words and members must match, several values for the same
+    member match any of them. If the query doesn't end with a space,
+    the last word also matches longer words starting with it, so
+    results can be shown while the query is typed.
+    """
+
+    def __init__(self, text: str):
+        self.words: list[str] = []
+        "The words that must appear in the sentence."
+        self.prefix: str | None = None
+        "The start of a word that must appear in the sentence."
+        self.facets: dict[str, list[str]] = {}
+        "Maps members to the case-folded values they must have."
+        self.durations: list[tuple[float, float]] = []
+        "Intervals the duration of the audio file must be in."
+        try:
+            terms = shlex.split(text)
+        except ValueError:
+            # An unterminated quote while the query is being typed.
+            terms = text.split()
+        for term in terms:
+            member, separator, value = term.partition(":")
+            if separator and member.casefold() in FACETS:
+                self.facets.setdefault(member.casefold(), []).append(value.casefold())
+            elif separator and member.casefold() == "duration":
+                interval = parse_range(value)
+                if interval:
+                    self.durations.append(interval)
+            else:
+                self.words.extend(_find_words(term.casefold()))
+        if self.words and text and not text[-1].isspace():
+            self.prefix = self.words.pop()
+
+    def is_empty(self) -> bool:
+        "Returns true if the query matches every annotation."
+        return not (self.words or self.prefix or self.facets or self.durations)
+
+
+class SearchIndex:
+    """Indexes the sentences and metadata of annotations, so they can
+    be searched without looking at every annotation.
+
+    Every annotation gets an id when it is added. Ids increase with the
+    row of the annotation, so sorted ids are in the order of the rows,
+    and they are kept when rows before them are removed.
+
+    The sentences are indexed by an inverted index mapping every word to
+    a sorted array of the ids of the sentences containing it. Changing
+    a sentence doesn't rewrite these arrays: the id is marked as stale
+    and its new words are kept in small sets instead, until enough
+    sentences changed that the arrays are built again. The members in
+    `FACETS` are stored as an array of value codes per member, which
+    can be compared at once, and the durations of the audio files in an
+    array of seconds.
+    """
+
+    def __init__(self, annotations: Iterable[Annotation] = ()):
+        self._ids: dict[str, int] = {}
+        "Maps file names to the ids of their annotations."
+        self._names: list[str | None] = []
+        "The file names of the ids, None for removed annotations."
+        self._sentences: list[str] = []
+        "The indexed sentence of every id."
+        self._postings: dict[str, numpy.ndarray] = {}
+        "Maps words to the sorted ids whose sentence contained them when built."
+        self._built = 0
+        "The number of ids when the postings were built."
+        self._added: dict[str, set[int]] = {}
+        "Maps words to the ids whose sentence was indexed after the build."
+        self._changes = 0
+        "The number of sentences indexed since the postings were built."
+        self._vocabulary: list[str] | None = None
+        "The sorted words of the postings, None if it needs to be sorted."
+        self._alive = numpy.zeros(0, bool)
+        "True for the ids of annotations that weren't removed."
+        self._stale = numpy.zeros(0, bool)
+        "True for the ids whose words changed since the build."
+        self._codes: dict[str, dict[Any, int]] = {facet: {} for facet in FACETS}
+        "Maps the distinct values of every facet to their code."
+        self._columns: dict[str, numpy.ndarray] = {
+            facet: numpy.zeros(0, numpy.int32) for facet in FACETS
+        }
+        "The value code of every id for every facet."
+        self._durations = numpy.zeros(0)
+        "The duration of the audio file of every id, NaN if it isn't known."
+        self._extend(annotations)
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def id_of(self, name: str) -> int:
+        """Returns the id of the annotation with the given file name.
+
+        Raises a KeyError if it isn't indexed.
+        """
+        return self._ids[name]
+
+    def name_of(self, id: int) -> str | None:
+        "Returns the file name of an id, None if it was removed."
+        return self._names[id]
+
+    def update(self, annotation: Annotation):
+        """Indexes an added annotation or indexes a changed annotation
+        again. Added annotations must come after all indexed annotations.
+        """
+        id = self._ids.get(annotation.name)
+        if id is None:
+            self._append(annotation)
+            return
+        self._set_facets(id, annotation)
+        if annotation.sentence == self._sentences[id]:
+            return
+        for word in words_of(self._sentences[id]):
+            added = self._added.get(word)
+            if added:
+                added.discard(id)
+        self._sentences[id] = annotation.sentence
+        self._index_sentence(id)
+
+    def remove(self, name: str):
+        "Removes the annotation with the given file name from the index."
+        id = self._ids.pop(name, None)
+        if id is None:
+            return
+        self._names[id] = None
+        self._sentences[id] = ""
+        self._alive[id] = False
+
+    def rename(self, old_name: str, new_name: str):
+        "Changes the file name of an indexed annotation, keeping its id."
+        id = self._ids.pop(old_name, None)
+        if id is None:
+            return
+        self._ids[new_name] = id
+        self._names[id] = new_name
+
+    def set_durations(self, durations: Iterable[tuple[str, float | None]]):
+        """Sets the durations of the audio files of annotations, given
+        as pairs of the file name and the duration in seconds or None.
+        """
+        ids = self._ids
+        for name, duration in durations:
+            id = ids.get(name)
+            if id is not None:
+                self._durations[id] = math.nan if duration is None else duration
+
+    def order_by_duration(self, ids: numpy.ndarray, descending=False) -> numpy.ndarray:
+        """Returns the ids ordered by the duration of their audio file.
+        Ids with the same duration stay in the order of their rows,
+        unknown durations come last.
+        """
+        durations = self._durations[ids]
+        if descending:
+            durations = -durations
+        return ids[numpy.argsort(durations, kind="stable")]
+
+    def search(self, query: str | SearchQuery) -> numpy.ndarray:
+        """Returns the sorted ids of the annotations matching the query,
+        see `SearchQuery`.
+        """
+        if isinstance(query, str):
+            query = SearchQuery(query)
+        if self._changes > max(REBUILD_MIN_CHANGES, len(self._ids) * REBUILD_RATIO):
+            self._build()
+        count = len(self._names)
+        mask = self._alive[:count].copy()
+        for facet, values in query.facets.items():
+            mask &= self._facet_mask(facet, values, count)
+        for low, high in query.durations:
+            durations = self._durations[:count]
+            mask &= (durations >= low) & (durations <= high)
+        candidates = [self._word_ids(word) for word in set(query.words)]
+        if candidates:
+            candidates.sort(key=len)
+            ids = candidates[0]
+            for other in candidates[1:]:
+                if not len(ids):
+                    break
+                ids = numpy.intersect1d(ids, other, assume_unique=True)
+            ids = ids[mask[ids]]
+            if query.prefix and len(ids) <= PREFIX_SCAN_LIMIT:
+                return self._with_prefix(ids, query.prefix)
+            if not query.prefix:
+                return ids
+        if query.prefix:
+            mask &= self._prefix_mask(query.prefix, count)
+            if candidates:
+                return ids[mask[ids]]
+        return numpy.flatnonzero(mask)
+
+    def _append(self, annotation: Annotation):
+        "Gives a new annotation the next id and indexes it."
+        id = len(self._names)
+        if id >= len(self._alive):
+            self._grow(max(1024, id * 2))
+        self._ids[annotation.name] = id
+        self._names.append(annotation.name)
+        self._sentences.append(annotation.sentence)
+        self._alive[id] = True
+        self._set_facets(id, annotation)
+        self._index_sentence(id)
+
+    def _extend(self, annotations: Iterable[Annotation]):
+        """Gives the annotations the next ids without indexing their
+        sentences, which is faster than appending them one by one.
+        """
+        first = len(self._names)
+        values: dict[str, list] = {facet: [] for facet in FACETS}
+        for annotation in annotations:
+            self._ids[annotation.name] = len(self._names)
+            self._names.append(annotation.name)
+            self._sentences.append(annotation.sentence)
+            for facet, column in values.items():
+                column.append(getattr(annotation, facet))
+        self._grow(len(self._names))
+        self._alive[first:] = True
+        for facet, column in values.items():
+            codes = self._codes[facet]
+            for value in dict.fromkeys(column):
+                codes.setdefault(value, len(codes))
+            self._columns[facet][first:] = numpy.fromiter(
+                map(codes.__getitem__, column), numpy.int32, len(column)
+            )
+
+    def _grow(self, capacity: int):
+        "Enlarges the arrays stored per id."
+        self._alive = grown(self._alive, capacity)
+        self._stale = grown(self._stale, capacity)
+        for facet, column in self._columns.items():
+            self._columns[facet] = grown(column, capacity)
+        self._durations = grown(self._durations, capacity, math.nan)
+
+    def _set_facets(self, id: int, annotation: Annotation):
+        "Stores the codes of the facet values of an annotation."
+        for facet in FACETS:
+            codes = self._codes[facet]
+            value = getattr(annotation, facet)
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(codes)
+            self._columns[facet][id] = code
+
+    def _index_sentence(self, id: int):
+        "Adds the words of a sentence indexed after the build."
+        if id < self._built:
+            self._stale[id] = True
+        self._changes += 1
+        for word in words_of(self._sentences[id]):
+            added = self._added.get(word)
+            if added is None:
+                added = self._added[word] = set()
+                if word not in self._postings:
+                    self._vocabulary = None
+            added.add(id)
+
+    def _build(self):
+        "Builds the postings of all sentences."
+        words: list[str] = []
+        counts: list[int] = []
+        for name, sentence in zip(self._names, self._sentences):
+            found = words_of(sentence) if name is not None else ()
+            words.extend(found)
+            counts.append(len(found))
+        # Sorting the word codes of all sentences groups the ids of every
+        # word, which stay sorted since the sort is stable.
+        codes_of = {word: code for code, word in enumerate(dict.fromkeys(words))}
+        codes = numpy.fromiter(
+            map(codes_of.__getitem__, words), numpy.int64, len(words)
+        )
+        ids = numpy.repeat(numpy.arange(len(counts)), counts)
+        ids = ids[numpy.argsort(codes, kind="stable")]
+        ends = numpy.cumsum(numpy.bincount(codes, minlength=len(codes_of)))
+        self._postings = dict(zip(codes_of, numpy.split(ids, ends[:-1])))
+        self._built = len(self._names)
+        self._added.clear()
+        self._changes = 0
+        self._stale[:] = False
+        self._vocabulary = None
+
+    def _word_ids(self, word: str) -> numpy.ndarray:
+        "Returns the sorted ids whose sentence contains the word."
+        ids = self._postings.get(word, _EMPTY)
+        if self._changes:
+            ids = ids[~self._stale[ids]]
+        added = self._added.get(word)
+        if added:
+            extra = numpy.fromiter(added, numpy.int64, len(added))
+            ids = numpy.union1d(ids, extra)
+        return ids
+
+    def _prefix_mask(self, prefix: str, count: int) -> numpy.ndarray:
+        """Returns a mask of the ids whose sentence contains a word
+        starting with the prefix.
+        """
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings.keys() | self._added.keys())
+        vocabulary = self._vocabulary
+        mask = numpy.zeros(count, bool)
+        for position in range(bisect_left(vocabulary, prefix), len(vocabulary)):
+            if not vocabulary[position].startswith(prefix):
+                break
+            mask[self._word_ids(vocabulary[position])] = True
+        return mask
+
+    def _with_prefix(self, ids: numpy.ndarray, prefix: str) -> numpy.ndarray:
+        """Returns the ids whose sentence contains a word starting with
+        the prefix, by looking at the sentences.
+        """
+        return numpy.array(
+            [
+                id
+                for id in ids.tolist()
+                if any(
+                    word.startswith(prefix) for word in words_of(self._sentences[id])
+                )
+            ],
+            numpy.int64,
+        )
+
+    def _facet_mask(self, facet: str, values: list[str], count: int) -> numpy.ndarray:
+        "Returns a mask of the ids whose facet has one of the values."
+        codes = [
+            code
+            for value, code in self._codes[facet].items()
+            if self._matches(facet, value, values)
+        ]
+        column = self._columns[facet][:count]
+        if len(codes) == 1:
+            return column == codes[0]
+        return numpy.isin(column, codes)
+
+    @staticmethod
+    def _matches(facet: str, value: Any, values: list[str]) -> bool:
+        "Returns true if the value of a facet is one of the queried values."
+        if facet == "modified":
+            return any((query in TRUE_VALUES) == bool(value) for query in values)
+        return str(value).casefold() in values
@@ -0,0 +1,211 @@
+from collections import Counter
+from operator import attrgetter
+from typing import Any, Callable
+
+from PySide6.QtCore import QItemSelection, QObject, QTimer, Slot
+from PySide6.QtGui import QUndoCommand
+from PySide6.QtWidgets import QAbstractItemView
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_diff import AnnotationDiff
+from voice_annotation_tool.edit_commands import EditCommand
+from voice_annotation_tool.project import Project
+
+METADATA_FIELDS = ("age", "gender", "accent", "client_id")
+"The fields of the annotations that are edited for the whole selection."
+
+EDIT_DELAY = 300
+"Milliseconds without typing after which edits are applied."
+
+
+def selection_size(selection: QItemSelection) -> int:
+    "Returns the number of rows in the ranges of a selection."
+    return sum(range.height() for range in selection if range.isValid())
+
+
+class SelectionSummary:
+    """Counts the values of the metadata fields of the selected
+    annotations, so the value shared by all of them is known without
+    looking at every annotation whenever the selection changes.
+    """
+
+    def __init__(self):
+        self.count = 0
+        "The number of counted annotations."
+        self._values: dict[str, Counter] = {
+            field: Counter() for field in METADATA_FIELDS
+        }
+        "Maps the fields to the number of annotations with each value."
+
+    def clear(self):
+        """Forgets all counted annotations."""
+        self.count = 0
+        for counter in self._values.values():
+            counter.clear()
+
+    def add(self, annotations: list[Annotation]):
+        """Counts the values of newly selected annotations."""
+        for field, counter in self._values.items():
+            counter.update(map(attrgetter(field), annotations))
+        self.count += len(annotations)
+
+    def remove(self, annotations: list[Annotation]):
+        """Stops counting the values of deselected annotations."""
+        for field, counter in self._values.items():
+            counter.subtract(map(attrgetter(field), annotations))
+            # Drop values no annotation has anymore.
+            self._values[field] = +counter
+        self.count -= len(annotations)
+
+    def assign(self, **fields: Any):
+        """Records that the fields of all counted annotations were set
+        to the given values.
+        """
+        for field, value in fields.items():
+            self._values[field] = Counter({value: self.count} if self.count else {})
+
+    def common(self, field: str) -> Any:
+        """Returns the value of the field shared by all annotations,
+        None if they have different values or there are none.
+        """
+        counter = self._values[field]
+        if len(counter) != 1:
+            return None
+        return next(iter(counter))
+
+
+class SelectionEditor(QObject):
+    """Edits the metadata of the annotations selected in a list view.
+
+    The selection is read as row ranges, which the models of the list
+    convert to annotations directly. Edits typed into text fields are
+    collected for `EDIT_DELAY` milliseconds and then applied to all
+    selected annotations at once as a single command on the undo stack.
+    The values shared by the selection are kept in a `SelectionSummary`
+    that is updated with the rows added to and removed from the
+    selection.
+    """
+
+    def __init__(
+        self,
+        view: QAbstractItemView,
+        push_edit: Callable[[QUndoCommand], Any],
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.view = view
+        self.push_edit = push_edit
+        "Applies an edit by pushing it to an undo stack."
+        self.project = Project()
+        self.summary = SelectionSummary()
+        self._pending: dict[str, Any] = {}
+        "The field values that weren't applied yet."
+        self._targets: list[Annotation] | None = None
+        "The annotations that were selected when the pending edits began."
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(EDIT_DELAY)
+        self._timer.timeout.connect(self.flush)
+
+    def set_project(self, project: Project):
+        """Applies pending edits and edits the annotations of another
+        project from now on.
+        """
+        self.flush()
+        self.project = project
+        self.summary.clear()
+
+    def selected_annotations(self) -> list[Annotation]:
+        """Returns the selected annotations, in the order of the
+        selected ranges.
+        """
+        selection_model = self.view.selectionModel()
+        if not selection_model:
+            return []
+        return self.annotations_in(selection_model.selection())
+
+    def annotations_in(self, selection: QItemSelection) -> list[Annotation]:
+        """Returns the annotations of the rows in the ranges of the
+        selection.
+        """
+        model = self.view.model()
+        annotations = []
+        for range in selection:
+            # Ranges become invalid when the rows of the model are reset.
+            if range.isValid():
+                annotations += model.annotations_in_rows(range.top(), range.bottom())
+        return annotations
+
+    @Slot()
+    def selection_changed(self, selected: QItemSelection, deselected: QItemSelection):
+        """Updates the summary with the rows that were added to and
+        removed from the selection. It is counted again if that is less
+        work, for example when a single row replaces a large selection.
+        """
+        self.flush()
+        removed = selection_size(deselected)
+        added = selection_size(selected)
+        if removed > self.summary.count - removed + added:
+            self.refresh()
+            return
+        self.summary.remove(self.annotations_in(deselected))
+        self.summary.add(self.annotations_in(selected))
+
+    @Slot()
+    def refresh(self):
+        """Counts the values of the selected annotations again, for
+        example after the rows of the list or the annotations were
+        changed by something else than this editor.
+        """
+        self.summary.clear()
+        self.summary.add(self.selected_annotations())
+
+    def edit(self, field: str, value: Any):
+        """Sets a field of the selected annotations once no other edit
+        followed for `EDIT_DELAY` milliseconds. The summary shows the
+        value right away.
+        """
+        self._begin_edit()
+        self._pending[field] = value
+        self.summary.assign(**{field: value})
+        self._timer.start()
+
+    def assign(self, **fields: Any):
+        """Sets the fields of the selected annotations right away,
+        together with any pending edits.
+        """
+        self._begin_edit()
+        self._pending.update(fields)
+        self.summary.assign(**fields)
+        self.flush()
+
+    def has_pending_edits(self) -> bool:
+        "Returns true if edits are waiting to be applied."
+        return bool(self._pending)
+
+    @Slot()
+    def flush(self):
+        """Applies the pending edits to the annotations that were
+        selected when they were made.
+        """
+        self._timer.stop()
+        if not self._pending:
+            return
+        pending = self._pending
+        targets = self._targets
+        self._pending = {}
+        self._targets = None
+        self.push_edit(
+            EditCommand(
+                self.project,
+                AnnotationDiff.assign(targets, pending),
+                self.tr("Edit Metadata"),
+            )
+        )
+
+    def _begin_edit(self):
+        """Remembers the selected annotations when a new series of
+        edits begins.
+        """
+        if self._targets is None:
+            self._targets = self.selected_annotations()
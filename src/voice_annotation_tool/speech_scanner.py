@@ -0,0 +1,66 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+import multiprocessing
+from pathlib import Path
+
+from PySide6.QtCore import Signal
+
+from voice_annotation_tool.background_worker import BackgroundWorker
+from voice_annotation_tool.voice_activity import DETECT_BATCH_SIZE, detect_batch
+
+
+class SpeechScanner(BackgroundWorker):
+    """Detects where speech starts and ends in audio files in a pool of
+    worker processes, see `detect_batch`.
+
+    Computing the frame features is CPU bound, so the files are
+    examined in processes to use every core. The results are reported
+    in batches in the thread of the scanner.
+    """
+
+    detected = Signal(list)
+    "Emitted with a list of file names and their `SpeechRange`."
+    progress = Signal(int, int)
+    "Emitted with the number of examined files and the number of files."
+    finished = Signal()
+    "Emitted after all files passed to `scan` were examined."
+
+    def __init__(self, parent=None, workers: int | None = None):
+        # Forking would copy the threads of the GUI into the workers.
+        # The processes are only started once files are scanned.
+        super().__init__(
+            parent,
+            executor=ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("spawn")
+            ),
+        )
+        self._done = 0
+        self._total = 0
+
+    def scan(self, files: list[tuple[Path, int, int]]):
+        """Starts examining the files, given as their path, size and
+        modification time, and cancels examining the previous files.
+        """
+        self.cancel()
+        self._done = 0
+        self._total = len(files)
+        for start in range(0, len(files), DETECT_BATCH_SIZE):
+            batch = files[start : start + DETECT_BATCH_SIZE]
+            self.submit(partial(self._report, len(batch)), detect_batch, batch)
+        if not self.is_busy():
+            self.finished.emit()
+
+    def is_scanning(self) -> bool:
+        """Returns true if some files weren't examined yet."""
+        return self.is_busy()
+
+    def _report(self, count: int, future: Future):
+        error = future.exception()
+        if error:
+            print("Failed to detect speech:", error)
+        self._done += count
+        if not error and future.result():
+            self.detected.emit(future.result())
+        self.progress.emit(self._done, self._total)
+        if not self.is_busy():
+            self.finished.emit()
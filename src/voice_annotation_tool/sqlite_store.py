@@ -0,0 +1,401 @@
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+import sqlite3
+import sys
+from typing import Iterable, Iterator
+from weakref import WeakValueDictionary
+
+from voice_annotation_tool.annotation import Annotation, shared_folder
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS annotations (
+    position INTEGER PRIMARY KEY,
+    client_id TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL UNIQUE,
+    sentence TEXT NOT NULL DEFAULT '',
+    up_votes INTEGER NOT NULL DEFAULT 0,
+    down_votes INTEGER NOT NULL DEFAULT 0,
+    age TEXT NOT NULL DEFAULT '',
+    gender TEXT NOT NULL DEFAULT '',
+    accent TEXT NOT NULL DEFAULT '',
+    modified INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS annotations_modified ON annotations (modified);
+CREATE INDEX IF NOT EXISTS annotations_client_id ON annotations (client_id);
+CREATE INDEX IF NOT EXISTS annotations_has_sentence ON annotations (sentence != '');
+"""
+"The table the annotations are stored in, the name column is indexed by UNIQUE."
+
+MEMBERS = "client_id, name, sentence, up_votes, down_votes, age, gender, accent"
+"The columns of a tsv row, in the order of `Annotation.TSV_HEADER_MEMBERS`."
+
+SELECT_ANNOTATIONS = f"SELECT position, {MEMBERS}, modified FROM annotations"
+SELECT_ROWS = f"SELECT {MEMBERS} FROM annotations ORDER BY position"
+
+
+def read_rows(database: Path) -> Iterator[tuple]:
+    """Yields the tsv rows of the annotations in a database.
+
+    The database is opened when the first row is requested, in the
+    thread iterating the rows. The rows are read in one transaction,
+    so they reflect the database at the time the first row is read.
+    """
+    connection = sqlite3.connect(database)
+    try:
+        yield from connection.execute(SELECT_ROWS)
+    finally:
+        connection.close()
+
+
+class SqliteAnnotationStore:
+    """Stores the annotations of a project in a SQLite database.
+
+    Can be used instead of an `AnnotationStore` for projects that don't
+    fit into memory. Only the database position of every row is kept
+    in memory. Annotations are read from the database in pages when
+    they are accessed, and changes are written to the database right
+    away.
+
+    Annotations that are still referenced are returned again when their
+    row is accessed, so there is only one annotation object per row.
+    """
+
+    PAGE_SIZE = 256
+    "The number of rows read from the database at once."
+    CACHE_SIZE = 16 * PAGE_SIZE
+    "The number of recently accessed annotations kept in memory."
+    NAMES_PER_QUERY = 500
+    "The number of names passed to a query at once, below SQLite's limit."
+
+    def __init__(self, database: Path):
+        self.database = database
+        "The file of the database."
+        self.folder: Path | None = None
+        "The folder the samples of the annotations are in."
+        self._connection = sqlite3.connect(database, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._positions = array(
+            "q",
+            (
+                row[0]
+                for row in self._connection.execute(
+                    "SELECT position FROM annotations ORDER BY position"
+                )
+            ),
+        )
+        "The database positions of the annotations, in row order."
+        self._live: WeakValueDictionary[int, Annotation] = WeakValueDictionary()
+        "Annotations that are referenced somewhere, by position."
+        self._recent: OrderedDict[int, Annotation] = OrderedDict()
+        "Recently accessed annotations, by position."
+        self._batch_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[Annotation]:
+        for start in range(0, len(self._positions), self.PAGE_SIZE):
+            yield from self._read_page(start)
+
+    def __getitem__(self, row: int) -> Annotation:
+        position = self._positions[row]
+        annotation = self._live.get(position)
+        if annotation is None:
+            if row < 0:
+                row += len(self._positions)
+            start = row - row % self.PAGE_SIZE
+            return self._read_page(start)[row - start]
+        self._remember(position, annotation)
+        return annotation
+
+    def __contains__(self, name: object) -> bool:
+        return self._position_of(name) is not None
+
+    def get(self, name: str) -> Annotation | None:
+        """Returns the annotation of the sample with the given file
+        name, or None if there is none.
+        """
+        row = self._connection.execute(
+            SELECT_ANNOTATIONS + " WHERE name = ?", (name,)
+        ).fetchone()
+        return self._materialize(row) if row else None
+
+    def names(self) -> Iterable[str]:
+        """Returns the file names of all stored annotations, as a set
+        so membership tests don't query the database.
+        """
+        cursor = self._connection.execute("SELECT name FROM annotations")
+        return {row[0] for row in cursor}
+
+    def row_of(self, name: str) -> int:
+        """Returns the row of the annotation with the given file name.
+
+        Raises a KeyError if there is no such annotation.
+        """
+        position = self._position_of(name)
+        if position is None:
+            raise KeyError(name)
+        return bisect_left(self._positions, position)
+
+    def add(self, annotation: Annotation, overwrite=False) -> bool:
+        """Appends the annotation to the end of the store. If an
+        annotation with the same file name exists it is replaced in
+        place if overwrite is true, otherwise nothing is changed.
+
+        Returns true if the annotation was added.
+        """
+        if annotation.folder is None and self.folder:
+            annotation.folder = shared_folder(self.folder)
+        position = self._position_of(annotation.name)
+        if position is None:
+            cursor = self._connection.execute(
+                f"INSERT INTO annotations ({MEMBERS}, modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*annotation.to_row(), annotation.modified),
+            )
+            position = cursor.lastrowid
+            self._positions.append(position)
+        elif overwrite:
+            self.update(annotation)
+        else:
+            return False
+        self._live[position] = annotation
+        self._remember(position, annotation)
+        return True
+
+    def insert_many(self, items: Iterable[tuple[int, Annotation]]):
+        """Inserts annotations at the given rows, which are the rows
+        they have afterwards and have to be ascending. Rows past the
+        end append the annotation. The file names must not be stored
+        yet.
+
+        Every annotation gets a database position between the positions
+        of its neighbours. The positions of the following rows are only
+        moved if there is no free position between them, which doesn't
+        happen when the annotations are put back where they were
+        removed from.
+        """
+        items = list(items)
+        old = self._positions
+        positions = array("q")
+        rest = 0
+        with self.batch():
+            for count, (row, annotation) in enumerate(items):
+                if annotation.folder is None and self.folder:
+                    annotation.folder = shared_folder(self.folder)
+                take = max(min(row - len(positions), len(old) - rest), 0)
+                positions.extend(old[rest : rest + take])
+                rest += take
+                previous = positions[-1] if positions else 0
+                if rest < len(old) and old[rest] - previous <= 1:
+                    self._shift_positions(old, rest, len(items) - count)
+                position = previous + 1
+                self._connection.execute(
+                    f"INSERT INTO annotations (position, {MEMBERS}, modified) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (position, *annotation.to_row(), annotation.modified),
+                )
+                positions.append(position)
+                self._live[position] = annotation
+                self._remember(position, annotation)
+        positions.extend(old[rest:])
+        self._positions = positions
+
+    def update(self, annotation: Annotation):
+        """Writes changes made to the members of an annotation to the
+        database.
+        """
+        self._connection.execute(
+            "UPDATE annotations SET client_id = ?, sentence = ?, up_votes = ?, "
+            "down_votes = ?, age = ?, gender = ?, accent = ?, modified = ? "
+            "WHERE name = ?",
+            (
+                annotation.client_id,
+                annotation.sentence,
+                annotation.up_votes,
+                annotation.down_votes,
+                annotation.age,
+                annotation.gender,
+                annotation.accent,
+                annotation.modified,
+                annotation.name,
+            ),
+        )
+
+    def remove(self, name: str) -> Annotation | None:
+        """Removes the annotation with the given file name and
+        returns it, or None if there is no such annotation.
+        """
+        annotation = self.get(name)
+        if annotation is None:
+            return None
+        position = self._position_of(name)
+        self._connection.execute("DELETE FROM annotations WHERE name = ?", (name,))
+        del self._positions[bisect_left(self._positions, position)]
+        self._recent.pop(position, None)
+        self._live.pop(position, None)
+        return annotation
+
+    def remove_many(self, names: Iterable[str]):
+        """Removes the annotations with the given file names, ignoring
+        names without an annotation.
+
+        The rows are deleted in one transaction and the positions are
+        rebuilt once, instead of once per removed annotation.
+        """
+        names = list(names)
+        removed: set[int] = set()
+        with self.batch():
+            for start in range(0, len(names), self.NAMES_PER_QUERY):
+                chunk = names[start : start + self.NAMES_PER_QUERY]
+                where = f"WHERE name IN ({', '.join('?' * len(chunk))})"
+                cursor = self._connection.execute(
+                    f"SELECT position FROM annotations {where}", chunk
+                )
+                removed.update(row[0] for row in cursor)
+                self._connection.execute(f"DELETE FROM annotations {where}", chunk)
+        if not removed:
+            return
+        self._positions = array(
+            "q", (position for position in self._positions if position not in removed)
+        )
+        for position in removed:
+            self._recent.pop(position, None)
+            self._live.pop(position, None)
+
+    def rename(self, old_name: str, new_name: str):
+        """Moves the annotation stored under the old file name to the
+        new name, keeping its row.
+        """
+        if new_name == old_name:
+            return
+        if new_name in self:
+            raise KeyError(new_name)
+        self._connection.execute(
+            "UPDATE annotations SET name = ? WHERE name = ?", (new_name, old_name)
+        )
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Returns a context in which many annotations can be added
+        or changed in a single transaction.
+        """
+        self._batch_depth += 1
+        if self._batch_depth == 1:
+            self._connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            if self._batch_depth == 1:
+                self._connection.execute("ROLLBACK")
+            raise
+        else:
+            if self._batch_depth == 1:
+                self._connection.execute("COMMIT")
+        finally:
+            self._batch_depth -= 1
+
+    def rows(self) -> Iterator[tuple]:
+        """Yields the annotations converted using `Annotation.to_row`,
+        streamed from a database cursor.
+        """
+        return iter(self._connection.execute(SELECT_ROWS))
+
+    def snapshot_rows(self) -> Iterable[tuple]:
+        """Returns the rows of the annotations, read using a separate
+        connection from the thread iterating them.
+        """
+        return read_rows(self.database)
+
+    def clear(self):
+        """Removes all annotations."""
+        self._connection.execute("DELETE FROM annotations")
+        self._positions = array("q")
+        self._recent.clear()
+        self._live.clear()
+
+    def close(self):
+        """Closes the database. The store can't be used afterwards."""
+        self._connection.close()
+
+    def _shift_positions(self, positions: array, start: int, distance: int):
+        """Moves the rows from the given index of the positions on by
+        the given distance, in the database and in memory.
+        """
+        first = positions[start]
+        # Negated first, since the positions are unique at all times.
+        self._connection.execute(
+            "UPDATE annotations SET position = -position - ? WHERE position >= ?",
+            (distance, first),
+        )
+        self._connection.execute(
+            "UPDATE annotations SET position = -position WHERE position < 0"
+        )
+        for index in range(start, len(positions)):
+            positions[index] += distance
+        self._live = WeakValueDictionary(
+            {
+                position + distance if position >= first else position: annotation
+                for position, annotation in self._live.items()
+            }
+        )
+        self._recent = OrderedDict(
+            (position + distance if position >= first else position, annotation)
+            for position, annotation in self._recent.items()
+        )
+
+    def _position_of(self, name: object) -> int | None:
+        row = self._connection.execute(
+            "SELECT position FROM annotations WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _read_page(self, start: int) -> list[Annotation]:
+        """Returns the annotations of the rows starting at the given
+        row, reading those that aren't in memory from the database.
+        """
+        positions = self._positions[start : start + self.PAGE_SIZE]
+        if not positions:
+            return []
+        cursor = self._connection.execute(
+            SELECT_ANNOTATIONS + " WHERE position BETWEEN ? AND ? ORDER BY position",
+            (positions[0], positions[-1]),
+        )
+        return [self._materialize(row) for row in cursor]
+
+    def _materialize(self, row: tuple) -> Annotation:
+        """Returns the annotation of a database row, creating it if it
+        isn't in memory.
+        """
+        position = row[0]
+        annotation = self._live.get(position)
+        if annotation is None:
+            annotation = Annotation()
+            annotation.client_id = sys.intern(row[1])
+            annotation.name = row[2]
+            annotation.sentence = row[3]
+            annotation.up_votes = row[4]
+            annotation.down_votes = row[5]
+            annotation.age = sys.intern(row[6])
+            annotation.gender = sys.intern(row[7])
+            annotation.accent = sys.intern(row[8])
+            annotation.modified = bool(row[9])
+            if self.folder:
+                annotation.folder = shared_folder(self.folder)
+            self._live[position] = annotation
+        self._remember(position, annotation)
+        return annotation
+
+    def _remember(self, position: int, annotation: Annotation):
+        """Keeps the annotation in memory until enough other
+        annotations were accessed.
+        """
+        self._recent[position] = annotation
+        self._recent.move_to_end(position)
+        if len(self._recent) > self.CACHE_SIZE:
+            self._recent.popitem(last=False)
@@ -0,0 +1,107 @@
+from contextlib import contextmanager
+import gzip
+import io
+from pathlib import Path
+from typing import Iterator, TextIO
+
+from voice_annotation_tool.atomic_file import atomic_write
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ENCODING = "utf-8"
+"""The encoding of tsv files, regardless of the locale. Every reader
+and writer of tsv files has to use it."""
+
+BUFFER_SIZE = 1024 * 1024
+"""The number of bytes read from or written to a tsv file at once.
+Large buffers reduce the number of round trips to slow storage."""
+
+GZIP_LEVEL = 6
+"Trades compression ratio for speed compared to the default of 9."
+ZSTD_LEVEL = 3
+"The default level of zstd, which compresses about as well as gzip."
+
+
+def compression_of(path: Path) -> str | None:
+    """Returns "gzip" or "zstd" if the file is compressed according to
+    its suffix, for example `metadata.tsv.gz`, or None.
+    """
+    match path.suffix:
+        case ".gz":
+            return "gzip"
+        case ".zst":
+            return "zstd"
+    return None
+
+
+def zstd_available() -> bool:
+    """Returns true if the optional zstandard package is installed,
+    which is required for `.zst` files.
+    """
+    return zstandard is not None
+
+
+def require_zstd():
+    """Raises a RuntimeError if zstandard isn't installed."""
+    if not zstd_available():
+        raise RuntimeError("Compressing tsv files with zstd requires zstandard.")
+
+
+@contextmanager
+def open_tsv(path: Path) -> Iterator[TextIO]:
+    """Opens a tsv file for reading, decompressing it while it is read
+    if it is compressed.
+    """
+    compression = compression_of(path)
+    if not compression:
+        with io.TextIOWrapper(
+            io.BufferedReader(io.FileIO(path), BUFFER_SIZE),
+            encoding=ENCODING,
+            newline="",
+        ) as file:
+            yield file
+        return
+    with open(path, "rb", buffering=BUFFER_SIZE) as raw:
+        if compression == "gzip":
+            stream = gzip.GzipFile(fileobj=raw, mode="rb")
+        else:
+            require_zstd()
+            stream = zstandard.ZstdDecompressor().stream_reader(
+                raw, read_size=BUFFER_SIZE, closefd=False
+            )
+        with io.TextIOWrapper(
+            io.BufferedReader(stream, BUFFER_SIZE), encoding=ENCODING, newline=""
+        ) as file:
+            yield file
+
+
+@contextmanager
+def write_tsv(path: Path) -> Iterator[TextIO]:
+    """Opens a tsv file for writing, compressing what is written if the
+    suffix of the path asks for it. The file is replaced atomically
+    once the context is left, see `atomic_write`.
+    """
+    compression = compression_of(path)
+    if not compression:
+        with atomic_write(
+            path, newline="", buffering=BUFFER_SIZE, encoding=ENCODING
+        ) as file:
+            yield file
+        return
+    with atomic_write(path, binary=True, buffering=BUFFER_SIZE) as raw:
+        if compression == "gzip":
+            stream = gzip.GzipFile(
+                filename="", fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0
+            )
+        else:
+            require_zstd()
+            stream = zstandard.ZstdCompressor(
+                level=ZSTD_LEVEL, threads=-1
+            ).stream_writer(raw, closefd=False)
+        with io.TextIOWrapper(
+            io.BufferedWriter(stream, BUFFER_SIZE), encoding=ENCODING, newline=""
+        ) as file:
+            yield file
@@ -0,0 +1,299 @@
+import json
+from pathlib import Path
+import wave
+
+import ffmpeg
+import numpy
+
+from voice_annotation_tool.atomic_file import atomic_write
+from voice_annotation_tool.audio_stream import CHUNK_SAMPLES, decode_chunks
+
+FRAME_SECONDS = 0.02
+"The length of the frames whose energy and zero crossings are measured."
+
+ENERGY_THRESHOLD_DB = -40.0
+"Frames louder than this, relative to full scale, are speech."
+
+FRICATIVE_THRESHOLD_DB = -55.0
+"""Quieter frames are still speech if they are louder than this and
+cross zero often, like fricatives at the start or end of a word."""
+
+FRICATIVE_CROSSING_RATE = 0.3
+"The fraction of samples changing sign above which a quiet frame is a fricative."
+
+MIN_SPEECH_SECONDS = 0.06
+"Shorter sounds, like clicks, aren't counted as speech."
+
+PADDING_SECONDS = 0.1
+"Silence kept before the first and after the last speech."
+
+DETECT_BATCH_SIZE = 32
+"The number of files a worker process examines before reporting them."
+
+
+def frame_features(frames: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Returns the energy in decibels relative to full scale and the
+    zero crossing rate of every row of 16 bit samples.
+    """
+    samples = frames.astype(numpy.float32) / 32768
+    energy = numpy.einsum("ij,ij->i", samples, samples) / frames.shape[1]
+    signs = numpy.signbit(frames)
+    crossings = numpy.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1)
+    return 10 * numpy.log10(energy + 1e-10), crossings / (frames.shape[1] - 1)
+
+
+def speech_frames(
+    energy_db: numpy.ndarray, crossing_rate: numpy.ndarray
+) -> numpy.ndarray:
+    """Returns which frames contain speech, given their features."""
+    return (energy_db >= ENERGY_THRESHOLD_DB) | (
+        (energy_db >= FRICATIVE_THRESHOLD_DB)
+        & (crossing_rate >= FRICATIVE_CROSSING_RATE)
+    )
+
+
+class SpeechDetector:
+    """Finds where speech starts and ends in a stream of mono samples.
+
+    The samples are passed in blocks and split into frames, so only one
+    block is kept in memory no matter how long the audio is. Speech is
+    a run of speech frames that lasts at least `MIN_SPEECH_SECONDS`.
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.frame_size = max(int(sample_rate * FRAME_SECONDS), 2)
+        "The number of samples per frame."
+        self.min_frames = max(round(MIN_SPEECH_SECONDS / FRAME_SECONDS), 1)
+        "The number of consecutive speech frames that count as speech."
+        self.sample_count = 0
+        self.first: int | None = None
+        "The index of the first frame of speech, None if there was none."
+        self.last: int | None = None
+        "The index of the last frame of speech."
+        self._frame_count = 0
+        self._run = 0
+        "The number of speech frames at the end of the previous block."
+        self._rest = numpy.zeros(0, numpy.int16)
+        "The samples of the previous block that didn't fill a frame."
+
+    def feed(self, samples: numpy.ndarray):
+        """Examines the next block of samples."""
+        self.sample_count += len(samples)
+        if len(self._rest):
+            samples = numpy.concatenate([self._rest, samples])
+        usable = len(samples) - len(samples) % self.frame_size
+        self._rest = samples[usable:].copy()
+        if not usable:
+            return
+        speech = speech_frames(
+            *frame_features(samples[:usable].reshape(-1, self.frame_size))
+        )
+        # The length of the run of speech frames ending at every frame,
+        # continuing the run at the end of the previous block.
+        positions = numpy.arange(len(speech))
+        last_silence = numpy.maximum.accumulate(numpy.where(speech, -1, positions))
+        runs = positions - last_silence
+        runs[last_silence < 0] += self._run
+        long_enough = numpy.flatnonzero(runs >= self.min_frames)
+        if len(long_enough):
+            if self.first is None:
+                first = long_enough[0]
+                self.first = int(self._frame_count + first - runs[first] + 1)
+            self.last = int(self._frame_count + long_enough[-1])
+        self._run = int(runs[-1])
+        self._frame_count += len(speech)
+
+    def speech_range(self) -> tuple[float, float] | None:
+        """Returns the start and end of the speech in seconds, padded
+        by `PADDING_SECONDS`, or None if there was no speech.
+        """
+        if self.first is None or self.last is None:
+            return None
+        duration = self.sample_count / self.sample_rate
+        frame_seconds = self.frame_size / self.sample_rate
+        start = max(self.first * frame_seconds - PADDING_SECONDS, 0.0)
+        end = min((self.last + 1) * frame_seconds + PADDING_SECONDS, duration)
+        return start, end
+
+
+def detect_speech(path: Path) -> tuple[float, float] | None:
+    """Returns the start and end of the speech in an audio file in
+    seconds, None if it contains no speech.
+    """
+    sample_rate, chunks = decode_chunks(path)
+    detector = SpeechDetector(sample_rate)
+    for chunk in chunks:
+        detector.feed(chunk)
+    return detector.speech_range()
+
+
+class SpeechRange:
+    """Where speech starts and ends in an audio file, and the size and
+    modification time of the file it was detected in.
+    """
+
+    __slots__ = ("start", "end", "size", "mtime_ns")
+
+    def __init__(
+        self, start: float | None, end: float | None, size: int, mtime_ns: int
+    ):
+        self.start = start
+        "The start of the speech in seconds, None if there is no speech."
+        self.end = end
+        "The end of the speech in seconds, None if there is no speech."
+        self.size = size
+        "The size of the file in bytes."
+        self.mtime_ns = mtime_ns
+        "The modification time of the file in nanoseconds."
+
+    def to_list(self) -> list:
+        "Returns the values in the order they are stored in the cache file."
+        return [self.size, self.mtime_ns, self.start, self.end]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SpeechRange) and self.to_list() == other.to_list()
+
+    def __repr__(self) -> str:
+        return f"SpeechRange({self.start}, {self.end})"
+
+
+def detect_file_speech(path: Path, size: int, mtime_ns: int) -> SpeechRange:
+    """Detects the speech in an audio file with the given size and
+    modification time. Files that can't be decoded have no speech.
+    """
+    try:
+        found = detect_speech(path)
+    except (ffmpeg.Error, OSError, EOFError) as error:
+        print("Failed to detect speech in", path, error)
+        found = None
+    start, end = found or (None, None)
+    return SpeechRange(start, end, size, mtime_ns)
+
+
+def detect_batch(files: list[tuple[Path, int, int]]) -> list[tuple[str, SpeechRange]]:
+    """Detects the speech in files given as their path, size and
+    modification time. Runs in a worker process.
+    """
+    return [
+        (path.name, detect_file_speech(path, size, mtime_ns))
+        for path, size, mtime_ns in files
+    ]
+
+
+def trim_audio_file(source: Path, destination: Path, start: float, end: float):
+    """Writes the part of an audio file between the start and end in
+    seconds to the destination. Wav files are copied in blocks, other
+    formats are cut and encoded again by ffmpeg.
+    """
+    try:
+        file = wave.open(str(source), "rb")
+    except (wave.Error, EOFError):
+        file = None
+    if file is None:
+        (
+            ffmpeg.input(str(source), ss=start, to=end)
+            .output(str(destination))
+            .overwrite_output()
+            .run(quiet=True)
+        )
+        return
+    with file, wave.open(str(destination), "wb") as output:
+        output.setparams(file.getparams())
+        rate = file.getframerate()
+        first = min(int(start * rate), file.getnframes())
+        remaining = max(min(int(end * rate), file.getnframes()) - first, 0)
+        file.setpos(first)
+        while remaining:
+            data = file.readframes(min(remaining, CHUNK_SAMPLES))
+            if not data:
+                break
+            output.writeframes(data)
+            remaining -= len(data) // file.getsampwidth() // file.getnchannels()
+
+
+class SpeechCache:
+    """The speech ranges of the audio files of a project, stored in a
+    file next to the tsv file.
+
+    Like `AudioMetadataCache`, an entry is only valid as long as the
+    size and modification time of the file didn't change.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        "The file the cache is stored in, None to keep it in memory."
+        self.folder: str = ""
+        "The folder containing the audio files."
+        self.entries: dict[str, SpeechRange] = {}
+        "Maps the names of the audio files to their speech range."
+
+    @staticmethod
+    def for_tsv_file(tsv_file: Path) -> "SpeechCache":
+        """Returns the cache that is stored next to a tsv file."""
+        return SpeechCache(tsv_file.with_name(tsv_file.name + ".speech"))
+
+    def load(self):
+        """Reads the stored cache. A missing or unreadable cache is
+        ignored.
+        """
+        if not self.path or not self.path.is_file():
+            return
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+            entries = {
+                name: SpeechRange(start, end, size, mtime)
+                for name, size, mtime, start, end in data["files"]
+            }
+        except (ValueError, KeyError, TypeError):
+            return
+        self.folder = data.get("folder", "")
+        self.entries = entries
+
+    def save(self):
+        """Writes the cache to its file."""
+        if not self.path:
+            return
+        content = json.dumps(
+            {
+                "folder": self.folder,
+                "files": [
+                    [name, *speech.to_list()] for name, speech in self.entries.items()
+                ],
+            },
+            separators=(",", ":"),
+        )
+        with atomic_write(self.path) as file:
+            file.write(content)
+
+    def outdated(self, folder: Path, files: dict[str, tuple[int, int]]) -> list[str]:
+        """Returns the names of the files that have no valid entry,
+        given the size and modification time of the files in the
+        folder. Entries of other files are removed.
+        """
+        if str(folder) != self.folder:
+            self.folder = str(folder)
+            self.entries = {}
+        entries = self.entries
+        for name in [name for name in entries if name not in files]:
+            del entries[name]
+        outdated = []
+        for name, (size, mtime_ns) in files.items():
+            speech = entries.get(name)
+            if speech is None or speech.size != size or speech.mtime_ns != mtime_ns:
+                outdated.append(name)
+        return outdated
+
+    def update(self, ranges: list[tuple[str, SpeechRange]]):
+        """Stores the speech ranges of examined files."""
+        self.entries.update(ranges)
+
+    def get(self, name: str) -> tuple[float, float] | None:
+        """Returns the start and end of the speech in a file in seconds,
+        None if it wasn't examined or contains no speech.
+        """
+        speech = self.entries.get(name)
+        if speech is None or speech.start is None or speech.end is None:
+            return None
+        return speech.start, speech.end
@@ -0,0 +1,128 @@
+from PySide6.QtCore import QLineF, QPointF, QRectF, QSize, Qt, Signal
+from PySide6.QtGui import QMouseEvent, QPainter, QPaintEvent, QPalette, QWheelEvent
+from PySide6.QtWidgets import QSizePolicy, QWidget
+
+from voice_annotation_tool.peak_pyramid import PeakPyramid
+
+ZOOM_STEP = 0.8
+"The factor the visible time span is multiplied with per wheel step."
+
+MIN_VISIBLE_SECONDS = 0.05
+"The shortest time span that can be zoomed in to."
+
+
+class WaveformWidget(QWidget):
+    """Draws the waveform of the loaded sample from its `PeakPyramid`,
+    one vertical line from the minimum to the maximum per pixel column,
+    and the playback position.
+
+    The wheel zooms around the cursor and clicking seeks.
+    """
+
+    seek = Signal(int)
+    "Emitted with the position in milliseconds that was clicked."
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pyramid: PeakPyramid | None = None
+        self.start = 0.0
+        "The time in seconds at the left edge."
+        self.end = 0.0
+        "The time in seconds at the right edge."
+        self.position = 0
+        "The playback position in milliseconds."
+        self.speech_range: tuple[float, float] | None = None
+        "The start and end of the speech in seconds, the rest is shaded."
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+    def sizeHint(self) -> QSize:
+        return QSize(200, 64)
+
+    def set_pyramid(self, pyramid: PeakPyramid | None):
+        """Shows the waveform of another sample, zoomed out."""
+        self.pyramid = pyramid
+        self.start = 0.0
+        self.end = pyramid.duration if pyramid else 0.0
+        self.update()
+
+    def set_speech_range(self, speech_range: tuple[float, float] | None):
+        """Shades the silence before and after the speech."""
+        self.speech_range = speech_range
+        self.update()
+
+    def set_position(self, position: int):
+        """Moves the playhead to the position in milliseconds."""
+        if position != self.position:
+            self.position = position
+            self.update()
+
+    def zoom(self, factor: float, around: float):
+        """Multiplies the visible time span by a factor, keeping the
+        time at the given position in seconds in place.
+        """
+        if not self.pyramid or self.end <= self.start:
+            return
+        duration = self.pyramid.duration
+        span = self.end - self.start
+        new_span = min(max(span * factor, MIN_VISIBLE_SECONDS), duration)
+        start = around - (around - self.start) * new_span / span
+        self.start = min(max(start, 0.0), duration - new_span)
+        self.end = self.start + new_span
+        self.update()
+
+    def time_at(self, x: float) -> float:
+        """Returns the time in seconds at a horizontal pixel position."""
+        if not self.width():
+            return self.start
+        return self.start + (self.end - self.start) * x / self.width()
+
+    def x_at(self, seconds: float) -> float:
+        """Returns the horizontal pixel position of a time in seconds."""
+        if self.end <= self.start:
+            return 0.0
+        return (seconds - self.start) / (self.end - self.start) * self.width()
+
+    def lines(self) -> list[QLineF]:
+        """Returns the line of every pixel column of the waveform."""
+        if not self.pyramid:
+            return []
+        minimums, maximums = self.pyramid.peaks(self.start, self.end, self.width())
+        middle = self.height() / 2
+        scale = middle / 32768
+        tops = middle - maximums * scale
+        bottoms = middle - minimums * scale
+        return [
+            QLineF(x + 0.5, top, x + 0.5, bottom)
+            for x, top, bottom in zip(range(len(tops)), tops.tolist(), bottoms.tolist())
+        ]
+
+    def paintEvent(self, event: QPaintEvent):
+        painter = QPainter(self)
+        palette = self.palette()
+        painter.fillRect(self.rect(), palette.color(QPalette.Base))
+        painter.setPen(palette.color(QPalette.Text))
+        painter.drawLines(self.lines())
+        if self.pyramid and self.speech_range:
+            silence = palette.color(QPalette.Window)
+            silence.setAlpha(160)
+            start = self.x_at(self.speech_range[0])
+            end = self.x_at(self.speech_range[1])
+            painter.fillRect(QRectF(0, 0, start, self.height()), silence)
+            painter.fillRect(QRectF(end, 0, self.width() - end, self.height()), silence)
+        if self.pyramid:
+            painter.setPen(palette.color(QPalette.Highlight))
+            x = self.x_at(self.position / 1000)
+            painter.drawLine(QPointF(x, 0), QPointF(x, self.height()))
+
+    def wheelEvent(self, event: QWheelEvent):
+        steps = event.angleDelta().y() / 120
+        if not steps:
+            return
+        self.zoom(ZOOM_STEP**steps, self.time_at(event.position().x()))
+        event.accept()
+
+    def mousePressEvent(self, event: QMouseEvent):
+        if event.button() != Qt.LeftButton or not self.pyramid:
+            return super().mousePressEvent(event)
+        seconds = min(max(self.time_at(event.position().x()), 0.0), self.end)
+        self.seek.emit(int(seconds * 1000))
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from voice_annotation_tool.annotation import Annotation
+
+
+def test_path_is_split_into_folder_and_name():
+    annotation = Annotation({"path": str(Path("audio") / "sample.mp3")})
+    assert annotation.name == "sample.mp3"
+    assert annotation.path == Path("audio/sample.mp3")
+
+
+def test_plain_file_name_has_no_folder():
+    annotation = Annotation({"path": "sample.mp3"})
+    assert annotation.folder is None
+    assert annotation.path == Path("sample.mp3")
+
+
+def test_annotations_share_folder():
+    first = Annotation()
+    second = Annotation()
+    first.path = Path("audio/first.mp3")
+    second.path = Path("audio/second.mp3")
+    assert first.folder is second.folder
+
+
+def test_metadata_is_interned():
+    first = Annotation({"accent": "".join(["sco", "tland"])})
+    second = Annotation({"accent": "".join(["scot", "land"])})
+    assert first.accent is second.accent
+
+
+def test_annotations_have_no_dict():
+    assert not hasattr(Annotation(), "__dict__")
+
+
+def test_to_row_matches_header():
+    annotation = Annotation({"path": "sample.mp3", "sentence": "text", "age": "teens"})
+    row = dict(zip(Annotation.TSV_HEADER_MEMBERS, annotation.to_row()))
+    assert row == annotation.to_dict()
+
+
+def test_from_row_matches_from_dict():
+    annotation = Annotation(
+        {"path": "folder/sample.mp3", "sentence": "text", "up_votes": "2"}
+    )
+    copy = Annotation.from_row(annotation.to_row())
+    assert copy.to_row() == annotation.to_row()
+    assert copy.name == "sample.mp3"
+    assert not copy.modified
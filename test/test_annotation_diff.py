@@ -0,0 +1,76 @@
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_diff import AnnotationDiff, ValueColumn
+
+
+def annotations(count: int) -> list[Annotation]:
+    return [Annotation({"path": f"{row}.mp3", "age": "teens"}) for row in range(count)]
+
+
+def test_value_column():
+    column = ValueColumn(["a", "b", "a"])
+    assert list(column) == ["a", "b", "a"]
+    assert column.nbytes() == 3
+    constant = ValueColumn(["a"] * 1000)
+    assert list(constant) == ["a"] * 1000
+    assert constant.nbytes() == 0
+    assert list(ValueColumn.constant(True, 2)) == [True, True]
+    assert ValueColumn([str(value) for value in range(300)]).nbytes() == 600
+
+
+def test_assign():
+    rows = annotations(3)
+    rows[1].age = "twenties"
+    diff = AnnotationDiff.assign(rows, {"age": "twenties"})
+    assert diff.names == ["0.mp3", "2.mp3"]
+    assert list(diff.changes()) == [
+        ("0.mp3", {"age": "twenties"}),
+        ("2.mp3", {"age": "twenties"}),
+    ]
+    assert list(diff.changes(reverse=True))[0] == ("0.mp3", {"age": "teens"})
+
+
+def test_bulk_assign_is_compact():
+    diff = AnnotationDiff.assign(annotations(100_000), {"accent": "new"})
+    assert len(diff) == 100_000
+    assert diff.nbytes() == 800_000
+
+
+def test_texts():
+    rows = annotations(2)
+    rows[1].sentence = "same"
+    rows[1].modified = True
+    diff = AnnotationDiff.texts([(rows[0], "first"), (rows[1], "same")])
+    assert list(diff.changes()) == [("0.mp3", {"sentence": "first", "modified": True})]
+    later = AnnotationDiff.texts([(rows[0], "second")])
+    merged = diff.then(later)
+    assert list(merged.changes()) == [
+        ("0.mp3", {"sentence": "second", "modified": True})
+    ]
+    assert list(merged.changes(reverse=True)) == [
+        ("0.mp3", {"sentence": "", "modified": False})
+    ]
+
+
+def test_texts_changed_back_are_noop():
+    rows = annotations(1)
+    rows[0].sentence = "text"
+    rows[0].modified = True
+    diff = AnnotationDiff.texts([(rows[0], "texts")])
+    assert not diff.is_noop()
+    rows[0].sentence = "texts"
+    assert diff.then(AnnotationDiff.texts([(rows[0], "text")])).is_noop()
+    unmodified = annotations(1)
+    diff = AnnotationDiff.texts([(unmodified[0], "a")])
+    unmodified[0].sentence = "a"
+    unmodified[0].modified = True
+    assert not diff.then(AnnotationDiff.texts([(unmodified[0], "")])).is_noop()
+
+
+def test_generated_texts_are_not_modified():
+    rows = annotations(2)
+    rows[1].sentence = "same"
+    diff = AnnotationDiff.texts(
+        [(rows[0], "generated"), (rows[1], "same")], mark_modified=False
+    )
+    assert list(diff.changes()) == [("0.mp3", {"sentence": "generated"})]
+    assert list(diff.changes(reverse=True)) == [("0.mp3", {"sentence": ""})]
@@ -0,0 +1,46 @@
+from io import StringIO
+import json
+from pathlib import Path
+
+import pytest
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_export import (
+    batched,
+    write_arrow,
+    write_json_lines,
+    write_parquet,
+)
+
+ROWS = [
+    ("client", "a.mp3", "First", 1, 0, "twenties", "male", ""),
+    ("client", "b.mp3", "Second", 0, 2, "", "", "accent"),
+]
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_write_json_lines():
+    output = StringIO()
+    write_json_lines(output, ROWS)
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[1]) == dict(zip(Annotation.TSV_HEADER_MEMBERS, ROWS[1]))
+
+
+def test_write_arrow(tmp_path: Path):
+    pyarrow = pytest.importorskip("pyarrow")
+    write_arrow(tmp_path / "export.arrow", ROWS)
+    table = pyarrow.ipc.open_file(str(tmp_path / "export.arrow")).read_all()
+    assert table.column_names == Annotation.TSV_HEADER_MEMBERS
+    assert table.column("down_votes").to_pylist() == [0, 2]
+
+
+def test_write_parquet(tmp_path: Path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    write_parquet(tmp_path / "export.parquet", ROWS)
+    table = pyarrow.parquet.read_table(tmp_path / "export.parquet")
+    assert [tuple(row.values()) for row in table.to_pylist()] == ROWS
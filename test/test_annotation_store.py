@@ -0,0 +1,101 @@
+from pathlib import Path
+from random import Random
+
+import pytest
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_store import AnnotationStore
+
+
+def make_annotation(name: str, sentence: str = "") -> Annotation:
+    return Annotation({"path": name, "sentence": sentence})
+
+
+@pytest.fixture
+def store():
+    return AnnotationStore(make_annotation(f"{num}.mp3") for num in range(5))
+
+
+def test_keeps_insertion_order(store: AnnotationStore):
+    assert [annotation.path.name for annotation in store] == [
+        f"{num}.mp3" for num in range(5)
+    ]
+
+
+def test_lookup_by_name(store: AnnotationStore):
+    assert store.get("3.mp3") is store[3]
+    assert store.get("missing.mp3") is None
+    assert "3.mp3" in store
+
+
+def test_overwrite_keeps_row(store: AnnotationStore):
+    replacement = make_annotation("2.mp3", "new")
+    assert store.add(replacement, overwrite=True)
+    assert store[2] is replacement
+    assert len(store) == 5
+
+
+def test_add_without_overwrite_keeps_existing(store: AnnotationStore):
+    existing = store[1]
+    assert not store.add(make_annotation("1.mp3"))
+    assert store[1] is existing
+
+
+def test_remove_updates_rows(store: AnnotationStore):
+    removed = store.remove("1.mp3")
+    assert removed and removed.path == Path("1.mp3")
+    assert len(store) == 4
+    assert "1.mp3" not in store
+    assert store.row_of("2.mp3") == 1
+    assert [annotation.path.name for annotation in store] == [
+        "0.mp3",
+        "2.mp3",
+        "3.mp3",
+        "4.mp3",
+    ]
+
+
+def test_add_after_remove(store: AnnotationStore):
+    store.remove("0.mp3")
+    store.add(make_annotation("0.mp3"))
+    assert store.row_of("0.mp3") == 4
+
+
+def test_insert_many_restores_rows(store: AnnotationStore):
+    removed = [store.remove("1.mp3"), store.remove("3.mp3")]
+    store.insert_many([(1, removed[0]), (3, removed[1]), (9, make_annotation("new"))])
+    assert [annotation.name for annotation in store] == [
+        *(f"{num}.mp3" for num in range(5)),
+        "new",
+    ]
+    assert store.row_of("3.mp3") == 3
+
+
+def test_rename_keeps_row(store: AnnotationStore):
+    store.rename("1.mp3", "1.mp3")
+    assert store.row_of("1.mp3") == 1
+    store.rename("2.mp3", "renamed.mp3")
+    assert store.row_of("renamed.mp3") == 2
+    assert "2.mp3" not in store
+
+
+def test_interleaved_deletes_and_row_access():
+    count = 20000
+    store = AnnotationStore(make_annotation(f"{num}.mp3") for num in range(count))
+    expected = [f"{num}.mp3" for num in range(count)]
+    random = Random(1)
+    for step in range(15000):
+        row = random.randrange(len(expected))
+        name = expected.pop(row)
+        assert store.row_of(name) == row
+        store.remove(name)
+        if step % 50 == 0:
+            store.add(make_annotation(f"new{step}.mp3"))
+            expected.append(f"new{step}.mp3")
+        row = random.randrange(len(expected))
+        assert store[row].path.name == expected[row]
+        assert store.row_of(expected[row]) == row
+        assert store[-1].path.name == expected[-1]
+    assert len(store) == len(expected)
+    assert [annotation.path.name for annotation in store] == expected
+    with pytest.raises(IndexError):
+        store[len(expected)]
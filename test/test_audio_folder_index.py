@@ -0,0 +1,88 @@
+import os
+from pathlib import Path
+
+import pytest
+from voice_annotation_tool.audio_folder_index import AudioFolderIndex
+from voice_annotation_tool.project import Project
+
+OLD_MTIME_NS = 1_000_000_000_000_000_000
+
+
+@pytest.fixture
+def audio_dir(tmp_path: Path):
+    audio_dir = tmp_path / "audio"
+    audio_dir.mkdir()
+    for file_num in range(3):
+        audio_dir.joinpath(f"{file_num}.mp3").write_bytes(b"x" * file_num)
+    audio_dir.joinpath("notes.txt").touch()
+    os.utime(audio_dir, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+    return audio_dir
+
+
+def test_scan_lists_audio_files(audio_dir: Path):
+    index = AudioFolderIndex()
+    added, vanished = index.scan(audio_dir)
+    assert sorted(added) == ["0.mp3", "1.mp3", "2.mp3"]
+    assert vanished == []
+    assert index.files["2.mp3"][0] == 2
+
+
+def test_unchanged_folder_isnt_listed(audio_dir: Path, monkeypatch):
+    index = AudioFolderIndex()
+    index.scan(audio_dir)
+
+    def fail(path):
+        raise AssertionError("folder was listed")
+
+    monkeypatch.setattr(os, "scandir", fail)
+    assert index.scan(audio_dir) == ([], [])
+    assert len(index.files) == 3
+
+
+def test_rescan_reports_changes(audio_dir: Path):
+    index = AudioFolderIndex()
+    index.scan(audio_dir)
+    audio_dir.joinpath("0.mp3").unlink()
+    audio_dir.joinpath("new.wav").touch()
+    assert index.scan(audio_dir) == (["new.wav"], ["0.mp3"])
+
+
+def test_rescan_updates_replaced_files(audio_dir: Path):
+    index = AudioFolderIndex()
+    index.scan(audio_dir)
+    audio_dir.joinpath("1.mp3").write_bytes(b"x" * 999)
+    os.utime(audio_dir, ns=(OLD_MTIME_NS + 1, OLD_MTIME_NS + 1))
+    assert index.scan(audio_dir) == ([], [])
+    assert index.files["1.mp3"][0] == 999
+
+
+def test_save_and_load(tmp_path: Path, audio_dir: Path):
+    index = AudioFolderIndex.for_tsv_file(tmp_path / "project.tsv")
+    index.scan(audio_dir)
+    index.save()
+    loaded = AudioFolderIndex.for_tsv_file(tmp_path / "project.tsv")
+    loaded.load()
+    assert loaded.files == index.files
+    assert loaded.folder_mtime_ns == OLD_MTIME_NS
+
+
+def test_corrupt_index_is_ignored(tmp_path: Path):
+    index = AudioFolderIndex(tmp_path / "index")
+    index.path.write_text("{")
+    index.load()
+    assert index.files == {}
+
+
+def test_project_flags_missing_files(tmp_path: Path, audio_dir: Path):
+    project = Project()
+    project.tsv_file = tmp_path / "project.tsv"
+    project.load_audio_files(audio_dir)
+    assert len(project.annotations) == 3
+    assert project.missing_files == set()
+    audio_dir.joinpath("1.mp3").unlink()
+    reopened = Project()
+    reopened.tsv_file = tmp_path / "project.tsv"
+    for annotation in project.annotations:
+        reopened.add_annotation(annotation)
+    reopened.load_audio_files(audio_dir)
+    assert reopened.missing_files == {"1.mp3"}
@@ -0,0 +1,90 @@
+import os
+from pathlib import Path
+import wave
+
+import pytest
+from voice_annotation_tool.audio_metadata import (
+    AudioInfo,
+    AudioMetadataCache,
+    probe_audio_file,
+    read_wav_header,
+)
+
+
+def write_wav(path: Path, frames: int, rate=16000, channels=1):
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(channels)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(b"\0\0" * channels * frames)
+
+
+def probe(path: Path) -> AudioInfo:
+    stat = path.stat()
+    return probe_audio_file(path, stat.st_size, stat.st_mtime_ns)
+
+
+def test_read_wav_header(tmp_path: Path):
+    path = tmp_path / "sample.wav"
+    write_wav(path, 8000, 16000, 2)
+    info = probe(path)
+    assert info.duration == 0.5
+    assert info.sample_rate == 16000
+    assert info.channels == 2
+    assert info.size == path.stat().st_size
+
+
+def test_truncated_wav_file(tmp_path: Path):
+    path = tmp_path / "sample.wav"
+    write_wav(path, 16000)
+    with open(path, "r+b") as file:
+        file.truncate(44 + 8000)
+    with open(path, "rb") as file:
+        assert read_wav_header(file, 44 + 8000) == (0.25, 16000, 1)
+
+
+def test_unreadable_file(tmp_path: Path):
+    path = tmp_path / "broken.wav"
+    path.write_bytes(b"not audio")
+    with open(path, "rb") as file:
+        assert read_wav_header(file, 9) is None
+    assert probe(path).duration is None
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> AudioMetadataCache:
+    cache = AudioMetadataCache(tmp_path / "annotations.tsv.audio")
+    cache.outdated(tmp_path, {"a.wav": (10, 1), "b.wav": (20, 2)})
+    cache.update(
+        [
+            ("a.wav", AudioInfo(1.5, 16000, 1, 10, 1)),
+            ("b.wav", AudioInfo(None, 0, 0, 20, 2)),
+        ]
+    )
+    return cache
+
+
+def test_cache_round_trip(cache: AudioMetadataCache, tmp_path: Path):
+    cache.save()
+    loaded = AudioMetadataCache(cache.path)
+    loaded.load()
+    assert loaded.entries == cache.entries
+    assert loaded.folder == str(tmp_path)
+
+
+def test_outdated_files(cache: AudioMetadataCache, tmp_path: Path):
+    files = {"a.wav": (10, 1), "b.wav": (21, 3), "c.wav": (5, 5)}
+    assert cache.outdated(tmp_path, files) == ["b.wav", "c.wav"]
+    assert cache.outdated(tmp_path, {"c.wav": (5, 5)}) == ["c.wav"]
+    assert not cache.entries
+    cache.update([("c.wav", AudioInfo(1, 16000, 1, 5, 5))])
+    assert cache.outdated(tmp_path / "other", {"c.wav": (5, 5)}) == ["c.wav"]
+
+
+def test_total_duration(cache: AudioMetadataCache):
+    assert cache.total_duration() == 1.5
+    assert cache.total_duration(["b.wav", "missing.wav"]) == 0
+    cache.update([("b.wav", AudioInfo(2, 16000, 1, 20, 2))])
+    assert cache.total_duration() == 3.5
+    assert cache.duration("b.wav") == 2
+    assert cache.duration("missing.wav") is None
@@ -1,6 +1,11 @@
+import numpy
+from PySide6.QtCore import QPoint, Qt
+from PySide6.QtTest import QTest
+from PySide6.QtMultimedia import QMediaPlayer
 from PySide6.QtWidgets import QPushButton
 
-from voice_annotation_tool.audio_playback_widget import AudioPlaybackWidget
+from voice_annotation_tool.audio_playback_widget import AudioPlaybackWidget, LoadLatency
+from voice_annotation_tool.peak_pyramid import PeakPyramid
 
 
 def test_tooltips_have_shortcuts():
@@ -14,3 +19,54 @@ def test_icons_loaded():
     image = widget.playPauseButton.icon().pixmap(10, 10).toImage()
     value = image.pixelColor(3, 3).valueF()
     assert value > 0.2 and value < 0.3
+
+
+def test_load_latency():
+    latency = LoadLatency()
+    for milliseconds in range(1, 21):
+        latency.add(milliseconds / 1000, milliseconds % 2 == 0)
+    assert latency.count() == 20
+    assert latency.report() == (
+        "audio load latency memory: 10 files, median 11.0 ms, 95% 20.0 ms;"
+        " disk: 10 files, median 10.0 ms, 95% 19.0 ms"
+    )
+
+
+def test_waveform():
+    widget = AudioPlaybackWidget()
+    waveform = widget.waveform
+    waveform.resize(100, 40)
+    samples = numpy.zeros(16000 * 10, numpy.int16)
+    samples[: 16000 * 5 : 2] = 16384
+    samples[1 : 16000 * 5 : 2] = -16384
+    waveform.set_pyramid(PeakPyramid.from_chunks(16000, [samples]))
+    lines = waveform.lines()
+    assert len(lines) == 100
+    assert (lines[0].y1(), lines[0].y2()) == (10, 30)
+    assert lines[-1].y1() == lines[-1].y2() == 20
+    waveform.zoom(0.5, 10)
+    assert (waveform.start, waveform.end) == (5, 10)
+    assert waveform.time_at(50) == 7.5
+    positions = []
+    waveform.seek.connect(positions.append)
+    QTest.mouseClick(waveform, Qt.LeftButton, pos=QPoint(50, 20))
+    assert positions == [7500]
+    waveform.set_pyramid(None)
+    assert waveform.lines() == []
+
+
+def test_skip_silence():
+    widget = AudioPlaybackWidget()
+    widget.set_speech_range((0.5, 1.5))
+    assert widget.speech_range == (500, 1500)
+    assert widget.waveform.speech_range == (0.5, 1.5)
+    widget.play_pause_button_pressed()
+    assert widget.player.position() == 500
+    widget.update_position(1500)
+    assert widget.player.playbackState() != QMediaPlayer.PlayingState
+    widget.skip_silence = False
+    widget.player.setPosition(0)
+    widget.play_pause_button_pressed()
+    assert widget.player.position() == 0
+    widget.update_position(1500)
+    assert widget.player.playbackState() == QMediaPlayer.PlayingState
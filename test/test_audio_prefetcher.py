@@ -0,0 +1,58 @@
+from pathlib import Path
+import time
+
+from PySide6.QtCore import QCoreApplication
+from voice_annotation_tool import audio_prefetcher
+from voice_annotation_tool.audio_prefetcher import (
+    AudioCache,
+    AudioPrefetcher,
+    read_audio_file,
+)
+
+
+def test_least_recently_used_files_are_dropped():
+    cache = AudioCache(10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"1234"
+    cache.put("c", b"1234")
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.size == 8
+    cache.put("d", b"12345678901")
+    assert "d" not in cache
+    cache.discard("a")
+    assert cache.size == 4
+
+
+def test_large_files_are_not_read(tmp_path: Path, monkeypatch):
+    path = tmp_path / "sample.wav"
+    path.write_bytes(b"12345")
+    assert read_audio_file(path) == b"12345"
+    monkeypatch.setattr(audio_prefetcher, "MAX_FILE_BYTES", 4)
+    assert read_audio_file(path) is None
+    assert read_audio_file(tmp_path / "missing.wav") is None
+
+
+def wait_for(prefetcher: AudioPrefetcher):
+    deadline = time.monotonic() + 5
+    while prefetcher._pending and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+
+
+def test_prefetch(tmp_path: Path):
+    paths = []
+    for number in range(3):
+        paths.append(tmp_path / f"{number}.wav")
+        paths[-1].write_bytes(bytes([number]) * 10)
+    prefetcher = AudioPrefetcher()
+    prefetcher.prefetch(paths[:2])
+    wait_for(prefetcher)
+    assert prefetcher.data(paths[1]) == bytes([1]) * 10
+    assert prefetcher.data(paths[2]) is None
+    assert (prefetcher.hits, prefetcher.misses) == (1, 1)
+    prefetcher.discard([paths[1]])
+    assert prefetcher.data(paths[1]) is None
+    prefetcher.clear()
+    assert not len(prefetcher.cache)
+    prefetcher.shutdown()
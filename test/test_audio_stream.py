@@ -0,0 +1,35 @@
+from pathlib import Path
+import wave
+
+import numpy
+
+from voice_annotation_tool.audio_stream import read_samples, wav_chunks
+
+
+def write_wav(path: Path, samples: numpy.ndarray, channels=1, rate=16000):
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(channels)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(samples.astype("<i2").tobytes())
+
+
+def test_wav_chunks_are_mixed_down(tmp_path: Path):
+    path = tmp_path / "stereo.wav"
+    write_wav(path, numpy.array([100, 300, -100, -300]), channels=2, rate=8000)
+    sample_rate, chunks = wav_chunks(path)
+    assert sample_rate == 8000
+    assert numpy.concatenate(list(chunks)).tolist() == [200, -200]
+
+
+def test_other_files_are_not_read_as_wav(tmp_path: Path):
+    path = tmp_path / "sample.mp3"
+    path.write_bytes(b"ID3")
+    assert wav_chunks(path) is None
+
+
+def test_read_samples_at_the_sample_rate(tmp_path: Path):
+    path = tmp_path / "sample.wav"
+    samples = numpy.arange(-500, 500)
+    write_wav(path, samples)
+    assert read_samples(path, 16000).tolist() == samples.tolist()
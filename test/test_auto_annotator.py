@@ -0,0 +1,103 @@
+from pathlib import Path
+import time
+import wave
+
+from PySide6.QtTest import QTest
+import pytest
+
+from voice_annotation_tool import auto_annotator
+from voice_annotation_tool.auto_annotator import AutoAnnotator, transcribe
+
+
+class FakeModel:
+    def __init__(self, path: str):
+        if not Path(path).is_file():
+            raise RuntimeError("CreateModel failed")
+
+    def sampleRate(self) -> int:
+        return 16000
+
+    def stt(self, samples) -> str:
+        return f"{len(samples)} samples"
+
+
+@pytest.fixture
+def model_path(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setattr(auto_annotator, "Model", FakeModel)
+    path = tmp_path / "model.tflite"
+    path.write_bytes(b"model")
+    return path
+
+
+def write_wav(path: Path, frames: int):
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(16000)
+        file.writeframes(bytes(frames * 2))
+
+
+def wait_for(annotator: AutoAnnotator):
+    deadline = time.monotonic() + 5
+    while annotator.is_running() and time.monotonic() < deadline:
+        QTest.qWait(10)
+
+
+def test_transcribe(tmp_path: Path):
+    path = tmp_path / "sample.wav"
+    write_wav(path, 800)
+    assert transcribe(FakeModel(str(path)), path) == "800 samples."
+
+
+def test_files_are_transcribed_in_the_background(tmp_path: Path, model_path: Path):
+    files = []
+    for number in range(3):
+        path = tmp_path / f"{number}.wav"
+        write_wav(path, 100 * (number + 1))
+        files.append((path.name, path))
+    files.insert(1, ("broken.wav", tmp_path / "broken.wav"))
+    annotator = AutoAnnotator()
+    texts = []
+    errors = []
+    progress = []
+    finished = []
+    annotator.transcribed.connect(texts.extend)
+    annotator.file_failed.connect(lambda name, error: errors.append(name))
+    annotator.progress.connect(lambda done, total, eta: progress.append(done))
+    annotator.finished.connect(lambda: finished.append(True))
+    annotator.start(model_path, files)
+    assert annotator.is_running()
+    wait_for(annotator)
+    annotator.shutdown()
+    assert texts == [
+        ("0.wav", "100 samples."),
+        ("1.wav", "200 samples."),
+        ("2.wav", "300 samples."),
+    ]
+    assert errors == ["broken.wav"]
+    assert progress[-1] == 4
+    assert finished
+
+
+def test_model_errors_are_reported(tmp_path: Path, model_path: Path):
+    annotator = AutoAnnotator()
+    errors = []
+    annotator.failed.connect(errors.append)
+    annotator.start(tmp_path / "missing.tflite", [])
+    wait_for(annotator)
+    annotator.shutdown()
+    assert errors == ["CreateModel failed"]
+
+
+def test_canceled_runs_report_nothing(tmp_path: Path, model_path: Path):
+    path = tmp_path / "sample.wav"
+    write_wav(path, 100)
+    annotator = AutoAnnotator()
+    texts = []
+    annotator.transcribed.connect(texts.append)
+    annotator.start(model_path, [(path.name, path)])
+    annotator.cancel()
+    assert not annotator.is_running()
+    QTest.qWait(100)
+    annotator.shutdown()
+    assert texts == []
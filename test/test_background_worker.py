@@ -0,0 +1,63 @@
+import threading
+import time
+
+from PySide6.QtCore import QCoreApplication
+from voice_annotation_tool.background_worker import BackgroundWorker
+
+
+def wait_for(worker: BackgroundWorker):
+    deadline = time.monotonic() + 5
+    while worker.is_busy() and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+
+
+def test_results_are_handled_in_the_thread_of_the_worker():
+    worker = BackgroundWorker(workers=2)
+    handled = []
+    worker.submit(
+        lambda future: handled.append((future.result(), threading.get_ident())),
+        threading.get_ident,
+    )
+    wait_for(worker)
+    assert len(handled) == 1
+    assert handled[0][0] != threading.get_ident()
+    assert handled[0][1] == threading.get_ident()
+    worker.shutdown()
+
+
+def test_canceled_work_is_dropped():
+    worker = BackgroundWorker(workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    handled = []
+    worker.submit(handled.append, lambda: started.set() or release.wait(5))
+    worker.submit(handled.append, lambda: None)
+    started.wait(5)
+    worker.cancel()
+    assert not worker.is_busy()
+    release.set()
+    worker.submit(lambda future: handled.append("new"), lambda: None)
+    wait_for(worker)
+    assert handled == ["new"]
+    worker.shutdown()
+
+
+def test_nothing_is_reported_after_shutdown():
+    worker = BackgroundWorker(workers=1)
+    started = threading.Event()
+    handled = []
+
+    def work():
+        started.set()
+        time.sleep(0.1)
+        worker.post(0, handled.append, "progress")
+
+    worker.submit(handled.append, work)
+    started.wait(5)
+    worker.shutdown()
+    # The pool finished, so the worker could be deleted safely.
+    assert not worker._executor._threads or all(
+        not thread.is_alive() for thread in worker._executor._threads
+    )
+    QCoreApplication.processEvents()
+    assert handled == []
@@ -0,0 +1,66 @@
+import csv
+from pathlib import Path
+
+import pytest
+from voice_annotation_tool.dataset_split import (
+    SplitAssigner,
+    export_splits,
+    shard_file_name,
+)
+
+
+def make_rows(count: int, speakers: int) -> list[tuple]:
+    return [
+        (f"speaker_{row % speakers}", f"{row}.mp3", f"Tëxt {row}", 0, 0, "", "", "")
+        for row in range(count)
+    ]
+
+
+def read_tsv(path: Path) -> list[dict]:
+    with open(path, encoding="utf-8", newline="") as file:
+        return list(csv.DictReader(file, delimiter="\t"))
+
+
+def test_speakers_stay_in_one_split():
+    assigner = SplitAssigner(seed=3)
+    splits: dict[str, set[str]] = {}
+    for row in make_rows(2000, 200):
+        splits.setdefault(row[0], set()).add(assigner.split_of(row))
+    assert all(len(names) == 1 for names in splits.values())
+
+
+def test_assignment_is_reproducible():
+    rows = make_rows(500, 500)
+    first = [SplitAssigner(seed=1).split_of(row) for row in rows]
+    assert first == [SplitAssigner(seed=1).split_of(row) for row in rows]
+    assert first != [SplitAssigner(seed=2).split_of(row) for row in rows]
+
+
+def test_ratios_are_approximated():
+    assigner = SplitAssigner({"train": 0.5, "test": 0.5})
+    splits = [assigner.split_of(row) for row in make_rows(4000, 4000)]
+    assert 1800 < splits.count("train") < 2200
+
+
+def test_invalid_ratios():
+    with pytest.raises(ValueError):
+        SplitAssigner({"train": 0})
+    with pytest.raises(ValueError):
+        SplitAssigner({"train": 1, "test": -1})
+
+
+def test_export_splits(tmp_path: Path):
+    rows = make_rows(300, 30)
+    counts = export_splits(rows, tmp_path, shards=2, workers=2)
+    assert sum(counts.values()) == 300
+    names = []
+    sentences = []
+    for split, count in counts.items():
+        split_rows = []
+        for shard in range(2):
+            split_rows += read_tsv(tmp_path / shard_file_name(split, shard, 2))
+        assert len(split_rows) == count
+        names += [row["path"] for row in split_rows]
+        sentences += [row["sentence"] for row in split_rows]
+    assert sorted(names) == sorted(row[1] for row in rows)
+    assert sorted(sentences) == sorted(row[2] for row in rows)
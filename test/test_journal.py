@@ -0,0 +1,161 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from voice_annotation_tool.journal import AnnotationJournal
+from voice_annotation_tool.project import Project
+
+TSV_CONTENT = """client_id\tpath\tsentence\tup_votes\tdown_votes\tage\tgender\taccent
+abc\tfirst.mp3\ttext\t2\t2\ttwenties\tother\taccent
+abc\tsecond.mp3\t\t0\t0\t\t\t
+"""
+
+
+def open_project(folder: Path) -> Project:
+    project = Project()
+    project.audio_folder = folder
+    project.tsv_file = folder / "project.tsv"
+    if project.tsv_file.is_file():
+        with open(project.tsv_file, newline="") as file:
+            project.load_tsv_file(file)
+    project.open_journal()
+    return project
+
+
+@pytest.fixture
+def folder(tmpdir):
+    folder = Path(tmpdir)
+    (folder / "project.tsv").write_text(TSV_CONTENT)
+    return folder
+
+
+def test_changes_are_replayed(folder: Path):
+    project = open_project(folder)
+    project.annotate(project.annotations[1], "new text")
+    project.update_annotation(project.annotations[0], age="thirties")
+    project.close_journal()
+    reopened = open_project(folder)
+    assert reopened.annotations[1].sentence == "new text"
+    assert reopened.annotations[1].modified
+    assert "second.mp3" in reopened.modified_annotations
+    assert reopened.annotations[0].age == "thirties"
+
+
+def test_tsv_is_not_rewritten_by_changes(folder: Path):
+    project = open_project(folder)
+    project.annotate(project.annotations[0], "new text")
+    project.journal.sync()
+    assert (folder / "project.tsv").read_text() == TSV_CONTENT
+
+
+def test_deletions_are_replayed(folder: Path):
+    project = open_project(folder)
+    project.delete_annotation(project.annotations[0])
+    project.close_journal()
+    assert [a.path.name for a in open_project(folder).annotations] == ["second.mp3"]
+
+
+def test_rollback_discards_unsaved_changes(folder: Path):
+    project = open_project(folder)
+    project.annotate(project.annotations[0], "saved")
+    project.journal.sync()
+    project.annotate(project.annotations[0], "unsaved")
+    project.discard_unsaved_changes()
+    project.close_journal()
+    assert open_project(folder).annotations[0].sentence == "saved"
+
+
+def test_compaction_rewrites_tsv(folder: Path):
+    project = open_project(folder)
+    project.annotate(project.annotations[1], "compacted")
+    project.snapshot(folder, compact=True).write(folder / "project.json")
+    assert not project.journal.path.exists()
+    assert not project.journal.compaction_path.exists()
+    project.close_journal()
+    reloaded = Project()
+    with open(folder / "project.tsv", newline="") as file:
+        reloaded.load_tsv_file(file)
+    assert reloaded.annotations[1].sentence == "compacted"
+
+
+def test_interrupted_compaction_is_replayed(folder: Path):
+    journal = AnnotationJournal.for_tsv_file(folder / "project.tsv")
+    journal.append([{"path": "first.mp3", "sentence": "old"}])
+    journal.begin_compaction()
+    journal.append([{"path": "first.mp3", "accent": "new"}])
+    journal.close()
+    project = open_project(folder)
+    assert project.annotations[0].sentence == "old"
+    assert project.annotations[0].accent == "new"
+
+
+def test_truncated_record_is_ignored(folder: Path):
+    journal_path = folder / "project.tsv.journal"
+    journal_path.write_text('{"path": "first.mp3", "sentence": "kept"}\n{"path": "fi')
+    assert open_project(folder).annotations[0].sentence == "kept"
+
+
+def test_replay_adds_missing_annotations():
+    project = Project()
+    project.load_tsv_file(StringIO(TSV_CONTENT))
+    project._replay({"path": "third.mp3", "sentence": "new"})
+    assert project.annotations[2].sentence == "new"
+
+
+def test_snapshot_only_syncs_journal(folder: Path):
+    project = open_project(folder)
+    project.annotate(project.annotations[0], "journaled")
+    snapshot = project.snapshot(folder)
+    assert snapshot.rows is None
+    snapshot.write(folder / "project.json")
+    assert (folder / "project.tsv").read_text() == TSV_CONTENT
+    assert project.journal.committed_size == project.journal.size()
+
+
+def test_snapshot_is_not_affected_by_later_changes(folder: Path):
+    project = Project()
+    project.load_tsv_file(StringIO(TSV_CONTENT))
+    project.tsv_file = folder / "written.tsv"
+    snapshot = project.snapshot(folder)
+    project.annotate(project.annotations[0], "after snapshot")
+    snapshot.write(folder / "project.json")
+    written = Project()
+    with open(folder / "written.tsv", newline="") as file:
+        written.load_tsv_file(file)
+    assert written.annotations[0].sentence == "text"
+
+
+def test_renames_are_replayed(folder: Path):
+    project = open_project(folder)
+    (folder / "first.mp3").touch()
+    project.rename_annotation(project.annotations[0], "renamed.mp3")
+    project.close_journal()
+    assert (folder / "renamed.mp3").is_file()
+    reopened = open_project(folder)
+    assert [a.path.name for a in reopened.annotations] == [
+        "renamed.mp3",
+        "second.mp3",
+    ]
+
+
+def test_failed_rename_changes_nothing(folder: Path):
+    project = open_project(folder)
+    with pytest.raises(OSError):
+        project.rename_annotation(project.annotations[0], "renamed.mp3")
+    assert "first.mp3" in project.annotations
+    assert "renamed.mp3" not in project.annotations
+    project.close_journal()
+    reopened = open_project(folder)
+    assert reopened.annotations[0].path.name == "first.mp3"
+
+
+def test_restored_rows_are_replayed(folder: Path):
+    project = open_project(folder)
+    first = project.annotations[0]
+    project.remove_annotations([first])
+    project.restore_annotations([first], [0])
+    project.close_journal()
+    assert [a.path.name for a in open_project(folder).annotations] == [
+        "first.mp3",
+        "second.mp3",
+    ]
@@ -0,0 +1,27 @@
+from io import StringIO
+import json
+
+import pytest
+from voice_annotation_tool.json_stream import iter_json_array, iter_json_lines
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 4096])
+def test_array_across_chunks(chunk_size: int):
+    values = [{"file": "a.mp3", "text": "ä [x], y"}, 12345, [1, {"b": None}], "s"]
+    content = " \n" + json.dumps(values, indent=2) + "\n"
+    assert list(iter_json_array(StringIO(content), chunk_size)) == values
+
+
+def test_empty_array():
+    assert list(iter_json_array(StringIO(" [ ] "), 1)) == []
+
+
+@pytest.mark.parametrize("content", ['{"a": 1}', "[1, 2", "[1 2]", "[1,", ""])
+def test_invalid_array(content: str):
+    with pytest.raises(ValueError):
+        list(iter_json_array(StringIO(content), 2))
+
+
+def test_json_lines():
+    content = '{"file": "a"}\n\n[1]\n'
+    assert list(iter_json_lines(StringIO(content))) == [{"file": "a"}, [1]]
@@ -0,0 +1,297 @@
+from pathlib import Path
+from random import Random
+import os
+
+import pytest
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_export import write_tsv_rows
+from voice_annotation_tool.lazy_tsv_store import LazyTsvStore, row_offsets_path
+from voice_annotation_tool.project import Project
+
+
+def make_annotation(name: str, sentence: str = "") -> Annotation:
+    return Annotation({"path": name, "sentence": sentence})
+
+
+def write_annotations(path: Path, annotations: list[Annotation]):
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        write_tsv_rows(file, [annotation.to_row() for annotation in annotations])
+
+
+@pytest.fixture
+def tsv_file(tmp_path: Path) -> Path:
+    path = tmp_path / "annotations.tsv"
+    write_annotations(
+        path, [make_annotation(f"{num}.mp3", f"s{num}") for num in range(5)]
+    )
+    return path
+
+
+@pytest.fixture
+def store(tsv_file: Path):
+    store = LazyTsvStore(tsv_file, {"3.mp3"})
+    yield store
+    store.close()
+
+
+def test_reads_rows_on_demand(store: LazyTsvStore):
+    assert len(store) == 5
+    assert store[2].sentence == "s2"
+    assert store.get("4.mp3").name == "4.mp3"
+    assert store.get("missing.mp3") is None
+    assert "3.mp3" in store
+    assert store[3].modified
+    assert not store[1].modified
+    assert [annotation.name for annotation in store] == [
+        f"{num}.mp3" for num in range(5)
+    ]
+
+
+def test_referenced_annotations_are_shared(store: LazyTsvStore):
+    assert store[1] is store.get("1.mp3")
+
+
+def test_offsets_are_cached(tsv_file: Path, store: LazyTsvStore):
+    assert row_offsets_path(tsv_file).is_file()
+    reopened = LazyTsvStore(tsv_file)
+    assert list(reopened.rows()) == list(store.rows())
+    reopened.close()
+
+
+def test_outdated_cache_is_ignored(tsv_file: Path, store: LazyTsvStore):
+    write_annotations(tsv_file, [make_annotation("other.mp3")])
+    os.utime(tsv_file, ns=(0, 0))
+    reopened = LazyTsvStore(tsv_file)
+    assert list(reopened.names()) == ["other.mp3"]
+    reopened.close()
+
+
+def test_quoted_line_breaks(tmp_path: Path):
+    path = tmp_path / "quoted.tsv"
+    write_annotations(
+        path,
+        [
+            make_annotation("a.mp3", 'two\nlines and "quotes"'),
+            make_annotation("b.mp3", "tab\tseparated"),
+            make_annotation("c.mp3", "plain"),
+        ],
+    )
+    store = LazyTsvStore(path)
+    assert list(store.names()) == ["a.mp3", "b.mp3", "c.mp3"]
+    assert store[0].sentence == 'two\nlines and "quotes"'
+    assert store[1].sentence == "tab\tseparated"
+    assert store[2].sentence == "plain"
+    store.close()
+
+
+def test_rows_are_utf8(tmp_path: Path):
+    path = tmp_path / "annotations.tsv"
+    write_annotations(
+        path,
+        [
+            make_annotation("ä.mp3", "Grüße"),
+            make_annotation("b.mp3", 'über "zwei"\nZeilen'),
+            make_annotation("c.mp3", "ß"),
+        ],
+    )
+    store = LazyTsvStore(path)
+    assert [annotation.sentence for annotation in store] == [
+        "Grüße",
+        'über "zwei"\nZeilen',
+        "ß",
+    ]
+    assert store.row_of("ä.mp3") == 0
+    store.close()
+
+
+def test_duplicate_names_replace_first_row(tmp_path: Path):
+    path = tmp_path / "duplicates.tsv"
+    write_annotations(
+        path,
+        [
+            make_annotation("a.mp3", "old"),
+            make_annotation("b.mp3"),
+            make_annotation("a.mp3", "new"),
+        ],
+    )
+    store = LazyTsvStore(path)
+    assert len(store) == 2
+    assert store[0].sentence == "new"
+    store.close()
+
+
+def test_rows_without_file_name_are_skipped(tmp_path: Path):
+    path = tmp_path / "blank.tsv"
+    path.write_text("client_id\tpath\tsentence\n\nc\tfolder/a.mp3\ttext\nc\t\t\n")
+    store = LazyTsvStore(path)
+    assert list(store.names()) == ["a.mp3"]
+    assert store[0].sentence == "text"
+    store.close()
+
+
+def test_unescaped_quote_inside_field(tmp_path: Path):
+    path = tmp_path / "quote.tsv"
+    path.write_text(
+        'client_id\tpath\tsentence\nc\ta.mp3\tHe said "hi\nc\tb.mp3\ttwo\n',
+        encoding="utf-8",
+    )
+    store = LazyTsvStore(path)
+    assert list(store.names()) == ["a.mp3", "b.mp3"]
+    assert store[0].sentence == 'He said "hi'
+    assert store[1].sentence == "two"
+    store.close()
+    project = Project()
+    project.load_tsv(path)
+    assert [annotation.sentence for annotation in project.annotations] == [
+        'He said "hi',
+        "two",
+    ]
+
+
+def test_empty_file(tmp_path: Path):
+    path = tmp_path / "empty.tsv"
+    path.touch()
+    store = LazyTsvStore(path)
+    assert len(store) == 0
+    store.add(make_annotation("a.mp3"))
+    assert list(store.rows())[0][1] == "a.mp3"
+    store.close()
+
+
+def test_edits_are_kept_in_overlay(store: LazyTsvStore):
+    annotation = store[2]
+    annotation.sentence = "changed"
+    store.update(annotation)
+    del annotation
+    assert store[2].sentence == "changed"
+    assert store.add(make_annotation("new.mp3", "added"))
+    assert not store.add(make_annotation("new.mp3"))
+    assert store.add(make_annotation("0.mp3", "replaced"), overwrite=True)
+    assert [row[2] for row in store.rows()] == [
+        "replaced",
+        "s1",
+        "changed",
+        "s3",
+        "s4",
+        "added",
+    ]
+
+
+def test_remove_and_rename(store: LazyTsvStore):
+    assert store.remove("1.mp3").name == "1.mp3"
+    assert store.remove("1.mp3") is None
+    store.rename("3.mp3", "renamed.mp3")
+    store[2].path = "renamed.mp3"
+    assert len(store) == 4
+    assert store.row_of("renamed.mp3") == 2
+    assert store[1].name == "2.mp3"
+    with pytest.raises(KeyError):
+        store.rename("4.mp3", "renamed.mp3")
+    assert [row[1] for row in store.rows()] == [
+        "0.mp3",
+        "2.mp3",
+        "renamed.mp3",
+        "4.mp3",
+    ]
+
+
+def test_insert_many_restores_rows(store: LazyTsvStore):
+    removed = [store.remove("0.mp3"), store.remove("3.mp3")]
+    store.insert_many([(0, removed[0]), (3, removed[1])])
+    assert [annotation.name for annotation in store] == [
+        f"{num}.mp3" for num in range(5)
+    ]
+    assert store[3] is removed[1]
+    assert store.row_of("4.mp3") == 4
+    assert [row[2] for row in store.rows()] == [f"s{num}" for num in range(5)]
+
+
+def test_snapshot_rows(store: LazyTsvStore):
+    annotation = store[0]
+    annotation.sentence = "changed"
+    store.update(annotation)
+    snapshot = store.snapshot_rows()
+    annotation.sentence = "changed again"
+    store.remove("4.mp3")
+    assert [row[2] for row in snapshot] == ["changed", "s1", "s2", "s3", "s4"]
+
+
+def test_project_loads_tsv_lazily(tsv_file: Path, tmp_path: Path):
+    project = Project()
+    project.lazy_tsv = True
+    project.tsv_file = tsv_file
+    project.load_tsv()
+    assert isinstance(project.annotations, LazyTsvStore)
+    project.open_journal()
+    project.annotate(project.annotations[1], "changed")
+    project.close()
+
+    reopened = Project()
+    reopened.lazy_tsv = True
+    reopened.tsv_file = tsv_file
+    reopened.load_tsv()
+    reopened.open_journal()
+    assert reopened.annotations.get("1.mp3").sentence == "changed"
+    reopened.save_tsv(tmp_path / "saved.tsv")
+    reopened.close()
+    with open(tmp_path / "saved.tsv") as file:
+        assert "changed" in file.read()
+
+
+def test_compacting_save_swaps_in_the_tsv_file(tsv_file: Path, tmp_path: Path):
+    project = Project()
+    project.lazy_tsv = True
+    project.tsv_file = tsv_file
+    project.load_tsv()
+    project.open_journal()
+    store = project.annotations
+    project.annotate(store[1], "changed")
+    project.delete_annotations([store.get("3.mp3")])
+    snapshot = project.snapshot(tmp_path, compact=True)
+    snapshot.write(tmp_path / "project.json")
+    # Edits made while the snapshot is written are kept.
+    project.annotate(store[0], "edited")
+    snapshot.finish()
+    assert not snapshot.journal.compaction_path.exists()
+    assert [annotation.sentence for annotation in store] == [
+        "edited",
+        "changed",
+        "s2",
+        "s4",
+    ]
+    store._live.clear()
+    store._recent.clear()
+    assert store.get("4.mp3").sentence == "s4"
+    project.close()
+
+    reopened = Project()
+    reopened.lazy_tsv = True
+    reopened.tsv_file = tsv_file
+    reopened.load_tsv()
+    reopened.open_journal()
+    assert [annotation.sentence for annotation in reopened.annotations] == [
+        "edited",
+        "changed",
+        "s2",
+        "s4",
+    ]
+    reopened.close()
+
+
+def test_interleaved_deletes_and_row_access(tmp_path: Path):
+    path = tmp_path / "annotations.tsv"
+    expected = [f"{num}.mp3" for num in range(3000)]
+    write_annotations(path, [make_annotation(name) for name in expected])
+    store = LazyTsvStore(path)
+    random = Random(1)
+    for step in range(2000):
+        name = expected.pop(random.randrange(len(expected)))
+        store.remove(name)
+        if step % 50 == 0:
+            store.add(make_annotation(f"new{step}.mp3"))
+            expected.append(f"new{step}.mp3")
+        row = random.randrange(len(expected))
+        assert store[row].name == expected[row]
+        assert store.row_of(expected[row]) == row
+    assert [annotation.name for annotation in store] == expected
+    store.close()
@@ -1,8 +1,10 @@
 from io import StringIO
 import json
 from pathlib import Path
+from PySide6.QtCore import QCoreApplication, QEvent
 from PySide6.QtGui import QKeySequence
 import pytest
+from voice_annotation_tool.annotation import Annotation
 from voice_annotation_tool.project import Project
 
 from voice_annotation_tool.main_window import MainWindow
@@ -10,7 +12,11 @@ from voice_annotation_tool.main_window import MainWindow
 
 @pytest.fixture
 def main_window():
-    return MainWindow()
+    window = MainWindow()
+    yield window
+    window.shutdown()
+    window.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
 
 
 def test_load_settings(main_window: MainWindow, tmpdir):
@@ -92,5 +98,52 @@ def test_save_project(main_window: MainWindow, tmpdir):
     main_window.set_current_project(project)
     main_window.project_file = Path(tmpdir / "project.json")
     main_window.save_current_project()
+    main_window.saver.wait()
     assert main_window.project_file.is_file()
     assert project.tsv_file.is_file()
+
+
+def test_autosave_only_saves_changes(main_window: MainWindow, tmpdir):
+    folder = Path(tmpdir)
+    (folder / "audio.mp3").touch()
+    project = Project()
+    project.load_audio_files(folder)
+    project.tsv_file = folder / "project.tsv"
+    main_window.project_file = folder / "project.json"
+    main_window.set_current_project(project)
+    main_window.autosave()
+    main_window.saver.wait()
+    assert not main_window.project_file.exists()
+    project.add_annotation(Annotation({"path": "sample.mp3"}))
+    main_window.autosave()
+    main_window.saver.wait()
+    assert main_window.project_file.is_file()
+
+
+def test_skip_silence_setting(main_window: MainWindow):
+    settings = {"shortcuts": [], "recent_projects": [], "skip_silence": False}
+    main_window.load_settings(StringIO(json.dumps(settings)))
+    assert not main_window.opened_project_frame.audioPlaybackWidget.skip_silence
+    main_window.actionSkipSilence.setChecked(True)
+    assert main_window.opened_project_frame.audioPlaybackWidget.skip_silence
+    output = StringIO()
+    main_window.save_settings(output)
+    assert json.loads(output.getvalue())["skip_silence"]
+
+
+def test_generated_texts_are_applied_in_batches(main_window: MainWindow, tmpdir):
+    folder = Path(tmpdir)
+    for name in ["first.wav", "second.wav"]:
+        (folder / name).touch()
+    project = Project()
+    project.load_audio_files(folder)
+    project.tsv_file = folder / "project.tsv"
+    main_window.set_current_project(project)
+    project.annotate(project.annotations[1], "typed")
+    main_window.auto_annotations_transcribed(
+        [("first.wav", "Generated."), ("second.wav", "Other."), ("gone.wav", "X.")]
+    )
+    first, second = project.annotations[0], project.annotations[1]
+    assert (first.sentence, first.modified) == ("Generated.", False)
+    assert second.sentence == "typed"
+    assert main_window.auto_annotation_count == 1
@@ -1,11 +1,16 @@
 from pathlib import Path
+import time
+import wave
 from PySide6.QtWidgets import QPushButton
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QCoreApplication, QEvent, Qt
+from PySide6.QtTest import QTest
 import pytest
 from voice_annotation_tool.opened_project_frame import (
     AnnotationListModel,
     OpenedProjectFrame,
 )
+from voice_annotation_tool.edit_commands import DeleteCommand
+from voice_annotation_tool.audio_metadata import AudioInfo
 from voice_annotation_tool.project import Project, Annotation
 
 annotation_data = {
@@ -22,8 +27,16 @@ annotation_data = {
 
 
 @pytest.fixture
-def project_frame(tmpdir):
+def frame():
     frame = OpenedProjectFrame()
+    yield frame
+    frame.shutdown()
+    frame.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+@pytest.fixture
+def project_frame(frame: OpenedProjectFrame, tmpdir):
     project = Project()
     for annotation_num in range(3):
         path: Path = Path(tmpdir) / Path("path_" + str(annotation_num))
@@ -56,6 +69,17 @@ def test_annotation_list_shows_filename(project_frame: OpenedProjectFrame):
     assert model.data(model.index(0, 0), Qt.DisplayRole) == "path_0"
 
 
+def test_rename_in_list(project_frame: OpenedProjectFrame):
+    model = project_frame.annotation_model
+    index = model.index(0, 0)
+    assert model.setData(index, "path_0", Qt.EditRole)
+    assert not model.setData(index, "path_1", Qt.EditRole)
+    assert model.data(index, Qt.DisplayRole) == "path_0"
+    assert model.setData(index, "renamed", Qt.EditRole)
+    assert model.data(index, Qt.DisplayRole) == "renamed"
+    assert project_frame.project.annotations[0].path.is_file()
+
+
 def test_metadata_header_filled_on_open(project_frame):
     assert project_frame.accentEdit.text() == "accent"
     assert project_frame.clientIdEdit.text() == "id"
@@ -122,3 +146,273 @@ def test_text_cleared_after_opening_project(project_frame: OpenedProjectFrame):
     project_frame.load_project(project)
     project_frame.load_project(Project())
     assert project_frame.annotationEdit.toPlainText() == ""
+
+
+def test_audio_folder_changes_are_picked_up(frame: OpenedProjectFrame, tmp_path: Path):
+    project = Project()
+    tmp_path.joinpath("first.mp3").touch()
+    project.load_audio_files(tmp_path)
+    frame.load_project(project)
+    model: AnnotationListModel = frame.annotationList.model()
+    tmp_path.joinpath("second.mp3").touch()
+    tmp_path.joinpath("first.mp3").unlink()
+    frame.audio_folder_changed()
+    assert model.rowCount() == 2
+    assert model.data(model.index(1, 0), Qt.DisplayRole) == "second.mp3"
+    assert model.data(model.index(0, 0), Qt.ForegroundRole) is not None
+    assert model.data(model.index(1, 0), Qt.ForegroundRole) is None
+
+
+def test_delete_ranges(frame: OpenedProjectFrame, tmp_path: Path):
+    project = Project()
+    for file_num in range(6):
+        tmp_path.joinpath(f"{file_num}.mp3").touch()
+    project.load_audio_files(tmp_path)
+    frame.load_project(project)
+    model: AnnotationListModel = frame.annotationList.model()
+    names = [annotation.name for annotation in project.annotations]
+    removed = []
+    model.rowsAboutToBeRemoved.connect(
+        lambda parent, first, last: removed.append(
+            [
+                model.data(model.index(row, 0), Qt.DisplayRole)
+                for row in range(first, last + 1)
+            ]
+        )
+    )
+    revision = project.revision
+    rows = [0, 2, 3, 5]
+    model.delete_annotations([project.annotations[row] for row in rows])
+    assert removed == [[names[5]], [names[2], names[3]], [names[0]]]
+    assert project.revision == revision + 1
+    assert model.rowCount() == 2
+    assert [model.data(model.index(row, 0), Qt.DisplayRole) for row in range(2)] == [
+        names[1],
+        names[4],
+    ]
+
+
+def test_undo_delete_keeps_order(frame: OpenedProjectFrame, tmp_path: Path):
+    project = Project()
+    for file_num in range(6):
+        tmp_path.joinpath(f"{file_num}.mp3").touch()
+    project.load_audio_files(tmp_path)
+    frame.load_project(project)
+    names = [annotation.name for annotation in project.annotations]
+    model = frame.annotation_model
+    inserted = []
+    model.rowsAboutToBeInserted.connect(
+        lambda parent, first, last: inserted.append((first, last))
+    )
+    frame.push_edit(
+        DeleteCommand(
+            model, [project.annotations[row] for row in [0, 2, 3, 5]], "Delete"
+        )
+    )
+    frame.undo_stack.undo()
+    assert inserted == [(2, 2), (1, 2), (0, 0)]
+    assert [annotation.name for annotation in project.annotations] == names
+    assert [
+        model.data(model.index(row, 0), Qt.DisplayRole) for row in range(6)
+    ] == names
+
+
+def test_remove_row(project_frame: OpenedProjectFrame):
+    model: AnnotationListModel = project_frame.annotationList.model()
+    assert model.removeRow(1)
+    assert model.rowCount() == 2
+    assert not model.removeRow(5)
+
+
+def test_rows_are_fetched_in_batches(frame: OpenedProjectFrame):
+    project = Project()
+    for num in range(AnnotationListModel.FETCH_BATCH_SIZE + 10):
+        project.add_annotation(Annotation({"path": f"{num}.mp3"}))
+    frame.load_project(project)
+    model: AnnotationListModel = frame.annotationList.model()
+    assert model.rowCount() == AnnotationListModel.FETCH_BATCH_SIZE
+    assert model.canFetchMore()
+    model.fetchMore()
+    assert model.rowCount() == len(project.annotations)
+    assert not model.canFetchMore()
+
+
+def test_load_project_keeps_model(project_frame: OpenedProjectFrame):
+    model = project_frame.annotationList.model()
+    project_frame.load_project(Project())
+    assert project_frame.annotationList.model() is model
+    assert model.rowCount() == 0
+
+
+def test_changes_emit_data_changed(project_frame: OpenedProjectFrame):
+    model: AnnotationListModel = project_frame.annotationList.model()
+    changed = []
+    model.dataChanged.connect(
+        lambda first, last, *roles: changed.append((first.row(), last.row()))
+    )
+    project = project_frame.project
+    project.update_annotation(project.annotations[2], age="teens")
+    project.annotate(project.annotations[0], "changed")
+    model.flush_changes()
+    assert sorted(changed) == [(0, 0), (2, 2)]
+    assert model.data(model.index(0, 0), Qt.BackgroundRole) is model.MODIFIED_BRUSH
+
+
+def test_search_filters_list(project_frame: OpenedProjectFrame):
+    project_frame.annotationList.setCurrentIndex(
+        project_frame.annotationList.model().index(2, 0)
+    )
+    project_frame.searchEdit.setText("sentence 2")
+    project_frame.search_changed()
+    model = project_frame.annotationList.model()
+    assert model is project_frame.filter_model
+    assert model.rowCount() == 1
+    assert model.data(model.index(0, 0), Qt.DisplayRole) == "path_2"
+    assert project_frame.annotationEdit.toPlainText() == "Sentence 2"
+    project_frame.searchEdit.clear()
+    project_frame.search_changed()
+    assert project_frame.annotationList.model() is project_frame.annotation_model
+    assert project_frame.annotationList.currentIndex().row() == 2
+
+
+def test_search_metadata(project_frame: OpenedProjectFrame):
+    project = project_frame.project
+    project.update_annotation(project.annotations[1], gender="female")
+    project_frame.searchEdit.setText("gender:female")
+    project_frame.search_changed()
+    model = project_frame.annotationList.model()
+    assert model.rowCount() == 1
+    assert project_frame.get_selected_annotations() == [project.annotations[1]]
+    project_frame.delete_selected()
+    assert model.rowCount() == 0
+
+
+def test_sort_by_duration(project_frame: OpenedProjectFrame):
+    project_frame.audio_probed(
+        [
+            (f"path_{row}", AudioInfo(duration, 16000, 1, 0, 0))
+            for row, duration in enumerate([3600.0, 7200.0, 1800.0])
+        ]
+    )
+    project_frame.project.annotate(project_frame.project.annotations[0], "text")
+    project_frame.update_duration_totals()
+    assert project_frame.durationLabel.text() == "1.0 h annotated, 2.5 h remaining"
+    project_frame.sortInput.setCurrentIndex(2)
+    project_frame.search_changed()
+    model = project_frame.annotationList.model()
+    assert model is project_frame.filter_model
+    names = [model.data(model.index(row, 0), Qt.DisplayRole) for row in range(3)]
+    assert names == ["path_1", "path_0", "path_2"]
+    assert project_frame.annotationList.currentIndex().row() == 1
+
+
+def test_metadata_edits_are_batched(project_frame: OpenedProjectFrame):
+    project = project_frame.project
+    project_frame.annotationList.selectAll()
+    assert project_frame.selection_editor.summary.count == 3
+    assert project_frame.accentEdit.text() == "accent"
+    revision = project.revision
+    project_frame.accentEdit.setText("new")
+    project_frame.accentEdit.setText("newer")
+    assert project.annotations[0].accent == "accent"
+    assert project_frame.selection_editor.has_pending_edits()
+    project_frame.flush_edits()
+    assert project.revision == revision + 1
+    assert [annotation.accent for annotation in project.annotations] == ["newer"] * 3
+
+
+def test_pending_edits_apply_to_previous_selection(project_frame: OpenedProjectFrame):
+    project = project_frame.project
+    project_frame.accentEdit.setText("first")
+    project_frame.next_pressed()
+    assert project.annotations[0].accent == "first"
+    assert project.annotations[1].accent == "accent"
+    project_frame.genderInput.activated.emit(2)
+    assert project.annotations[1].gender == "female"
+    project_frame.annotationList.selectAll()
+    assert project_frame.genderInput.currentIndex() == 4
+
+
+def test_undo_text_edits(project_frame: OpenedProjectFrame):
+    project = project_frame.project
+    project_frame.annotationEdit.setPlainText("first")
+    project_frame.annotationEdit.setPlainText("second")
+    assert project.annotations[0].sentence == "second"
+    assert project_frame.undo_stack.count() == 1
+    project_frame.undo_stack.undo()
+    assert project.annotations[0].sentence == "Sentence 0"
+    assert not project.annotations[0].modified
+    assert project_frame.annotationEdit.toPlainText() == "Sentence 0"
+    project_frame.undo_stack.redo()
+    assert project_frame.annotationEdit.toPlainText() == "second"
+
+
+def test_text_edits_changed_back_are_dropped(project_frame: OpenedProjectFrame):
+    project_frame.project.annotations[0].modified = True
+    project_frame.annotationEdit.setPlainText("first")
+    project_frame.annotationEdit.setPlainText("Sentence 0")
+    assert project_frame.undo_stack.count() == 0
+
+
+def test_undo_metadata_edits(project_frame: OpenedProjectFrame):
+    project = project_frame.project
+    project_frame.annotationList.selectAll()
+    project_frame.accentEdit.setText("new")
+    project_frame.genderInput.activated.emit(2)
+    assert project_frame.undo_stack.count() == 1
+    project_frame.undo_stack.undo()
+    assert [annotation.accent for annotation in project.annotations] == ["accent"] * 3
+    assert project_frame.accentEdit.text() == "accent"
+    assert project_frame.genderInput.currentIndex() == 1
+
+
+def test_undo_delete(project_frame: OpenedProjectFrame):
+    project = project_frame.project
+    deleted = project.annotations[0]
+    project_frame.delete_selected()
+    assert not deleted.path.exists()
+    assert project_frame.annotation_model.rowCount() == 2
+    project_frame.undo_stack.undo()
+    assert deleted.path.is_file()
+    assert project_frame.annotation_model.rowCount() == 3
+    assert project.annotations[0] is deleted
+    project_frame.undo_stack.redo()
+    assert not deleted.path.exists()
+    assert len(project.annotations) == 2
+
+
+def test_neighbours_are_played_from_memory(project_frame: OpenedProjectFrame):
+    prefetcher = project_frame.audio_prefetcher
+    project = project_frame.project
+    project.annotations[1].path.write_bytes(b"audio")
+    # The empty file was read when the project was loaded.
+    prefetcher.clear()
+    project_frame.update_selected_annotation()
+    deadline = time.monotonic() + 5
+    while prefetcher._pending and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+    assert str(project.annotations[1].path) in prefetcher.cache
+    project_frame.next_pressed()
+    buffer = project_frame.audioPlaybackWidget.buffer
+    assert buffer is not None and bytes(buffer.data()) == b"audio"
+    assert project_frame.audioPlaybackWidget.latency.samples[True]
+
+
+def test_waveform_is_loaded_in_the_background(project_frame: OpenedProjectFrame):
+    path = project_frame.project.annotations[0].path
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(16000)
+        file.writeframes(b"\x00\x10" * 1600)
+    # The empty file was loaded when the project was opened.
+    project_frame.peak_loader.clear()
+    project_frame.update_selected_annotation()
+    waveform = project_frame.audioPlaybackWidget.waveform
+    assert waveform.pyramid is None
+    deadline = time.monotonic() + 5
+    while waveform.pyramid is None and time.monotonic() < deadline:
+        QTest.qWait(10)
+    assert waveform.pyramid is not None and waveform.pyramid.duration == 0.1
+    project_frame.next_pressed()
+    assert waveform.pyramid is None
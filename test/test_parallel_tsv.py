@@ -0,0 +1,62 @@
+from pathlib import Path
+
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_export import write_tsv_rows
+from voice_annotation_tool import parallel_tsv
+from voice_annotation_tool.parallel_tsv import (
+    parse_tsv_parallel,
+    row_boundaries,
+    worker_count,
+)
+from voice_annotation_tool.project import Project
+
+
+def write_tsv(path: Path, count: int):
+    rows = [
+        (f"speaker_{row % 7}", f"{row}.mp3", f"Text {row}", row % 3, 0, "", "", "")
+        for row in range(count)
+    ]
+    # Quoted fields with line breaks and tabs must not be split.
+    rows[10] = ("c", "10.mp3", 'two\nlines "quoted"', 0, 0, "", "", "")
+    rows[11] = ("c", "11.mp3", "tab\tand\nbreak", 0, 0, "", "", "")
+    rows[12] = ("c", "12.mp3", 'Grüße – "ä"', 0, 0, "", "", "")
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        write_tsv_rows(file, rows)
+
+
+def test_boundaries_are_row_starts(tmp_path: Path):
+    path = tmp_path / "annotations.tsv"
+    write_tsv(path, 50)
+    header, boundaries = row_boundaries(path, 40)
+    assert header == Annotation.TSV_HEADER_MEMBERS
+    assert boundaries == sorted(set(boundaries))
+    data = path.read_bytes()
+    assert boundaries[-1] == len(data)
+    for boundary in boundaries[:-1]:
+        assert data[boundary - 1 : boundary] == b"\n"
+        assert data[:boundary].count(b'"') % 2 == 0
+
+
+def test_parallel_load_matches_single_process(tmp_path: Path):
+    path = tmp_path / "annotations.tsv"
+    write_tsv(path, 200)
+    parallel = [row for rows in parse_tsv_parallel(path, 2) for row in rows]
+    single = Project()
+    single.load_tsv(path)
+    assert [Annotation.from_row(row).to_row() for row in parallel] == list(
+        single.annotations.rows()
+    )
+
+
+def test_small_files_use_one_process(tmp_path: Path, monkeypatch):
+    path = tmp_path / "annotations.tsv"
+    write_tsv(path, 20)
+    assert worker_count(path, 8) == 1
+    monkeypatch.setattr(parallel_tsv, "PARALLEL_MIN_SIZE", 0)
+    assert worker_count(path, 8) == 8
+    project = Project()
+    project.modified_annotations = {"3.mp3"}
+    project.load_tsv(path, workers=2)
+    assert len(project.annotations) == 20
+    assert project.annotations.get("3.mp3").modified
+    assert project.annotations[11].sentence == "tab\tand\nbreak"
@@ -0,0 +1,43 @@
+from pathlib import Path
+import time
+import wave
+
+from PySide6.QtTest import QTest
+
+from voice_annotation_tool.peak_loader import PeakLoader
+
+
+def write_wav(path: Path, frames: int):
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(16000)
+        file.writeframes(b"\x10\x00" * frames)
+
+
+def wait_for(loader: PeakLoader):
+    deadline = time.monotonic() + 5
+    while loader._pending and time.monotonic() < deadline:
+        QTest.qWait(10)
+
+
+def test_pyramids_are_loaded_in_the_background(tmp_path: Path):
+    paths = [tmp_path / f"{number}.wav" for number in range(3)]
+    for number, path in enumerate(paths):
+        write_wav(path, 100 * (number + 1))
+    loader = PeakLoader()
+    loader.cache_folder = tmp_path / "peaks"
+    loaded = []
+    loader.loaded.connect(lambda path, pyramid: loaded.append(path))
+    assert loader.request(paths[0]) is None
+    loader.prefetch(paths[1:])
+    wait_for(loader)
+    assert sorted(loaded) == sorted(map(str, paths))
+    assert loader.request(paths[2]).sample_count == 300
+    assert (tmp_path / "peaks" / "2.wav.npz").is_file()
+    loader.discard([paths[2]])
+    assert loader.request(paths[2]) is None
+    loader.clear()
+    wait_for(loader)
+    assert loader.request(paths[0]) is None
+    loader.shutdown()
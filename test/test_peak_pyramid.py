@@ -0,0 +1,102 @@
+from pathlib import Path
+import os
+import wave
+
+import numpy
+
+from voice_annotation_tool import peak_pyramid
+from voice_annotation_tool.peak_pyramid import (
+    BASE_BLOCK,
+    LEVEL_FACTOR,
+    PeakPyramid,
+    block_peaks,
+    cached_pyramid,
+)
+
+
+def write_wav(path: Path, samples: numpy.ndarray, rate=16000, channels=1):
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(channels)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(samples.astype("<i2").tobytes())
+
+
+def test_block_peaks_span_chunks():
+    samples = numpy.arange(10, dtype=numpy.int16)
+    minimums, maximums, count = block_peaks([samples[:3], samples[3:7], samples[7:]], 4)
+    assert minimums.tolist() == [0, 4, 8]
+    assert maximums.tolist() == [3, 7, 9]
+    assert count == 10
+
+
+def test_levels(monkeypatch):
+    monkeypatch.setattr(peak_pyramid, "MIN_LEVEL_PEAKS", 4)
+    samples = numpy.zeros(BASE_BLOCK * 20, numpy.int16)
+    samples[BASE_BLOCK * 5] = 100
+    samples[BASE_BLOCK * 19] = -100
+    pyramid = PeakPyramid.from_chunks(8000, [samples])
+    assert [len(minimums) for minimums, _ in pyramid.levels] == [20, 5, 2]
+    assert pyramid.levels[1][1].tolist() == [0, 100, 0, 0, 0]
+    assert pyramid.levels[2][0].tolist() == [0, -100]
+    assert pyramid.duration == len(samples) / 8000
+
+
+def test_peaks(monkeypatch):
+    monkeypatch.setattr(peak_pyramid, "MIN_LEVEL_PEAKS", 4)
+    rate = BASE_BLOCK * 10
+    samples = numpy.zeros(rate * 10, numpy.int16)
+    # A loud second in the middle.
+    samples[rate * 5 : rate * 6] = 1000
+    pyramid = PeakPyramid.from_chunks(rate, [samples])
+    minimums, maximums = pyramid.peaks(0, 10, 10)
+    assert maximums.tolist() == [0, 0, 0, 0, 0, 1000, 0, 0, 0, 0]
+    assert minimums.tolist() == [0] * 10
+    # Zoomed in further than the finest level.
+    minimums, maximums = pyramid.peaks(5, 5.1, 100)
+    assert len(maximums) == 100 and set(maximums.tolist()) == {1000}
+    # Columns after the end are left out.
+    assert len(pyramid.peaks(9, 11, 10)[0]) == 5
+    assert len(pyramid.peaks(11, 12, 10)[0]) == 0
+
+
+def test_stereo_files_are_mixed_down(tmp_path: Path):
+    path = tmp_path / "stereo.wav"
+    write_wav(path, numpy.array([100, 300] * BASE_BLOCK), channels=2)
+    pyramid = PeakPyramid.from_file(path)
+    assert pyramid.sample_count == BASE_BLOCK
+    assert pyramid.levels[0][0].tolist() == [200]
+
+
+def test_cache_is_invalidated_by_changes(tmp_path: Path):
+    audio = tmp_path / "sample.wav"
+    write_wav(audio, numpy.full(BASE_BLOCK * 4, 50))
+    cache = tmp_path / "peaks"
+    pyramid = cached_pyramid(audio, cache)
+    assert pyramid.levels[0][1].tolist() == [50] * 4
+    assert (cache / "sample.wav.npz").is_file()
+    write_wav(audio, numpy.full(BASE_BLOCK * 4, 70))
+    stat = audio.stat()
+    os.utime(audio, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cached_pyramid(audio, cache).levels[0][1].tolist() == [70] * 4
+
+
+def test_cached_pyramid_is_read_back(tmp_path: Path, monkeypatch):
+    audio = tmp_path / "sample.wav"
+    write_wav(audio, numpy.full(BASE_BLOCK * LEVEL_FACTOR, 5))
+    cached_pyramid(audio, tmp_path)
+
+    def fail(path):
+        raise AssertionError("decoded again")
+
+    monkeypatch.setattr(PeakPyramid, "from_file", fail)
+    pyramid = cached_pyramid(audio, tmp_path)
+    assert pyramid.sample_count == BASE_BLOCK * LEVEL_FACTOR
+    assert pyramid.sample_rate == 16000
+
+
+def test_unreadable_files(tmp_path: Path):
+    assert cached_pyramid(tmp_path / "missing.wav", tmp_path) is None
+    cache = tmp_path / "broken.npz"
+    cache.write_bytes(b"not numpy")
+    assert PeakPyramid.load(cache, 0, 0) is None
@@ -1,10 +1,14 @@
 from io import StringIO
 import json
 from pathlib import Path
+import wave
 
 import pytest
 from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.annotation_diff import AnnotationDiff
+from voice_annotation_tool.audio_metadata import AudioInfo
 from voice_annotation_tool.project import Project
+from voice_annotation_tool.voice_activity import SpeechRange
 
 
 @pytest.fixture
@@ -34,16 +38,47 @@ def test_export_json(project: Project):
     assert json.loads(output.read()) == [{"file": "path", "text": "text"}]
 
 
+def test_export_json_lines(project: Project):
+    output = StringIO()
+    project.exportJsonLines(output)
+    assert json.loads(output.getvalue())["sentence"] == "text"
+
+
 def test_import_csv(project: Project):
     project.importCSV(StringIO("file;text\npath;new"))
     assert project.annotations[0].sentence == "new"
 
 
+def test_import_csv_continues_after_unknown_file(project: Project):
+    project.add_annotation(Annotation({"path": "other"}))
+    result = project.importCSV(StringIO("file;text\nunknown;a\nother;b\npath;text"))
+    assert project.annotations.get("other").sentence == "b"
+    assert (result.matched, result.unmatched, result.changed) == (2, 1, 1)
+
+
 def test_import_json(project: Project):
     project.importJson(StringIO('[{"file":"path", "text":"new"}]'))
     assert project.annotations[0].sentence == "new"
 
 
+def test_import_json_lines(project: Project):
+    result = project.importJsonLines(
+        StringIO('{"file": "path", "text": "new"}\n\n{"file": "unknown"}\n')
+    )
+    assert project.annotations[0].sentence == "new"
+    assert project.annotations[0].modified
+    assert (result.matched, result.unmatched, result.changed) == (1, 1, 1)
+
+
+def test_import_is_one_revision(project: Project):
+    for num in range(3):
+        project.add_annotation(Annotation({"path": f"{num}.mp3"}))
+    revision = project.revision
+    rows = [{"file": f"{num}.mp3", "text": "new"} for num in range(3)]
+    project.importJson(StringIO(json.dumps(rows)))
+    assert project.revision == revision + 1
+
+
 def test_save(project: Project):
     buffer = StringIO()
     project.save(buffer, Path("tmp"))
@@ -118,3 +153,326 @@ def test_duplicates_get_overwritten():
 abc\tsample.mp3\ttext\t2\t2\ttwenties\tother\taccent"""
     project.load_tsv_file(StringIO(content))
     assert len(project.annotations) == 1
+
+
+def test_overwriting_keeps_position():
+    project = Project()
+    for name in ["first.mp3", "sample.mp3", "last.mp3"]:
+        annotation = Annotation()
+        annotation.path = Path(name)
+        project.add_annotation(annotation)
+    content = """client_id\tpath\tsentence\tup_votes\tdown_votes\tage\tgender\taccent
+abc\tsample.mp3\ttext\t2\t2\ttwenties\tother\taccent"""
+    project.load_tsv_file(StringIO(content))
+    assert len(project.annotations) == 3
+    assert project.annotations[1].sentence == "text"
+
+
+def test_delete_annotation(tmpdir):
+    audio_dir = Path(tmpdir)
+    for file_num in range(3):
+        audio_dir.joinpath(str(file_num) + ".mp3").touch()
+    project = Project()
+    project.load_audio_files(audio_dir)
+    deleted = project.annotations.get("1.mp3")
+    project.annotate(deleted, "text")
+    project.delete_annotation(deleted)
+    assert not deleted.path.exists()
+    assert "1.mp3" not in project.annotations
+    assert "1.mp3" not in project.modified_annotations
+    assert len(project.annotations) == 2
+
+
+def test_loading_does_not_modify_project():
+    project = Project()
+    content = """client_id\tpath\tsentence\tup_votes\tdown_votes\tage\tgender\taccent
+abc\tsample.mp3\ttext\t2\t2\ttwenties\tother\taccent"""
+    project.load_tsv_file(StringIO(content))
+    assert not project.is_modified()
+    assert not project.dirty_annotations
+
+
+def test_changes_mark_project_dirty(project: Project):
+    project.mark_saved()
+    annotation = project.annotations[0]
+    project.update_annotation(annotation, accent="new")
+    assert project.is_modified()
+    assert project.dirty_annotations == {"path": project.revision}
+    assert annotation.revision == project.revision
+    project.mark_saved()
+    assert not project.is_modified()
+    assert not project.dirty_annotations
+
+
+def test_revision_increases_with_every_change(project: Project):
+    annotation = project.annotations[0]
+    start = project.revision
+    project.annotate(annotation, "first")
+    project.mark_unchanged(annotation)
+    project.add_annotation(Annotation({"path": "other"}))
+    assert project.revision == start + 3
+
+
+def test_change_listeners(project: Project):
+    changed = []
+    project.change_listeners.append(changed.extend)
+    annotation = project.annotations[0]
+    project.update_annotation(annotation, age="teens")
+    project.annotate_many([(annotation, "text")])
+    assert changed == [annotation.name, annotation.name]
+
+
+def test_mark_unsaved(project: Project):
+    project.mark_saved()
+    project.mark_unsaved()
+    assert project.is_modified()
+
+
+def test_scan_audio_folder(tmp_path: Path):
+    for name in ["first.mp3", "second.mp3"]:
+        tmp_path.joinpath(name).touch()
+    project = Project()
+    project.load_audio_files(tmp_path)
+    tmp_path.joinpath("first.mp3").unlink()
+    tmp_path.joinpath("third.mp3").touch()
+    new_files, changed = project.scan_audio_folder()
+    assert new_files == ["third.mp3"]
+    assert changed == ["first.mp3"]
+    assert project.missing_files == {"first.mp3"}
+    project.add_audio_files(new_files)
+    assert project.annotations[2].name == "third.mp3"
+    tmp_path.joinpath("first.mp3").touch()
+    assert project.scan_audio_folder() == ([], ["first.mp3"])
+    assert not project.missing_files
+
+
+def test_delete_annotations(tmp_path: Path):
+    for file_num in range(5):
+        tmp_path.joinpath(f"{file_num}.mp3").touch()
+    project = Project()
+    project.load_audio_files(tmp_path)
+    project.mark_saved()
+    selected = [project.annotations.get(name) for name in ["1.mp3", "3.mp3", "4.mp3"]]
+    assert project.delete_annotations(selected) == selected
+    assert [annotation.name for annotation in project.annotations] == [
+        "0.mp3",
+        "2.mp3",
+    ]
+    assert not any(annotation.path.exists() for annotation in selected)
+    assert set(project.dirty_annotations) == {"1.mp3", "3.mp3", "4.mp3"}
+
+
+def test_rename_annotation(tmp_path: Path):
+    for file_num in range(3):
+        tmp_path.joinpath(f"{file_num}.mp3").touch()
+    project = Project()
+    project.load_audio_files(tmp_path)
+    project.mark_saved()
+    annotation = project.annotations.get("1.mp3")
+    row = project.annotations.row_of("1.mp3")
+    project.rename_annotation(annotation, "1.mp3")
+    assert not project.is_modified()
+    project.rename_annotation(annotation, "renamed.mp3")
+    assert project.annotations.row_of("renamed.mp3") == row
+    assert tmp_path.joinpath("renamed.mp3").is_file()
+    assert not tmp_path.joinpath("1.mp3").exists()
+
+
+def test_failed_rename_keeps_annotation(tmp_path: Path):
+    for file_num in range(2):
+        tmp_path.joinpath(f"{file_num}.mp3").touch()
+    project = Project()
+    project.load_audio_files(tmp_path)
+    project.mark_saved()
+    annotation = project.annotations.get("1.mp3")
+    row = project.annotations.row_of("1.mp3")
+    with pytest.raises(KeyError):
+        project.rename_annotation(annotation, "0.mp3")
+    annotation.path.unlink()
+    with pytest.raises(OSError):
+        project.rename_annotation(annotation, "renamed.mp3")
+    assert annotation.name == "1.mp3"
+    assert project.annotations.row_of("1.mp3") == row
+    assert "renamed.mp3" not in project.annotations
+    assert not project.is_modified()
+
+
+def test_search_index(project: Project):
+    project.add_annotation(Annotation({"path": "other", "sentence": "more text"}))
+    index = project.search_index()
+    annotation = project.annotations[0]
+    project.annotate(annotation, "changed")
+    project.update_annotation(annotation, gender="female")
+    assert list(index.search("text")) == [1]
+    assert list(index.search("gender:female changed")) == [0]
+    project.remove_annotations([annotation])
+    assert list(index.search("")) == [1]
+
+
+def test_audio_metadata(tmp_path: Path):
+    audio_folder = tmp_path / "audio"
+    audio_folder.mkdir()
+    for name in ["first.mp3", "second.mp3"]:
+        audio_folder.joinpath(name).touch()
+    project = Project()
+    project.tsv_file = tmp_path / "annotations.tsv"
+    project.load_audio_files(audio_folder)
+    files = project.audio_files_to_probe()
+    assert sorted(path.name for path, size, mtime in files) == [
+        "first.mp3",
+        "second.mp3",
+    ]
+    project.set_audio_info(
+        [
+            (path.name, AudioInfo(float(len(path.name)), 16000, 1, size, mtime))
+            for path, size, mtime in files
+        ]
+    )
+    project.annotate(project.annotations.get("first.mp3"), "text")
+    assert project.duration_totals() == (9.0, 10.0)
+    assert list(project.search_index().search("duration:<10")) == [
+        project.search_index().id_of("first.mp3")
+    ]
+    assert not project.audio_files_to_probe()
+    assert project.has_audio_file(project.annotations[0])
+
+
+def test_update_annotations(project: Project):
+    changed = []
+    project.change_listeners.append(changed.append)
+    revision = project.revision
+    annotations = list(project.annotations)
+    project.update_annotations(annotations, age="teens", accent="accent")
+    assert project.revision == revision + 1
+    assert changed == [[annotation.name for annotation in annotations]]
+    assert all(annotation.age == "teens" for annotation in project.annotations)
+    project.update_annotations([], age="twenties")
+    project.update_annotations(annotations, age="teens")
+    assert project.revision == revision + 1
+    assert len(changed) == 1
+
+
+def test_restoring_nothing_keeps_revision(project: Project):
+    project.mark_saved()
+    project.restore_annotations([])
+    project.restore_annotations([project.annotations[0]])
+    assert not project.is_modified()
+
+
+def test_apply_diff(project: Project):
+    annotation = project.annotations[0]
+    changed = []
+    project.change_listeners.append(changed.append)
+    diff = AnnotationDiff.texts([(annotation, "changed text")])
+    project.apply_diff(diff)
+    assert annotation.sentence == "changed text"
+    assert annotation.name in project.modified_annotations
+    revision = project.revision
+    project.mark_saved()
+    project.apply_diff(diff, reverse=True)
+    assert annotation.sentence != "changed text"
+    assert annotation.name not in project.modified_annotations
+    assert project.is_modified()
+    assert project.dirty_annotations == {annotation.name: revision + 1}
+    assert changed == [[annotation.name], [annotation.name]]
+
+
+def test_trash_and_restore(tmp_path: Path):
+    audio_folder = tmp_path / "audio"
+    audio_folder.mkdir()
+    audio_folder.joinpath("first.mp3").write_text("audio")
+    project = Project()
+    project.tsv_file = tmp_path / "annotations.tsv"
+    project.load_audio_files(audio_folder)
+    annotation = project.annotations[0]
+    project.annotate(annotation, "changed text")
+    trashed = project.trash_audio_files([annotation])
+    project.remove_annotations(trashed)
+    assert trashed == [annotation]
+    assert not audio_folder.joinpath("first.mp3").exists()
+    assert not len(project.annotations)
+    project.restore_annotations(trashed)
+    assert project.annotations[0] is annotation
+    assert audio_folder.joinpath("first.mp3").read_text() == "audio"
+    assert annotation.name in project.modified_annotations
+    assert project.has_audio_file(annotation)
+    project.remove_annotations(project.trash_audio_files([annotation]))
+    trash_folder = project.trash_folder()
+    assert trash_folder.joinpath("first.mp3").is_file()
+    project.close()
+    assert not trash_folder.exists()
+
+
+def test_peak_folder_is_deleted_with_the_tsv_file(tmp_path: Path):
+    project = Project()
+    assert project.peak_folder() is None
+    project.tsv_file = tmp_path / "annotations.tsv"
+    project.tsv_file.write_text("")
+    peak_folder = project.peak_folder()
+    assert peak_folder == tmp_path / "annotations.tsv.peaks"
+    peak_folder.mkdir()
+    peak_folder.joinpath("first.mp3.npz").write_bytes(b"peaks")
+    project.delete_tsv()
+    assert not peak_folder.exists()
+
+
+def test_speech_ranges(tmp_path: Path):
+    audio_folder = tmp_path / "audio"
+    audio_folder.mkdir()
+    audio_folder.joinpath("first.wav").write_bytes(b"audio")
+    project = Project()
+    project.tsv_file = tmp_path / "annotations.tsv"
+    project.load_audio_files(audio_folder)
+    files = project.audio_files_without_speech_range()
+    assert [path for path, size, mtime in files] == [audio_folder / "first.wav"]
+    path, size, mtime = files[0]
+    project.set_speech_ranges([("first.wav", SpeechRange(0.5, 1.0, size, mtime))])
+    assert project.speech_range(project.annotations[0]) == (0.5, 1.0)
+    assert not project.audio_files_without_speech_range()
+    project.speech_ranges.save()
+    assert tmp_path.joinpath("annotations.tsv.speech").is_file()
+    project.delete_tsv()
+    assert not tmp_path.joinpath("annotations.tsv.speech").exists()
+
+
+def test_export_trimmed_audio(tmp_path: Path):
+    audio_folder = tmp_path / "audio"
+    audio_folder.mkdir()
+    for name in ["first.wav", "second.wav"]:
+        with wave.open(str(audio_folder / name), "wb") as file:
+            file.setnchannels(1)
+            file.setsampwidth(2)
+            file.setframerate(1000)
+            file.writeframes(bytes(4000))
+    project = Project()
+    project.load_audio_files(audio_folder)
+    for path, size, mtime in project.audio_files_without_speech_range():
+        if path.name == "first.wav":
+            project.set_speech_ranges(
+                [("first.wav", SpeechRange(0.5, 1.5, size, mtime))]
+            )
+    export_folder = tmp_path / "export"
+    assert project.exportTrimmedAudio(export_folder) == (1, 1)
+    with wave.open(str(export_folder / "first.wav"), "rb") as file:
+        assert file.getnframes() == 1000
+    with wave.open(str(export_folder / "second.wav"), "rb") as file:
+        assert file.getnframes() == 2000
+
+
+def test_import_recording(tmp_path: Path):
+    audio_folder = tmp_path / "audio"
+    audio_folder.mkdir()
+    audio_folder.joinpath("first.wav").write_bytes(b"audio")
+    recording = tmp_path / "session.wav"
+    with wave.open(str(recording), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(1000)
+        file.writeframes(b"\x00\x40\x00\xc0" * 500 + bytes(4000))
+    project = Project()
+    project.load_audio_files(audio_folder)
+    segments = project.import_recording(recording)
+    assert [segment.name for segment in segments] == ["session_0001.wav"]
+    assert list(project.annotations.names()) == ["first.wav", "session_0001.wav"]
+    assert project.has_audio_file(project.annotations[1])
+    assert project.scan_audio_folder() == ([], [])
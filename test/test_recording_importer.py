@@ -0,0 +1,52 @@
+from pathlib import Path
+import time
+import wave
+
+from PySide6.QtTest import QTest
+
+from voice_annotation_tool.recording_importer import RecordingImporter
+
+
+def write_recording(path: Path):
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(16000)
+        file.writeframes(b"\x00\x40\x00\xc0" * 8000 + bytes(32000))
+
+
+def wait_for(importer: RecordingImporter):
+    deadline = time.monotonic() + 5
+    while importer.is_running() and time.monotonic() < deadline:
+        QTest.qWait(10)
+
+
+def test_recording_is_split_in_the_background(tmp_path: Path):
+    recording = tmp_path / "session.wav"
+    write_recording(recording)
+    folder = tmp_path / "audio"
+    folder.mkdir()
+    importer = RecordingImporter()
+    finished = []
+    progress = []
+    importer.finished.connect(finished.append)
+    importer.progress.connect(progress.append)
+    importer.start(recording, folder)
+    assert importer.is_running()
+    wait_for(importer)
+    importer.shutdown()
+    assert [segment.name for segment in finished[0]] == ["session_0001.wav"]
+    assert progress == [2]
+    assert folder.joinpath("session_0001.wav").is_file()
+
+
+def test_errors_are_reported(tmp_path: Path):
+    folder = tmp_path / "audio"
+    folder.mkdir()
+    importer = RecordingImporter()
+    errors = []
+    importer.failed.connect(errors.append)
+    importer.start(tmp_path / "session.wav", folder)
+    wait_for(importer)
+    importer.shutdown()
+    assert len(errors) == 1
@@ -0,0 +1,116 @@
+from pathlib import Path
+import threading
+import wave
+
+import numpy
+import pytest
+
+from voice_annotation_tool.recording_splitter import (
+    RecordingSplitter,
+    split_recording,
+)
+
+RATE = 16000
+
+
+def write_wav(path: Path, samples: numpy.ndarray):
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(RATE)
+        file.writeframes(samples.astype("<i2").tobytes())
+
+
+def read_wav(path: Path) -> numpy.ndarray:
+    with wave.open(str(path), "rb") as file:
+        return numpy.frombuffer(file.readframes(file.getnframes()), "<i2")
+
+
+def tone(seconds: float) -> numpy.ndarray:
+    time = numpy.arange(int(seconds * RATE)) / RATE
+    return (numpy.sin(2 * numpy.pi * 220 * time) * 8000).astype(numpy.int16)
+
+
+def silence(seconds: float) -> numpy.ndarray:
+    return numpy.zeros(int(seconds * RATE), numpy.int16)
+
+
+def recording() -> numpy.ndarray:
+    # Six sentences with short pauses, a long silence and a monologue.
+    parts = []
+    for _ in range(6):
+        parts += [tone(3), silence(0.5)]
+    parts += [silence(30), tone(45), silence(1)]
+    return numpy.concatenate(parts)
+
+
+def spans(segments) -> list[tuple[float, float]]:
+    return [(segment.start, segment.end) for segment in segments]
+
+
+@pytest.mark.parametrize("block", [1000, 4097, 10**8])
+def test_split_at_pauses(tmp_path: Path, block: int):
+    samples = recording()
+    splitter = RecordingSplitter(tmp_path, "session", RATE, 10)
+    for start in range(0, len(samples), block):
+        splitter.feed(samples[start : start + block])
+    segments = splitter.finish()
+    # Cut in the middle of the first pause after ten seconds, the long
+    # silence is left out and the monologue is cut after 20 seconds.
+    assert spans(segments) == pytest.approx(
+        [(0, 10.14), (10.14, 20.64), (50.64, 70.64), (70.64, 90.64), (90.64, 97)]
+    )
+    assert [segment.name for segment in segments] == [
+        f"session_{number:04d}.wav" for number in range(1, 6)
+    ]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        segment.name for segment in segments
+    ]
+    for segment in segments:
+        expected = samples[round(segment.start * RATE) : round(segment.end * RATE)]
+        assert read_wav(tmp_path / segment.name).tolist() == expected.tolist()
+
+
+def test_split_recording(tmp_path: Path):
+    source = tmp_path / "session.wav"
+    write_wav(source, recording())
+    folder = tmp_path / "audio"
+    folder.mkdir()
+    progress = []
+    segments = split_recording(source, folder, progress=progress.append)
+    assert len(segments) == 5
+    assert progress[-1] == pytest.approx(97)
+    assert len(list(folder.iterdir())) == 5
+
+
+def test_silence_has_no_segments(tmp_path: Path):
+    splitter = RecordingSplitter(tmp_path, "silence", RATE, 10)
+    splitter.feed(silence(60))
+    assert splitter.finish() == []
+    assert not list(tmp_path.iterdir())
+
+
+def test_existing_files_are_not_overwritten(tmp_path: Path):
+    source = tmp_path / "session.wav"
+    write_wav(source, recording())
+    folder = tmp_path / "audio"
+    folder.mkdir()
+    folder.joinpath("session_0003.wav").write_text("sample")
+    with pytest.raises(FileExistsError):
+        split_recording(source, folder)
+    assert [path.name for path in folder.iterdir()] == ["session_0003.wav"]
+
+
+def test_stop_removes_segments(tmp_path: Path):
+    source = tmp_path / "session.wav"
+    write_wav(source, recording())
+    folder = tmp_path / "audio"
+    folder.mkdir()
+    stop = threading.Event()
+
+    def progress(seconds: float):
+        if seconds > 30:
+            stop.set()
+
+    assert split_recording(source, folder, progress=progress, stop=stop) == []
+    assert not list(folder.iterdir())
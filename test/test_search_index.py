@@ -0,0 +1,111 @@
+import pytest
+from voice_annotation_tool import search_index
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.search_index import SearchIndex, SearchQuery
+
+
+def make_annotation(name: str, sentence: str, **fields) -> Annotation:
+    return Annotation({"path": name, "sentence": sentence, **fields})
+
+
+@pytest.fixture
+def annotations() -> list[Annotation]:
+    return [
+        make_annotation("0.mp3", "The cat sat.", gender="female", age="twenties"),
+        make_annotation("1.mp3", "A dog barked", gender="male", accent="new zealand"),
+        make_annotation("2.mp3", "The dog and the cat", gender="female"),
+        make_annotation("3.mp3", "", gender="male", accent="new zealand"),
+    ]
+
+
+@pytest.fixture
+def index(annotations: list[Annotation]) -> SearchIndex:
+    return SearchIndex(annotations)
+
+
+def search(index: SearchIndex, query: str) -> list[str]:
+    return [index.name_of(id) for id in index.search(query)]
+
+
+def test_parse_query():
+    query = SearchQuery('Dog age:Teens accent:"new zealand" Ca')
+    assert query.words == ["dog"]
+    assert query.prefix == "ca"
+    assert query.facets == {"age": ["teens"], "accent": ["new zealand"]}
+    assert SearchQuery("dog ").prefix is None
+    assert SearchQuery('accent:"new').facets == {"accent": ['"new']}
+    assert SearchQuery("").is_empty()
+
+
+def test_search_words(index: SearchIndex):
+    assert search(index, "cat ") == ["0.mp3", "2.mp3"]
+    assert search(index, "the cat ") == ["0.mp3", "2.mp3"]
+    assert search(index, "dog cat ") == ["2.mp3"]
+    assert search(index, "DOG") == ["1.mp3", "2.mp3"]
+    assert search(index, "bird") == []
+    assert search(index, "") == ["0.mp3", "1.mp3", "2.mp3", "3.mp3"]
+
+
+def test_search_prefix(index: SearchIndex, monkeypatch: pytest.MonkeyPatch):
+    assert search(index, "ba") == ["1.mp3"]
+    assert search(index, "dog ba") == ["1.mp3"]
+    assert search(index, "dog ba ") == []
+    monkeypatch.setattr(search_index, "PREFIX_SCAN_LIMIT", 0)
+    assert search(index, "the ca") == ["0.mp3", "2.mp3"]
+
+
+def test_search_facets(index: SearchIndex):
+    assert search(index, "gender:female") == ["0.mp3", "2.mp3"]
+    assert search(index, "gender:female age:") == ["2.mp3"]
+    assert search(index, "age:twenties age:") == ["0.mp3", "1.mp3", "2.mp3", "3.mp3"]
+    assert search(index, 'accent:"New Zealand" dog') == ["1.mp3"]
+    assert search(index, "modified:yes") == []
+    assert search(index, "modified:no gender:male") == ["1.mp3", "3.mp3"]
+    assert search(index, "client_id:unknown") == []
+
+
+def test_update(index: SearchIndex, annotations: list[Annotation]):
+    annotations[0].sentence = "A bird"
+    annotations[0].modified = True
+    index.update(annotations[0])
+    assert search(index, "cat ") == ["2.mp3"]
+    assert search(index, "bird") == ["0.mp3"]
+    assert search(index, "modified:yes") == ["0.mp3"]
+    annotations[0].sentence = "A fish"
+    index.update(annotations[0])
+    assert search(index, "bird") == []
+    index.update(make_annotation("4.mp3", "A cat"))
+    assert search(index, "cat ") == ["2.mp3", "4.mp3"]
+
+
+def test_remove_and_rename(index: SearchIndex):
+    index.remove("0.mp3")
+    index.rename("2.mp3", "renamed.mp3")
+    assert search(index, "cat ") == ["renamed.mp3"]
+    assert "0.mp3" not in index
+    assert index.id_of("renamed.mp3") == 2
+    assert len(index) == 3
+
+
+def test_rebuild(index: SearchIndex, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(search_index, "REBUILD_MIN_CHANGES", 0)
+    for number in range(5, 10):
+        index.update(make_annotation(f"{number}.mp3", "A cat"))
+    index.remove("0.mp3")
+    assert search(index, "cat ") == ["2.mp3", *(f"{n}.mp3" for n in range(5, 10))]
+    assert not index._changes
+
+
+def test_durations(index: SearchIndex):
+    index.set_durations([("0.mp3", 2.0), ("1.mp3", 7.5), ("2.mp3", 5.0)])
+    assert search(index, "duration:<5") == ["0.mp3"]
+    assert search(index, "duration:<=5") == ["0.mp3", "2.mp3"]
+    assert search(index, "duration:>5") == ["1.mp3"]
+    assert search(index, "duration:2-5 cat ") == ["0.mp3", "2.mp3"]
+    assert search(index, "duration:>1 duration:<6") == ["0.mp3", "2.mp3"]
+    assert SearchQuery("duration:<").is_empty()
+    ids = index.search("")
+    ordered = [index.name_of(id) for id in index.order_by_duration(ids)]
+    assert ordered == ["0.mp3", "2.mp3", "1.mp3", "3.mp3"]
+    ordered = [index.name_of(id) for id in index.order_by_duration(ids, True)]
+    assert ordered == ["1.mp3", "2.mp3", "0.mp3", "3.mp3"]
@@ -0,0 +1,36 @@
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.selection_editor import SelectionSummary
+
+
+def annotation(**fields) -> Annotation:
+    annotation = Annotation({"path": "sample.mp3"})
+    for field, value in fields.items():
+        setattr(annotation, field, value)
+    return annotation
+
+
+def test_common_values():
+    summary = SelectionSummary()
+    assert summary.common("age") is None
+    first = annotation(age="twenties", gender="male")
+    second = annotation(age="twenties", gender="female")
+    summary.add([first, second])
+    assert summary.count == 2
+    assert summary.common("age") == "twenties"
+    assert summary.common("gender") is None
+    summary.remove([second])
+    assert summary.common("gender") == "male"
+    summary.remove([first])
+    assert summary.count == 0
+    assert summary.common("age") is None
+
+
+def test_assign():
+    summary = SelectionSummary()
+    summary.add([annotation(accent="a"), annotation(accent="b")])
+    summary.assign(accent="c", client_id="")
+    assert summary.common("accent") == "c"
+    assert summary.common("client_id") == ""
+    summary.clear()
+    summary.assign(accent="c")
+    assert summary.common("accent") is None
@@ -0,0 +1,55 @@
+from pathlib import Path
+import time
+import wave
+
+from PySide6.QtTest import QTest
+
+from voice_annotation_tool.speech_scanner import SpeechScanner
+
+
+def write_wav(path: Path, samples: bytes):
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(16000)
+        file.writeframes(samples)
+
+
+def test_speech_is_detected_in_worker_processes(tmp_path: Path):
+    loud = tmp_path / "loud.wav"
+    write_wav(loud, b"\x00\x40\x00\xc0" * 8000)
+    quiet = tmp_path / "quiet.wav"
+    write_wav(quiet, bytes(32000))
+    scanner = SpeechScanner(workers=1)
+    detected = []
+    progress = []
+    finished = []
+    scanner.detected.connect(detected.extend)
+    scanner.progress.connect(lambda done, total: progress.append((done, total)))
+    scanner.finished.connect(lambda: finished.append(True))
+    scanner.scan([(loud, 1, 2), (quiet, 3, 4)])
+    assert scanner.is_scanning()
+    deadline = time.monotonic() + 60
+    while not finished and time.monotonic() < deadline:
+        QTest.qWait(10)
+    scanner.shutdown()
+    assert finished
+    assert progress == [(2, 2)]
+    ranges = dict(detected)
+    assert (ranges["loud.wav"].start, ranges["loud.wav"].end) == (0, 1)
+    assert ranges["quiet.wav"].start is None
+    assert not scanner.is_scanning()
+
+
+def test_canceled_results_are_ignored(tmp_path: Path):
+    path = tmp_path / "sample.wav"
+    write_wav(path, bytes(32000))
+    scanner = SpeechScanner(workers=1)
+    detected = []
+    scanner.detected.connect(detected.append)
+    scanner.scan([(path, 1, 2)])
+    scanner.cancel()
+    assert not scanner.is_scanning()
+    QTest.qWait(200)
+    scanner.shutdown()
+    assert detected == []
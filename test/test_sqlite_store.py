@@ -0,0 +1,118 @@
+from pathlib import Path
+
+import pytest
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.project import Project
+from voice_annotation_tool.sqlite_store import SqliteAnnotationStore, read_rows
+
+
+def make_annotation(name: str, sentence: str = "") -> Annotation:
+    return Annotation({"path": name, "sentence": sentence})
+
+
+@pytest.fixture
+def store(tmp_path: Path):
+    store = SqliteAnnotationStore(tmp_path / "annotations.sqlite")
+    with store.batch():
+        for num in range(5):
+            store.add(make_annotation(f"{num}.mp3"))
+    yield store
+    store.close()
+
+
+def test_keeps_insertion_order(store: SqliteAnnotationStore):
+    assert [annotation.name for annotation in store] == [
+        f"{num}.mp3" for num in range(5)
+    ]
+
+
+def test_lookup_by_name(store: SqliteAnnotationStore):
+    assert store.get("3.mp3") is store[3]
+    assert store.get("missing.mp3") is None
+    assert "3.mp3" in store
+
+
+def test_overwrite_keeps_row(store: SqliteAnnotationStore):
+    assert store.add(make_annotation("2.mp3", "new"), overwrite=True)
+    assert store[2].sentence == "new"
+    assert len(store) == 5
+
+
+def test_remove_updates_rows(store: SqliteAnnotationStore):
+    assert store.remove("1.mp3").name == "1.mp3"
+    assert store.remove("1.mp3") is None
+    assert len(store) == 4
+    assert store.row_of("3.mp3") == 2
+    assert store[1].name == "2.mp3"
+
+
+def test_insert_many_restores_rows(store: SqliteAnnotationStore):
+    removed = store.remove("2.mp3")
+    store.insert_many(
+        [(0, make_annotation("first")), (3, removed), (4, make_annotation("b"))]
+    )
+    assert [annotation.name for annotation in store] == [
+        "first",
+        "0.mp3",
+        "1.mp3",
+        "2.mp3",
+        "b",
+        "3.mp3",
+        "4.mp3",
+    ]
+    assert store.row_of("3.mp3") == 5
+    assert store[3] is removed
+
+
+def test_rename_keeps_row(store: SqliteAnnotationStore):
+    store.rename("2.mp3", "renamed.mp3")
+    assert store.row_of("renamed.mp3") == 2
+    assert "2.mp3" not in store
+    with pytest.raises(KeyError):
+        store.rename("3.mp3", "renamed.mp3")
+
+
+def test_update_is_persisted(tmp_path: Path, store: SqliteAnnotationStore):
+    annotation = store[4]
+    annotation.sentence = "changed"
+    store.update(annotation)
+    store.close()
+    reopened = SqliteAnnotationStore(tmp_path / "annotations.sqlite")
+    assert len(reopened) == 5
+    assert reopened[4].sentence == "changed"
+    reopened.close()
+
+
+def test_snapshot_rows(tmp_path: Path, store: SqliteAnnotationStore):
+    assert list(store.snapshot_rows()) == list(store.rows())
+    assert [row[1] for row in read_rows(tmp_path / "annotations.sqlite")] == [
+        f"{num}.mp3" for num in range(5)
+    ]
+
+
+def test_project_use_database(tmp_path: Path):
+    project = Project()
+    project.add_annotation(make_annotation("a.mp3", "first"))
+    project.use_database(tmp_path / "project.sqlite")
+    assert isinstance(project.annotations, SqliteAnnotationStore)
+    project.annotate(project.annotations[0], "changed")
+    project.close()
+
+    reopened = Project()
+    reopened.use_database(tmp_path / "project.sqlite")
+    assert reopened.annotations.get("a.mp3").sentence == "changed"
+    reopened.use_database(None)
+    assert reopened.database is None
+    assert reopened.annotations[0].sentence == "changed"
+
+
+def test_remove_many_updates_rows(store: SqliteAnnotationStore):
+    store.NAMES_PER_QUERY = 2
+    kept = store[2]
+    store.remove_many(["0.mp3", "2.mp3", "4.mp3", "missing.mp3"])
+    assert [annotation.name for annotation in store] == ["1.mp3", "3.mp3"]
+    assert store.row_of("3.mp3") == 1
+    assert "2.mp3" not in store
+    assert store.get("2.mp3") is None
+    store.add(kept)
+    assert store[2] is kept
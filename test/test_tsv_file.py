@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import pytest
+from voice_annotation_tool.annotation import Annotation
+from voice_annotation_tool.project import Project
+from voice_annotation_tool.tsv_file import (
+    compression_of,
+    open_tsv,
+    write_tsv,
+    zstd_available,
+)
+
+SUFFIXES = [
+    ".tsv",
+    ".tsv.gz",
+    pytest.param(
+        ".tsv.zst",
+        marks=pytest.mark.skipif(not zstd_available(), reason="needs zstandard"),
+    ),
+]
+
+
+def test_compression_of():
+    assert compression_of(Path("a.tsv")) is None
+    assert compression_of(Path("a.tsv.gz")) == "gzip"
+    assert compression_of(Path("a.tsv.zst")) == "zstd"
+
+
+@pytest.mark.parametrize("suffix", SUFFIXES)
+def test_round_trip(tmp_path: Path, suffix: str):
+    path = tmp_path / ("metadata" + suffix)
+    content = "client_id\tpath\r\nä\tsample.mp3\r\n" * 1000
+    with write_tsv(path) as file:
+        file.write(content)
+    with open_tsv(path) as file:
+        assert file.read() == content
+
+
+def test_plain_tsv_is_utf8(tmp_path: Path):
+    path = tmp_path / "metadata.tsv"
+    path.write_bytes("path\tsentence\r\na.mp3\tÄrger – ok\r\n".encode("utf-8"))
+    with open_tsv(path) as file:
+        assert file.read() == "path\tsentence\r\na.mp3\tÄrger – ok\r\n"
+    with write_tsv(path) as file:
+        file.write("ß\n")
+    assert path.read_bytes() == "ß\n".encode("utf-8")
+
+
+def test_gzip_is_compressed(tmp_path: Path):
+    with write_tsv(tmp_path / "metadata.tsv.gz") as file:
+        file.write("abc\t" * 1000)
+    assert (tmp_path / "metadata.tsv.gz").read_bytes()[:2] == b"\x1f\x8b"
+
+
+@pytest.mark.parametrize("suffix", SUFFIXES)
+def test_project_load_and_save(tmp_path: Path, suffix: str):
+    project = Project()
+    project.tsv_file = tmp_path / ("project" + suffix)
+    project.add_annotation(Annotation({"path": "a.mp3", "sentence": "Text"}))
+    project.save_tsv()
+    loaded = Project()
+    loaded.tsv_file = project.tsv_file
+    loaded.load_tsv()
+    assert loaded.annotations.get("a.mp3").sentence == "Text"
+
+
+def test_snapshot_writes_compressed_tsv(tmp_path: Path):
+    project = Project()
+    project.tsv_file = tmp_path / "project.tsv.gz"
+    project.add_annotation(Annotation({"path": "a.mp3", "sentence": "Text"}))
+    project.snapshot(tmp_path).write(tmp_path / "project.json")
+    with open_tsv(project.tsv_file) as file:
+        assert "Text" in file.read()
@@ -0,0 +1,130 @@
+from pathlib import Path
+import wave
+
+import numpy
+import pytest
+
+from voice_annotation_tool.voice_activity import (
+    PADDING_SECONDS,
+    SpeechCache,
+    SpeechDetector,
+    SpeechRange,
+    detect_batch,
+    detect_speech,
+    trim_audio_file,
+)
+
+RATE = 16000
+
+
+def write_wav(path: Path, samples: numpy.ndarray, rate=RATE):
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(samples.astype("<i2").tobytes())
+
+
+def tone(seconds: float, amplitude=8000) -> numpy.ndarray:
+    time = numpy.arange(int(seconds * RATE)) / RATE
+    return (numpy.sin(2 * numpy.pi * 220 * time) * amplitude).astype(numpy.int16)
+
+
+def silence(seconds: float) -> numpy.ndarray:
+    return numpy.zeros(int(seconds * RATE), numpy.int16)
+
+
+def detect(samples: numpy.ndarray, block=None) -> tuple[float, float] | None:
+    detector = SpeechDetector(RATE)
+    block = block or len(samples)
+    for start in range(0, len(samples), block):
+        detector.feed(samples[start : start + block])
+    return detector.speech_range()
+
+
+def test_speech_between_silence():
+    samples = numpy.concatenate([silence(1), tone(0.5), silence(1)])
+    start, end = detect(samples)
+    assert start == pytest.approx(1 - PADDING_SECONDS)
+    assert end == pytest.approx(1.5 + PADDING_SECONDS)
+
+
+@pytest.mark.parametrize("block", [1, 7, 320, 1000, 4096])
+def test_blocks_dont_change_the_result(block: int):
+    samples = numpy.concatenate(
+        [silence(0.3), tone(0.1), silence(0.2), tone(0.3), silence(0.25)]
+    )
+    assert detect(samples, block) == pytest.approx(detect(samples))
+
+
+def test_padding_is_clamped():
+    start, end = detect(tone(0.5))
+    assert start == 0
+    assert end == pytest.approx(0.5)
+
+
+def test_quiet_noise_is_a_fricative():
+    noise = numpy.random.default_rng(0).normal(0, 80, int(0.3 * RATE))
+    samples = numpy.concatenate([silence(0.5), noise.astype(numpy.int16), silence(0.5)])
+    start, end = detect(samples)
+    assert start == pytest.approx(0.5 - PADDING_SECONDS)
+    assert end == pytest.approx(0.8 + PADDING_SECONDS)
+
+
+def test_clicks_are_ignored():
+    samples = numpy.concatenate([silence(0.5), tone(0.02), silence(0.5)])
+    assert detect(samples) is None
+    assert detect(silence(1)) is None
+
+
+def test_detect_file(tmp_path: Path):
+    path = tmp_path / "sample.wav"
+    write_wav(path, numpy.concatenate([silence(1), tone(0.5), silence(1)]))
+    start, end = detect_speech(path)
+    assert start == pytest.approx(1 - PADDING_SECONDS)
+    assert end == pytest.approx(1.5 + PADDING_SECONDS)
+
+
+def test_detect_batch(tmp_path: Path):
+    speech = tmp_path / "speech.wav"
+    write_wav(speech, numpy.concatenate([silence(1), tone(0.5)]))
+    quiet = tmp_path / "quiet.wav"
+    write_wav(quiet, silence(1))
+    results = dict(detect_batch([(speech, 10, 1), (quiet, 20, 2)]))
+    assert results["speech.wav"].start == pytest.approx(1 - PADDING_SECONDS)
+    assert results["speech.wav"].end == pytest.approx(1.5)
+    assert results["quiet.wav"] == SpeechRange(None, None, 20, 2)
+
+
+def test_trim_wav(tmp_path: Path):
+    source = tmp_path / "source.wav"
+    samples = numpy.arange(RATE * 2, dtype=numpy.int16)
+    write_wav(source, samples)
+    destination = tmp_path / "trimmed.wav"
+    trim_audio_file(source, destination, 0.5, 1.25)
+    with wave.open(str(destination), "rb") as file:
+        assert file.getframerate() == RATE
+        trimmed = numpy.frombuffer(file.readframes(file.getnframes()), "<i2")
+    assert trimmed.tolist() == samples[RATE // 2 : RATE * 5 // 4].tolist()
+
+
+def test_cache(tmp_path: Path):
+    cache = SpeechCache.for_tsv_file(tmp_path / "annotations.tsv")
+    assert cache.path == tmp_path / "annotations.tsv.speech"
+    files = {"first.wav": (10, 1), "second.wav": (20, 2)}
+    assert cache.outdated(tmp_path, files) == ["first.wav", "second.wav"]
+    cache.update(
+        [
+            ("first.wav", SpeechRange(0.5, 1.5, 10, 1)),
+            ("second.wav", SpeechRange(None, None, 20, 2)),
+        ]
+    )
+    cache.save()
+    loaded = SpeechCache(cache.path)
+    loaded.load()
+    assert loaded.get("first.wav") == (0.5, 1.5)
+    assert loaded.get("second.wav") is None
+    assert loaded.outdated(tmp_path, files) == []
+    assert loaded.outdated(tmp_path, {"first.wav": (11, 1)}) == ["first.wav"]
+    assert "second.wav" not in loaded.entries
+    assert loaded.outdated(tmp_path / "other", files) == ["first.wav", "second.wav"]